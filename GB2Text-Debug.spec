@@ -10,7 +10,7 @@ a = Analysis(
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
-    excludes=['posix', 'pwd', 'grp', 'fcntl', 'resource', '_posixsubprocess', 'java', 'org', 'vms_lib', '_winreg', 'matplotlib', 'numpy', 'pandas', 'scipy', 'PIL', 'cv2'],
+    excludes=['posix', 'pwd', 'grp', 'fcntl', 'resource', '_posixsubprocess', 'java', 'org', 'vms_lib', '_winreg', 'matplotlib', 'sklearn', 'pandas', 'scipy', 'PIL', 'cv2'],
     noarchive=False,
     optimize=0,
 )
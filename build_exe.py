@@ -151,7 +151,7 @@ finally:
             "--exclude-module=vms_lib",
             "--exclude-module=_winreg",
             "--exclude-module=matplotlib",
-            "--exclude-module=numpy",
+            "--exclude-module=sklearn",
             "--exclude-module=pandas",
             "--exclude-module=scipy",
             "--exclude-module=PIL",
@@ -409,7 +409,7 @@ a = Analysis(
         'vms_lib',
         '_winreg',
         'matplotlib',
-        'numpy',
+        'sklearn',
         'pandas',
         'scipy',
         'PIL',
@@ -17,11 +17,22 @@ GB Text Extraction Framework
 
 """
 База данных с безопасной информацией о типичных структурах ROM
+и постоянная память переводов (SQLite)
 """
 
-from typing import List, Dict
+import hashlib
 import logging
+import os
+import sqlite3
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
 from core.constants import SYSTEM_GB, SYSTEM_GBC, SYSTEM_GBA, GBA_ROM_BASE_ADDRESS, POINTER_SIZES
+from core.fuzzy_memory import FuzzyIndex, FuzzyMatch
 
 logger = logging.getLogger('gb2text.database')
 
@@ -63,38 +74,297 @@ def get_pointer_size(system: str) -> int:
     return size
 
 
+# Схема памяти переводов. Уникальный индекс начинается с (source_lang, target_lang,
+# source_hash) и служит индексом поиска; полный текст сверяется в запросе, так что
+# коллизии хэша не дают чужой перевод
+_SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS translations (
+        id INTEGER PRIMARY KEY,
+        source_lang TEXT NOT NULL,
+        target_lang TEXT NOT NULL,
+        source_hash INTEGER NOT NULL,
+        target_hash INTEGER NOT NULL,
+        source TEXT NOT NULL,
+        target TEXT NOT NULL,
+        updated REAL NOT NULL
+    )""",
+    """CREATE UNIQUE INDEX IF NOT EXISTS idx_translations_lookup
+        ON translations (source_lang, target_lang, source_hash, target_hash)""",
+)
+
+_UPSERT = """INSERT INTO translations
+    (source_lang, target_lang, source_hash, target_hash, source, target, updated)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (source_lang, target_lang, source_hash, target_hash)
+    DO UPDATE SET source = excluded.source, target = excluded.target, updated = excluded.updated"""
+
+_SELECT_TARGETS = """SELECT target FROM translations
+    WHERE source_lang = ? AND target_lang = ? AND source_hash = ? AND source = ?
+    ORDER BY updated DESC, id DESC"""
+
+# Пакетный поиск: запрос с постоянным числом параметров, чтобы подготовленное
+# выражение бралось из кэша соединения (недостающие хэши дополняются повтором)
+LOOKUP_BATCH_SIZE = 256
+_SELECT_BATCH = (
+    "SELECT source, target FROM translations WHERE source_lang = ? AND target_lang = ? "
+    "AND source_hash IN (" + ", ".join("?" * LOOKUP_BATCH_SIZE) + ") ORDER BY updated, id"
+)
+
+# Размер LRU-кэша чтения по умолчанию (число текстов)
+DEFAULT_TRANSLATION_CACHE_SIZE = 10000
+
+TRANSLATION_MEMORY_ENV = 'GB2TEXT_TM_PATH'
+
+
+def default_memory_path() -> str:
+    """Файл памяти переводов по умолчанию (GB2TEXT_TM_PATH или ~/.gb2text/translation_memory.db)"""
+    return os.environ.get(TRANSLATION_MEMORY_ENV) or os.path.join(
+        os.path.expanduser('~'), '.gb2text', 'translation_memory.db')
+
+
+def text_hash(text: str) -> int:
+    """64-битный хэш текста (знаковый, как INTEGER SQLite)"""
+    digest = hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'little', signed=True)
+
+
+class _ThreadConnection:
+    """Соединение одного потока: закрывается вместе с локальными данными завершившегося потока"""
+
+    __slots__ = ('connection', '__weakref__')
+
+    def __init__(self, connection: sqlite3.Connection):
+        self.connection = connection
+
+    def close(self) -> None:
+        self.connection.close()
+
+    __del__ = close
+
+
 class TranslationDatabase:
-    """Класс для хранения и извлечения переводов"""
-    
-    def __init__(self, db_path: str = None):
+    """
+    Память переводов в SQLite
+
+    Файл базы работает в режиме WAL: GUI и пакетные обработчики могут открывать один
+    файл одновременно (читатели не блокируют писателя). Каждый поток использует своё
+    соединение (оно закрывается, когда поток завершается); база ':memory:' (по умолчанию) -
+    одно общее соединение под блокировкой. После close() файл открывается заново при
+    следующем обращении, а база в памяти больше недоступна.
+    Кэш чтения (LRU) включается enable_cache; записи этого объекта обновляют его сразу,
+    а записи других процессов видны после disable_cache/enable_cache.
+    Нечёткий поиск (find_similar) строит индекс пары языков при первом обращении
+    и дополняет его собственными записями.
+    """
+
+    def __init__(self, db_path: str = None, cache_size: int = DEFAULT_TRANSLATION_CACHE_SIZE):
         """Инициализация базы данных переводов"""
         self.db_path = db_path or ":memory:"
-        self._cache = {}
+        self._cache: 'OrderedDict[Tuple, object]' = OrderedDict()
         self._cache_enabled = False
-    
+        self._cache_size = cache_size
+        self._cache_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self._local = threading.local()
+        self._connections: 'weakref.WeakSet[_ThreadConnection]' = weakref.WeakSet()
+        self._connections_lock = threading.Lock()
+        self._fuzzy: Dict[Tuple[str, str], FuzzyIndex] = {}
+        self._fuzzy_lock = threading.Lock()
+        # База в памяти существует только внутри своего соединения
+        self._shared_lock = threading.RLock() if self.db_path == ":memory:" else None
+        self._shared: Optional[sqlite3.Connection] = self._connect() if self._shared_lock else None
+        with self._connection() as connection:
+            for statement in _SCHEMA:
+                connection.execute(statement)
+            connection.commit()
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False, cached_statements=256)
+        if self.db_path != ":memory:":
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute("PRAGMA cache_size=-65536")
+        return connection
+
+    @contextmanager
+    def _connection(self) -> Iterator[sqlite3.Connection]:
+        """Соединение текущего потока (или общее соединение базы в памяти)"""
+        if self._shared_lock is not None:
+            with self._shared_lock:
+                if self._shared is None:
+                    raise sqlite3.ProgrammingError("База переводов в памяти закрыта")
+                yield self._shared
+            return
+        local = self._local
+        holder = getattr(local, 'holder', None)
+        if holder is None:
+            holder = local.holder = _ThreadConnection(self._connect())
+            with self._connections_lock:
+                self._connections.add(holder)
+        yield holder.connection
+
+    def _cache_get(self, key: Tuple):
+        if not self._cache_enabled:
+            return None
+        with self._cache_lock:
+            value = self._cache.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def _cache_put(self, key: Tuple, value) -> None:
+        if not self._cache_enabled:
+            return
+        with self._cache_lock:
+            self._cache[key] = value
+            self._cache.move_to_end(key)
+            while len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+
+    def _cache_discard(self, entries: Iterable[Tuple[str, str, str]]) -> None:
+        with self._cache_lock:
+            for source_lang, target_lang, source in entries:
+                self._cache.pop(('one', source_lang, target_lang, source), None)
+                self._cache.pop(('all', source_lang, target_lang, source), None)
+
     def store_translation(self, source_lang: str, target_lang: str, source: str, target: str) -> bool:
         """Сохраняет перевод в базу данных"""
-        key = (source_lang, target_lang, source)
-        self._cache[key] = target
-        return True
-    
+        return self.store_translations([(source_lang, target_lang, source, target)]) == 1
+
+    def store_translations(self, entries: Iterable[Tuple[str, str, str, str]]) -> int:
+        """
+        Сохраняет переводы (source_lang, target_lang, source, target) одной транзакцией
+
+        Повторно сохранённая пара становится самым свежим переводом исходного текста.
+        Возвращает число сохранённых записей.
+        """
+        now = time.time()
+        rows = [(sl, tl, text_hash(source), text_hash(target), source, target, now)
+                for sl, tl, source, target in entries]
+        if not rows:
+            return 0
+        try:
+            with self._connection() as connection:
+                with connection:
+                    connection.executemany(_UPSERT, rows)
+        except sqlite3.Error as e:
+            logger.error(f"Ошибка сохранения переводов в {self.db_path}: {e}")
+            return 0
+        self._cache_discard((row[0], row[1], row[4]) for row in rows)
+        if self._fuzzy:
+            with self._fuzzy_lock:
+                for row in rows:
+                    index = self._fuzzy.get((row[0], row[1]))
+                    if index is not None:
+                        index.add([(row[4], row[5])])
+        return len(rows)
+
     def get_translation(self, source_lang: str, target_lang: str, source: str) -> str:
-        """Получает перевод из базы данных"""
-        key = (source_lang, target_lang, source)
-        return self._cache.get(key)
-    
+        """Получает перевод из базы данных (последний сохранённый)"""
+        key = ('one', source_lang, target_lang, source)
+        cached = self._cache_get(key)
+        if cached is not None:
+            return cached
+        with self._connection() as connection:
+            row = connection.execute(_SELECT_TARGETS + " LIMIT 1",
+                                     (source_lang, target_lang, text_hash(source), source)).fetchone()
+        if row is None:
+            return None
+        self._cache_put(key, row[0])
+        return row[0]
+
     def get_translations_for_source(self, source_lang: str, target_lang: str, source: str) -> list:
-        """Получает все переводы для исходного текста"""
-        translations = []
-        for (sl, tl, s), t in self._cache.items():
-            if sl == source_lang and tl == target_lang and s == source:
-                translations.append(t)
+        """Получает все переводы для исходного текста (от последнего сохранённого)"""
+        key = ('all', source_lang, target_lang, source)
+        cached = self._cache_get(key)
+        if cached is not None:
+            return list(cached)
+        with self._connection() as connection:
+            rows = connection.execute(_SELECT_TARGETS,
+                                      (source_lang, target_lang, text_hash(source), source)).fetchall()
+        translations = [row[0] for row in rows]
+        self._cache_put(key, tuple(translations))
         return translations
-    
+
+    def get_translations(self, source_lang: str, target_lang: str, sources: Iterable[str]) -> Dict[str, str]:
+        """Последние переводы для набора исходных текстов: {исходный текст: перевод}"""
+        result: Dict[str, str] = {}
+        pending: Dict[int, List[str]] = {}
+        for source in dict.fromkeys(sources):
+            cached = self._cache_get(('one', source_lang, target_lang, source))
+            if cached is not None:
+                result[source] = cached
+            else:
+                pending.setdefault(text_hash(source), []).append(source)
+        hashes = list(pending)
+        found: Dict[str, str] = {}
+        with self._connection() as connection:
+            for i in range(0, len(hashes), LOOKUP_BATCH_SIZE):
+                batch = hashes[i:i + LOOKUP_BATCH_SIZE]
+                batch += [batch[-1]] * (LOOKUP_BATCH_SIZE - len(batch))
+                # Строки упорядочены от старых к новым: последний перевод перезаписывает
+                for source, target in connection.execute(_SELECT_BATCH, (source_lang, target_lang, *batch)):
+                    found[source] = target
+        for group in pending.values():
+            for source in group:
+                if source in found:
+                    result[source] = found[source]
+                    self._cache_put(('one', source_lang, target_lang, source), found[source])
+        return result
+
+    def iter_translations(self, source_lang: str, target_lang: str) -> Iterator[Tuple[str, str]]:
+        """Все пары (исходный текст, перевод) для пары языков, от старых к новым"""
+        with self._connection() as connection:
+            rows = connection.execute(
+                "SELECT source, target FROM translations WHERE source_lang = ? AND target_lang = ? "
+                "ORDER BY updated, id", (source_lang, target_lang)).fetchall()
+        return iter(rows)
+
+    def fuzzy_index(self, source_lang: str, target_lang: str) -> FuzzyIndex:
+        """Индекс нечёткого поиска по последним переводам пары языков"""
+        with self._fuzzy_lock:
+            index = self._fuzzy.get((source_lang, target_lang))
+            if index is None:
+                # Более поздний перевод текста заменяет более ранний
+                index = FuzzyIndex(self.iter_translations(source_lang, target_lang))
+                self._fuzzy[(source_lang, target_lang)] = index
+                logger.info(f"Индекс нечёткого поиска {source_lang}->{target_lang}: {len(index)} текстов")
+            return index
+
+    def find_similar(self, source_lang: str, target_lang: str, text: str,
+                     k: int = 5, min_score: float = 0.5) -> List[FuzzyMatch]:
+        """До k переводов похожих текстов (FuzzyMatch, от самого похожего)"""
+        return self.fuzzy_index(source_lang, target_lang).search(text, k=k, min_score=min_score)
+
+    def count(self) -> int:
+        """Число сохранённых переводов"""
+        with self._connection() as connection:
+            return connection.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+
     def enable_cache(self):
         """Включает кэширование"""
         self._cache_enabled = True
-    
+
     def disable_cache(self):
         """Выключает кэширование"""
-        self._cache_enabled = False
\ No newline at end of file
+        self._cache_enabled = False
+        with self._cache_lock:
+            self._cache.clear()
+
+    def close(self) -> None:
+        """Закрывает соединения всех потоков (файл откроется заново при следующем обращении)"""
+        with self._connections_lock:
+            holders = list(self._connections)
+            self._connections = weakref.WeakSet()
+            self._local = threading.local()
+        for holder in holders:
+            holder.close()
+        if self._shared_lock is not None:
+            with self._shared_lock:
+                if self._shared is not None:
+                    self._shared.close()
+                    self._shared = None
@@ -20,8 +20,12 @@ GB Text Extraction Framework
 """
 
 import logging
+import re
 from abc import ABC, abstractmethod
-from typing import Dict, Tuple, Optional, List, Callable
+from functools import lru_cache
+from typing import Dict, Tuple, Optional, List, Callable, FrozenSet, Iterable
+
+from core.constants import TEXT_TERMINATORS
 
 # Импортируем multi_charmap для поддержки нескольких таблиц символов
 try:
@@ -39,6 +43,48 @@ except ImportError:
     analyze_custom_encoding = None
 
 
+# Значения таблицы символов, которые обозначают конец сообщения
+_TERMINATOR_VALUES = ('\n', '[END]')
+_HEX_CODE_VALUE = re.compile(r'\[[0-9A-Fa-f]{2}\]')
+
+
+def message_terminators(decoder=None) -> FrozenSet[int]:
+    """
+    Возвращает байты-разделители сообщений для декодера
+
+    Всегда включает TEXT_TERMINATORS; дополнительно - байты, которые таблица символов
+    декодера отображает в перевод строки, '[END]' или управляющий код вида [XX].
+    """
+    charmap = getattr(decoder, 'charmap', None) or {}
+    extra = {
+        code for code, char in charmap.items()
+        if isinstance(code, int) and 0 <= code <= 0xFF and isinstance(char, str)
+        and (char in _TERMINATOR_VALUES or _HEX_CODE_VALUE.fullmatch(char))
+    }
+    return frozenset(TEXT_TERMINATORS | extra)
+
+
+@lru_cache(maxsize=64)
+def _message_pattern(terminators: FrozenSet[int]) -> 're.Pattern':
+    """Регулярное выражение для максимальных участков без байтов-терминаторов"""
+    excluded = ''.join(f'\\x{code:02x}' for code in sorted(terminators))
+    return re.compile(f'[^{excluded}]+'.encode('ascii'))
+
+
+def split_message_spans(data: bytes, terminators: Iterable[int] = TEXT_TERMINATORS) -> List[Tuple[int, int]]:
+    """
+    Делит сырые байты на сообщения по байтам-терминаторам
+
+    Returns:
+        Список (start, end) в байтах от начала data; терминаторы в сообщения не входят,
+        пустые сообщения пропускаются
+    """
+    if not data:
+        return []
+    pattern = _message_pattern(frozenset(terminators))
+    return [match.span() for match in pattern.finditer(data)]
+
+
 class CompressionHandler(ABC):
     """Базовый класс для обработчиков сжатия"""
 
@@ -54,12 +100,14 @@ class CharMapDecoder:
         self.charmap = charmap
         self.reverse_charmap = {v: k for k, v in charmap.items() if len(v) == 1}
         self.logger = logging.getLogger('gb2text.decoder')
-        self.logger.debug(f"Инициализирован CharMapDecoder с {len(charmap)} символами")
+        self.logger.debug("Инициализирован CharMapDecoder с %d символами", len(charmap))
 
     def decode(self, data: bytes, start: int, length: int) -> str:
         """Декодирует данные в строку"""
-        logger = logging.getLogger('gb2text.decoder')
-        self.logger.debug(f"Декодирование данных с 0x{start:X}, длина: {length}")
+        logger = self.logger
+        debug_enabled = logger.isEnabledFor(logging.DEBUG)
+        if debug_enabled:
+            logger.debug("Декодирование данных с 0x%X, длина: %d", start, length)
 
         result = []
         i = start
@@ -118,11 +166,13 @@ class CharMapDecoder:
         if total_count > 0:
             unknown_percent = (unknown_count / total_count) * 100
             if unknown_percent > 30:
-                logger.warning(f"Высокий процент неизвестных байтов: {unknown_percent:.1f}%")
+                logger.warning("Высокий процент неизвестных байтов: %.1f%%", unknown_percent)
 
         decoded_text = ''.join(result)
-        self.logger.info(f"Успешно декодировано {len(result)} символов")
-        self.logger.debug(f"Декодированный текст: {decoded_text[:100]}...")
+        # Вызывается на каждое сообщение: только DEBUG и только если уровень включён
+        if debug_enabled:
+            logger.debug("Успешно декодировано %d символов", len(result))
+            logger.debug("Декодированный текст: %s...", decoded_text[:100])
         return decoded_text
 
     def _find_similar_char(self, byte: int) -> Optional[str]:
@@ -15,7 +15,7 @@ GB Text Extraction Framework
 обучения и реверс-инжиниринга в рамках, разрешенных законодательством.
 """
 
-from typing import Dict
+from typing import Dict, Iterable, Optional
 
 
 def get_generic_english_charmap() -> Dict[int, str]:
@@ -221,10 +221,12 @@ def get_generic_shiftjis_charmap() -> Dict[int, str]:
     return charmap
 
 
-def auto_detect_charmap(rom_data: bytes, start: int = 0, length: int = 1000) -> Dict[int, str]:
+def auto_detect_charmap(rom_data: bytes, start: int = 0, length: int = 1000,
+                        known_words: Optional[Iterable[str]] = None) -> Dict[int, str]:
     """
     Автоматическое определение возможной таблицы символов.
     Пользователь должен проверить и скорректировать результат.
+    known_words - известные слова игры для относительного поиска кодов букв.
     """
     # Анализ статистики использования байтов
     freq = {}
@@ -251,4 +253,8 @@ def auto_detect_charmap(rom_data: bytes, start: int = 0, length: int = 1000) ->
             if byte not in charmap:
                 charmap[byte] = f'[TERM_{byte:02X}]'
 
+    if known_words:
+        from core.relative_search import apply_known_words
+        charmap = apply_known_words(charmap, rom_data, known_words)
+
     return charmap
\ No newline at end of file
@@ -20,24 +20,35 @@ GB Text Extraction Framework
 """
 
 import logging
+from contextlib import nullcontext
 from typing import Dict, List, Optional
 from core.rom import GameBoyROM
 from core.plugin_manager import PluginManager, CancellationToken
 from core.guide import GuideManager
+from core.decoder import message_terminators, split_message_spans
+from core.segment_plan import get_segments
+from core.tracing import Tracer, NULL_TRACER, get_tracer, use_tracer
 
 
 class TextExtractor:
     """Основной класс извлечения текста"""
 
-    def __init__(self, rom_path: str, plugin_manager=None, guide_manager=None, cancellation_token: Optional[CancellationToken] = None, max_segments: int = None, rom: GameBoyROM = None):
+    def __init__(self, rom_path: str, plugin_manager=None, guide_manager=None, cancellation_token: Optional[CancellationToken] = None, max_segments: int = None, rom: GameBoyROM = None, trace: bool = False):
         if not isinstance(rom_path, str):
             raise TypeError("rom_path должен быть строкой, а не типом")
 
+        # Трассировка стадий: при trace=True каждое извлечение сохраняет трассу в last_trace
+        # (загрузка ROM записывается сразу и добавляется к трассе каждого извлечения)
+        self.trace = trace
+        self.last_trace: Optional[Tracer] = None
+        self._load_trace = Tracer() if trace else NULL_TRACER
+
         # Используем переданный ROM или загружаем напрямую
         if rom is not None:
             self.rom = rom
         else:
-            self.rom = GameBoyROM(rom_path)
+            with use_tracer(self._load_trace) if trace else nullcontext():
+                self.rom = GameBoyROM(rom_path)
         self.plugin_manager = plugin_manager or PluginManager()
         self.cancellation_token = cancellation_token
         self.plugin = None
@@ -48,7 +59,36 @@ class TextExtractor:
         self.max_segments = max_segments
 
     def extract(self) -> Dict[str, List[Dict]]:
-        """Извлекает текст из ROM"""
+        """
+        Извлекает текст из ROM
+
+        Если включена трассировка (trace=True или активный трассировщик вызывающего кода),
+        трасса стадий доступна в last_trace после вызова.
+        """
+        tracer = self._start_trace()
+        # Внешний трассировщик может быть и не Tracer (например, профилировщик памяти)
+        self.last_trace = tracer if isinstance(tracer, Tracer) and tracer.enabled else None
+
+        with use_tracer(tracer), tracer.span('extract') as trace_args:
+            results = self._extract()
+            trace_args['segments'] = len(results)
+            trace_args['messages'] = sum(len(messages) for messages in results.values())
+        return results
+
+    def _start_trace(self):
+        """Трассировщик для очередного извлечения"""
+        ambient = get_tracer()
+        if ambient.enabled:
+            return ambient
+        if not self.trace:
+            return NULL_TRACER
+
+        tracer = Tracer(origin_ns=self._load_trace.origin_ns)
+        tracer.extend(self._load_trace.events)
+        return tracer
+
+    def _extract(self) -> Dict[str, List[Dict]]:
+        tracer = get_tracer()
         logger = logging.getLogger('gb2text.extractor')
         logger.info("Начало процесса извлечения текста")
 
@@ -74,7 +114,9 @@ class TextExtractor:
             self.plugin_manager.update_status(self.i18n.t("plugin.searching"), 5)
 
         # Передаем cancellation_token в plugin_manager
-        self.plugin = self.plugin_manager.get_plugin(game_id, system, self.cancellation_token)
+        with tracer.span('plugin.match', game_id=game_id, system=system) as trace_args:
+            self.plugin = self.plugin_manager.get_plugin(game_id, system, self.cancellation_token)
+            trace_args['plugin'] = type(self.plugin).__name__ if self.plugin else None
 
         if not self.plugin:
             logger.error(f"Не поддерживаемая игра: {game_id}")
@@ -91,7 +133,9 @@ class TextExtractor:
             return {}
 
         results = {}
-        segments = self.plugin.get_text_segments(self.rom)
+        with tracer.span('plugin.segments') as trace_args:
+            segments = get_segments(self.plugin, self.rom)
+            trace_args['segments'] = len(segments)
 
         logger.info(f"Найдено {len(segments)} текстовых сегментов для обработки")
 
@@ -132,34 +176,37 @@ class TextExtractor:
             data = self.rom.data[start:end]
             if segment.get('compression'):
                 compression_type = segment.get('compression')
-                if isinstance(compression_type, str):
-                    from core.compression import get_compression_handler
-                    handler = get_compression_handler(compression_type)
-                    if handler:
-                        logger.info(f"Распаковка: {compression_type}")
-                        decompressed, _ = handler.decompress(data, 0)
+                with tracer.span('segment.decompress', segment=name, bytes_in=len(data)) as trace_args:
+                    if isinstance(compression_type, str):
+                        from core.compression import get_compression_handler
+                        handler = get_compression_handler(compression_type)
+                        if handler:
+                            logger.info(f"Распаковка: {compression_type}")
+                            decompressed, _ = handler.decompress(data, 0)
+                            data = decompressed
+                        else:
+                            logger.warning(f"Неизвестный тип сжатия: {compression_type}")
+                    elif hasattr(compression_type, 'decompress'):
+                        logger.info("Распаковка (объект)")
+                        decompressed, _ = compression_type.decompress(data, 0)
                         data = decompressed
-                    else:
-                        logger.warning(f"Неизвестный тип сжатия: {compression_type}")
-                elif hasattr(compression_type, 'decompress'):
-                    logger.info("Распаковка (объект)")
-                    decompressed, _ = compression_type.decompress(data, 0)
-                    data = decompressed
+                    trace_args['bytes_out'] = len(data)
 
             # Декодирование текста
             if not segment['decoder']:
                 logger.info("Таблица символов не предоставлена, определяем автоматически")
-                from core.scanner import auto_detect_charmap
-                charmap = auto_detect_charmap(self.rom.data, start)
-                from core.decoder import CharMapDecoder
-                segment['decoder'] = CharMapDecoder(charmap)
+                # Сегменты с одинаковой статистикой участка используют общий декодер
+                with tracer.span('segment.charmap', segment=name, start=start):
+                    from core.scanner import get_charmap_cache
+                    segment['decoder'] = get_charmap_cache(self.rom).get_decoder(start)
 
-            logger.info("Декодирование текста")
-            text = segment['decoder'].decode(data, 0, len(data))
+            # Разделение на отдельные сообщения по байтам-терминаторам и их декодирование
+            logger.info("Разделение на сообщения и декодирование текста")
+            messages = self._split_messages(data, start, segment['decoder'], segment_name=name)
 
             # Проверка качества декодирования
-            unknown_chars = text.count('[')
-            total_chars = len(text)
+            unknown_chars = sum(msg['text'].count('[') for msg in messages)
+            total_chars = sum(len(msg['text']) for msg in messages)
             if total_chars > 0:
                 quality = 1.0 - (unknown_chars / total_chars)
                 logger.info(f"Качество декодирования для сегмента {name}: {quality:.2%}")
@@ -168,10 +215,6 @@ class TextExtractor:
                 if quality < 0.5:
                     logger.warning(f"Низкое качество декодирования для сегмента {name}")
 
-            # Разделение на отдельные сообщения
-            logger.info("Разделение на отдельные сообщения")
-            messages = self._split_messages(text, start)
-
             results[name] = messages
             logger.info(f"Извлечено {len(messages)} сообщений из сегмента '{name}'")
 
@@ -195,74 +238,34 @@ class TextExtractor:
 
         return results
 
-    def _split_messages(self, text: str, base_offset: int) -> List[Dict]:
-        """Разделение на отдельные сообщения с улучшенной обработкой"""
-        logger = logging.getLogger('gb2text.extractor')
-        logger.debug(f"Начало разделения текста (длина: {len(text)})")
-
-        messages = []
-        current_msg = ""
-        current_offset = base_offset
-        i = 0
-
-        while i < len(text):
-            char = text[i]
-
-            # Обработка специальных последовательностей
-            if i + 4 < len(text) and text[i:i + 5] == '[END]':
-                if current_msg:
-                    messages.append({
-                        'offset': current_offset,
-                        'text': current_msg
-                    })
-                    logger.debug(f"Найдено сообщение длиной {len(current_msg)}")
-                current_msg = ""
-                current_offset = base_offset + i + 5
-                i += 5
-                continue
+    def _split_messages(self, data: bytes, base_offset: int, decoder, segment_name: str = None) -> List[Dict]:
+        """
+        Разделение сырых байтов сегмента на сообщения с последующим декодированием каждого
 
-            # Обработка шестнадцатеричных кодов вида [XX]
-            elif char == '[' and i + 3 < len(text) and text[i + 3] == ']':
-                hex_part = text[i + 1:i + 3]
-                if all(c in '0123456789ABCDEFabcdef' for c in hex_part):
-                    # Это шестнадцатеричный код, возможно, терминатор
-                    i += 4  # Пропускаем [XX]
-                    if current_msg:
-                        messages.append({
-                            'offset': current_offset,
-                            'text': current_msg
-                        })
-                        logger.debug(f"Найдено сообщение длиной {len(current_msg)}")
-                        current_msg = ""
-                    current_offset = base_offset + i
-                    continue
-
-            # Разделение по переводу строки — синхронизация с инжектором
-            if char == '\n':
-                if current_msg:
-                    messages.append({
-                        'offset': current_offset,
-                        'text': current_msg
-                    })
-                    logger.debug(f"Найдено сообщение длиной {len(current_msg)}")
-                    current_msg = ""
-                i += 1
-                current_offset = base_offset + i
-                continue
-
-            # Обработка обычного символа
-            current_msg += char
-            i += 1
+        Сообщения разделяются по байтам-терминаторам (см. message_terminators) так же,
+        как в TextInjector._extract_original_messages, поэтому 'offset' - точное смещение
+        в байтах (base_offset + позиция в data), а 'length' - длина сообщения в байтах.
+        """
+        logger = logging.getLogger('gb2text.extractor')
+        logger.debug("Начало разделения данных (длина: %d байт)", len(data))
 
-        # Добавляем последнее сообщение, если оно есть
-        if current_msg:
-            messages.append({
-                'offset': current_offset,
-                'text': current_msg
-            })
-            logger.debug(f"Найдено последнее сообщение длиной {len(current_msg)}")
+        tracer = get_tracer()
+        with tracer.span('segment.split', segment=segment_name, bytes=len(data)) as trace_args:
+            spans = split_message_spans(data, message_terminators(decoder))
+            trace_args['messages'] = len(spans)
 
-        logger.info(f"Разделено на {len(messages)} сообщений")
+        messages = []
+        with tracer.span('segment.decode', segment=segment_name) as trace_args:
+            for msg_start, msg_end in spans:
+                messages.append({
+                    'offset': base_offset + msg_start,
+                    'length': msg_end - msg_start,
+                    'text': decoder.decode(data[msg_start:msg_end], 0, msg_end - msg_start)
+                })
+            trace_args['bytes'] = sum(msg['length'] for msg in messages)
+            trace_args['chars'] = sum(len(msg['text']) for msg in messages)
+
+        logger.info("Разделено на %d сообщений", len(messages))
         return messages
 
     def _apply_guide_recommendations(self):
@@ -274,8 +277,9 @@ class TextExtractor:
         recommendations = self.guide.get('recommendations', {})
 
         if 'decoder_adjustments' in recommendations:
+            segments = get_segments(self.plugin, self.rom)
             for seg_name, adjustments in recommendations['decoder_adjustments'].items():
-                for segment in self.plugin.get_text_segments(self.rom):
+                for segment in segments:
                     if segment['name'] == seg_name and segment['decoder']:
                         # Применение корректировок к декодеру
                         self._adjust_decoder(segment['decoder'], adjustments)
@@ -0,0 +1,276 @@
+"""
+Нечёткий поиск по памяти переводов
+
+Сценарии игр полны почти одинаковых строк: другое имя, другое число, другая
+пунктуация. Индекс символьных триграмм хранится как инвертированный список в
+массивах NumPy (отсортированные ключи триграмм -> номера текстов); кандидаты
+с наибольшей долей общих триграмм (коэффициент Дайса) отбираются одним векторным
+проходом, а лучшие из них переупорядочиваются по расстоянию Левенштейна
+(битово-параллельный алгоритм Майерса). Перед разбиением на триграммы текст
+приводится к нижнему регистру, пробелы схлопываются, а цифры заменяются на 0,
+чтобы изменённое число не мешало найти строку. Триграммы с настоящими цифрами
+индексируются дополнительно (с отдельным битом в ключе): среди строк, которые
+различаются только числом, выше оказывается строка с тем же числом. Точное
+совпадение нормализованного текста находится по словарю до триграмм.
+"""
+
+import logging
+import re
+import threading
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger('gb2text.fuzzy_memory')
+
+# Сколько лучших по триграммам кандидатов сравнивается по расстоянию редактирования
+DEFAULT_CANDIDATES = 16
+
+# Отбор кандидатов: число самых редких триграмм запроса, которые просматриваются всегда,
+# и предельный суммарный размер просматриваемых списков
+MIN_PROBE_GRAMS = 3
+PROBE_FRACTION = 0.4
+PROBE_BUDGET = 16384
+
+# Во сколько раз больше итогового числа кандидатов остаётся после редких триграмм
+SHORTLIST_FACTOR = 8
+
+# Добавленные после построения тексты индексируются отдельно до этого числа,
+# затем основной индекс перестраивается
+MERGE_THRESHOLD = 4096
+
+_DIGITS = re.compile(r'\d')
+
+# Бит ключа триграммы с исходными цифрами (кодовые точки занимают 63 младших бита)
+_RAW_DIGITS_FLAG = np.uint64(1 << 63)
+
+
+def normalize_text(text: str) -> str:
+    """Текст для сравнения: нижний регистр, одиночные пробелы"""
+    return ' '.join(text.replace('\x00', ' ').casefold().split())
+
+
+def _codes_to_keys(codes: np.ndarray) -> np.ndarray:
+    return (codes[:-2] << np.uint64(42)) | (codes[1:-1] << np.uint64(21)) | codes[2:]
+
+
+def _gram_keys(texts: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Триграммы текстов: (ключи, номера текстов), без повторов внутри текста
+
+    Ключ - три кодовые точки по 21 биту в uint64; тексты склеиваются через
+    '\\x00', и триграммы, захватывающие разделитель, отбрасываются. Триграммы
+    с цифрами добавляются ещё раз с исходными цифрами и битом _RAW_DIGITS_FLAG.
+    """
+    raw = '\x00'.join(f' {normalize_text(text)} ' for text in texts)
+    # Замена \d на 0 не меняет длину, поэтому позиции триграмм совпадают
+    joined = _DIGITS.sub('0', raw)
+    codes = np.frombuffer(joined.encode('utf-32-le'), dtype=np.uint32).astype(np.uint64)
+    if len(codes) < 3:
+        return np.zeros(0, dtype=np.uint64), np.zeros(0, dtype=np.int64)
+    separator = codes == 0
+    keys = _codes_to_keys(codes)
+    ids = np.cumsum(separator)[:-2]
+    valid = ~(separator[:-2] | separator[1:-1] | separator[2:])
+    if joined != raw:
+        raw_keys = _codes_to_keys(np.frombuffer(raw.encode('utf-32-le'), dtype=np.uint32).astype(np.uint64))
+        digits = valid & (raw_keys != keys)
+        keys = np.concatenate((keys[valid], raw_keys[digits] | _RAW_DIGITS_FLAG))
+        ids = np.concatenate((ids[valid], ids[digits]))
+    else:
+        keys, ids = keys[valid], ids[valid]
+    order = np.lexsort((ids, keys))
+    keys, ids = keys[order], ids[order]
+    distinct = np.ones(len(keys), dtype=bool)
+    distinct[1:] = (keys[1:] != keys[:-1]) | (ids[1:] != ids[:-1])
+    return keys[distinct], ids[distinct]
+
+
+def edit_distance(a: str, b: str) -> int:
+    """Расстояние Левенштейна (битово-параллельный алгоритм Майерса, вариант Хюрё)"""
+    if not a:
+        return len(b)
+    if not b:
+        return len(a)
+    peq: Dict[str, int] = {}
+    for i, char in enumerate(a):
+        peq[char] = peq.get(char, 0) | (1 << i)
+    full = (1 << len(a)) - 1
+    high = 1 << (len(a) - 1)
+    pv, mv, score = full, 0, len(a)
+    for char in b:
+        eq = peq.get(char, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | (~(xh | pv) & full)
+        mh = pv & xh
+        if ph & high:
+            score += 1
+        elif mh & high:
+            score -= 1
+        ph = ((ph << 1) | 1) & full
+        mh = (mh << 1) & full
+        pv = mh | (~(xv | ph) & full)
+        mv = ph & xv
+    return score
+
+
+def similarity(a: str, b: str) -> float:
+    """Сходство 0..1: 1 - расстояние редактирования / длина более длинного текста"""
+    a, b = normalize_text(a), normalize_text(b)
+    if not a and not b:
+        return 1.0
+    return 1.0 - edit_distance(a, b) / max(len(a), len(b))
+
+
+@dataclass
+class FuzzyMatch:
+    """Найденный перевод: исходный текст, перевод и сходство с запросом (0..1)"""
+
+    source: str
+    target: str
+    score: float
+
+
+class FuzzyIndex:
+    """Индекс нечёткого поиска по парам (исходный текст, перевод)"""
+
+    def __init__(self, entries: Iterable[Tuple[str, str]] = ()):
+        self.sources: List[str] = []
+        self.targets: List[str] = []
+        self._ids: Dict[str, int] = {}
+        # Нормализованный текст -> номер (первый добавленный текст с таким видом)
+        self._exact: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        # Основной индекс: отсортированные ключи, границы списков, номера текстов
+        self._keys = np.zeros(0, dtype=np.uint64)
+        self._starts = np.zeros(1, dtype=np.int64)
+        self._postings = np.zeros(0, dtype=np.int64)
+        self._sizes = np.zeros(0, dtype=np.int64)
+        # Тексты, добавленные после построения: ключ триграммы -> номера
+        self._delta: Dict[int, List[int]] = {}
+        self._delta_sizes: Dict[int, int] = {}
+        self.add(entries)
+
+    def __len__(self) -> int:
+        return len(self.sources)
+
+    def add(self, entries: Iterable[Tuple[str, str]]) -> None:
+        """Добавляет переводы; перевод уже известного текста заменяет прежний"""
+        with self._lock:
+            new_ids = []
+            for source, target in entries:
+                entry_id = self._ids.get(source)
+                if entry_id is not None:
+                    self.targets[entry_id] = target
+                    continue
+                self._ids[source] = len(self.sources)
+                self._exact.setdefault(normalize_text(source), len(self.sources))
+                new_ids.append(len(self.sources))
+                self.sources.append(source)
+                self.targets.append(target)
+            if not new_ids:
+                return
+            if len(self._delta_sizes) + len(new_ids) > MERGE_THRESHOLD:
+                self._rebuild()
+                return
+            keys, ids = _gram_keys([self.sources[i] for i in new_ids])
+            for key, local_id in zip(keys.tolist(), ids.tolist(), strict=True):
+                self._delta.setdefault(key, []).append(new_ids[local_id])
+            sizes = np.bincount(ids, minlength=len(new_ids))
+            for local_id, entry_id in enumerate(new_ids):
+                self._delta_sizes[entry_id] = int(sizes[local_id])
+
+    def _rebuild(self) -> None:
+        """Перестраивает основной индекс по всем текстам"""
+        keys, ids = _gram_keys(self.sources)
+        self._keys, first = np.unique(keys, return_index=True)
+        self._starts = np.append(first, len(keys)).astype(np.int64)
+        self._postings = ids.astype(np.int64)
+        self._sizes = np.bincount(ids, minlength=len(self.sources)).astype(np.int64)
+        self._delta.clear()
+        self._delta_sizes.clear()
+        logger.debug(f"Индекс нечёткого поиска перестроен: {len(self.sources)} текстов, {len(keys)} триграмм")
+
+    def _candidates(self, text: str, limit: int) -> List[int]:
+        """Номера текстов с наибольшим коэффициентом Дайса по триграммам"""
+        query_keys, _ = _gram_keys([text])
+        if not len(query_keys):
+            return []
+        positions = np.searchsorted(self._keys, query_keys)
+        inside = positions < len(self._keys)
+        positions = positions[inside][self._keys[positions[inside]] == query_keys[inside]]
+        lengths = self._starts[positions + 1] - self._starts[positions]
+        order = np.argsort(lengths, kind='stable')
+        positions, lengths = positions[order], lengths[order]
+        # Кандидаты берутся из редких триграмм (не меньше MIN_PROBE_GRAMS, пока списки
+        # укладываются в PROBE_BUDGET); частые триграммы лишь досчитываются для них
+        probe = max(MIN_PROBE_GRAMS, int(np.ceil(len(lengths) * PROBE_FRACTION)),
+                    int(np.searchsorted(np.cumsum(lengths), PROBE_BUDGET, side='right')))
+        postings = [self._postings[self._starts[p]:self._starts[p + 1]] for p in positions.tolist()]
+
+        counter: Dict[int, int] = {}
+        for key in query_keys.tolist():
+            for entry_id in self._delta.get(key, ()):
+                counter[entry_id] = counter.get(entry_id, 0) + 1
+        if postings[:probe]:
+            ids, counts = np.unique(np.concatenate(postings[:probe]), return_counts=True)
+        else:
+            ids, counts = np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        if len(ids) > limit * SHORTLIST_FACTOR:
+            shortlist = np.sort(np.argpartition(-counts, limit * SHORTLIST_FACTOR - 1)[:limit * SHORTLIST_FACTOR])
+            ids, counts = ids[shortlist], counts[shortlist]
+        for posting in postings[probe:]:
+            # Списки отсортированы по номеру текста
+            found = np.searchsorted(posting, ids)
+            found[found == len(posting)] = 0
+            counts = counts + (posting[found] == ids)
+        if counter:
+            ids = np.concatenate((ids, np.fromiter(counter, dtype=np.int64, count=len(counter))))
+            counts = np.concatenate((counts, np.fromiter(counter.values(), dtype=np.int64, count=len(counter))))
+        if not len(ids):
+            return []
+
+        if self._delta_sizes:
+            sizes = np.array([self._delta_sizes[i] if i in self._delta_sizes else self._sizes[i]
+                              for i in ids.tolist()], dtype=np.int64)
+        else:
+            sizes = self._sizes[ids]
+        dice = 2.0 * counts / (sizes + len(query_keys))
+        if len(ids) > limit:
+            ids = ids[np.argpartition(-dice, limit - 1)[:limit]]
+        return ids.tolist()
+
+    def search(self, text: str, k: int = 5, min_score: float = 0.5,
+               candidates: int = DEFAULT_CANDIDATES) -> List[FuzzyMatch]:
+        """
+        До k самых похожих переводов со сходством не ниже min_score
+
+        Сходство считается по расстоянию редактирования (1.0 - совпадение без учёта
+        регистра и пробелов); при равном сходстве первым идёт более ранний текст.
+        Точное совпадение нормализованного текста всегда попадает в результат.
+        """
+        query = normalize_text(text)
+        with self._lock:
+            ids = self._candidates(text, max(candidates, k))
+            exact = self._exact.get(query)
+            if exact is not None and exact not in ids:
+                ids.append(exact)
+            scored = []
+            for entry_id in ids:
+                candidate = normalize_text(self.sources[entry_id])
+                longest = max(len(query), len(candidate))
+                # Разница длин - нижняя граница расстояния редактирования
+                if longest and abs(len(query) - len(candidate)) / longest > 1.0 - min_score:
+                    continue
+                score = 1.0 - edit_distance(query, candidate) / longest if longest else 1.0
+                if score >= min_score:
+                    scored.append((-score, entry_id))
+            scored.sort()
+            return [FuzzyMatch(self.sources[i], self.targets[i], -s) for s, i in scored[:k]]
+
+    def best(self, text: str, min_score: float = 0.5) -> Optional[FuzzyMatch]:
+        """Самый похожий перевод или None"""
+        matches = self.search(text, k=1, min_score=min_score)
+        return matches[0] if matches else None
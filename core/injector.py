@@ -20,6 +20,9 @@ GB Text Extraction Framework
 """
 
 from core.rom import GameBoyROM
+from core.decoder import message_terminators, split_message_spans
+from core.segment_plan import get_segments
+from core.tracing import span
 from typing import List, Dict
 import logging
 
@@ -34,15 +37,19 @@ class TextInjector:
         self.modified_data = bytearray(self.rom.data)
         self.logger = logging.getLogger('gb2text.injector')
 
-    def inject_segment(self, segment_name: str, translations: List[str], plugin) -> bool:
+    def inject_segment(self, segment_name: str, translations: List[str], plugin, repoint: bool = False) -> bool:
         """
         Внедряет переводы в указанный сегмент
         Возвращает True, если внедрение прошло успешно
+
+        По умолчанию перевод должен помещаться в окно исходного сообщения. С repoint=True
+        сообщения сегмента, если перевод длиннее окна, переупаковываются подряд, а все
+        указатели на сдвинутые сообщения (по обратному индексу указателей) перенаправляются.
         """
         if not plugin:
             return False
 
-        segments = plugin.get_text_segments(self.rom)
+        segments = get_segments(plugin, self.rom)
         segment = next((s for s in segments if s['name'] == segment_name), None)
 
         if not segment:
@@ -60,66 +67,99 @@ class TextInjector:
             return False
 
         enc = segment['decoder'].encode
-        for original, translation in zip(original_messages, translations):
-        # Сравниваем длину в байтах
-            trans_bytes = enc(translation)
-            if len(trans_bytes) > original['length']:
-                return False
+        with span('inject.segment', segment=segment_name, messages=len(translations)) as trace_args:
+            encoded = [enc(translation) for translation in translations]
+            if repoint and any(len(b) > m['length'] for b, m in zip(encoded, original_messages)):
+                trace_args['repointed'] = True
+                return self._inject_repointed(segment, original_messages, encoded)
+
+            for original, trans_bytes in zip(original_messages, encoded):
+            # Сравниваем длину в байтах
+                if len(trans_bytes) > original['length']:
+                    return False
 
-            # Внедряем перевод
-            self._inject_message(segment, original['offset'], trans_bytes, original['length'])
+                # Внедряем перевод
+                self._inject_message(segment, original['offset'], trans_bytes, original['length'])
+            trace_args['bytes'] = sum(msg['length'] for msg in original_messages)
 
         return True
 
 
+    def _inject_repointed(self, segment, original_messages: List[Dict], encoded: List[bytes]) -> bool:
+        """
+        Переупаковывает сообщения сегмента подряд и перенаправляет указатели на них
+
+        Разделители между сообщениями сохраняются. Сдвинуть можно только сообщение,
+        на которое ссылается хотя бы один указатель, все ссылки на которое подтверждены
+        таблицами указателей, и только туда, куда могут указывать все его указатели
+        (16-битные - в пределах банка); иначе ROM не меняется.
+        """
+        from core.pointer_index import get_pointer_index
+
+        start, end = segment['start'], segment['end']
+        data = self.rom.data
+        index = get_pointer_index(self.rom)
+
+        # Байты до первого сообщения остаются на месте
+        layout = bytearray(data[start:start + original_messages[0]['offset']] if original_messages else b'')
+        writes = []
+        for i, (original, trans_bytes) in enumerate(zip(original_messages, encoded)):
+            old_offset = start + original['offset']
+            new_offset = start + len(layout)
+            if new_offset != old_offset:
+                if not index.is_referenced(old_offset):
+                    self.logger.warning(f"Сообщение 0x{old_offset:X} не адресуется указателями, перенос невозможен")
+                    return False
+                try:
+                    writes.extend(index.pointer_writes(old_offset, new_offset))
+                except ValueError as e:
+                    self.logger.warning(f"Перенос сообщения 0x{old_offset:X} невозможен: {e}")
+                    return False
+            tail_end = (start + original_messages[i + 1]['offset'] if i + 1 < len(original_messages)
+                        else old_offset + original['length'] + 1)
+            layout += trans_bytes + bytes(data[old_offset + original['length']:min(tail_end, end)])
+
+        if len(layout) > end - start:
+            return False
+        layout += b'\x20' * (end - start - len(layout))
+        self.modified_data[start:end] = layout
+        for slot, pointer_bytes in writes:
+            self.modified_data[slot:slot + len(pointer_bytes)] = pointer_bytes
+        self.logger.info(f"Сегмент 0x{start:X}-0x{end:X} переупакован, перенаправлено указателей: {len(writes)}")
+        return True
+
     def _ensure_decoder(self, segment):
         """Гарантирует, что у сегмента есть decoder"""
         if not segment.get('decoder'):
             try:
-                from core.scanner import auto_detect_charmap
-                from core.decoder import CharMapDecoder
-                charmap = auto_detect_charmap(self.rom.data, segment['start'])
-                segment['decoder'] = CharMapDecoder(charmap)
+                from core.scanner import get_charmap_cache
+                segment['decoder'] = get_charmap_cache(self.rom).get_decoder(segment['start'])
             except Exception:
                 segment['decoder'] = None
 
     def _extract_original_messages(self, segment) -> List[Dict]:
         """
         Извлекает оригинальные сообщения из сегмента, считая смещения в БАЙТАХ.
-        Разделители: 0x00, 0xFF, 0xFE, 0x0D, 0x0A (терминаторы/переводы строки).
+        Разделители: 0x00, 0xFF, 0xFE, 0x0D, 0x0A (терминаторы/переводы строки), а также
+        байты-терминаторы таблицы символов - те же, что использует TextExtractor._split_messages.
         """
         start = segment['start']
         end = segment['end']
-        data = self.rom.data[start:end]
+        data = bytes(self.rom.data[start:end])
         decoder = segment['decoder']
 
         msgs: List[Dict] = []
-        i = 0
-        n = len(data)
-        terminators = {0x00, 0xFF, 0xFE, 0x0D, 0x0A}
-
-        while i < n:
-            msg_start = i
-            # идём до первого терминатора
-            while i < n and data[i] not in terminators:
-                i += 1
-
-            msg_len = i - msg_start  # длина сообщения в БАЙТАХ (без терминатора)
-            if msg_len > 0:
-                msg_bytes = bytes(data[msg_start:i])
-                try:
-                    text = decoder.decode(msg_bytes, 0, len(msg_bytes))
-                except Exception:
-                    text = ""
-                msgs.append({
-                    'offset': msg_start,  # смещение в байтах от начала сегмента
-                    'length': msg_len,  # длина доступного окна под текст
-                    'text': text
-                })
-
-            # пропускаем терминатор (1 байт), если он есть
-            if i < n:
-                i += 1
+        for msg_start, msg_end in split_message_spans(data, message_terminators(decoder)):
+            msg_bytes = data[msg_start:msg_end]
+            try:
+                text = decoder.decode(msg_bytes, 0, len(msg_bytes))
+            except Exception:
+                text = ""
+            msgs.append({
+                'offset': msg_start,  # смещение в байтах от начала сегмента
+                'length': msg_end - msg_start,  # длина доступного окна под текст
+                'text': text
+            })
 
         return msgs
 
@@ -145,5 +185,6 @@ class TextInjector:
 
     def save(self, output_path: str):
         """Сохраняет модифицированный ROM"""
-        with open(output_path, 'wb') as f:
-            f.write(self.modified_data)
\ No newline at end of file
+        with span('rom.save', path=output_path, bytes=len(self.modified_data)):
+            with open(output_path, 'wb') as f:
+                f.write(self.modified_data)
\ No newline at end of file
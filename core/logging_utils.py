@@ -0,0 +1,164 @@
+"""
+Настройка логирования GB2Text с низкими накладными расходами
+
+- Запись в файл и консоль выполняется отдельным потоком (QueueHandler/QueueListener):
+  рабочий поток только кладёт запись в очередь и не ждёт файлового ввода-вывода
+- Повторяющиеся DEBUG-события горячих путей прореживаются по модулям (SamplingFilter)
+- В горячих путях сообщения форматируются лениво (%-стиль) под проверкой isEnabledFor
+"""
+
+import atexit
+import logging
+import logging.handlers
+import queue
+import threading
+from typing import Dict, List, Optional, Tuple, Union
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+CONSOLE_FORMAT = '%(name)s - %(levelname)s - %(message)s'
+LOG_FILE = 'gb2text.log'
+
+LOG_LEVELS = ('DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL')
+DEFAULT_LOG_LEVEL = 'INFO'
+
+# Прореживание по умолчанию: из повторяющихся DEBUG-событий модуля пишется каждое N-е
+DEFAULT_SAMPLE_RATES = {
+    'gb2text.scanner': 100,
+    'gb2text.decoder': 100,
+    'gb2text.extractor': 10,
+}
+
+# Ограничение числа отслеживаемых шаблонов сообщений в SamplingFilter
+_MAX_SAMPLING_KEYS = 10000
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_installed_handlers: List[logging.Handler] = []
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Прореживает повторяющиеся события по модулям
+
+    Для логгера из sample_rates (совпадение по имени или префиксу 'name.') из записей
+    с одним и тем же шаблоном сообщения пропускается первая и далее каждая N-я.
+    Записи уровнем выше max_level проходят всегда.
+    """
+
+    def __init__(self, sample_rates: Dict[str, int], max_level: int = logging.DEBUG):
+        super().__init__()
+        self.sample_rates = dict(sample_rates)
+        self.max_level = max_level
+        self._counters: Dict[Tuple[str, str], int] = {}
+        self._lock = threading.Lock()
+
+    def _rate_for(self, name: str) -> int:
+        """Частота прореживания для логгера (самый длинный совпадающий префикс)"""
+        best, rate = -1, 1
+        for prefix, prefix_rate in self.sample_rates.items():
+            if (name == prefix or name.startswith(prefix + '.')) and len(prefix) > best:
+                best, rate = len(prefix), prefix_rate
+        return rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > self.max_level:
+            return True
+
+        rate = self._rate_for(record.name)
+        if rate <= 1:
+            return True
+
+        # При ленивом форматировании все повторы события имеют один шаблон record.msg
+        key = (record.name, str(record.msg))
+        with self._lock:
+            if key not in self._counters and len(self._counters) >= _MAX_SAMPLING_KEYS:
+                self._counters.clear()
+            count = self._counters.get(key, 0)
+            self._counters[key] = count + 1
+        return count % rate == 0
+
+
+def resolve_level(level: Union[str, int]) -> int:
+    """Преобразует имя уровня ('INFO') или число в числовой уровень logging"""
+    if isinstance(level, int):
+        return level
+    name = str(level).upper()
+    if name not in LOG_LEVELS:
+        raise ValueError(f"Неизвестный уровень логирования: {level}")
+    return getattr(logging, name)
+
+
+def setup_logging(level: Union[str, int] = DEFAULT_LOG_LEVEL, log_file: Optional[str] = LOG_FILE,
+                  console: bool = True, sample_rates: Optional[Dict[str, int]] = None,
+                  use_queue: bool = True) -> Optional[logging.handlers.QueueListener]:
+    """
+    Настраивает корневой логгер
+
+    Args:
+        level: уровень логирования (имя из LOG_LEVELS или число)
+        log_file: файл лога (перезаписывается при каждом запуске), None - без файла
+        console: выводить ли сообщения уровня INFO и выше в консоль
+        sample_rates: прореживание DEBUG-событий по модулям, например {'gb2text.scanner': 100}
+        use_queue: писать в обработчики из отдельного потока через очередь
+
+    Returns:
+        запущенный QueueListener (use_queue=True) или None
+    """
+    global _listener
+
+    shutdown_logging()
+    level_no = resolve_level(level)
+
+    handlers: List[logging.Handler] = []
+    if log_file:
+        file_handler = logging.FileHandler(log_file, mode='w', encoding='utf-8')
+        file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        handlers.append(file_handler)
+    if console:
+        console_handler = logging.StreamHandler()
+        console_handler.setLevel(max(level_no, logging.INFO))
+        console_handler.setFormatter(logging.Formatter(CONSOLE_FORMAT))
+        handlers.append(console_handler)
+
+    sampling = SamplingFilter(sample_rates) if sample_rates else None
+
+    if use_queue:
+        log_queue: queue.SimpleQueue = queue.SimpleQueue()
+        queue_handler = logging.handlers.QueueHandler(log_queue)
+        if sampling:
+            # Фильтр работает до постановки в очередь: отброшенные записи не форматируются
+            queue_handler.addFilter(sampling)
+        _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+        _listener.start()
+        _installed_handlers.append(queue_handler)
+    else:
+        for handler in handlers:
+            if sampling:
+                handler.addFilter(sampling)
+        _installed_handlers.extend(handlers)
+
+    root = logging.getLogger()
+    root.setLevel(level_no)
+    for handler in _installed_handlers:
+        root.addHandler(handler)
+
+    return _listener
+
+
+def shutdown_logging():
+    """Останавливает фоновую запись (дописывая очередь) и снимает установленные обработчики"""
+    global _listener
+
+    root = logging.getLogger()
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+    for handler in _installed_handlers:
+        root.removeHandler(handler)
+        handler.close()
+    _installed_handlers.clear()
+
+
+atexit.register(shutdown_logging)
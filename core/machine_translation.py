@@ -17,18 +17,89 @@ GB Text Extraction Framework
 
 """
 Модуль для машинного перевода с использованием различных сервисов
+
+Пакетный перевод (MachineTranslation.translate_batch) переводит повторы один раз,
+берёт готовые переводы из постоянного кэша (TranslationDatabase), упаковывает
+остальные строки в многотекстовые запросы сервиса и отправляет их параллельно
+с ограничением частоты и повторами временных ошибок.
 """
 
 import logging
+import threading
+import time
 from abc import ABC, abstractmethod
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, List, Optional
 
 logger = logging.getLogger(__name__)
 
+# Параллельные запросы пакетного перевода и повторы временных ошибок
+DEFAULT_MAX_WORKERS = 4
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF = 0.5  # секунды; удваивается с каждой попыткой
+
+BING_ENDPOINT = "https://api.cognitive.microsofttranslator.com/translate"
+
+
+class RetryableTranslationError(Exception):
+    """Временная ошибка сервиса (429, 5xx, обрыв соединения): запрос можно повторить"""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """Ограничитель частоты: rate запросов в секунду, всплеск до capacity запросов"""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Ждёт свободный токен и забирает его"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+def pack_batches(texts: List[str], max_texts: int, max_chars: int) -> List[List[str]]:
+    """
+    Разбивает тексты на пакеты не больше max_texts строк и max_chars символов
+
+    Текст длиннее max_chars отправляется отдельным пакетом.
+    """
+    batches: List[List[str]] = []
+    current: List[str] = []
+    size = 0
+    for text in texts:
+        if current and (len(current) >= max_texts or size + len(text) > max_chars):
+            batches.append(current)
+            current, size = [], 0
+        current.append(text)
+        size += len(text)
+    if current:
+        batches.append(current)
+    return batches
+
 
 class Translator(ABC):
     """Базовый класс для переводчиков"""
 
+    # Ограничения одного запроса пакетного перевода
+    max_batch_texts = 1
+    max_batch_chars = 5000
+
     @abstractmethod
     def translate(self, text: str, source_lang: str, target_lang: str) -> str:
         """Перевести текст с source_lang на target_lang"""
@@ -39,6 +110,10 @@ class Translator(ABC):
         """Проверить доступность сервиса"""
         pass
 
+    def translate_batch(self, texts: List[str], source_lang: str, target_lang: str) -> List[str]:
+        """Перевести несколько текстов одним запросом (по умолчанию - по одному)"""
+        return [self.translate(text, source_lang, target_lang) for text in texts]
+
 
 class GoogleTranslator(Translator):
     """Переводчик через Google Translate"""
@@ -69,6 +144,10 @@ class GoogleTranslator(Translator):
 class DeepLTranslator(Translator):
     """Переводчик через DeepL"""
 
+    # До 50 текстов и 128 КБ на запрос (до 3 байт UTF-8 на символ)
+    max_batch_texts = 50
+    max_batch_chars = 40000
+
     def __init__(self, auth_key: str):
         try:
             import deepl
@@ -80,19 +159,22 @@ class DeepLTranslator(Translator):
             self.translator = None
             logger.error(f"Ошибка инициализации DeepL: {e}")
 
-    def translate(self, text: str, source_lang: str, target_lang: str) -> str:
-        if not self.is_available():
-            raise Exception("DeepL недоступен")
-
-        # Преобразование языков в формат DeepL
+    @staticmethod
+    def _deepl_langs(source_lang: str, target_lang: str):
+        """Преобразование языков в формат DeepL"""
         lang_map = {
             'en': 'EN',
             'ru': 'RU',
             'ja': 'JA',
             'zh': 'ZH'
         }
-        source = lang_map.get(source_lang, source_lang.upper())
-        target = lang_map.get(target_lang, target_lang.upper())
+        return lang_map.get(source_lang, source_lang.upper()), lang_map.get(target_lang, target_lang.upper())
+
+    def translate(self, text: str, source_lang: str, target_lang: str) -> str:
+        if not self.is_available():
+            raise Exception("DeepL недоступен")
+
+        source, target = self._deepl_langs(source_lang, target_lang)
 
         try:
             result = self.translator.translate_text(text, source_lang=source, target_lang=target)
@@ -101,6 +183,20 @@ class DeepLTranslator(Translator):
             logger.error(f"Ошибка DeepL: {e}")
             raise
 
+    def translate_batch(self, texts: List[str], source_lang: str, target_lang: str) -> List[str]:
+        if self.translator is None:
+            raise Exception("DeepL недоступен")
+
+        source, target = self._deepl_langs(source_lang, target_lang)
+
+        # Библиотека deepl сама повторяет запросы при 429 и ошибках сервера
+        try:
+            results = self.translator.translate_text(list(texts), source_lang=source, target_lang=target)
+            return [result.text for result in results]
+        except Exception as e:
+            logger.error(f"Ошибка DeepL: {e}")
+            raise
+
     def is_available(self) -> bool:
         if self.translator is None:
             return False
@@ -115,45 +211,94 @@ class DeepLTranslator(Translator):
 class BingTranslator(Translator):
     """Переводчик через Microsoft Bing/Azure Translator"""
 
-    def __init__(self, api_key: str, region: str = 'global'):
+    # До 1000 текстов и 50 000 символов на запрос
+    max_batch_texts = 1000
+    max_batch_chars = 50000
+
+    def __init__(self, api_key: str, region: str = 'global', endpoint: str = BING_ENDPOINT,
+                 timeout: float = 30, pool_size: int = DEFAULT_MAX_WORKERS):
         self.api_key = api_key
         self.region = region
-        self.endpoint = f"https://api.cognitive.microsofttranslator.com/translate?api-version=3.0"
+        self.endpoint = f"{endpoint}?api-version=3.0"
+        self.timeout = timeout
+        self.pool_size = pool_size
         self.headers = {
             'Ocp-Apim-Subscription-Key': api_key,
             'Ocp-Apim-Subscription-Region': region,
             'Content-type': 'application/json'
         }
         self.available = True
+        self._session = None
+        self._session_lock = threading.Lock()
+
+    def _get_session(self):
+        """Общая сессия с пулом соединений (keep-alive) для пакетных запросов"""
+        with self._session_lock:
+            if self._session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+
+                session = requests.Session()
+                session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size))
+                session.mount('http://', HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size))
+                self._session = session
+            return self._session
 
     def translate(self, text: str, source_lang: str, target_lang: str) -> str:
         if not self.is_available():
             raise Exception("Bing Translator недоступен")
 
         try:
-            import requests
-            url = f"{self.endpoint}&from={source_lang}&to={target_lang}"
-            body = [{"text": text}]
-            response = requests.post(url, headers=self.headers, json=body)
-            response.raise_for_status()
-            result = response.json()
-            return result[0]["translations"][0]["text"]
+            # Через общую сессию и с таймаутом: зависший запрос не блокирует GUI
+            return self.translate_batch([text], source_lang, target_lang)[0]
         except ImportError:
             raise Exception("requests не установлен")
         except Exception as e:
             logger.error(f"Ошибка Bing: {e}")
             raise
 
+    def translate_batch(self, texts: List[str], source_lang: str, target_lang: str) -> List[str]:
+        if not self.is_available():
+            raise Exception("Bing Translator недоступен")
+
+        import requests
+        url = f"{self.endpoint}&from={source_lang}&to={target_lang}"
+        body = [{"text": text} for text in texts]
+        try:
+            response = self._get_session().post(url, headers=self.headers, json=body, timeout=self.timeout)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            raise RetryableTranslationError(f"Ошибка соединения с Bing: {e}")
+        if response.status_code == 429 or response.status_code >= 500:
+            retry_after = response.headers.get('Retry-After')
+            raise RetryableTranslationError(
+                f"Bing вернул {response.status_code}",
+                retry_after=float(retry_after) if retry_after and retry_after.isdigit() else None)
+        response.raise_for_status()
+        result = response.json()
+        return [item["translations"][0]["text"] for item in result]
+
     def is_available(self) -> bool:
         return self.available and self.api_key
 
 
 class MachineTranslation:
-    """Менеджер машинного перевода"""
+    """
+    Менеджер машинного перевода
 
-    def __init__(self):
+    cache - TranslationDatabase для готовых переводов; они хранятся с целевым языком
+    вида 'ru@deepl', чтобы не смешиваться с переводами пользователя и других сервисов.
+    """
+
+    def __init__(self, cache=None, max_workers: int = DEFAULT_MAX_WORKERS,
+                 requests_per_second: Optional[float] = None,
+                 max_retries: int = DEFAULT_MAX_RETRIES, backoff: float = DEFAULT_BACKOFF):
         self.translators = {}
         self.current_service = None
+        self.cache = cache
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.rate_limiter = TokenBucket(requests_per_second) if requests_per_second else None
 
     def add_google_translator(self) -> None:
         """Добавить Google Translate"""
@@ -174,16 +319,90 @@ class MachineTranslation:
         else:
             raise ValueError(f"Сервис {service} недоступен")
 
-    def translate(self, text: str, source_lang: str, target_lang: str) -> str:
-        """Перевести текст"""
+    def _current_translator(self) -> Translator:
         if not self.current_service:
             raise Exception("Сервис перевода не выбран")
 
         translator = self.translators.get(self.current_service)
         if not translator:
             raise Exception(f"Переводчик {self.current_service} не найден")
+        return translator
+
+    def _cache_lang(self, target_lang: str) -> str:
+        return f"{target_lang}@{self.current_service}"
+
+    def _call(self, func: Callable, *args):
+        """Вызов сервиса с ограничением частоты и повторами временных ошибок"""
+        for attempt in range(self.max_retries + 1):
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+            try:
+                return func(*args)
+            except RetryableTranslationError as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = e.retry_after if e.retry_after is not None else self.backoff * 2 ** attempt
+                logger.warning(f"{e}; повтор через {delay:.1f} с ({attempt + 1}/{self.max_retries})")
+                time.sleep(delay)
 
-        return translator.translate(text, source_lang, target_lang)
+    def translate(self, text: str, source_lang: str, target_lang: str) -> str:
+        """Перевести текст"""
+        translator = self._current_translator()
+        if self.cache is not None:
+            cached = self.cache.get_translation(source_lang, self._cache_lang(target_lang), text)
+            if cached is not None:
+                return cached
+
+        result = self._call(translator.translate, text, source_lang, target_lang)
+        if self.cache is not None:
+            self.cache.store_translation(source_lang, self._cache_lang(target_lang), text, result)
+        return result
+
+    def translate_batch(self, texts: List[str], source_lang: str, target_lang: str,
+                        progress_callback: Optional[Callable[[int, int], None]] = None) -> List[str]:
+        """
+        Перевести список текстов; результат в том же порядке
+
+        Повторы переводятся один раз, пустые строки возвращаются как есть. Пакеты
+        отправляются параллельно (max_workers); переведённые пакеты сразу попадают
+        в кэш, поэтому после ошибки повторный вызов продолжит с того же места.
+        progress_callback(готово, всего) вызывается после каждого пакета.
+        """
+        translator = self._current_translator()
+        cache_lang = self._cache_lang(target_lang)
+        unique = [text for text in dict.fromkeys(texts) if text.strip()]
+        done: Dict[str, str] = {}
+        if self.cache is not None:
+            done = self.cache.get_translations(source_lang, cache_lang, unique)
+        pending = [text for text in unique if text not in done]
+        batches = pack_batches(pending, translator.max_batch_texts, translator.max_batch_chars)
+        logger.info(f"Пакетный перевод {self.current_service}: {len(texts)} строк, {len(unique)} уникальных, "
+                    f"{len(unique) - len(pending)} из кэша, {len(batches)} запросов")
+
+        if batches:
+            executor = ThreadPoolExecutor(max_workers=min(self.max_workers, len(batches)))
+            try:
+                futures = {
+                    executor.submit(self._call, translator.translate_batch, batch, source_lang, target_lang): batch
+                    for batch in batches
+                }
+                for future in as_completed(futures):
+                    batch = futures[future]
+                    results = future.result()
+                    if len(results) != len(batch):
+                        raise Exception(f"Сервис {self.current_service} вернул {len(results)} переводов "
+                                        f"вместо {len(batch)}")
+                    done.update(zip(batch, results))
+                    if self.cache is not None:
+                        self.cache.store_translations(
+                            (source_lang, cache_lang, source, target) for source, target in zip(batch, results))
+                    if progress_callback:
+                        progress_callback(len(done), len(unique))
+            finally:
+                # После ошибки оставшиеся пакеты не отправляются
+                executor.shutdown(wait=True, cancel_futures=True)
+
+        return [done.get(text, text) for text in texts]
 
     def get_available_services(self) -> list:
         """Получить список доступных сервисов"""
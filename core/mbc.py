@@ -17,10 +17,55 @@ GB Text Extraction Framework
 
 """
 Поддержка различных Memory Bank Controllers
+
+Кроме эмуляции записи в регистры (write/read_rom) каждый MBC умеет пакетно
+переводить массивы (банк, адрес CPU) в смещения файла и обратно (numpy), что
+нужно сканерам указателей: 16-битный указатель 0x4000-0x7FFF указывает в тот
+банк, который подключён при его использовании - обычно в банк, где он лежит.
 """
 
+from typing import Tuple
+
+import numpy as np
+
+# Размер банка ROM и окно переключаемого банка в адресном пространстве CPU
+ROM_BANK_SIZE = 0x4000
+SWITCHABLE_START = 0x4000
+SWITCHABLE_END = 0x8000
+
+
+def bank_addresses_to_offsets(banks, addresses) -> np.ndarray:
+    """
+    Смещения файла для массивов (банк, адрес CPU) без учёта ограничений MBC
+
+    Адреса 0x0000-0x3FFF - банк 0 (номер банка игнорируется), 0x4000-0x7FFF -
+    переключаемое окно указанного банка. Для остальных адресов возвращается -1.
+    """
+    banks = np.asarray(banks, dtype=np.int64)
+    addresses = np.asarray(addresses, dtype=np.int64)
+    switchable = (addresses >= SWITCHABLE_START) & (addresses < SWITCHABLE_END)
+    offsets = np.where(switchable, banks * ROM_BANK_SIZE + (addresses - SWITCHABLE_START), addresses)
+    valid = (addresses >= 0) & (addresses < SWITCHABLE_END) & (~switchable | (banks >= 0))
+    return np.where(valid, offsets, -1)
+
+
+def offsets_to_bank_addresses(offsets) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    (банки, адреса CPU) для массива смещений файла
+
+    Смещения банка 0 отображаются в 0x0000-0x3FFF, остальные - в окно 0x4000-0x7FFF.
+    """
+    offsets = np.asarray(offsets, dtype=np.int64)
+    banks = offsets // ROM_BANK_SIZE
+    addresses = np.where(banks == 0, offsets, SWITCHABLE_START + offsets % ROM_BANK_SIZE)
+    return banks, addresses
+
+
 class MBC:
-    """Базовый класс для MBC"""
+    """Базовый класс для MBC (картридж без MBC: банк 1 всегда подключён)"""
+
+    name = 'ROM'
+    max_rom_banks = 2
 
     def __init__(self, rom_data: bytes):
         self.rom_data = rom_data
@@ -54,10 +99,55 @@ class MBC:
         """Запись в карту памяти"""
         pass
 
+    # === Пакетный перевод адресов ===
+
+    @property
+    def bank_count(self) -> int:
+        """Число банков ROM, доступных через этот MBC"""
+        return min(max(1, -(-len(self.rom_data) // ROM_BANK_SIZE)), self.max_rom_banks)
+
+    def switchable_banks(self, banks) -> np.ndarray:
+        """Маска банков, которые можно подключить в окно 0x4000-0x7FFF"""
+        banks = np.asarray(banks, dtype=np.int64)
+        return banks == 1
+
+    def to_file_offsets(self, banks, addresses) -> np.ndarray:
+        """
+        Смещения файла для массивов (банк, адрес CPU)
+
+        -1 для адресов вне ROM, банков, которые этот MBC не может подключить в окно
+        0x4000-0x7FFF, и смещений за концом файла.
+        """
+        banks = np.asarray(banks, dtype=np.int64)
+        addresses = np.asarray(addresses, dtype=np.int64)
+        offsets = bank_addresses_to_offsets(banks, addresses)
+        in_window = addresses >= SWITCHABLE_START
+        reachable = ~in_window | (self.switchable_banks(banks) & (banks < self.bank_count))
+        return np.where(reachable & (offsets < len(self.rom_data)), offsets, -1)
+
+    def to_bank_addresses(self, offsets) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        (банки, адреса CPU) для массива смещений файла
+
+        Для смещений вне файла или в банках, недоступных этому MBC, банк равен -1.
+        """
+        offsets = np.asarray(offsets, dtype=np.int64)
+        banks, addresses = offsets_to_bank_addresses(offsets)
+        valid = (offsets >= 0) & (offsets < len(self.rom_data)) & (
+            (banks == 0) | (self.switchable_banks(banks) & (banks < self.bank_count)))
+        return np.where(valid, banks, -1), addresses
+
+    def to_file_offset(self, bank: int, address: int) -> int:
+        """Смещение файла для одной пары (банк, адрес CPU); -1, если недоступно"""
+        return int(self.to_file_offsets([bank], [address])[0])
+
 
 class MBC1(MBC):
     """Поддержка MBC1"""
 
+    name = 'MBC1'
+    max_rom_banks = 128
+
     def __init__(self, rom_data: bytes):
         super().__init__(rom_data)
         self.rom_banks = 2
@@ -84,13 +174,105 @@ class MBC1(MBC):
             # Переключение режима памяти
             self.memory_model = value & 0x01
 
+    def switchable_banks(self, banks) -> np.ndarray:
+        # Запись 0 в младшие 5 бит выбирает следующий банк: 0x00/0x20/0x40/0x60 недоступны в окне
+        banks = np.asarray(banks, dtype=np.int64)
+        return (banks > 0) & (banks % 0x20 != 0)
+
+
+class MBC2(MBC):
+    """Поддержка MBC2 (до 16 банков ROM, встроенные 512x4 бит RAM)"""
+
+    name = 'MBC2'
+    max_rom_banks = 16
+
+    def write(self, address: int, value: int):
+        if 0x0000 <= address < 0x4000:
+            # Бит 8 адреса выбирает регистр: 0 - включение RAM, 1 - номер ROM-банка
+            if address & 0x0100:
+                bank = value & 0x0F
+                self.rom_bank = bank if bank else 1
+            else:
+                self.ram_enabled = (value & 0x0F) == 0x0A
+
+    def switchable_banks(self, banks) -> np.ndarray:
+        banks = np.asarray(banks, dtype=np.int64)
+        return banks > 0
+
+
+class MBC3(MBC):
+    """Поддержка MBC3 (до 128 банков ROM, RAM-банки и регистры часов RTC)"""
+
+    name = 'MBC3'
+    max_rom_banks = 128
+
+    def __init__(self, rom_data: bytes):
+        super().__init__(rom_data)
+        self.rtc_register = None
+        self.latch = None
+
+    def write(self, address: int, value: int):
+        if 0x0000 <= address < 0x2000:
+            self.ram_enabled = (value & 0x0F) == 0x0A
+        elif 0x2000 <= address < 0x4000:
+            bank = value & 0x7F
+            self.rom_bank = bank if bank else 1
+        elif 0x4000 <= address < 0x6000:
+            # 0x00-0x03 - RAM-банк, 0x08-0x0C - регистр часов
+            if value <= 0x03:
+                self.ram_bank = value
+                self.rtc_register = None
+            elif 0x08 <= value <= 0x0C:
+                self.rtc_register = value
+        elif 0x6000 <= address < 0x8000:
+            # Фиксация времени: запись 0, затем 1
+            self.latch = value & 0x01
+
+    def switchable_banks(self, banks) -> np.ndarray:
+        banks = np.asarray(banks, dtype=np.int64)
+        return banks > 0
+
+
+class MBC5(MBC):
+    """Поддержка MBC5 (до 512 банков ROM, 9-битный номер; банк 0 можно подключить в окно)"""
+
+    name = 'MBC5'
+    max_rom_banks = 512
+
+    def write(self, address: int, value: int):
+        if 0x0000 <= address < 0x2000:
+            self.ram_enabled = (value & 0x0F) == 0x0A
+        elif 0x2000 <= address < 0x3000:
+            # Младшие 8 бит номера банка
+            self.rom_bank = (self.rom_bank & 0x100) | (value & 0xFF)
+        elif 0x3000 <= address < 0x4000:
+            # 9-й бит номера банка
+            self.rom_bank = (self.rom_bank & 0xFF) | ((value & 0x01) << 8)
+        elif 0x4000 <= address < 0x6000:
+            self.ram_bank = value & 0x0F
+
+    def switchable_banks(self, banks) -> np.ndarray:
+        banks = np.asarray(banks, dtype=np.int64)
+        return banks >= 0
+
+
+# Типы картриджей (байт 0x147 заголовка)
+MBC_TYPES = {
+    0x00: MBC, 0x08: MBC, 0x09: MBC,
+    0x01: MBC1, 0x02: MBC1, 0x03: MBC1,
+    0x05: MBC2, 0x06: MBC2,
+    0x0F: MBC3, 0x10: MBC3, 0x11: MBC3, 0x12: MBC3, 0x13: MBC3,
+    0x19: MBC5, 0x1A: MBC5, 0x1B: MBC5, 0x1C: MBC5, 0x1D: MBC5, 0x1E: MBC5,
+}
+
 
 def create_mbc(rom_data: bytes, mbc_type: int) -> MBC:
     """Создает экземпляр MBC в зависимости от типа"""
-    if mbc_type == 0x00 or mbc_type == 0x08 or mbc_type == 0x09:
-        return MBC(rom_data)  # Без MBC
-    elif mbc_type == 0x01 or mbc_type == 0x02 or mbc_type == 0x03:
-        return MBC1(rom_data)
-    # Добавьте другие типы MBC по мере необходимости
-    else:
-        return MBC(rom_data)  # По умолчанию без MBC
\ No newline at end of file
+    # Неизвестные типы - по умолчанию без MBC
+    return MBC_TYPES.get(mbc_type, MBC)(rom_data)
+
+
+def get_rom_mbc(rom):
+    """MBC загруженного ROM или None (GBA-образы и объекты без MBC)"""
+    mbc = getattr(rom, 'mbc', None)
+    return mbc if isinstance(mbc, MBC) else None
@@ -1,23 +1,198 @@
 """
 ML Classifier for text segment detection in ROM files
-Uses scikit-learn for classifying whether a data block is likely to contain text
+Classifies whether a data block is likely to contain text
+
+The model is not trained at import time: a pre-trained model is loaded from a
+versioned artifact (see MODEL_FORMAT_VERSION) on first use, and training only
+happens when the artifact is missing or incompatible.
+
+Two inference backends are available:
+- 'numpy' (default): the forest flattened into NumPy arrays (CompactForest),
+  evaluated for whole batches of blocks without importing scikit-learn
+- 'sklearn': the original RandomForestClassifier
+
+scikit-learn is only required to train or re-export the model.
 """
 
+import importlib.util
 import logging
-from typing import List, Dict, Tuple
+import os
+import pickle
+import random
+from typing import List, Dict, Tuple, Optional, Sequence, Union
 import numpy as np
 
 logger = logging.getLogger('gb2text.ml_classifier')
 
-# Try to import scikit-learn, fall back to None if not available
-try:
-    from sklearn.ensemble import RandomForestClassifier
-    from sklearn.preprocessing import StandardScaler
-    SKLEARN_AVAILABLE = True
-except ImportError:
-    SKLEARN_AVAILABLE = False
-    RandomForestClassifier = None
-    StandardScaler = None
+# scikit-learn is imported lazily: only availability is checked here, so that
+# importing core.scanner does not pay for the sklearn import
+SKLEARN_AVAILABLE = importlib.util.find_spec('sklearn') is not None
+
+# Bump when features, training data or the artifact layout change
+MODEL_FORMAT_VERSION = 1
+
+FEATURE_COUNT = 10
+
+_MODELS_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    'resources', 'models'
+)
+DEFAULT_MODEL_PATH = os.path.join(_MODELS_DIR, f'segment_classifier_v{MODEL_FORMAT_VERSION}.pkl')
+DEFAULT_COMPACT_MODEL_PATH = os.path.join(_MODELS_DIR, f'segment_classifier_v{MODEL_FORMAT_VERSION}.npz')
+
+BACKEND_NUMPY = 'numpy'
+BACKEND_SKLEARN = 'sklearn'
+DEFAULT_BACKEND = BACKEND_NUMPY
+
+# ML classification works either with the exported compact model or with sklearn
+ML_AVAILABLE = SKLEARN_AVAILABLE or os.path.exists(DEFAULT_COMPACT_MODEL_PATH)
+
+# Rows evaluated per chunk: bounds the (rows x nodes) decision matrix
+_PREDICT_CHUNK = 1 << 12
+
+_CONTROL_EXCLUDED = (0x09, 0x0A, 0x0D)
+_TERMINATORS = (0x00, 0x0A, 0x0D, 0xFF, 0x50)  # NULL, LF, CR, FF, common terminator
+
+
+class CompactForest:
+    """
+    Random forest flattened into NumPy arrays
+
+    All trees share one node table. Leaves loop onto themselves (threshold=+inf),
+    so a batch is evaluated by advancing every (row, tree) cursor `depth` times.
+    Inputs are standardized and cast to float32 exactly like sklearn does,
+    so probabilities match RandomForestClassifier.predict_proba.
+    """
+
+    def __init__(self, feature: np.ndarray, threshold: np.ndarray, left: np.ndarray,
+                 right: np.ndarray, value: np.ndarray, roots: np.ndarray, depth: int,
+                 mean: np.ndarray, scale: np.ndarray):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.depth = int(depth)
+        self.mean = mean
+        self.scale = scale
+
+    @classmethod
+    def from_sklearn(cls, model, scaler) -> 'CompactForest':
+        """Flatten a fitted RandomForestClassifier + StandardScaler"""
+        positive = list(model.classes_).index(1)
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        depth = 0
+
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            count = tree.node_count
+            ids = np.arange(count)
+            leaf = tree.children_left == -1
+
+            features.append(np.where(leaf, 0, tree.feature))
+            thresholds.append(np.where(leaf, np.inf, tree.threshold))
+            lefts.append(np.where(leaf, ids, tree.children_left) + offset)
+            rights.append(np.where(leaf, ids, tree.children_right) + offset)
+            counts = tree.value[:, 0, :]
+            values.append(counts[:, positive] / counts.sum(axis=1))
+            roots.append(offset)
+
+            offset += count
+            depth = max(depth, tree.max_depth)
+
+        return cls(
+            feature=np.concatenate(features).astype(np.int32),
+            threshold=np.concatenate(thresholds).astype(np.float64),
+            left=np.concatenate(lefts).astype(np.int32),
+            right=np.concatenate(rights).astype(np.int32),
+            value=np.concatenate(values).astype(np.float64),
+            roots=np.array(roots, dtype=np.int32),
+            depth=depth,
+            mean=np.asarray(scaler.mean_, dtype=np.float64),
+            scale=np.asarray(scaler.scale_, dtype=np.float64),
+        )
+
+    def save(self, path: str) -> str:
+        """Write the model as an .npz artifact (no pickled objects)"""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'wb') as f:
+            np.savez_compressed(
+                f,
+                format_version=np.array(MODEL_FORMAT_VERSION),
+                feature_count=np.array(FEATURE_COUNT),
+                feature=self.feature, threshold=self.threshold,
+                left=self.left, right=self.right, value=self.value,
+                roots=self.roots, depth=np.array(self.depth),
+                mean=self.mean, scale=self.scale,
+            )
+        return path
+
+    @classmethod
+    def load(cls, path: str) -> Optional['CompactForest']:
+        """Load an .npz artifact; returns None if it is missing or incompatible"""
+        if not path or not os.path.exists(path):
+            return None
+
+        try:
+            with np.load(path, allow_pickle=False) as npz:
+                if int(npz['format_version']) != MODEL_FORMAT_VERSION or \
+                        int(npz['feature_count']) != FEATURE_COUNT:
+                    logger.warning(f"Incompatible compact ML model {path}")
+                    return None
+                return cls(
+                    feature=npz['feature'], threshold=npz['threshold'],
+                    left=npz['left'], right=npz['right'], value=npz['value'],
+                    roots=npz['roots'], depth=int(npz['depth']),
+                    mean=npz['mean'], scale=npz['scale'],
+                )
+        except Exception as e:
+            logger.warning(f"Failed to load compact ML model {path}: {e}")
+            return None
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """Probability of the positive (text) class for each row of X"""
+        X = np.asarray(X, dtype=np.float64).reshape(-1, len(self.mean))
+        result = np.empty(len(X), dtype=np.float64)
+        node_count = len(self.feature)
+
+        for begin in range(0, len(X), _PREDICT_CHUNK):
+            chunk = ((X[begin:begin + _PREDICT_CHUNK] - self.mean) / self.scale).astype(np.float32)
+            # Every node's split decision for every row, flattened for 1-D gathers
+            decisions = (chunk[:, self.feature] <= self.threshold).ravel()
+            row_base = (np.arange(len(chunk)) * node_count)[:, None]
+            nodes = np.broadcast_to(self.roots, (len(chunk), len(self.roots)))
+            for _ in range(self.depth):
+                go_left = decisions[row_base + nodes]
+                nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+            result[begin:begin + len(chunk)] = self.value[nodes].mean(axis=1)
+
+        return result
+
+
+def _as_block_matrix(blocks: Union[np.ndarray, Sequence[bytes]]) -> List[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Group blocks into (indices, uint8 matrix) pairs of equal block length
+    so that features can be computed row-wise
+    """
+    if isinstance(blocks, np.ndarray):
+        matrix = blocks.reshape(1, -1) if blocks.ndim == 1 else blocks
+        return [(np.arange(len(matrix)), matrix.astype(np.uint8, copy=False))]
+
+    by_length: Dict[int, List[int]] = {}
+    for index, block in enumerate(blocks):
+        by_length.setdefault(len(block), []).append(index)
+
+    groups = []
+    for length, indices in by_length.items():
+        if length == 0:
+            matrix = np.zeros((len(indices), 0), dtype=np.uint8)
+        else:
+            matrix = np.frombuffer(b''.join(bytes(blocks[i]) for i in indices),
+                                   dtype=np.uint8).reshape(len(indices), length)
+        groups.append((np.array(indices), matrix))
+    return groups
 
 
 class SegmentMLClassifier:
@@ -25,31 +200,116 @@ class SegmentMLClassifier:
     ML-based classifier for detecting text segments in ROM data
     Uses Random Forest for binary classification (text vs non-text)
     """
-    
-    def __init__(self):
+
+    def __init__(self, model_path: Optional[str] = None, pretrained: bool = True,
+                 backend: str = DEFAULT_BACKEND, compact_model_path: Optional[str] = None):
+        if backend not in (BACKEND_NUMPY, BACKEND_SKLEARN):
+            raise ValueError(f"Unknown ML backend: {backend}")
+
         self.model = None
         self.scaler = None
+        self.compact_model: Optional[CompactForest] = None
         self.is_trained = False
+        self.model_path = model_path or DEFAULT_MODEL_PATH
+        self.compact_model_path = compact_model_path or DEFAULT_COMPACT_MODEL_PATH
+        self.pretrained = pretrained
+        self.backend = backend
         self._initialize_model()
-    
+
     def _initialize_model(self):
-        """Initialize the ML model"""
+        """Initialize the ML model: load the pre-trained artifact or train a new one"""
+        if self.backend == BACKEND_NUMPY and self.pretrained:
+            self.compact_model = CompactForest.load(self.compact_model_path)
+            if self.compact_model is not None:
+                self.is_trained = True
+                logger.info(f"Loaded compact ML model v{MODEL_FORMAT_VERSION} from {self.compact_model_path}")
+                return
+
         if not SKLEARN_AVAILABLE:
             logger.warning("scikit-learn not available, ML classification disabled")
             return
-        
-        # Initialize Random Forest classifier
-        self.model = RandomForestClassifier(
-            n_estimators=100,
-            max_depth=10,
-            random_state=42,
-            n_jobs=-1
-        )
-        self.scaler = StandardScaler()
-        
-        # Train on initial dataset
-        self._train_initial_model()
-    
+
+        if not (self.pretrained and self.load_model(self.model_path)):
+            from sklearn.ensemble import RandomForestClassifier
+            from sklearn.preprocessing import StandardScaler
+
+            # Initialize Random Forest classifier
+            # n_jobs=1: single-block predictions gain nothing from a process pool
+            # and batch workers must not grab every core
+            self.model = RandomForestClassifier(
+                n_estimators=100,
+                max_depth=10,
+                random_state=42,
+                n_jobs=1
+            )
+            self.scaler = StandardScaler()
+
+            # Train on initial dataset
+            self._train_initial_model()
+
+        if self.backend == BACKEND_NUMPY and self.is_trained:
+            self.compact_model = CompactForest.from_sklearn(self.model, self.scaler)
+
+    def load_model(self, path: str) -> bool:
+        """
+        Load a pre-trained sklearn model from a versioned artifact
+        Returns True if the model was loaded and is compatible
+        """
+        if not path or not os.path.exists(path):
+            logger.debug(f"ML model artifact not found: {path}")
+            return False
+
+        try:
+            with open(path, 'rb') as f:
+                payload = pickle.load(f)
+        except Exception as e:
+            logger.warning(f"Failed to load ML model artifact {path}: {e}")
+            return False
+
+        if not isinstance(payload, dict) or payload.get('format_version') != MODEL_FORMAT_VERSION:
+            logger.warning(f"Incompatible ML model artifact {path}, retraining")
+            return False
+
+        self.model = payload['model']
+        self.scaler = payload['scaler']
+        self.model.n_jobs = 1
+        self.is_trained = True
+        logger.info(f"Loaded pre-trained ML model v{MODEL_FORMAT_VERSION} from {path}")
+        return True
+
+    def save_model(self, path: Optional[str] = None) -> str:
+        """Serialize the trained sklearn model to a versioned artifact"""
+        if not self.is_trained or self.model is None:
+            raise RuntimeError("ML model is not trained")
+
+        import sklearn
+
+        path = path or self.model_path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        payload = {
+            'format_version': MODEL_FORMAT_VERSION,
+            'sklearn_version': sklearn.__version__,
+            'feature_count': FEATURE_COUNT,
+            'model': self.model,
+            'scaler': self.scaler,
+        }
+        with open(path, 'wb') as f:
+            pickle.dump(payload, f, protocol=4)
+
+        logger.info(f"ML model saved to {path}")
+        return path
+
+    def save_compact_model(self, path: Optional[str] = None) -> str:
+        """Export the model in the dependency-free NumPy format"""
+        if self.compact_model is None:
+            if not self.is_trained or self.model is None:
+                raise RuntimeError("ML model is not trained")
+            self.compact_model = CompactForest.from_sklearn(self.model, self.scaler)
+
+        path = self.compact_model.save(path or self.compact_model_path)
+        logger.info(f"Compact ML model saved to {path}")
+        return path
+
     def _extract_features(self, data: bytes) -> np.ndarray:
         """
         Extract features from a block of data for ML classification
@@ -62,78 +322,81 @@ class SegmentMLClassifier:
         - High byte ratio (>0x80)
         """
         if len(data) == 0:
-            return np.zeros(10)
-        
-        features = []
-        
+            return np.zeros(FEATURE_COUNT)
+
+        block = np.frombuffer(bytes(data), dtype=np.uint8).reshape(1, -1)
+        return self._extract_features_batch(block)[0]
+
+    def _extract_features_batch(self, blocks: np.ndarray) -> np.ndarray:
+        """
+        Vectorized feature extraction for a (n_blocks, block_size) uint8 matrix
+        Returns a (n_blocks, 10) matrix, one row per block
+        """
+        n, length = blocks.shape
+        if length == 0:
+            return np.zeros((n, FEATURE_COUNT))
+
+        features = np.empty((n, FEATURE_COUNT), dtype=np.float64)
+        printable = (blocks >= 0x20) & (blocks <= 0x7E)
+
         # 1. ASCII printable ratio (0x20-0x7E)
-        printable = sum(1 for b in data if 0x20 <= b <= 0x7E)
-        features.append(printable / len(data))
-        
+        features[:, 0] = printable.mean(axis=1)
+
         # 2. Extended ASCII ratio (0xA0-0xFF)
-        extended = sum(1 for b in data if 0xA0 <= b <= 0xFF)
-        features.append(extended / len(data))
-        
+        features[:, 1] = (blocks >= 0xA0).mean(axis=1)
+
         # 3. Null byte ratio
-        nulls = data.count(0x00)
-        features.append(nulls / len(data))
-        
+        features[:, 2] = (blocks == 0x00).mean(axis=1)
+
         # 4. Control characters ratio (0x01-0x1F except TAB=0x09, LF=0x0A, CR=0x0D)
-        control = sum(1 for b in data if 0x01 <= b <= 0x1F and b not in [0x09, 0x0A, 0x0D])
-        features.append(control / len(data))
-        
+        control = (blocks >= 0x01) & (blocks <= 0x1F) & ~np.isin(blocks, _CONTROL_EXCLUDED)
+        features[:, 3] = control.mean(axis=1)
+
         # 5. Known terminators ratio (common text terminators in GB games)
-        terminators = [0x00, 0x0A, 0x0D, 0xFF, 0x50]  # NULL, LF, CR, FF, common terminator
-        term_count = sum(1 for b in data if b in terminators)
-        features.append(term_count / len(data))
-        
-        # 6. Byte entropy (simplified)
-        byte_counts = [0] * 256
-        for b in data:
-            byte_counts[b] += 1
-        entropy = 0
-        for count in byte_counts:
-            if count > 0:
-                p = count / len(data)
-                entropy -= p * np.log2(p)
-        features.append(entropy / 8.0)  # Normalize to 0-1
-        
+        features[:, 4] = np.isin(blocks, _TERMINATORS).mean(axis=1)
+
+        # 6. Byte entropy: with rows sorted, every byte belongs to a run of equal
+        # values of length c, and H = -(1/L) * sum(log2(c / L)) over all bytes
+        ordered = np.sort(blocks, axis=1)
+        new_run = np.ones((n, length), dtype=bool)
+        new_run[:, 1:] = ordered[:, 1:] != ordered[:, :-1]
+        positions = np.arange(length)
+        run_start = np.maximum.accumulate(np.where(new_run, positions, 0), axis=1)
+        run_end_mask = np.ones((n, length), dtype=bool)
+        run_end_mask[:, :-1] = new_run[:, 1:]
+        run_end = np.minimum.accumulate(
+            np.where(run_end_mask, positions, length - 1)[:, ::-1], axis=1)[:, ::-1]
+        run_length = run_end - run_start + 1
+        entropy = -np.log2(run_length / length).sum(axis=1) / length
+        features[:, 5] = entropy / 8.0  # Normalize to 0-1
+
         # 7. Repetition ratio (consecutive identical bytes)
-        repetitions = 0
-        for i in range(1, len(data)):
-            if data[i] == data[i-1]:
-                repetitions += 1
-        features.append(repetitions / max(1, len(data) - 1))
-        
+        repetitions = (blocks[:, 1:] == blocks[:, :-1]).sum(axis=1)
+        features[:, 6] = repetitions / max(1, length - 1)
+
         # 8. Unique byte ratio
-        unique = len(set(data))
-        features.append(unique / 256.0)
-        
+        features[:, 7] = new_run.sum(axis=1) / 256.0
+
         # 9. Text-like pattern score (sequences of printable chars)
-        text_sequences = 0
-        in_sequence = False
-        for b in data:
-            if 0x20 <= b <= 0x7E:
-                if not in_sequence:
-                    text_sequences += 1
-                    in_sequence = True
-            else:
-                in_sequence = False
-        features.append(text_sequences / max(1, len(data) // 4))
-        
+        sequence_starts = printable.copy()
+        sequence_starts[:, 1:] &= ~printable[:, :-1]
+        features[:, 8] = sequence_starts.sum(axis=1) / max(1, length // 4)
+
         # 10. Average byte value
-        avg_byte = sum(data) / len(data) / 255.0
-        features.append(avg_byte)
-        
-        return np.array(features)
-    
+        features[:, 9] = blocks.mean(axis=1) / 255.0
+
+        return features
+
     def _train_initial_model(self):
         """Train on synthetic labeled data"""
         if not SKLEARN_AVAILABLE:
             return
-        
+
         logger.info("Training initial ML model with synthetic data...")
-        
+
+        # Seeded so that the exported artifact is reproducible
+        rng = random.Random(42)
+
         # Generate synthetic training data
         # Positive examples (text-like)
         text_samples = []
@@ -144,66 +407,107 @@ class SegmentMLClassifier:
             text_data = bytes(b ^ (i % 256) for i, b in enumerate(text_data))
             features = self._extract_features(text_data)
             text_samples.append(features)
-        
+
         # Negative examples (non-text)
         nontext_samples = []
         for _ in range(500):
             # Random bytes (code-like)
-            import random
-            code_data = bytes([random.randint(0, 255) for _ in range(16)])
+            code_data = bytes([rng.randint(0, 255) for _ in range(16)])
             features = self._extract_features(code_data)
             nontext_samples.append(features)
-        
+
         # Combine
         X = np.array(text_samples + nontext_samples)
         y = np.array([1] * 500 + [0] * 500)
-        
+
         # Scale features
         X_scaled = self.scaler.fit_transform(X)
-        
+
         # Train
         self.model.fit(X_scaled, y)
         self.is_trained = True
-        
+
         logger.info("Initial ML model trained successfully")
-    
+
+    def _predict_features(self, features: np.ndarray) -> np.ndarray:
+        """Run the active backend on a feature matrix"""
+        if self.compact_model is not None:
+            return self.compact_model.predict_proba(features)
+        return self.model.predict_proba(self.scaler.transform(features))[:, 1]
+
     def predict(self, data: bytes) -> float:
         """
         Predict if a block of data is likely text
         Returns probability (0-1)
         """
-        if not SKLEARN_AVAILABLE or not self.is_trained:
+        if not self.is_trained:
             # Fall back to heuristic
             return self._heuristic_score(data)
-        
+
         features = self._extract_features(data).reshape(1, -1)
-        features_scaled = self.scaler.transform(features)
-        
+
         # Get probability of being text
-        prob = self.model.predict_proba(features_scaled)[0][1]
-        
-        return prob
-    
+        return float(self._predict_features(features)[0])
+
+    def predict_batch(self, blocks: Union[np.ndarray, Sequence[bytes]]) -> np.ndarray:
+        """
+        Predict text probability for many blocks in one call
+
+        Args:
+            blocks: a (n_blocks, block_size) uint8 matrix or a sequence of byte blocks
+
+        Returns:
+            array of probabilities (0-1), one per block
+        """
+        groups = _as_block_matrix(blocks)
+        total = sum(len(indices) for indices, _ in groups)
+        scores = np.zeros(total, dtype=np.float64)
+
+        for indices, matrix in groups:
+            if matrix.shape[1] == 0:
+                continue
+            if self.is_trained:
+                scores[indices] = self._predict_features(self._extract_features_batch(matrix))
+            else:
+                scores[indices] = self._heuristic_scores_batch(matrix)
+
+        return scores
+
+    def predict_buffer(self, data: bytes, start: int, end: int, block_size: int = 16) -> np.ndarray:
+        """Score consecutive blocks of data[start:end] (a trailing partial block is ignored)"""
+        count = max(0, (min(end, len(data)) - start) // block_size)
+        if count == 0:
+            return np.zeros(0, dtype=np.float64)
+        matrix = np.frombuffer(data, dtype=np.uint8, count=count * block_size, offset=start)
+        return self.predict_batch(matrix.reshape(count, block_size))
+
     def _heuristic_score(self, data: bytes) -> float:
         """Fallback heuristic scoring when ML is not available"""
         if len(data) == 0:
             return 0.0
-        
+
+        block = np.frombuffer(bytes(data), dtype=np.uint8).reshape(1, -1)
+        return float(self._heuristic_scores_batch(block)[0])
+
+    def _heuristic_scores_batch(self, blocks: np.ndarray) -> np.ndarray:
+        """Vectorized heuristic score for a (n_blocks, block_size) uint8 matrix"""
+        if blocks.shape[1] == 0:
+            return np.zeros(len(blocks))
+
         # Basic readability score
-        printable = sum(1 for b in data if 0x20 <= b <= 0x7E)
-        readability = printable / len(data)
-        
+        readability = ((blocks >= 0x20) & (blocks <= 0x7E)).mean(axis=1)
+
         # Penalize nulls
-        nulls = data.count(0x00) / len(data)
-        
+        nulls = (blocks == 0x00).mean(axis=1)
+
         # Penalize high control character ratio
-        control = sum(1 for b in data if 0x01 <= b <= 0x1F and b not in [0x09, 0x0A, 0x0D])
-        control_ratio = control / len(data)
-        
+        control = (blocks >= 0x01) & (blocks <= 0x1F) & ~np.isin(blocks, _CONTROL_EXCLUDED)
+        control_ratio = control.mean(axis=1)
+
         score = readability - (nulls * 0.5) - (control_ratio * 0.3)
-        
-        return max(0.0, min(1.0, score))
-    
+
+        return np.clip(score, 0.0, 1.0)
+
     def analyze_segments(self, rom_data: bytes, start: int, end: int, block_size: int = 16) -> Dict:
         """
         Analyze a range of ROM data and return segment quality scores
@@ -213,43 +517,63 @@ class SegmentMLClassifier:
             'ml_scores': [],
             'heuristic_scores': []
         }
-        
-        i = start
-        while i + block_size <= end:
-            block = rom_data[i:i + block_size]
-            
-            # Get ML prediction
-            ml_score = self.predict(block)
-            results['ml_scores'].append(ml_score)
-            
-            # Get heuristic score
-            heuristic = self._heuristic_score(block)
-            results['heuristic_scores'].append(heuristic)
-            
-            # Combined score (weighted average)
-            if SKLEARN_AVAILABLE and self.is_trained:
-                combined = ml_score * 0.7 + heuristic * 0.3
-            else:
-                combined = heuristic
-            
-            if combined > 0.5:  # Threshold for text-like
-                results['segments'].append({
-                    'start': i,
-                    'end': i + block_size,
-                    'score': combined,
-                    'ml_score': ml_score,
-                    'heuristic': heuristic
-                })
-            
-            i += block_size
-        
+
+        count = max(0, (min(end, len(rom_data)) - start) // block_size)
+        if count == 0:
+            return results
+
+        matrix = np.frombuffer(bytes(rom_data[start:start + count * block_size]),
+                               dtype=np.uint8).reshape(count, block_size)
+        ml_scores = self.predict_batch(matrix)
+        heuristics = self._heuristic_scores_batch(matrix)
+
+        # Combined score (weighted average)
+        if self.is_trained:
+            combined = ml_scores * 0.7 + heuristics * 0.3
+        else:
+            combined = heuristics
+
+        results['ml_scores'] = ml_scores.tolist()
+        results['heuristic_scores'] = heuristics.tolist()
+
+        for index in np.flatnonzero(combined > 0.5):  # Threshold for text-like
+            block_start = start + int(index) * block_size
+            results['segments'].append({
+                'start': block_start,
+                'end': block_start + block_size,
+                'score': float(combined[index]),
+                'ml_score': float(ml_scores[index]),
+                'heuristic': float(heuristics[index])
+            })
+
         return results
 
 
-# Global instance
-ml_classifier = SegmentMLClassifier()
+# Global instance (created lazily on first use)
+_global_classifier: Optional[SegmentMLClassifier] = None
 
 
 def get_ml_classifier() -> SegmentMLClassifier:
     """Get the global ML classifier instance"""
-    return ml_classifier
+    global _global_classifier
+    if _global_classifier is None:
+        _global_classifier = SegmentMLClassifier()
+    return _global_classifier
+
+
+def export_pretrained_model(path: Optional[str] = None, compact_path: Optional[str] = None) -> Tuple[str, str]:
+    """
+    Train the model from scratch and write both versioned artifacts
+    (sklearn pickle and compact NumPy model)
+    Used to regenerate resources/models after changing features or training data
+    """
+    classifier = SegmentMLClassifier(pretrained=False, backend=BACKEND_SKLEARN)
+    return (classifier.save_model(path or DEFAULT_MODEL_PATH),
+            classifier.save_compact_model(compact_path or DEFAULT_COMPACT_MODEL_PATH))
+
+
+if __name__ == '__main__':
+    # python -m core.ml_classifier  -> regenerate resources/models artifacts
+    logging.basicConfig(level=logging.INFO)
+    for artifact in export_pretrained_model():
+        print(artifact)
@@ -9,11 +9,53 @@
 """
 
 import logging
-from typing import Dict, List, Tuple, Optional, Set
+from functools import lru_cache
+from typing import Dict, List, Tuple, Optional, Set, Iterable
 from collections import Counter
 
+import numpy as np
+
 logger = logging.getLogger('gb2text.multi_charmap')
 
+# Печатаемые ASCII-байты (0x20-0x7E)
+_ASCII_RANGE = np.arange(0x20, 0x7F)
+
+
+def byte_histogram(data: bytes) -> np.ndarray:
+    """
+    Строит гистограмму байтов (256 корзин) за один проход по данным
+
+    Все оценки покрытия считаются по гистограмме, поэтому стоимость
+    оценки таблицы не зависит от размера данных.
+    """
+    return np.bincount(np.frombuffer(data, dtype=np.uint8), minlength=256)
+
+
+def coverage_mask(char_map: Dict[int, str]) -> np.ndarray:
+    """
+    Возвращает 256-битную маску покрытия таблицы: mask[b] == True, если байт b есть в таблице
+
+    Многобайтовые коды (> 0xFF) в маску не входят: покрытие считается по одиночным байтам.
+    """
+    mask = np.zeros(256, dtype=bool)
+    codes = np.fromiter((code for code in char_map if isinstance(code, int) and 0 <= code <= 0xFF),
+                        dtype=np.int64)
+    mask[codes] = True
+    return mask
+
+
+def coverage_scores(histogram: np.ndarray, masks: Iterable[np.ndarray]) -> np.ndarray:
+    """
+    Доля данных, покрытая каждой из таблиц: скалярное произведение гистограммы и маски
+
+    Оценка N таблиц стоит O(256·N) независимо от длины данных.
+    """
+    total = int(histogram.sum())
+    matrix = np.array(list(masks), dtype=bool).reshape(-1, 256)
+    if total == 0:
+        return np.zeros(len(matrix))
+    return (matrix @ histogram) / total
+
 
 class CharTable:
     """Представляет одну таблицу символов"""
@@ -23,6 +65,8 @@ class CharTable:
         self.char_map = char_map
         self.confidence = confidence
         self.covered_ranges = self._analyze_covered_ranges()
+        self.mask = coverage_mask(char_map)
+        self._translation: Optional[List[str]] = None
         
     def _analyze_covered_ranges(self) -> Set[Tuple[int, int]]:
         """Анализирует диапазоны символов в таблице"""
@@ -46,6 +90,18 @@ class CharTable:
         """Проверяет, покрывает ли таблица данный байт"""
         return byte_val in self.char_map
     
+    @property
+    def translation(self) -> List[str]:
+        """
+        Таблица трансляции для str.translate: 256 строк, по одной на байт
+        
+        Байты вне таблицы переводятся в '[XX]'. Строится один раз, после чего
+        участок данных декодируется как data.decode('latin-1').translate(table.translation).
+        """
+        if self._translation is None:
+            self._translation = [self.char_map.get(b, f'[{b:02X}]') for b in range(256)]
+        return self._translation
+    
     def __repr__(self):
         return f"CharTable('{self.name}', {len(self.char_map)} chars, conf={self.confidence:.2f})"
 
@@ -59,6 +115,20 @@ class MultiCharmapSegment:
         self.tables: List[CharTable] = []
         self.encoding_map: Dict[int, int] = {}  # byte -> table_index
         self.segments: List[Tuple[int, int, int]] = []  # (start, end, table_index)
+        self._histogram: Optional[np.ndarray] = None
+        self._histogram_source: Optional[bytes] = None
+        # Кэш для текущего набора таблиц: байт -> индекс таблицы и общая таблица трансляции
+        self._lookup_key: Optional[Tuple[int, ...]] = None
+        self._table_lookup: Optional[np.ndarray] = None
+        self._fallback_translation: Optional[List[str]] = None
+        
+    @property
+    def histogram(self) -> np.ndarray:
+        """Гистограмма байтов данных сегмента (строится один раз)"""
+        if self._histogram is None or self._histogram_source is not self.data:
+            self._histogram = byte_histogram(self.data)
+            self._histogram_source = self.data
+        return self._histogram
         
     def add_table(self, table: CharTable):
         """Добавляет таблицу символов в сегмент"""
@@ -95,8 +165,7 @@ class MultiCharmapSegment:
         if not self.data:
             return 0.0
             
-        covered = sum(1 for b in self.data if b in char_map)
-        return covered / len(self.data)
+        return float(coverage_scores(self.histogram, [coverage_mask(char_map)])[0])
     
     def _generate_table_name(self, char_map: Dict[int, str]) -> str:
         """Генерирует имя таблицы на основе анализа символов"""
@@ -119,14 +188,42 @@ class MultiCharmapSegment:
             
         return "Custom Encoding"
     
+    def _get_table_lookup(self) -> np.ndarray:
+        """
+        Массив из 256 элементов: байт -> индекс первой таблицы, содержащей байт (-1 - ни одной)
+        
+        Строится один раз на набор таблиц по их маскам покрытия.
+        """
+        key = tuple(id(table) for table in self.tables)
+        if self._table_lookup is None or self._lookup_key != key:
+            lookup = np.full(256, -1, dtype=np.int32)
+            if self.tables:
+                masks = np.array([table.mask for table in self.tables], dtype=bool)
+                covered = masks.any(axis=0)
+                lookup[covered] = masks.argmax(axis=0)[covered]
+            self._table_lookup = lookup
+            self._fallback_translation = None
+            self._lookup_key = key
+        return self._table_lookup
+    
+    def _get_fallback_translation(self) -> List[str]:
+        """Таблица трансляции, где каждый байт берётся из первой покрывающей его таблицы"""
+        lookup = self._get_table_lookup()
+        if self._fallback_translation is None:
+            self._fallback_translation = [
+                self.tables[index].translation[b] if index >= 0 else f'[{b:02X}]'
+                for b, index in enumerate(lookup.tolist())
+            ]
+        return self._fallback_translation
+    
     def build_encoding_map(self):
         """Строит карту кодирования: байт -> индекс таблицы"""
         self.encoding_map.clear()
         
-        for i, table in enumerate(self.tables):
-            for byte_val in self.data:
-                if byte_val in table.char_map and byte_val not in self.encoding_map:
-                    self.encoding_map[byte_val] = i
+        lookup = self._get_table_lookup()
+        for byte_val in np.flatnonzero(self.histogram).tolist():
+            if lookup[byte_val] >= 0:
+                self.encoding_map[byte_val] = int(lookup[byte_val])
                     
     def segment_by_table(self) -> List[Tuple[int, int, int]]:
         """
@@ -139,56 +236,28 @@ class MultiCharmapSegment:
             self.build_encoding_map()
             
         self.segments.clear()
-        current_table = None
-        segment_start = 0
+        if not self.data:
+            return self.segments
         
-        for i, byte_val in enumerate(self.data):
-            table_idx = self.encoding_map.get(byte_val, -1)
-            
-            if table_idx != current_table:
-                if current_table is not None:
-                    self.segments.append((segment_start, i, current_table))
-                current_table = table_idx
-                segment_start = i
-                
-        # Добавляем последний сегмент
-        if current_table is not None:
-            self.segments.append((segment_start, len(self.data), current_table))
-            
+        # Индекс таблицы для каждого байта, затем run-length: границы там, где индекс меняется
+        table_indices = self._get_table_lookup()[np.frombuffer(self.data, dtype=np.uint8)]
+        starts = np.concatenate(([0], np.flatnonzero(np.diff(table_indices)) + 1))
+        ends = np.append(starts[1:], len(self.data))
+        
+        self.segments.extend(zip(starts.tolist(), ends.tolist(), table_indices[starts].tolist()))
         return self.segments
     
     def decode_segment(self, start: int, end: int, table_index: int) -> str:
         """Декодирует сегмент данных с использованием указанной таблицы"""
-        if table_index >= len(self.tables):
+        if not 0 <= table_index < len(self.tables):
             return self.decode_with_fallback(start, end)
             
-        table = self.tables[table_index]
-        result = []
-        
-        for i in range(start, end):
-            byte_val = self.data[i]
-            char = table.char_map.get(byte_val, f'[{byte_val:02X}]')
-            result.append(char)
-            
-        return ''.join(result)
+        return self.data[start:end].decode('latin-1').translate(self.tables[table_index].translation)
     
     def decode_with_fallback(self, start: int, end: int) -> str:
         """Декодирует с использованием fallback для неизвестных символов"""
-        result = []
-        
-        for i in range(start, end):
-            byte_val = self.data[i]
-            
-            # Пробуем найти в любой таблице
-            for table in self.tables:
-                if byte_val in table.char_map:
-                    result.append(table.char_map[byte_val])
-                    break
-            else:
-                # Fallback
-                result.append(f'[{byte_val:02X}]')
-                
-        return ''.join(result)
+        # Каждый байт берётся из первой таблицы, которая его содержит, иначе '[XX]'
+        return self.data[start:end].decode('latin-1').translate(self._get_fallback_translation())
     
     def full_decode(self) -> List[Tuple[str, int]]:
         """
@@ -198,7 +267,17 @@ class MultiCharmapSegment:
             Список кортежей (decoded_text, table_index)
         """
         segments = self.segment_by_table()
-        return [(self.decode_segment(s, e, t), t) for s, e, t in segments]
+        if not segments:
+            return []
+        
+        # Внутри участка все байты относятся к его таблице (первой покрывающей),
+        # поэтому весь буфер транслируется один раз, а участки вырезаются по смещениям символов
+        translation = self._get_fallback_translation()
+        text = self.data.decode('latin-1').translate(translation)
+        char_lengths = np.array([len(chars) for chars in translation], dtype=np.int64)
+        char_offsets = np.concatenate(([0], np.cumsum(char_lengths[np.frombuffer(self.data, dtype=np.uint8)]))).tolist()
+        
+        return [(text[char_offsets[s]:char_offsets[e]], t) for s, e, t in segments]
 
 
 def analyze_custom_encoding(data: bytes) -> Dict[str, any]:
@@ -211,12 +290,14 @@ def analyze_custom_encoding(data: bytes) -> Dict[str, any]:
         - 'confidence': уверенность в определении (0-1)
         - 'character_distribution': распределение символов
         - 'possible_tables': список возможных таблиц символов
+        - 'sjis_pair_counts': частоты пар Shift-JIS {код пары: количество}
     """
     result = {
         'type': 'unknown',
         'confidence': 0.0,
         'character_distribution': {},
-        'possible_tables': []
+        'possible_tables': [],
+        'sjis_pair_counts': {}
     }
     
     if not data:
@@ -227,8 +308,9 @@ def analyze_custom_encoding(data: bytes) -> Dict[str, any]:
     result['character_distribution'] = dict(freq.most_common(50))
     
     # Определяем тип кодировки
-    ascii_count = sum(1 for b in data if 0x20 <= b <= 0x7E)
-    high_byte_count = sum(1 for b in data if b >= 0x80)
+    histogram = byte_histogram(data)
+    ascii_count = int(histogram[0x20:0x7F].sum())
+    high_byte_count = int(histogram[0x80:].sum())
     
     ascii_ratio = ascii_count / len(data)
     
@@ -244,49 +326,75 @@ def analyze_custom_encoding(data: bytes) -> Dict[str, any]:
         result['confidence'] = 0.5
         
     # Ищем возможные таблицы символов
-    possible_tables = _detect_possible_charmaps(data)
+    sjis_pair_counts = count_sjis_pairs(data)
+    result['sjis_pair_counts'] = sjis_pair_counts
+    possible_tables = _detect_possible_charmaps(data, histogram, sjis_pair_counts)
     result['possible_tables'] = possible_tables
     
     return result
 
 
-def _detect_possible_charmaps(data: bytes) -> List[Dict[int, str]]:
+def _detect_possible_charmaps(data: bytes, histogram: Optional[np.ndarray] = None,
+                              sjis_pair_counts: Optional[Dict[int, int]] = None) -> List[Dict[int, str]]:
     """Обнаруживает возможные таблицы символов в данных"""
     tables = []
+    if histogram is None:
+        histogram = byte_histogram(data)
     
     # Проверяем наличие ASCII
-    ascii_chars = {b: chr(b) for b in range(0x20, 0x7F) if bytes([b]) in data}
+    ascii_chars = {int(b): chr(b) for b in _ASCII_RANGE[histogram[0x20:0x7F] > 0]}
     if len(ascii_chars) > 10:
         tables.append(ascii_chars)
         
     # Проверяем наличие Shift-JIS последовательностей
-    sjis_pairs = _detect_sjis_sequences(data)
+    if sjis_pair_counts is None:
+        sjis_pair_counts = count_sjis_pairs(data)
+    sjis_pairs = {code: _decode_sjis_pair(code) for code in sjis_pair_counts}
     if sjis_pairs:
         tables.append(sjis_pairs)
         
     return tables
 
 
+@lru_cache(maxsize=None)
+def _decode_sjis_pair(code: int) -> str:
+    """Декодирует пару байтов Shift-JIS (код first * 256 + second); результат кэшируется"""
+    return bytes((code >> 8, code & 0xFF)).decode('shift-jis', errors='ignore')
+
+
+def count_sjis_pairs(data: bytes) -> Dict[int, int]:
+    """
+    Считает частоты декодируемых пар Shift-JIS (ведущий + завершающий байт)
+    
+    Все позиции проверяются масками ведущего/завершающего байта за один проход,
+    а каждая уникальная пара декодируется один раз, так что функция подходит
+    для анализа целых банков.
+    
+    Returns:
+        Словарь {first * 256 + second: количество вхождений}
+    """
+    if len(data) < 2:
+        return {}
+        
+    array = np.frombuffer(data, dtype=np.uint8)
+    first, second = array[:-1], array[1:]
+    
+    # Валидные ведущие и завершающие байты Shift-JIS
+    lead = ((first >= 0x81) & (first <= 0x9F)) | ((first >= 0xE0) & (first <= 0xEF))
+    trail = ((second >= 0x40) & (second <= 0x7E)) | ((second >= 0x80) & (second <= 0xFC))
+    codes = first[lead & trail].astype(np.int32) * 256 + second[lead & trail]
+    
+    unique_codes, counts = np.unique(codes, return_counts=True)
+    return {
+        code: count
+        for code, count in zip(unique_codes.tolist(), counts.tolist())
+        if _decode_sjis_pair(code)
+    }
+
+
 def _detect_sjis_sequences(data: bytes) -> Dict[int, str]:
     """Обнаруживает Shift-JIS последовательности"""
-    pairs = {}
-    
-    for i in range(len(data) - 1):
-        first = data[i]
-        second = data[i + 1]
-        
-        # Проверяем валидные Shift-JIS пары
-        if (0x81 <= first <= 0x9F or 0xE0 <= first <= 0xEF):
-            if (0x40 <= second <= 0x7E or 0x80 <= second <= 0xFC):
-                try:
-                    sjis = bytes([first, second])
-                    char = sjis.decode('shift-jis', errors='ignore')
-                    if char:
-                        pairs[first * 256 + second] = char
-                except:
-                    pass
-                    
-    return pairs
+    return {code: _decode_sjis_pair(code) for code in count_sjis_pairs(data)}
 
 
 class EncodingDetector:
@@ -301,8 +409,8 @@ class EncodingDetector:
         if name not in self.known_encodings:
             self.known_encodings[name] = []
             
-        coverage = sum(1 for b in sample_data if b in char_map) / len(sample_data)
-        table = CharTable(name, char_map, confidence=coverage)
+        table = CharTable(name, char_map)
+        table.confidence = float(coverage_scores(byte_histogram(sample_data), [table.mask])[0])
         self.known_encodings[name].append(table)
         
         # Сохраняем паттерн
@@ -319,12 +427,15 @@ class EncodingDetector:
             Кортеж (encoding_name, confidence)
         """
         best_match = ('unknown', 0.0)
+        candidates = [(name, table) for name, tables in self.known_encodings.items() for table in tables]
+        if not candidates or not data:
+            return best_match
         
-        for encoding_name, tables in self.known_encodings.items():
-            for table in tables:
-                coverage = sum(1 for b in data if b in table.char_map) / len(data)
-                if coverage > best_match[1]:
-                    best_match = (encoding_name, coverage)
+        # Одна гистограмма на все таблицы: покрытие = гистограмма · маска
+        scores = coverage_scores(byte_histogram(data), (table.mask for _, table in candidates))
+        for (encoding_name, _), coverage in zip(candidates, scores):
+            if coverage > best_match[1]:
+                best_match = (encoding_name, float(coverage))
                     
         return best_match
         
@@ -348,23 +459,33 @@ class EncodingDetector:
         
     def _auto_detect_charmap(self, data: bytes) -> Dict[int, str]:
         """Автоматически создаёт таблицу символов"""
-        charmap = {}
+        histogram = byte_histogram(data)
         
         # Добавляем ASCII
-        for b in range(0x20, 0x7F):
-            if bytes([b]) in data:
-                charmap[b] = chr(b)
+        charmap = {int(b): chr(b) for b in _ASCII_RANGE[histogram[0x20:0x7F] > 0]}
                 
-        # Анализируем паттерны для не-ASCII символов
-        freq = Counter(data)
-        for byte_val, count in freq.most_common(100):
-            if byte_val >= 0x80 and count > 2:
+        # Анализируем паттерны для не-ASCII символов среди 100 самых частых байтов
+        for byte_val in _most_common_bytes(data, histogram, 100):
+            if byte_val >= 0x80 and histogram[byte_val] > 2:
                 # Создаём placeholder символ
                 charmap[byte_val] = f'[{byte_val:02X}]'
                 
         return charmap
 
 
+def _most_common_bytes(data: bytes, histogram: np.ndarray, limit: int) -> List[int]:
+    """
+    Самые частые байты в порядке Counter.most_common:
+    по убыванию частоты, при равенстве - по первому вхождению
+    """
+    present = np.flatnonzero(histogram)
+    if len(present) > limit:
+        # Порядок первых вхождений важен только когда часть байтов отсекается
+        _, first_seen = np.unique(np.frombuffer(data, dtype=np.uint8), return_index=True)
+        present = present[np.lexsort((first_seen, -histogram[present]))][:limit]
+    return [int(b) for b in present]
+
+
 # Глобальный экземпляр для удобства
 _global_detector = None
 
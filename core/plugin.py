@@ -20,7 +20,7 @@ GB Text Extraction Framework
 """
 
 from abc import ABC, abstractmethod
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
 from core.rom import GameBoyROM
 
 
@@ -36,6 +36,16 @@ class GamePlugin(ABC):
     def get_text_segments(self, rom: GameBoyROM) -> List[Dict]:
         pass
 
+    def segment_plan_key(self) -> Optional[Tuple]:
+        """
+        Ключ плана сегментов для core.segment_plan
+
+        Плагин, чьи сегменты зависят только от содержимого ROM и этого ключа,
+        может вернуть его, чтобы get_text_segments не пересчитывался для каждого
+        потребителя. None (по умолчанию) - план не кэшируется.
+        """
+        return None
+
 
 class GenericGamePlugin(GamePlugin):
     """Общий плагин для игр без привязки к конкретным коммерческим играм"""
@@ -53,4 +63,7 @@ class GenericGamePlugin(GamePlugin):
                 'decoder': None,  # Будет определен автоматически
                 'compression': None
             }
-        ]
\ No newline at end of file
+        ]
+
+    def segment_plan_key(self) -> Optional[Tuple]:
+        return (type(self).__module__, type(self).__qualname__)
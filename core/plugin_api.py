@@ -7,14 +7,20 @@ API для создания плагинов GB2Text
 - API для работы с ROM и сегментами
 """
 
+import contextvars
 import logging
+import threading
+import time
 from abc import ABC, abstractmethod
-from typing import Dict, List, Optional, Any, Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Any, Callable, Tuple
 from dataclasses import dataclass, field
 from enum import Enum
 import json
 import os
 
+from core.tracing import get_tracer
+
 logger = logging.getLogger('gb2text.plugin_api')
 
 
@@ -88,35 +94,238 @@ class HookContext:
 HookCallback = Callable[[HookContext], Optional[Any]]
 
 
+@dataclass
+class HookStats:
+    """Статистика вызовов одного callback-а хука"""
+    hook_type: HookType
+    name: str
+    calls: int = 0
+    errors: int = 0
+    total_time: float = 0.0
+    max_time: float = 0.0
+    over_budget: int = 0
+    disabled: bool = False
+
+    @property
+    def avg_time(self) -> float:
+        """Среднее время вызова в секундах"""
+        return self.total_time / self.calls if self.calls else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'hook_type': self.hook_type.value,
+            'name': self.name,
+            'calls': self.calls,
+            'errors': self.errors,
+            'total_ms': self.total_time * 1000,
+            'avg_ms': self.avg_time * 1000,
+            'max_ms': self.max_time * 1000,
+            'over_budget': self.over_budget,
+            'disabled': self.disabled,
+        }
+
+
+@dataclass
+class HookBudget:
+    """Лимит времени одного вызова callback-а для типа хука"""
+    seconds: float
+    auto_disable: bool = False
+    max_violations: int = 3  # После стольких превышений callback отключается (если auto_disable)
+
+
+def _callback_name(callback: HookCallback) -> str:
+    owner = getattr(callback, '__self__', None)
+    name = getattr(callback, '__qualname__', None) or repr(callback)
+    if owner is not None and '.' not in name:
+        name = f"{type(owner).__name__}.{name}"
+    module = getattr(callback, '__module__', None)
+    return f"{module}.{name}" if module else name
+
+
 class HookManager:
-    """Менеджер хуков плагинов"""
+    """
+    Менеджер хуков плагинов
+
+    Для каждого callback-а собирается статистика (число вызовов, ошибок, время).
+    Для типа хука можно задать бюджет времени на вызов: превышение логируется, а при
+    auto_disable callback отключается после max_violations превышений.
+
+    Независимые callback-и, зарегистрированные с concurrent=True, выполняются
+    в пуле потоков; результаты всё равно собираются в порядке приоритета. Обычный
+    callback служит барьером: он запускается после завершения всех предыдущих.
+    """
     
-    def __init__(self):
+    def __init__(self, max_workers: Optional[int] = None):
         self._hooks: Dict[HookType, List[Tuple[int, HookCallback]]] = {h: [] for h in HookType}
+        self._concurrent: Dict[HookType, List[HookCallback]] = {h: [] for h in HookType}
+        self._stats: Dict[HookType, Dict[HookCallback, HookStats]] = {h: {} for h in HookType}
+        self._budgets: Dict[HookType, HookBudget] = {}
+        self._lock = threading.Lock()
+        self._max_workers = max_workers or min(4, os.cpu_count() or 1)
+        self._executor: Optional[ThreadPoolExecutor] = None
         
-    def register(self, hook_type: HookType, callback: HookCallback, priority: int = 0):
-        """Регистрирует хук"""
+    def register(self, hook_type: HookType, callback: HookCallback, priority: int = 0,
+                 concurrent: bool = False):
+        """
+        Регистрирует хук
+
+        concurrent=True - callback не зависит от остальных хуков этого типа
+        и может выполняться параллельно с соседними concurrent-хуками.
+        """
         self._hooks[hook_type].append((priority, callback))
         # Сортируем по приоритету (больший приоритет первым)
         self._hooks[hook_type].sort(key=lambda x: -x[0])
+        if concurrent:
+            self._concurrent[hook_type].append(callback)
         
     def unregister(self, hook_type: HookType, callback: HookCallback):
         """Удаляет хук"""
         self._hooks[hook_type] = [(p, c) for p, c in self._hooks[hook_type] if c != callback]
-        
+        self._concurrent[hook_type] = [c for c in self._concurrent[hook_type] if c != callback]
+        with self._lock:
+            self._stats[hook_type].pop(callback, None)
+
+    # === Бюджеты и статистика ===
+
+    def set_budget(self, hook_type: HookType, seconds: Optional[float],
+                   auto_disable: bool = False, max_violations: int = 3):
+        """Задаёт (или снимает при seconds=None) бюджет времени на вызов для типа хука"""
+        if seconds is None:
+            self._budgets.pop(hook_type, None)
+        else:
+            self._budgets[hook_type] = HookBudget(seconds, auto_disable, max_violations)
+
+    def get_budget(self, hook_type: HookType) -> Optional[HookBudget]:
+        """Бюджет времени для типа хука"""
+        return self._budgets.get(hook_type)
+
+    def is_disabled(self, hook_type: HookType, callback: HookCallback) -> bool:
+        """Отключён ли callback из-за превышения бюджета"""
+        stats = self._stats[hook_type].get(callback)
+        return stats is not None and stats.disabled
+
+    def enable(self, hook_type: HookType, callback: HookCallback):
+        """Снова включает отключённый callback и сбрасывает счётчик превышений"""
+        stats = self._stats[hook_type].get(callback)
+        if stats is not None:
+            with self._lock:
+                stats.disabled = False
+                stats.over_budget = 0
+
+    def get_stats(self, hook_type: Optional[HookType] = None) -> List[Dict[str, Any]]:
+        """Статистика callback-ов (всех или одного типа хука), самые затратные первыми"""
+        hook_types = list(HookType) if hook_type is None else [hook_type]
+        with self._lock:
+            stats = [s.as_dict() for h in hook_types for s in self._stats[h].values()]
+        return sorted(stats, key=lambda s: -s['total_ms'])
+
+    def reset_stats(self):
+        """Сбрасывает статистику (в том числе отключения по бюджету)"""
+        with self._lock:
+            for stats in self._stats.values():
+                stats.clear()
+
+    # === Вызов ===
+
+    def _call(self, stats: HookStats, callback: HookCallback, context: HookContext,
+              budget: Optional[HookBudget]) -> Any:
+        """Вызывает callback с замером времени и проверкой бюджета"""
+        hook_type = stats.hook_type
+        error = None
+        result = None
+        tracer = get_tracer()
+        trace_span = tracer.span(f'hook.{hook_type.value}', 'hook', callback=stats.name) if tracer.enabled else None
+        if trace_span is not None:
+            trace_span.__enter__()
+        started = time.perf_counter()
+        try:
+            result = callback(context)
+        except Exception as e:
+            error = e
+        elapsed = time.perf_counter() - started
+        if trace_span is not None:
+            trace_span.__exit__(None, None, None)
+
+        over_budget = disable = False
+        with self._lock:
+            stats.calls += 1
+            stats.total_time += elapsed
+            if elapsed > stats.max_time:
+                stats.max_time = elapsed
+            if error is not None:
+                stats.errors += 1
+            if budget is not None and elapsed > budget.seconds:
+                over_budget = True
+                stats.over_budget += 1
+                if budget.auto_disable and stats.over_budget >= budget.max_violations:
+                    disable = stats.disabled = True
+
+        if error is not None:
+            logger.error(f"Ошибка в хуке {hook_type.value}: {error}")
+        if over_budget:
+            logger.warning(f"Хук {hook_type.value} ({stats.name}) выполнялся {elapsed * 1000:.1f} мс, "
+                           f"бюджет {budget.seconds * 1000:.1f} мс")
+            if disable:
+                logger.error(f"Хук {hook_type.value} ({stats.name}) отключён: "
+                             f"бюджет превышен {stats.over_budget} раз")
+        return result
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self._max_workers,
+                                                        thread_name_prefix='gb2text-hook')
+        return self._executor
+
     def trigger(self, hook_type: HookType, context: HookContext) -> Optional[Any]:
         """Вызывает все хуки определённого типа"""
+        concurrent = self._concurrent[hook_type]
+        type_stats = self._stats[hook_type]
+        budget = self._budgets.get(hook_type)
         results = []
+        batch: List[Tuple[HookStats, HookCallback]] = []
+
         for priority, callback in self._hooks[hook_type]:
-            try:
-                result = callback(context)
-                if result is not None:
-                    results.append(result)
-            except Exception as e:
-                logger.error(f"Ошибка в хуке {hook_type.value}: {e}")
+            stats = type_stats.get(callback)
+            if stats is None:
+                with self._lock:
+                    stats = type_stats.setdefault(callback, HookStats(hook_type, _callback_name(callback)))
+            elif stats.disabled:
+                continue
+            if concurrent and callback in concurrent:
+                batch.append((stats, callback))
+                continue
+            if batch:
+                self._run_batch(batch, context, budget, results)
+            result = self._call(stats, callback, context, budget)
+            if result is not None:
+                results.append(result)
+        if batch:
+            self._run_batch(batch, context, budget, results)
                 
         return results if results else None
 
+    def _run_batch(self, batch: List[Tuple[HookStats, HookCallback]], context: HookContext,
+                   budget: Optional[HookBudget], results: List):
+        """Выполняет группу concurrent-хуков; результаты добавляются в порядке приоритета"""
+        if len(batch) == 1:
+            outputs = [self._call(batch[0][0], batch[0][1], context, budget)]
+        else:
+            executor = self._get_executor()
+            # Каждому хуку - копия контекста вызывающего потока (текущий трассировщик и т.п.)
+            futures = [executor.submit(contextvars.copy_context().run, self._call, stats, cb, context, budget)
+                       for stats, cb in batch]
+            outputs = [f.result() for f in futures]
+        results.extend(r for r in outputs if r is not None)
+        batch.clear()
+
+    def shutdown(self):
+        """Останавливает пул потоков параллельных хуков"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
 
 # Глобальный менеджер хуков
 _global_hook_manager: Optional[HookManager] = None
@@ -130,29 +339,88 @@ def get_hook_manager() -> HookManager:
 
 
 class ROMContext:
-    """Контекст ROM для плагинов"""
+    """
+    Контекст ROM для плагинов
+
+    Сегменты ищутся по имени через словарь (индекс перестраивается, если список
+    segments заменён или изменилась его длина; после замены элементов на месте
+    вызовите reindex()). get_segment_view возвращает memoryview без копирования,
+    get_unpacked_data - данные, распакованные при первом обращении и кэшированные.
+    """
     
     def __init__(self, rom_data: bytes, header: Dict[str, Any], segments: List[Dict]):
         self.rom_data = rom_data
         self.header = header
         self.segments = segments
         self._custom_data: Dict[str, Any] = {}
+        self._index: Dict[str, Dict] = {}
+        self._indexed: Tuple[int, int] = (0, -1)
+        self._view: Optional[memoryview] = None
+        self._unpacked: Dict[str, Any] = {}
+
+    def reindex(self):
+        """Перестраивает индекс сегментов и сбрасывает кэш распакованных данных"""
+        index: Dict[str, Dict] = {}
+        for seg in self.segments:
+            # Как и при линейном поиске, побеждает первый сегмент с таким именем
+            index.setdefault(seg.get('name'), seg)
+        self._index = index
+        self._indexed = (id(self.segments), len(self.segments))
+        self._unpacked.clear()
         
     def get_segment(self, name: str) -> Optional[Dict]:
         """Получает сегмент по имени"""
-        for seg in self.segments:
-            if seg.get('name') == name:
-                return seg
+        if self._indexed != (id(self.segments), len(self.segments)):
+            self.reindex()
+        return self._index.get(name)
+
+    def _rom_view(self) -> memoryview:
+        view = self._view
+        if view is None or view.obj is not self.rom_data:
+            view = self._view = memoryview(self.rom_data)
+        return view
+
+    def get_segment_view(self, name: str) -> Optional[memoryview]:
+        """Данные сегмента как memoryview над rom_data (без копирования)"""
+        seg = self.get_segment(name)
+        if seg:
+            start = seg.get('start', 0)
+            end = seg.get('end', len(self.rom_data))
+            return self._rom_view()[start:end]
         return None
         
     def get_segment_data(self, name: str) -> Optional[bytes]:
-        """Получает данные сегмента"""
+        """Получает данные сегмента (копия bytes; без копирования - get_segment_view)"""
         seg = self.get_segment(name)
         if seg:
             start = seg.get('start', 0)
             end = seg.get('end', len(self.rom_data))
             return self.rom_data[start:end]
         return None
+
+    def get_unpacked_data(self, name: str) -> Optional[Any]:
+        """
+        Данные сегмента с учётом сжатия
+
+        Сжатый сегмент ('compression' - имя или объект с decompress) распаковывается
+        при первом обращении, результат кэшируется в контексте. Для несжатого
+        сегмента возвращается memoryview.
+        """
+        cached = self._unpacked.get(name)
+        if cached is not None:
+            return cached
+        view = self.get_segment_view(name)
+        if view is None:
+            return None
+        compression = self.get_segment(name).get('compression')
+        if isinstance(compression, str):
+            from core.compression import get_compression_handler
+            compression = get_compression_handler(compression)
+        if compression is None or not hasattr(compression, 'decompress'):
+            return view
+        data, _ = compression.decompress(view, 0)
+        self._unpacked[name] = data
+        return data
         
     def set_custom_data(self, key: str, value: Any):
         """Устанавливает пользовательские данные"""
@@ -381,9 +649,10 @@ class ExtendedGamePlugin(ABC):
         
     # === Регистрация хуков ===
     
-    def register_hook(self, hook_type: HookType, callback: HookCallback, priority: int = 0):
+    def register_hook(self, hook_type: HookType, callback: HookCallback, priority: int = 0,
+                      concurrent: bool = False):
         """Регистрирует хук для этого плагина"""
-        self._hooks.register(hook_type, callback, priority)
+        self._hooks.register(hook_type, callback, priority, concurrent)
         
     def unregister_hook(self, hook_type: HookType, callback: HookCallback):
         """Удаляет хук"""
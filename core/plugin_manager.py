@@ -19,12 +19,13 @@ GB Text Extraction Framework
 Менеджер плагинов для динамической загрузки
 """
 
-import importlib, pkgutil, os, json, re, logging, threading, sys
+import importlib, pkgutil, os, json, re, logging, threading, sys, time, hashlib
 from pathlib import Path
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Tuple, Callable, Any
 from core.plugin import GamePlugin
 from core.rom import GameBoyROM
 from core.decoder import CompressionHandler
+from core.scan_cache import default_cache_dir
 from plugins.generic import GenericGBPlugin, GenericGBCPlugin, GenericGBAPlugin
 from plugins.auto_detect import AutoDetectPlugin
 
@@ -47,10 +48,248 @@ class CancellationToken:
             return self._cancel_requested
 
 
+# Шаблон '^ЛИТЕРАЛ$' (или 'ЛИТЕРАЛ$': re.match и так привязан к началу) без метасимволов
+_EXACT_LITERAL_RE = re.compile(r'\^?((?:[^\\.^$*+?{}\[\]|()]|\\[^A-Za-z0-9])*)\$')
+# Конструкции, зависящие от номеров/имён групп или глобальных флагов: такие шаблоны
+# нельзя объединить в общую альтернативу
+_STANDALONE_RE = re.compile(r'\\[1-9]|\(\?P=|\(\?\(')
+
+# Через сколько секунд построения индекса начинать показывать прогресс в GUI
+_PROGRESS_DELAY = 0.1
+# Размер кэша результатов поиска (game_id, system)
+_MATCH_CACHE_SIZE = 4096
+
+
+def _exact_literal(pattern: str) -> Optional[str]:
+    """Строка, с которой совпадает шаблон, если он точный литерал; иначе None"""
+    m = _EXACT_LITERAL_RE.fullmatch(pattern)
+    if not m:
+        return None
+    return re.sub(r'\\(.)', r'\1', m.group(1))
+
+
+class PluginMatcher:
+    """
+    Скомпилированный индекс шаблонов game_id_pattern
+
+    Находит первый (в порядке списка) плагин, для которого re.match(pattern, game_id)
+    успешен, как и последовательный перебор, но:
+    - точные литералы ('^GAME_01$') ищутся в словаре
+    - остальные шаблоны объединены в одну альтернативу, скомпилированную один раз;
+      альтернативы проверяются по порядку, поэтому первая совпавшая ветвь - это
+      плагин с наименьшим индексом
+    - шаблоны с обратными ссылками, именованными группами или глобальными флагами
+      проверяются по отдельности (тоже скомпилированными)
+    """
+
+    def __init__(self, plugins: List, progress: Optional[Callable[[int, int], None]] = None):
+        logger = logging.getLogger('gb2text.plugin_manager')
+        self.exact: Dict[str, int] = {}
+        self.standalone: List[Tuple[int, re.Pattern]] = []
+        self.combined: Optional[re.Pattern] = None
+        self._branch_plugins: Dict[int, int] = {}
+
+        branches: List[Tuple[int, str, re.Pattern]] = []
+        for index, plugin in enumerate(plugins):
+            if progress:
+                progress(index, len(plugins))
+            try:
+                pattern = plugin.game_id_pattern
+                compiled = re.compile(pattern)
+            except (re.error, TypeError, AttributeError) as e:
+                logger.warning(f"Ошибка регулярного выражения в плагине {plugin.__class__.__name__}: {str(e)}")
+                continue
+
+            literal = _exact_literal(pattern)
+            if literal is not None:
+                self.exact.setdefault(literal, index)
+            elif compiled.groupindex or compiled.flags & ~re.UNICODE or _STANDALONE_RE.search(pattern):
+                self.standalone.append((index, compiled))
+            else:
+                branches.append((index, pattern, compiled))
+
+        if branches:
+            group = 1
+            for index, _, compiled in branches:
+                self._branch_plugins[group] = index
+                group += 1 + compiled.groups
+            try:
+                self.combined = re.compile('|'.join(f'({pattern})' for _, pattern, _ in branches))
+            except re.error:
+                # Не удалось объединить - проверяем шаблоны по отдельности
+                self._branch_plugins.clear()
+                self.standalone = sorted(self.standalone + [(i, c) for i, _, c in branches],
+                                         key=lambda item: item[0])
+
+    def match(self, game_id: str) -> Optional[int]:
+        """Индекс первого подходящего плагина или None"""
+        # '$' совпадает и перед завершающим переводом строки
+        best = self.exact.get(game_id[:-1] if game_id.endswith('\n') else game_id)
+
+        if self.combined is not None:
+            m = self.combined.match(game_id)
+            if m:
+                index = self._branch_plugins[m.lastindex]
+                if best is None or index < best:
+                    best = index
+
+        for index, compiled in self.standalone:
+            if best is not None and index > best:
+                break
+            if compiled.match(game_id):
+                best = index
+                break
+
+        return best
+
+
+class _PluginList(list):
+    """Список плагинов со счётчиком изменений (по нему перестраивается индекс шаблонов)"""
+
+    version = 0
+
+    @staticmethod
+    def _tracked(name):
+        method = getattr(list, name)
+
+        def tracked(self, *args, **kwargs):
+            result = method(self, *args, **kwargs)
+            self.version += 1
+            return result
+        tracked.__name__ = name
+        return tracked
+
+    for _name in ('append', 'extend', 'insert', 'remove', 'pop', 'clear', 'sort', 'reverse',
+                  '__setitem__', '__delitem__', '__iadd__', '__imul__'):
+        locals()[_name] = _tracked(_name)
+    del _name, _tracked
+
+
+class PluginManifest:
+    """
+    Кэш обнаружения плагинов (plugins/.manifest.json; в сборке PyInstaller -
+    plugins.manifest.json в каталоге кэша сканирования)
+
+    Для каждого Python-модуля хранит найденные классы плагинов и их game_id_pattern,
+    для каждого JSON-конфига - результат проверки и game_id_pattern. Запись действительна,
+    пока не изменились исходные файлы: сначала сравниваются mtime и размер, при их
+    несовпадении - SHA-1 содержимого (так переживают git checkout и touch без изменений).
+    """
+
+    VERSION = 1
+    FILENAME = '.manifest.json'
+
+    def __init__(self, path: str):
+        self.path = path
+        self.dirty = False
+        self._sections: Dict[str, Dict[str, Dict]] = {'python': {}, 'config': {}}
+        try:
+            with open(path, encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == self.VERSION:
+                for section in self._sections:
+                    self._sections[section] = dict(data.get(section, {}))
+        except (OSError, ValueError, AttributeError):
+            pass
+
+    @staticmethod
+    def _stat(files: List[Path]) -> List:
+        return [[f.name, f.stat().st_mtime_ns, f.stat().st_size] for f in files]
+
+    @staticmethod
+    def _hash(files: List[Path]) -> str:
+        digest = hashlib.sha1()
+        for f in files:
+            digest.update(f.name.encode('utf-8') + b'\0')
+            digest.update(f.read_bytes())
+        return digest.hexdigest()
+
+    def lookup(self, section: str, key: str, files: List[Path]) -> Optional[Dict]:
+        """Сохранённые данные для key, если исходные файлы не изменились; иначе None"""
+        entry = self._sections[section].get(key)
+        if entry is None:
+            return None
+        try:
+            stat = self._stat(files)
+            if stat != entry['stat']:
+                if self._hash(files) != entry['hash']:
+                    return None
+                entry['stat'] = stat
+                self.dirty = True
+        except (OSError, KeyError, TypeError):
+            return None
+        return entry['data']
+
+    def store(self, section: str, key: str, files: List[Path], data: Dict) -> None:
+        """Запоминает данные для key вместе с отпечатком исходных файлов"""
+        try:
+            entry = {'stat': self._stat(files), 'hash': self._hash(files), 'data': data}
+        except OSError:
+            return
+        self._sections[section][key] = entry
+        self.dirty = True
+
+    def prune(self, section: str, keys) -> None:
+        """Удаляет записи о файлах, которых больше нет"""
+        stale = set(self._sections[section]) - set(keys)
+        for key in stale:
+            del self._sections[section][key]
+        self.dirty = self.dirty or bool(stale)
+
+    def save(self) -> None:
+        """Записывает манифест, если он изменился (ошибки записи не критичны)"""
+        if not self.dirty:
+            return
+        data = {'version': self.VERSION, **self._sections}
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+            self.dirty = False
+        except OSError as e:
+            logging.getLogger('gb2text.plugin_manager').debug(f"Не удалось сохранить манифест плагинов: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+
+class LazyPlugin:
+    """
+    Заместитель плагина, найденного по манифесту
+
+    Хранит только game_id_pattern; модуль импортируется (или конфиг читается),
+    а плагин создаётся при первом обращении к любому другому атрибуту или resolve().
+    """
+
+    def __init__(self, game_id_pattern: str, name: str, loader: Callable[[], GamePlugin]):
+        self.game_id_pattern = game_id_pattern
+        self.plugin_name = name
+        self._loader = loader
+        self._plugin = None
+
+    def resolve(self) -> GamePlugin:
+        """Загружает и возвращает настоящий плагин"""
+        if self._plugin is None:
+            self._plugin = self._loader()
+        return self._plugin
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith('__') or '_loader' not in self.__dict__:
+            raise AttributeError(name)
+        return getattr(self.resolve(), name)
+
+    def __repr__(self) -> str:
+        state = 'loaded' if self._plugin is not None else 'lazy'
+        return f"<LazyPlugin {self.plugin_name} ({state})>"
+
+
 class PluginManager:
     """Менеджер динамической загрузки плагинов"""
 
-    def __init__(self, plugins_dir: str = "plugins"):
+    def __init__(self, plugins_dir: str = "plugins", use_manifest: bool = True):
         self.plugins = [
             GenericGBPlugin(),
             GenericGBCPlugin(),
@@ -58,6 +297,8 @@ class PluginManager:
             AutoDetectPlugin()
         ]
         self.plugins_dir = self._get_resource_path(plugins_dir)
+        self.use_manifest = use_manifest
+        self._manifest = None
         self.load_plugins()
 
     def _get_resource_path(self, relative_path: str) -> str:
@@ -71,6 +312,21 @@ class PluginManager:
 
         return os.path.join(base_path, relative_path)
 
+    def _get_manifest(self) -> Optional[PluginManifest]:
+        """Манифест обнаружения плагинов (None, если кэш отключён)"""
+        if not getattr(self, 'use_manifest', False):
+            return None
+        if self._manifest is None:
+            path = os.path.join(self.plugins_dir, PluginManifest.FILENAME)
+            if getattr(sys, 'frozen', False):
+                # В сборке PyInstaller каталог _MEIPASS удаляется при выходе -
+                # манифест хранится в пользовательском кэше рядом с кэшем сканирования,
+                # отдельно для каждого каталога плагинов
+                key = hashlib.sha1(os.path.abspath(self.plugins_dir).encode('utf-8')).hexdigest()[:12]
+                path = os.path.join(default_cache_dir(), f'plugins.{key}' + PluginManifest.FILENAME)
+            self._manifest = PluginManifest(path)
+        return self._manifest
+
     def load_plugins(self) -> None:
         """Загружает все плагины из указанной директории"""
         # Определяем путь к директории с плагинами
@@ -86,14 +342,43 @@ class PluginManager:
         # Загружаем конфигурационные плагины
         self._load_config_plugins()
 
+    @staticmethod
+    def _module_files(module_info) -> List[Path]:
+        """Исходные файлы модуля плагина (для пакета - все .py внутри)"""
+        path = Path(module_info.module_finder.path) / module_info.name
+        if module_info.ispkg:
+            return sorted(path.rglob('*.py'))
+        return [path.with_suffix('.py')]
+
     def _load_python_plugins(self) -> None:
-        """Загружает Python-плагины из директории"""
+        """
+        Загружает Python-плагины из директории
+
+        Модули, уже описанные в манифесте, не импортируются: в список попадают
+        LazyPlugin, а модуль импортируется, только когда ROM подошёл под шаблон.
+        """
+        logger = logging.getLogger('gb2text.plugin_manager')
         plugins_module_path = self.plugins_dir
+        manifest = self._get_manifest()
         if os.path.exists(plugins_module_path):
             try:
-                for _, module_name, _ in pkgutil.iter_modules([plugins_module_path]):
+                seen = []
+                for module_info in pkgutil.iter_modules([plugins_module_path]):
+                    module_name = module_info.name
+                    seen.append(module_name)
+                    files = self._module_files(module_info)
+                    cached = manifest.lookup('python', module_name, files) if manifest else None
+                    if cached is not None:
+                        for entry in cached['plugins']:
+                            self.plugins.append(LazyPlugin(
+                                entry['game_id_pattern'], entry['class'],
+                                self._python_loader(module_name, entry['attribute'])))
+                            logger.debug(f"Плагин из манифеста: {entry['class']}")
+                        continue
+
                     try:
                         module = importlib.import_module(f"plugins.{module_name}")
+                        entries = []
                         for attribute_name in dir(module):
                             attribute = getattr(module, attribute_name)
                             if (
@@ -101,15 +386,56 @@ class PluginManager:
                                     issubclass(attribute, GamePlugin) and
                                     attribute != GamePlugin
                             ):
-                                self.plugins.append(attribute())
+                                plugin = attribute()
+                                self.plugins.append(plugin)
+                                entries.append({'attribute': attribute_name,
+                                                'class': attribute.__name__,
+                                                'game_id_pattern': getattr(plugin, 'game_id_pattern', None)})
                                 print(f"Загружен плагин: {attribute.__name__}")
+                        if manifest:
+                            manifest.store('python', module_name, files, {'plugins': entries})
                     except Exception as e:
                         print(f"Ошибка загрузки модуля {module_name}: {str(e)}")
+                if manifest:
+                    manifest.prune('python', seen)
+                    manifest.save()
             except Exception as e:
                 print(f"Ошибка доступа к директории плагинов: {str(e)}")
 
+    @staticmethod
+    def _python_loader(module_name: str, attribute_name: str) -> Callable[[], GamePlugin]:
+        def load() -> GamePlugin:
+            module = importlib.import_module(f"plugins.{module_name}")
+            return getattr(module, attribute_name)()
+        return load
+
+    @staticmethod
+    def _config_loader(json_file: Path) -> Callable[[], GamePlugin]:
+        def load() -> GamePlugin:
+            with open(json_file) as f:
+                return ConfigurablePlugin(json.load(f))
+        return load
+
+    def _read_config(self, json_file: Path) -> Dict:
+        """Читает и проверяет конфиг; результат в формате записи манифеста"""
+        try:
+            with open(json_file) as f:
+                config = json.load(f)
+        except Exception as e:
+            return {'error': str(e)}
+        if not isinstance(config, dict) or not self._is_valid_config(config):
+            return {'valid': False}
+        return {'valid': True, 'game_id_pattern': config['game_id_pattern'], 'config': config}
+
     def _load_config_plugins(self) -> None:
-        """Загружает конфигурационные плагины из JSON-файлов"""
+        """
+        Загружает конфигурационные плагины из JSON-файлов
+
+        Результат проверки и game_id_pattern каждого конфига хранятся в манифесте,
+        поэтому при неизменных файлах конфиги не читаются при запуске: ConfigurablePlugin
+        создаётся (LazyPlugin), когда ROM подошёл под шаблон. Поэтому ограничения
+        на число конфигураций нет.
+        """
         logger = logging.getLogger('gb2text.plugin_manager')
         config_dir = Path(self.plugins_dir) / "config"
 
@@ -118,38 +444,57 @@ class PluginManager:
             logger.info("Создана директория для конфигураций: plugins/config")
             return
 
+        manifest = self._get_manifest()
         loaded_configs = 0
-        max_configs = 20  # Ограничение на количество конфигураций
 
-        for json_file in config_dir.glob("*.json"):
-            if loaded_configs >= max_configs:
-                logger.warning(f"Достигнуто максимальное количество конфигураций ({max_configs}). Остальные пропущены.")
-                break
+        # Шаблоны уже загруженных плагинов - для проверки дубликатов
+        patterns = set()
+        for plugin in self.plugins:
+            try:
+                patterns.add(plugin.game_id_pattern)
+            except Exception:
+                pass
 
+        json_files = list(config_dir.glob("*.json"))
+        for json_file in json_files:
             try:
-                with open(json_file) as f:
-                    config = json.load(f)
+                key = json_file.name
+                entry = manifest.lookup('config', key, [json_file]) if manifest else None
+                config = None
+                if entry is None:
+                    entry = self._read_config(json_file)
+                    config = entry.pop('config', None)
+                    if manifest:
+                        manifest.store('config', key, [json_file], entry)
+
+                if 'error' in entry:
+                    logger.error(f"Ошибка загрузки конфигурации {json_file.name}: {entry['error']}")
+                    continue
 
                 # Проверяем структуру конфигурации
-                if not self._is_valid_config(config):
+                if not entry['valid']:
                     logger.warning(f"Пропущен некорректный конфиг: {json_file.name}")
                     continue
 
                 # Проверяем на дубликаты
-                is_duplicate = False
-                for plugin in self.plugins:
-                    if hasattr(plugin, 'game_id_pattern') and plugin.game_id_pattern == config.get('game_id_pattern', ''):
-                        logger.info(f"Пропущен дубликат конфигурации: {json_file.name}")
-                        is_duplicate = True
-                        break
-
-                if not is_duplicate:
+                pattern = entry['game_id_pattern']
+                if pattern in patterns:
+                    logger.info(f"Пропущен дубликат конфигурации: {json_file.name}")
+                    continue
+
+                if config is not None:
                     self.plugins.append(ConfigurablePlugin(config))
-                    logger.info(f"Загружена конфигурация: {json_file.name}")
-                    loaded_configs += 1
+                else:
+                    self.plugins.append(LazyPlugin(pattern, json_file.name, self._config_loader(json_file)))
+                patterns.add(pattern)
+                logger.info(f"Загружена конфигурация: {json_file.name}")
+                loaded_configs += 1
             except Exception as e:
                 logger.error(f"Ошибка загрузки конфигурации {json_file.name}: {str(e)}")
 
+        if manifest:
+            manifest.prune('config', [f.name for f in json_files])
+            manifest.save()
         logger.info(f"Загружено {loaded_configs} конфигураций")
 
     def _is_valid_config(self, config: dict) -> bool:
@@ -227,57 +572,102 @@ class PluginManager:
                 return False
         return True
 
+    @property
+    def plugins(self) -> List:
+        return self._plugins
+
+    @plugins.setter
+    def plugins(self, plugins: List):
+        self._plugins = _PluginList(plugins)
+
+    def _get_matcher(self, progress: Optional[Callable[[int, int], None]] = None) -> PluginMatcher:
+        """
+        Индекс шаблонов для текущего списка плагинов
+
+        Перестраивается (со сбросом кэша результатов), только если список плагинов изменился.
+        """
+        signature = (id(self._plugins), self._plugins.version)
+        if getattr(self, '_matcher_signature', None) != signature:
+            self._matcher = PluginMatcher(self.plugins, progress)
+            self._matcher_signature = signature
+            self._match_cache = {}
+        return self._matcher
+
     def get_plugin(self, game_id: str, system: str = None,
                    cancellation_token: Optional[CancellationToken] = None) -> Optional[GamePlugin]:
         """Находит подходящий плагин для игры с поддержкой отмены"""
         logger = logging.getLogger('gb2text.plugin_manager')
         logger.info(f"Поиск подходящего плагина для игры с ID: {game_id}, система: {system}")
 
-        # Обновляем статус в GUI, если доступен
-        if hasattr(self, 'update_status'):
-            self.update_status(f"{self.i18n.t('plugin.searching')} {game_id}...", 10)
+        # Проверяем, запрошена ли отмена
+        if cancellation_token and cancellation_token.is_cancellation_requested():
+            logger.info("Операция отменена пользователем")
+            return None
 
-        # Сначала пытаемся найти специфичный плагин
-        total_plugins = len(self.plugins)
-        for i, plugin in enumerate(self.plugins):
-            # Проверяем, запрошена ли отмена
-            if cancellation_token and cancellation_token.is_cancellation_requested():
-                logger.info("Операция отменена пользователем")
-                return None
+        # Прогресс в GUI показываем, только если построение индекса заметно затянулось
+        started = time.perf_counter()
 
-            # Обновляем прогресс
-            progress = 10 + int(80 * i / total_plugins) if total_plugins > 0 else 10
+        def report_progress(i: int, total: int):
+            if i % 50 or time.perf_counter() - started < _PROGRESS_DELAY:
+                return
             if hasattr(self, 'update_status'):
-                self.update_status(f"{self.i18n.t('checking.plugin')} {plugin.__class__.__name__}...", progress)
-
-            # Добавляем небольшую задержку для обновления интерфейса
-            if hasattr(self, 'root') and i % 5 == 0:
+                self.update_status(f"{self.i18n.t('plugin.searching')} {game_id}...",
+                                   10 + int(80 * i / total))
+            if hasattr(self, 'root'):
                 self.root.update_idletasks()
 
+        matcher = self._get_matcher(report_progress)
+
+        # Результаты запоминаются по (game_id, system)
+        key = (game_id, system)
+        cached = self._match_cache.get(key)
+        if cached is None:
+            cached = self._match(matcher, game_id, system, report_progress)
+            if len(self._match_cache) >= _MATCH_CACHE_SIZE:
+                self._match_cache.clear()
+            self._match_cache[key] = cached
+        plugin, is_default = cached
+
+        if is_default:
+            if hasattr(self, 'update_status'):
+                self.update_status(self.i18n.t(f"using.default.{system if system in ('gba', 'gbc') else 'gb'}"), 90)
+        else:
+            logger.info(f"Найден подходящий плагин: {plugin.__class__.__name__}")
+            if hasattr(self, 'update_status'):
+                self.update_status(f"{self.i18n.t('plugin.found')} {plugin.__class__.__name__}", 95)
+        return plugin
+
+    def _match(self, matcher: PluginMatcher, game_id: str, system: str,
+               progress: Callable[[int, int], None]) -> Tuple[GamePlugin, bool]:
+        """(плагин, is_default) для game_id; LazyPlugin загружается здесь"""
+        logger = logging.getLogger('gb2text.plugin_manager')
+        while True:
+            index = matcher.match(game_id)
+            if index is None:
+                return self._default_plugin(system), True
+            plugin = self.plugins[index]
+            if not isinstance(plugin, LazyPlugin):
+                return plugin, False
+            # Плагин из манифеста импортируется только сейчас
             try:
-                if re.match(plugin.game_id_pattern, game_id):
-                    logger.info(f"Найден подходящий плагин: {plugin.__class__.__name__}")
-                    if hasattr(self, 'update_status'):
-                        self.update_status(f"{self.i18n.t('plugin.found')} {plugin.__class__.__name__}", 95)
-                    return plugin
-            except re.error as e:
-                logger.warning(f"Ошибка регулярного выражения в плагине {plugin.__class__.__name__}: {str(e)}")
+                return plugin.resolve(), False
+            except Exception as e:
+                # Как и при обычной загрузке, сломанный плагин просто не участвует в поиске
+                logger.error(f"Ошибка загрузки плагина {plugin.plugin_name}: {e}")
+                del self.plugins[index]
+                matcher = self._get_matcher(progress)
 
-        # Если не найден, возвращаем базовый плагин для системы
+    def _default_plugin(self, system: str = None) -> GamePlugin:
+        """Базовый плагин для системы, если ни один шаблон не подошёл"""
+        logger = logging.getLogger('gb2text.plugin_manager')
         if system == 'gba':
             logger.info("Используем GenericGBAPlugin по умолчанию")
-            if hasattr(self, 'update_status'):
-                self.update_status(self.i18n.t("using.default.gba"), 90)
             return GenericGBAPlugin()
         elif system == 'gbc':
             logger.info("Используем GenericGBCPlugin по умолчанию")
-            if hasattr(self, 'update_status'):
-                self.update_status(self.i18n.t("using.default.gbc"), 90)
             return GenericGBCPlugin()
         else:
             logger.info("Используем GenericGBPlugin по умолчанию")
-            if hasattr(self, 'update_status'):
-                self.update_status(self.i18n.t("using.default.gb"), 90)
             return GenericGBPlugin()
 
 
@@ -291,6 +681,12 @@ class ConfigurablePlugin(GamePlugin):
     def game_id_pattern(self) -> str:
         return self.config['game_id_pattern']
 
+    def segment_plan_key(self) -> Tuple:
+        # Конфигурация может меняться (редактирование в GUI), поэтому хэш считается каждый раз
+        config = json.dumps(self.config, sort_keys=True, ensure_ascii=False, default=repr)
+        return (type(self).__module__, type(self).__qualname__,
+                hashlib.sha1(config.encode('utf-8')).hexdigest())
+
     def get_text_segments(self, rom: GameBoyROM) -> List[Dict]:
         logger = logging.getLogger('gb2text.plugin_manager')
         logger.info("Определение текстовых сегментов...")
@@ -0,0 +1,235 @@
+"""
+Обратный индекс указателей: смещение текста -> записи указателей, ссылающиеся на него
+
+Вопрос "какие указатели ссылаются на это сообщение?" (перенос сообщений при
+внедрении, вкладка сравнения, проверка перевода) без индекса требует полного
+пересканирования ROM. Индекс строится один раз на ROM по всем поддерживаемым
+форматам указателей, хранится в памяти для загруженного ROM и на диске в кэше
+сканирования (core.scan_cache), а запросы по смещению и диапазону выполняются
+двоичным поиском по отсортированному массиву смещений - O(log n).
+
+16-битные кандидаты ищутся на каждой байтовой позиции, поэтому среди них есть
+случайные совпадения в коде и графике. Подтверждёнными считаются только записи
+таблиц (detect_pointer_tables; дальние и раздельные указатели ищутся только
+таблицами); переносить сообщение можно, лишь если все ссылки на него подтверждены.
+"""
+
+import logging
+import threading
+import weakref
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from core.constants import GBA_ROM_BASE_ADDRESS
+from core.mbc import ROM_BANK_SIZE, SWITCHABLE_START, get_rom_mbc
+from core.scan_cache import scan_cache
+from core.segment_plan import rom_content_hash
+
+logger = logging.getLogger('gb2text.pointer_index')
+
+# Форматы записей указателей (номер формата хранится в индексе)
+POINTER_KINDS = (
+    'banked16',        # 16-битный адрес окна 0x4000-0x7FFF в банке записи
+    'far_bank_lo_hi',  # 3 байта: банк, адрес
+    'far_lo_hi_bank',  # 3 байта: адрес, банк
+    'split16',         # 16-битный адрес раздельной таблицы (банк - в параллельной таблице)
+    'gba32',           # 32-битный адрес GBA 0x08000000 + смещение
+)
+KIND_CODES = {kind: code for code, kind in enumerate(POINTER_KINDS)}
+
+# Имя результата в кэше сканирования
+CACHE_NAME = 'pointer_index'
+
+
+class PointerIndex:
+    """Отсортированные по смещению текста пары (смещение текста, адрес записи, формат)"""
+
+    def __init__(self, targets, slots, kinds, validated=None):
+        targets = np.asarray(targets, dtype=np.int64)
+        slots = np.asarray(slots, dtype=np.int64)
+        kinds = np.asarray(kinds, dtype=np.uint8)
+        validated = (np.ones(len(targets), dtype=bool) if validated is None
+                     else np.asarray(validated, dtype=bool))
+        order = np.lexsort((slots, targets))
+        self.targets = targets[order]
+        self.slots = slots[order]
+        self.kinds = kinds[order]
+        self.validated = validated[order]
+
+    @classmethod
+    def from_pointers(cls, pointers: Dict[str, Iterable[Tuple[int, int]]],
+                      validated: Optional[Iterable[int]] = None) -> 'PointerIndex':
+        """
+        Индекс из результатов сканеров: {формат: [(адрес записи, смещение текста), ...]}
+
+        validated - адреса подтверждённых записей (записей таблиц); None - все записи.
+        """
+        arrays = [np.asarray(list(found), dtype=np.int64).reshape(-1, 2) for found in pointers.values()]
+        codes = [np.full(len(a), KIND_CODES[kind], dtype=np.uint8) for kind, a in zip(pointers, arrays, strict=True)]
+        pairs = np.concatenate(arrays) if arrays else np.zeros((0, 2), dtype=np.int64)
+        kinds = np.concatenate(codes) if codes else np.zeros(0, dtype=np.uint8)
+        if validated is None:
+            confirmed = np.ones(len(pairs), dtype=bool)
+        else:
+            confirmed = np.isin(pairs[:, 0], np.fromiter(validated, dtype=np.int64))
+        # Одна запись может найтись несколькими сканерами - учитываем подтверждённую,
+        # а среди равных - первый формат
+        order = np.lexsort((np.arange(len(pairs)), ~confirmed, pairs[:, 0]))
+        slots, first = np.unique(pairs[order, 0], return_index=True)
+        first = order[first]
+        return cls(pairs[first, 1], slots, kinds[first], confirmed[first])
+
+    @classmethod
+    def build(cls, rom) -> 'PointerIndex':
+        """Сканирует ROM всеми поисковиками указателей, подходящими для его системы"""
+        from core.scanner import (
+            FAR_POINTER_LAYOUTS,
+            detect_pointer_tables,
+            find_banked_pointers,
+            find_far_pointers,
+            find_split_far_pointers,
+            find_text_pointers,
+        )
+
+        data = rom.data
+        if getattr(rom, 'system', None) == 'gba':
+            pointers = {'gba32': find_text_pointers(data, pointer_size=4, address_base=GBA_ROM_BASE_ADDRESS)}
+            tables = detect_pointer_tables(data, pointers['gba32'], strides=(4,))
+            validated = {slot for table in tables for slot, _ in table.entries}
+        else:
+            mbc = get_rom_mbc(rom)
+            pointers = {'banked16': find_banked_pointers(data, mbc=mbc)}
+            tables = detect_pointer_tables(data, pointers['banked16'], strides=(2,))
+            validated = {slot for table in tables for slot, _ in table.entries}
+            # Дальние и раздельные указатели сканеры находят только в таблицах
+            for layout in FAR_POINTER_LAYOUTS:
+                pointers[f'far_{layout}'] = find_far_pointers(data, layout=layout, mbc=mbc)
+                validated.update(slot for slot, _ in pointers[f'far_{layout}'])
+            pointers['split16'] = find_split_far_pointers(data, mbc=mbc)
+            validated.update(slot for slot, _ in pointers['split16'])
+        index = cls.from_pointers(pointers, validated)
+        logger.info(f"Построен обратный индекс указателей: {len(index)} записей, "
+                    f"подтверждено таблицами: {int(index.validated.sum())}")
+        return index
+
+    def __len__(self) -> int:
+        return len(self.targets)
+
+    def _bounds(self, start: int, end: int) -> Tuple[int, int]:
+        return (int(np.searchsorted(self.targets, start, side='left')),
+                int(np.searchsorted(self.targets, end, side='left')))
+
+    def references(self, offset: int) -> List[Tuple[int, str]]:
+        """Записи (адрес записи, формат), ссылающиеся на смещение текста"""
+        lo, hi = self._bounds(offset, offset + 1)
+        return [(int(slot), POINTER_KINDS[kind])
+                for slot, kind in zip(self.slots[lo:hi], self.kinds[lo:hi], strict=True)]
+
+    def is_referenced(self, offset: int) -> bool:
+        """Ссылается ли хотя бы один указатель на смещение"""
+        lo, hi = self._bounds(offset, offset + 1)
+        return hi > lo
+
+    def unvalidated_references(self, offset: int) -> List[Tuple[int, str]]:
+        """Ссылки на смещение, не подтверждённые таблицей указателей (возможно, случайные байты)"""
+        lo, hi = self._bounds(offset, offset + 1)
+        return [(int(slot), POINTER_KINDS[kind])
+                for slot, kind, ok in zip(self.slots[lo:hi], self.kinds[lo:hi], self.validated[lo:hi], strict=True)
+                if not ok]
+
+    def in_range(self, start: int, end: int) -> List[Tuple[int, int, str]]:
+        """Ссылки на смещения [start, end): (смещение текста, адрес записи, формат) по возрастанию смещения"""
+        lo, hi = self._bounds(start, end)
+        return [(int(target), int(slot), POINTER_KINDS[kind])
+                for target, slot, kind in zip(self.targets[lo:hi], self.slots[lo:hi], self.kinds[lo:hi], strict=True)]
+
+    def count_in_range(self, start: int, end: int) -> int:
+        """Число ссылок на смещения [start, end)"""
+        lo, hi = self._bounds(start, end)
+        return hi - lo
+
+    def pointer_writes(self, old_target: int, new_target: int) -> List[Tuple[int, bytes]]:
+        """
+        Байты для перенаправления всех указателей со старого смещения текста на новое
+
+        Возвращает [(адрес записи, новые байты)]. ValueError, если формат записи не может
+        адресовать новое смещение (16-битные указатели - только в пределах банка) или
+        на старое смещение ссылается неподтверждённая запись: её нельзя ни оставить
+        (будет указывать в середину другого текста), ни переписать (возможно, это не указатель).
+        """
+        unconfirmed = self.unvalidated_references(old_target)
+        if unconfirmed:
+            slots = ', '.join(f'0x{slot:X}' for slot, _ in unconfirmed)
+            raise ValueError(f"на смещение 0x{old_target:X} ссылаются записи вне таблиц указателей: {slots}")
+        writes = []
+        for slot, kind in self.references(old_target):
+            writes.append((slot, encode_pointer(kind, old_target, new_target)))
+        return writes
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        return {'targets': self.targets, 'slots': self.slots, 'kinds': self.kinds, 'validated': self.validated}
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray]) -> 'PointerIndex':
+        return cls(arrays['targets'], arrays['slots'], arrays['kinds'], arrays['validated'])
+
+
+def encode_pointer(kind: str, old_target: int, new_target: int) -> bytes:
+    """Байты записи формата kind, указывающей на new_target (old_target - для проверки банка)"""
+    bank, address = divmod(new_target, ROM_BANK_SIZE)
+    address += SWITCHABLE_START
+    if kind == 'gba32':
+        return (GBA_ROM_BASE_ADDRESS + new_target).to_bytes(4, 'little')
+    if new_target < ROM_BANK_SIZE:
+        raise ValueError(f"Смещение 0x{new_target:X} в банке 0 недоступно через окно 0x4000-0x7FFF")
+    if kind in ('banked16', 'split16'):
+        if bank != old_target // ROM_BANK_SIZE:
+            raise ValueError(f"16-битный указатель не может перейти из банка {old_target // ROM_BANK_SIZE} "
+                             f"в банк {bank}")
+        return address.to_bytes(2, 'little')
+    if kind == 'far_bank_lo_hi':
+        return bytes((bank & 0xFF, address & 0xFF, address >> 8))
+    if kind == 'far_lo_hi_bank':
+        return bytes((address & 0xFF, address >> 8, bank & 0xFF))
+    raise ValueError(f"Неизвестный формат указателя: {kind}")
+
+
+# Индексы загруженных ROM: rom -> (объект данных, индекс)
+_indexes: 'weakref.WeakKeyDictionary' = weakref.WeakKeyDictionary()
+_lock = threading.Lock()
+
+
+def get_pointer_index(rom, cache=None) -> PointerIndex:
+    """
+    Обратный индекс указателей ROM
+
+    Берётся из памяти (для того же объекта данных), затем из кэша сканирования
+    на диске; иначе строится и сохраняется в оба кэша.
+    """
+    cache = cache if cache is not None else scan_cache
+    data = rom.data
+    with _lock:
+        cached = _indexes.get(rom)
+    if cached is not None and cached[0] is data:
+        return cached[1]
+
+    content_hash = rom_content_hash(rom)
+    key = f'{CACHE_NAME}.{getattr(rom, "system", None)}'
+    arrays = cache.load(content_hash, key)
+    # Индексы старых версий без отметок подтверждения строятся заново
+    if arrays is not None and 'validated' in arrays:
+        index = PointerIndex.from_arrays(arrays)
+    else:
+        index = PointerIndex.build(rom)
+        cache.store(content_hash, key, index.to_arrays())
+
+    with _lock:
+        _indexes[rom] = (data, index)
+    return index
+
+
+def clear_pointer_indexes() -> None:
+    """Сбрасывает индексы в памяти (дисковый кэш не затрагивается)"""
+    with _lock:
+        _indexes.clear()
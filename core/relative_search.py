@@ -0,0 +1,284 @@
+"""
+GB Text Extraction Framework
+
+ПРЕДУПРЕЖДЕНИЕ ОБ АВТОРСКИХ ПРАВАХ:
+Этот программный инструмент предназначен ТОЛЬКО для анализа ROM-файлов,
+законно принадлежащих пользователю. Использование этого инструмента для
+нелегального копирования, распространения или модификации защищенных
+авторским правом материалов строго запрещено.
+
+Этот проект НЕ содержит и НЕ распространяет никакие ROM-файлы или
+защищенные авторским правом материалы. Все ROM-файлы должны быть
+законно приобретены пользователем самостоятельно.
+
+Этот инструмент разработан исключительно для исследовательских целей,
+обучения и реверс-инжиниринга в рамках, разрешенных законодательством.
+"""
+
+"""
+Относительный поиск (relative search) для восстановления неизвестных таблиц символов
+
+В собственных кодировках игр буквы обычно идут подряд (A, B, C... с шагом 1), но с
+неизвестным сдвигом. Известное слово находится по разностям соседних байтов: у "HELLO"
+они те же, что у кодов его букв в любой такой кодировке. Разности всего ROM
+вычисляются один раз; все слова запроса ищутся за один проход мультишаблонным
+сопоставлением: ключ из первых разностей каждого слова проверяется по таблице
+ключей, а совпадения затем сверяются со словами векторно. Из найденных вхождений
+выводятся сдвиги для заглавных, строчных букв и цифр и предлагается таблица символов.
+"""
+
+import logging
+import threading
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger('gb2text.relative_search')
+
+# Классы символов, внутри которых коды предполагаются идущими подряд
+CHAR_CLASSES = {
+    'upper': 'ABCDEFGHIJKLMNOPQRSTUVWXYZ',
+    'lower': 'abcdefghijklmnopqrstuvwxyz',
+    'digit': '0123456789',
+}
+
+# Сколько первых разностей слова образуют ключ мультишаблонного поиска (24 бита)
+ANCHOR_DIFFS = 3
+
+# Минимальное число разностей внутри одного класса (3 буквы подряд)
+MIN_QUERY_DIFFS = 2
+
+
+def _char_class(char: str) -> Optional[str]:
+    for name, chars in CHAR_CLASSES.items():
+        if char in chars:
+            return name
+    return None
+
+
+@dataclass
+class RelativeQuery:
+    """
+    Разобранное слово запроса
+
+    classes[i] - класс i-го символа (None - символ без ограничений), anchor - позиция
+    в слове начала самой длинной серии символов одного класса, anchor_diffs - разности
+    первых символов этой серии, используемые как ключ поиска.
+    """
+
+    word: str
+    classes: List[Optional[str]]
+    anchor: int
+    anchor_diffs: Tuple[int, ...]
+
+    @classmethod
+    def parse(cls, word: str) -> 'RelativeQuery':
+        classes = [_char_class(char) for char in word]
+        best_start, best_length = 0, 0
+        run_start = 0
+        for i in range(1, len(word) + 1):
+            if i == len(word) or classes[i] is None or classes[i] != classes[run_start]:
+                if classes[run_start] is not None and i - run_start > best_length:
+                    best_start, best_length = run_start, i - run_start
+                run_start = i
+        if best_length - 1 < MIN_QUERY_DIFFS:
+            raise ValueError(f"В слове '{word}' нет {MIN_QUERY_DIFFS + 1} букв или цифр одного класса подряд")
+        diffs = tuple((ord(word[best_start + k + 1]) - ord(word[best_start + k])) & 0xFF
+                      for k in range(min(best_length - 1, ANCHOR_DIFFS)))
+        return cls(word, classes, best_start, diffs)
+
+    @property
+    def key(self) -> int:
+        """Ключ поиска: разности якоря, упакованные в 24 бита"""
+        key = 0
+        for k, diff in enumerate(self.anchor_diffs):
+            key |= diff << (8 * k)
+        return key
+
+
+@dataclass
+class RelativeMatch:
+    """Вхождение слова: смещение первого символа и сдвиги кодов по классам (код = ord + сдвиг)"""
+
+    word: str
+    offset: int
+    shifts: Dict[str, int] = field(default_factory=dict)
+
+
+class RelativeSearch:
+    """Относительный поиск по ROM (разности соседних байтов вычисляются один раз)"""
+
+    def __init__(self, rom_data: bytes):
+        self.data = np.frombuffer(rom_data, dtype=np.uint8)
+        # diffs[i] = (data[i + 1] - data[i]) mod 256
+        self.diffs = self.data[1:] - self.data[:-1]
+        self._keys: Optional[np.ndarray] = None
+        self._lock = threading.Lock()
+
+    def _anchor_keys(self) -> np.ndarray:
+        """
+        Ключи из ANCHOR_DIFFS разностей, начиная с каждой позиции (строятся один раз)
+
+        Ключ более короткого якоря - младшие байты того же ключа.
+        """
+        with self._lock:
+            if self._keys is None:
+                padded = np.concatenate((self.diffs, np.zeros(ANCHOR_DIFFS - 1, dtype=np.uint8)))
+                keys = padded[:len(self.diffs)].astype(np.uint32)
+                for k in range(1, ANCHOR_DIFFS):
+                    keys |= padded[k:k + len(self.diffs)].astype(np.uint32) << (8 * k)
+                self._keys = keys
+            return self._keys
+
+    def search(self, words: Iterable[str], start: int = 0, end: Optional[int] = None,
+               max_matches: int = 10000) -> List[RelativeMatch]:
+        """
+        Все вхождения слов в ROM (или в диапазоне [start, end))
+
+        Слова группируются по длине ключа; для каждой группы один проход по ключам ROM
+        с проверкой по таблице ключей группы, затем кандидаты каждого слова сверяются
+        векторно. Возвращает вхождения, упорядоченные по смещению (не более max_matches
+        на слово).
+        """
+        queries = [RelativeQuery.parse(word) for word in dict.fromkeys(words)]
+        end = len(self.data) if end is None else min(end, len(self.data))
+        by_length: Dict[int, List[RelativeQuery]] = {}
+        for query in queries:
+            by_length.setdefault(len(query.anchor_diffs), []).append(query)
+
+        matches: List[RelativeMatch] = []
+        for length, group in by_length.items():
+            keys = self._anchor_keys()
+            if length < ANCHOR_DIFFS:
+                keys = keys & ((1 << (8 * length)) - 1)
+            table = np.zeros(1 << (8 * length), dtype=bool)
+            table[[query.key for query in group]] = True
+            candidates = np.flatnonzero(table[keys])
+            if not len(candidates):
+                continue
+            candidate_keys = keys[candidates]
+            for query in group:
+                anchors = candidates[candidate_keys == query.key]
+                matches.extend(self._verify(query, anchors - query.anchor, start, end)[:max_matches])
+
+        matches.sort(key=lambda m: (m.offset, m.word))
+        logger.info(f"Относительный поиск: {len(queries)} слов, {len(matches)} вхождений")
+        return matches
+
+    def _verify(self, query: RelativeQuery, offsets: np.ndarray, start: int, end: int) -> List[RelativeMatch]:
+        """
+        Проверяет вхождения слова: сдвиг кода одинаков для всех символов каждого класса,
+        а коды символов не попадают в диапазон другого класса того же вхождения
+        """
+        offsets = offsets[(offsets >= start) & (offsets + len(query.word) <= end)]
+        if not len(offsets):
+            return []
+        valid = np.ones(len(offsets), dtype=bool)
+        shifts: Dict[str, np.ndarray] = {}
+        for i, (char, char_class) in enumerate(zip(query.word, query.classes, strict=True)):
+            if char_class is None:
+                continue
+            shift = (self.data[offsets + i].astype(np.int64) - ord(char)) & 0xFF
+            if char_class in shifts:
+                valid &= shift == shifts[char_class]
+            else:
+                shifts[char_class] = shift
+        # Диапазоны кодов разных классов не пересекаются: одиночная заглавная буква
+        # в "Bright" иначе совпала бы и со строчной в "bright"
+        for i, char_class in enumerate(query.classes):
+            if char_class is None:
+                continue
+            codes = self.data[offsets + i].astype(np.int64)
+            for other, other_shifts in shifts.items():
+                if other != char_class:
+                    first = ord(CHAR_CLASSES[other][0])
+                    valid &= ((codes - first - other_shifts) & 0xFF) >= len(CHAR_CLASSES[other])
+        offsets = offsets[valid]
+        shifts = {name: values[valid] for name, values in shifts.items()}
+        return [RelativeMatch(query.word, offset, {name: int(values[k]) for name, values in shifts.items()})
+                for k, offset in enumerate(offsets.tolist())]
+
+    def propose_shifts(self, matches: Iterable[RelativeMatch]) -> Dict[str, int]:
+        """
+        Наиболее вероятный сдвиг каждого класса символов
+
+        Голос за сдвиг подаёт каждое различное слово (а не каждое вхождение), так что
+        частое короткое слово, случайно совпавшее в коде, не перевешивает несколько
+        разных найденных слов.
+        """
+        votes: Dict[str, Counter] = {}
+        for match in matches:
+            for name, shift in match.shifts.items():
+                votes.setdefault(name, Counter())[(shift, match.word)] += 1
+        result = {}
+        for name, counter in votes.items():
+            # (число различных слов, число вхождений) для каждого сдвига
+            scores: Dict[int, Tuple[int, int]] = {}
+            for (shift, _), count in counter.items():
+                words, hits = scores.get(shift, (0, 0))
+                scores[shift] = (words + 1, hits + count)
+            result[name] = max(scores, key=scores.get)
+        return result
+
+    def propose_charmap(self, words: Iterable[str], start: int = 0, end: Optional[int] = None) -> Dict[int, str]:
+        """Таблица символов (код -> символ) для классов, сдвиг которых удалось определить"""
+        return shifts_to_charmap(self.propose_shifts(self.search(words, start, end)))
+
+
+def shifts_to_charmap(shifts: Dict[str, int]) -> Dict[int, str]:
+    """Таблица символов из сдвигов классов: код = (ord(символ) + сдвиг) mod 256"""
+    charmap = {}
+    for name, shift in shifts.items():
+        for char in CHAR_CLASSES[name]:
+            charmap[(ord(char) + shift) & 0xFF] = char
+    return charmap
+
+
+def apply_known_words(charmap: Dict[int, str], rom_data: bytes, known_words: Iterable[str]) -> Dict[int, str]:
+    """
+    Уточняет таблицу символов относительным поиском известных слов по всему ROM
+
+    Для классов с найденным сдвигом предположения исходной таблицы заменяются
+    выведенными кодами; остальные символы остаются без изменений. Слова, непригодные
+    для относительного поиска (без трёх латинских букв или цифр одного класса подряд),
+    пропускаются с предупреждением.
+    """
+    words = []
+    for word in known_words:
+        try:
+            RelativeQuery.parse(word)
+        except ValueError as e:
+            logger.warning(f"Известное слово {word!r} пропущено: {e}")
+            continue
+        words.append(word)
+    if not words:
+        logger.info("Нет известных слов, пригодных для относительного поиска, таблица не изменена")
+        return charmap
+    engine = get_relative_search(rom_data)
+    shifts = engine.propose_shifts(engine.search(words))
+    if not shifts:
+        logger.info("Относительный поиск не нашёл известных слов, таблица не изменена")
+        return charmap
+    resolved = set(''.join(CHAR_CLASSES[name] for name in shifts))
+    result = {code: char for code, char in charmap.items() if char not in resolved}
+    result.update(shifts_to_charmap(shifts))
+    logger.info(f"Относительный поиск определил сдвиги: {shifts}")
+    return result
+
+
+# Движок последнего ROM: разности и ключи переиспользуются между запросами
+_last_engine: Optional[Tuple[bytes, RelativeSearch]] = None
+_engine_lock = threading.Lock()
+
+
+def get_relative_search(rom_data: bytes) -> RelativeSearch:
+    """Движок относительного поиска для данных ROM (кэшируется для последнего ROM)"""
+    global _last_engine
+    with _engine_lock:
+        if _last_engine is not None and _last_engine[0] is rom_data:
+            return _last_engine[1]
+        engine = RelativeSearch(rom_data)
+        _last_engine = (rom_data, engine)
+        return engine
@@ -21,7 +21,11 @@ GB Text Extraction Framework
 
 import logging
 from typing import Dict, Optional
+
+import numpy as np
+
 from core.mbc import create_mbc
+from core.tracing import span
 
 
 # Валидные расширения файлов
@@ -82,10 +86,14 @@ class GameBoyROM:
                 raise ValueError(validation_error)
         
         self.path = rom_path
-        self.data = self._load_rom(rom_path)
-        self.header = self._parse_header()
-        self.system = self._detect_system()
-        self.mbc = create_mbc(self.data, self.header['cartridge_type'])
+        with span('rom.load', path=rom_path) as trace_args:
+            self.data = self._load_rom(rom_path)
+            trace_args['bytes'] = len(self.data)
+        with span('rom.parse_header') as trace_args:
+            self.header = self._parse_header()
+            self.system = self._detect_system()
+            self.mbc = create_mbc(self.data, self.header['cartridge_type'])
+            trace_args['system'] = self.system
         logger.info(f"ROM загружен успешно. Размер: {len(self.data)} байт")
         logger.info(f"Определена система: {self.system}")
         logger.debug(f"Заголовок ROM: {self.header}")
@@ -185,6 +193,16 @@ class GameBoyROM:
         cartridge_type = self.header['cartridge_type']
         return f"GAME_{cartridge_type:02X}"
 
+    def read_banked(self, banks, addresses) -> np.ndarray:
+        """
+        Пакетное чтение байтов по массивам (банк, адрес CPU) с учётом MBC
+
+        Для адресов, которые MBC не может отобразить, возвращается 0xFF.
+        """
+        offsets = self.mbc.to_file_offsets(banks, addresses)
+        data = np.frombuffer(self.data, dtype=np.uint8)
+        return np.where(offsets >= 0, data[np.maximum(offsets, 0)], 0xFF).astype(np.uint8)
+
     def read(self, address: int) -> int:
         """Чтение из ROM с учетом MBC"""
         if 0x0000 <= address < 0x8000:
@@ -0,0 +1,181 @@
+"""
+Дисковый кэш результатов сканирования ROM
+
+Полный проход по ROM (поиск указателей всех форматов, построение индексов) занимает
+сотни миллисекунд на образ в несколько мегабайт и повторяется при каждом запуске.
+Результаты - наборы numpy-массивов - сохраняются в .npz-файлы, ключ - SHA-1
+содержимого ROM (core.segment_plan.rom_content_hash) и имя результата, так что
+изменённый ROM никогда не получает чужие данные.
+
+Каталог кэша: переменная окружения GB2TEXT_CACHE_DIR или ~/.cache/gb2text/scan.
+Размер каталога ограничен (GB2TEXT_CACHE_MAX_MB, по умолчанию 512 МБ): после записи
+удаляются файлы, которые дольше всех не использовались (по времени изменения, которое
+обновляется при чтении).
+"""
+
+import logging
+import os
+import tempfile
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger('gb2text.scan_cache')
+
+# Версия формата; при изменении старые файлы игнорируются
+SCAN_CACHE_VERSION = 1
+
+CACHE_DIR_ENV = 'GB2TEXT_CACHE_DIR'
+
+# Предельный размер каталога кэша (МБ); 0 - без ограничения
+CACHE_MAX_MB_ENV = 'GB2TEXT_CACHE_MAX_MB'
+DEFAULT_CACHE_MAX_MB = 512
+
+
+def default_cache_dir() -> str:
+    """Каталог кэша сканирования по умолчанию"""
+    return os.environ.get(CACHE_DIR_ENV) or os.path.join(os.path.expanduser('~'), '.cache', 'gb2text', 'scan')
+
+
+def default_max_size() -> int:
+    """Предельный размер кэша в байтах по умолчанию (0 - без ограничения)"""
+    try:
+        megabytes = float(os.environ.get(CACHE_MAX_MB_ENV, DEFAULT_CACHE_MAX_MB))
+    except ValueError:
+        megabytes = DEFAULT_CACHE_MAX_MB
+    return max(0, int(megabytes * 1024 * 1024))
+
+
+class ScanCache:
+    """Хранилище массивов результатов сканирования по (хэш ROM, имя результата)"""
+
+    def __init__(self, directory: Optional[str] = None, enabled: bool = True, max_size: Optional[int] = None):
+        self._directory = directory
+        self.enabled = enabled
+        self._max_size = max_size
+
+    @property
+    def directory(self) -> str:
+        return self._directory or default_cache_dir()
+
+    @property
+    def max_size(self) -> int:
+        """Предельный размер каталога в байтах (0 - без ограничения)"""
+        return self._max_size if self._max_size is not None else default_max_size()
+
+    def path(self, content_hash: str, name: str) -> str:
+        """Путь к файлу результата"""
+        return os.path.join(self.directory, f'{content_hash}.{name}.npz')
+
+    def load(self, content_hash: Optional[str], name: str) -> Optional[Dict[str, np.ndarray]]:
+        """Массивы результата или None, если его нет, он другой версии или повреждён"""
+        if not self.enabled or not content_hash:
+            return None
+        path = self.path(content_hash, name)
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path, allow_pickle=False) as archive:
+                arrays = {key: archive[key] for key in archive.files}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Не удалось прочитать кэш сканирования {path}: {e}")
+            return None
+        version = arrays.pop('__version__', None)
+        if version is None or int(version) != SCAN_CACHE_VERSION:
+            logger.debug(f"Кэш сканирования {path} другой версии, игнорируем")
+            return None
+        try:
+            # Время изменения - время последнего использования для вытеснения
+            os.utime(path)
+        except OSError:
+            pass
+        logger.debug(f"Результат '{name}' загружен из кэша сканирования")
+        return arrays
+
+    def store(self, content_hash: Optional[str], name: str, arrays: Dict[str, np.ndarray]) -> bool:
+        """Атомарно сохраняет массивы результата; False, если кэш недоступен"""
+        if not self.enabled or not content_hash:
+            return False
+        path = self.path(content_hash, name)
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.npz.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    np.savez(f, __version__=np.int64(SCAN_CACHE_VERSION), **arrays)
+                os.replace(tmp_path, path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        except OSError as e:
+            logger.warning(f"Не удалось сохранить кэш сканирования {path}: {e}")
+            return False
+        self.prune(keep=path)
+        return True
+
+    def _entries(self) -> List[Tuple[float, int, str]]:
+        """Файлы кэша: (время изменения, размер, путь)"""
+        if not os.path.isdir(self.directory):
+            return []
+        entries = []
+        for filename in os.listdir(self.directory):
+            if not filename.endswith('.npz'):
+                continue
+            path = os.path.join(self.directory, filename)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def size(self) -> int:
+        """Суммарный размер файлов кэша в байтах"""
+        return sum(size for _, size, _ in self._entries())
+
+    def prune(self, max_size: Optional[int] = None, keep: Optional[str] = None) -> int:
+        """
+        Удаляет давно не использованные файлы, пока кэш больше max_size байт
+
+        max_size по умолчанию - self.max_size (0 - без ограничения); файл keep
+        не удаляется. Возвращает число освобождённых байт.
+        """
+        limit = self.max_size if max_size is None else max_size
+        if not limit:
+            return 0
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        freed = 0
+        for _, size, path in entries:
+            if total - freed <= limit:
+                break
+            if path == keep:
+                continue
+            try:
+                os.unlink(path)
+            except OSError:
+                continue
+            freed += size
+        if freed:
+            logger.info(f"Кэш сканирования сокращён на {freed} байт (предел {limit} байт)")
+        return freed
+
+    def clear(self) -> int:
+        """Удаляет все файлы кэша; возвращает число освобождённых байт"""
+        return self.prune(max_size=-1)
+
+    def remove(self, content_hash: str, name: Optional[str] = None) -> None:
+        """Удаляет результат (или все результаты ROM)"""
+        if not os.path.isdir(self.directory):
+            return
+        prefix = f'{content_hash}.{name}.npz' if name else f'{content_hash}.'
+        for filename in os.listdir(self.directory):
+            if filename == prefix or (not name and filename.startswith(prefix)):
+                try:
+                    os.unlink(os.path.join(self.directory, filename))
+                except OSError:
+                    pass
+
+
+# Общий кэш процесса
+scan_cache = ScanCache()
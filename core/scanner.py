@@ -20,8 +20,12 @@ GB Text Extraction Framework
 """
 
 import logging
+import weakref
 from collections import Counter
-from typing import List, Dict, Tuple
+from dataclasses import dataclass, field
+from typing import Iterable, List, Dict, Optional, Tuple
+
+import numpy as np
 
 from core.constants import (
     ROM_HEADER_SIZE,
@@ -43,8 +47,9 @@ from core.constants import (
 
 # ML-based segment classification
 try:
-    from core.ml_classifier import get_ml_classifier, SKLEARN_AVAILABLE
+    from core.ml_classifier import get_ml_classifier, ML_AVAILABLE, SKLEARN_AVAILABLE
 except ImportError:
+    ML_AVAILABLE = False
     SKLEARN_AVAILABLE = False
     get_ml_classifier = None
 
@@ -62,35 +67,33 @@ def find_text_pointers(rom_data: bytes, start: int = 0, end: int = None,
     end_value = end if end is not None else len(rom_data)
 
     # Формируем сообщение для лога
-    logger.info(f"Поиск указателей (размер указателя: {pointer_size} байта) в диапазоне 0x{start:X}-0x{end_value:X}")
+    logger.info("Поиск указателей (размер указателя: %d байта) в диапазоне 0x%X-0x%X",
+                pointer_size, start, end_value)
 
-    pointers = []
-    step = pointer_size
-
-    for i in range(start, end_value - pointer_size + 1, step):
-        # Определение адреса в зависимости от размера указателя
-        if pointer_size == 2:
-            addr = (rom_data[i + 1] << 8) | rom_data[i]
-        elif pointer_size == 4:
-            addr = (rom_data[i + 3] << 24) | (rom_data[i + 2] << 16) | (rom_data[i + 1] << 8) | rom_data[i]
-        else:
-            continue  # Неподдерживаемый размер указателя
+    if pointer_size not in (2, 4):
+        logger.info("Найдено %d указателей", 0)  # Неподдерживаемый размер указателя
+        return []
 
-        # Маппим адрес для систем с базой адреса (например, GBA 0x08000000)
-        mapped = addr
-        if pointer_size == 4 and address_base:
-            mapped = addr - address_base
-            if mapped < 0:
-                continue
+    # Все позиции с шагом размера указателя разбираются и проверяются векторно
+    data = np.frombuffer(rom_data, dtype=np.uint8)
+    positions = np.arange(start, min(end_value, len(data)) - pointer_size + 1, pointer_size, dtype=np.int64)
+    addresses = np.zeros(len(positions), dtype=np.int64)
+    for k in range(pointer_size):
+        addresses |= data[positions + k].astype(np.int64) << (8 * k)
 
-        # Проверяем, является ли значение возможным адресом
-        if 0x4000 <= mapped < len(rom_data):
-            # Проверяем, похож ли текст по адресу на текст
-            if is_text_like(rom_data, mapped, min_length):
-                pointers.append((i, mapped))
-                logger.debug(f"Найден указатель: 0x{i:X} -> 0x{mapped:X} (raw=0x{addr:X}, base=0x{address_base:X})")
+    # Маппим адрес для систем с базой адреса (например, GBA 0x08000000)
+    mapped = addresses - address_base if pointer_size == 4 and address_base else addresses
 
-    logger.info(f"Найдено {len(pointers)} указателей")
+    # Проверяем, является ли значение возможным адресом и похож ли текст по адресу на текст
+    found = (mapped >= 0x4000) & (mapped < len(data))
+    found[found] = text_like_mask(rom_data, mapped[found], min_length)
+    pointers = list(zip(positions[found].tolist(), mapped[found].tolist()))
+
+    if logger.isEnabledFor(logging.DEBUG):
+        for (i, target), addr in zip(pointers, addresses[found].tolist()):
+            logger.debug("Найден указатель: 0x%X -> 0x%X (raw=0x%X, base=0x%X)", i, target, addr, address_base)
+
+    logger.info("Найдено %d указателей", len(pointers))
     return pointers
 
 
@@ -114,6 +117,384 @@ def is_text_like(rom_data: bytes, start: int, min_length: int) -> bool:
     return result
 
 
+# Байты, которые is_text_like считает "читаемыми"
+_TEXT_LIKE_BYTES = np.zeros(256, dtype=bool)
+_TEXT_LIKE_BYTES[0x20:0x7F] = True
+_TEXT_LIKE_BYTES[[0x00, 0x0A, 0x0D, 0xFF]] = True
+
+
+def text_like_mask(rom_data: bytes, starts, min_length: int) -> np.ndarray:
+    """
+    Векторный is_text_like для массива начальных смещений
+
+    Число читаемых байтов в каждом окне [start, start + min_length) берётся из
+    префиксных сумм, так что проверка миллионов кандидатов - один проход по ROM.
+    """
+    return _text_like_windows(_text_like_counts(rom_data), starts, min_length)
+
+
+def _text_like_counts(rom_data: bytes) -> np.ndarray:
+    """Префиксные суммы читаемых байтов: counts[i] - число читаемых в rom_data[:i]"""
+    data = np.frombuffer(rom_data, dtype=np.uint8)
+    counts = np.zeros(len(data) + 1, dtype=np.int32)
+    np.cumsum(_TEXT_LIKE_BYTES[data], out=counts[1:], dtype=np.int32)
+    return counts
+
+
+def _text_like_windows(counts: np.ndarray, starts, min_length: int) -> np.ndarray:
+    """text_like_mask по готовым префиксным суммам (для нескольких проверок одного ROM)"""
+    starts = np.asarray(starts, dtype=np.int64)
+    if min_length <= 0:
+        return np.zeros(len(starts), dtype=bool)
+    valid = (starts >= 0) & (starts + min_length < len(counts))
+    safe = np.where(valid, starts, 0)
+    printable = counts[safe + min_length] - counts[safe]
+    return valid & (printable / min_length > 0.6)
+
+
+def find_banked_pointers(rom_data: bytes, start: int = 0, end: int = None,
+                         min_length: int = MIN_POINTER_LENGTH, mbc=None,
+                         home_bank: int = 1, step: int = 1) -> List[Tuple[int, int]]:
+    """
+    Поиск 16-битных указателей GB/GBC с учётом банков
+
+    Указатель 0x4000-0x7FFF, лежащий в банке N, разрешается в окно того же банка
+    (N * 0x4000 + адрес - 0x4000); для указателей из банка 0 используется home_bank.
+    Если передан mbc (core.mbc.MBC), банки, которые он не может подключить,
+    отбрасываются. Перевод адресов и проверка текста векторизованы.
+    Указатели GB не выровнены (операнд ld hl,nn может лежать по нечётному адресу),
+    поэтому по умолчанию проверяется каждая байтовая позиция (step=1).
+    Возвращает список кортежей (адрес указателя, смещение текста) как find_text_pointers.
+    """
+    from core.mbc import ROM_BANK_SIZE, SWITCHABLE_START, SWITCHABLE_END, bank_addresses_to_offsets
+
+    data = np.frombuffer(rom_data, dtype=np.uint8)
+    end_value = min(end if end is not None else len(data), len(data))
+    logger.info("Поиск указателей с учётом банков в диапазоне 0x%X-0x%X", start, end_value)
+
+    positions = np.arange(start, end_value - 1, step, dtype=np.int64)
+    if not len(positions):
+        return []
+    addresses = data[positions].astype(np.int64) | (data[positions + 1].astype(np.int64) << 8)
+
+    in_window = (addresses >= SWITCHABLE_START) & (addresses < SWITCHABLE_END)
+    positions, addresses = positions[in_window], addresses[in_window]
+    banks = positions // ROM_BANK_SIZE
+    banks[banks == 0] = home_bank
+
+    if mbc is not None:
+        offsets = mbc.to_file_offsets(banks, addresses)
+    else:
+        offsets = bank_addresses_to_offsets(banks, addresses)
+        offsets[offsets >= len(data)] = -1
+    found = offsets >= 0
+    found[found] = text_like_mask(rom_data, offsets[found], min_length)
+
+    pointers = list(zip(positions[found].tolist(), offsets[found].tolist()))
+    logger.info("Найдено %d указателей", len(pointers))
+    return pointers
+
+
+# Раскладки 3-байтовых дальних указателей: позиции байтов (банк, младший, старший) в записи
+FAR_POINTER_LAYOUTS = {
+    'bank_lo_hi': (0, 1, 2),
+    'lo_hi_bank': (2, 0, 1),
+}
+
+# Минимальное число записей в таблице дальних указателей
+MIN_FAR_TABLE_ENTRIES = 3
+
+
+def _resolve_far_pointers(data: np.ndarray, banks: np.ndarray, addresses: np.ndarray, mbc) -> np.ndarray:
+    """Смещения файла для пар (банк, адрес) дальних указателей; -1 для недопустимых"""
+    from core.mbc import SWITCHABLE_START, SWITCHABLE_END, bank_addresses_to_offsets
+
+    in_window = (addresses >= SWITCHABLE_START) & (addresses < SWITCHABLE_END)
+    if mbc is not None:
+        offsets = mbc.to_file_offsets(banks, addresses)
+    else:
+        # Без MBC банк 0 в окне не встречается: дальний указатель на банк 0 не нужен
+        offsets = bank_addresses_to_offsets(banks, addresses)
+        offsets[(banks < 1) | (offsets >= len(data))] = -1
+    return np.where(in_window, offsets, -1)
+
+
+def _runs_mask(valid: np.ndarray, stride: int, min_run: int) -> np.ndarray:
+    """Маска позиций, входящих в серии из min_run и более подряд идущих valid с шагом stride"""
+    if min_run <= 1:
+        return valid
+    result = np.zeros_like(valid)
+    for phase in range(stride):
+        chain = valid[phase::stride].astype(np.int8)
+        if not len(chain):
+            continue
+        edges = np.diff(np.concatenate(([0], chain, [0])))
+        starts = np.flatnonzero(edges == 1)
+        lengths = np.flatnonzero(edges == -1) - starts
+        keep = np.zeros(len(chain) + 1, dtype=np.int32)
+        long_runs = lengths >= min_run
+        np.add.at(keep, starts[long_runs], 1)
+        np.add.at(keep, starts[long_runs] + lengths[long_runs], -1)
+        result[phase::stride] = np.cumsum(keep[:-1]) > 0
+    return result
+
+
+def find_far_pointers(rom_data: bytes, start: int = 0, end: int = None,
+                      layout: str = 'bank_lo_hi', min_length: int = MIN_POINTER_LENGTH,
+                      mbc=None, min_entries: int = MIN_FAR_TABLE_ENTRIES) -> List[Tuple[int, int]]:
+    """
+    Поиск таблиц 3-байтовых дальних указателей GB/GBC (банк + 16-битный адрес)
+
+    layout - раскладка записи из FAR_POINTER_LAYOUTS ('bank_lo_hi' или 'lo_hi_bank').
+    Запись допустима, если адрес лежит в окне 0x4000-0x7FFF, банк доступен mbc
+    (без mbc - банк от 1 до конца файла) и текст по смещению похож на текст.
+    Одиночные совпадения в коде и графике отсекаются требованием таблицы: не менее
+    min_entries допустимых записей подряд с шагом 3. Все проверки векторизованы
+    по всем байтовым позициям диапазона.
+    Возвращает список кортежей (адрес записи, смещение текста) как find_text_pointers.
+    """
+    if layout not in FAR_POINTER_LAYOUTS:
+        raise ValueError(f"Неизвестная раскладка дальних указателей: {layout}")
+    bank_pos, lo_pos, hi_pos = FAR_POINTER_LAYOUTS[layout]
+
+    data = np.frombuffer(rom_data, dtype=np.uint8)
+    end_value = min(end if end is not None else len(data), len(data))
+    logger.info("Поиск дальних указателей (%s) в диапазоне 0x%X-0x%X", layout, start, end_value)
+
+    count = end_value - 2 - start
+    if count <= 0:
+        return []
+    # Старший байт адреса окна - 0x40-0x7F: отбираем кандидатов до расширения до int64
+    hi = data[start + hi_pos:start + hi_pos + count]
+    candidates = np.flatnonzero((hi >= 0x40) & (hi < 0x80)) + start
+    banks = data[candidates + bank_pos].astype(np.int64)
+    addresses = data[candidates + lo_pos].astype(np.int64) | (data[candidates + hi_pos].astype(np.int64) << 8)
+
+    offsets = _resolve_far_pointers(data, banks, addresses, mbc)
+    valid = offsets >= 0
+    valid[valid] = text_like_mask(rom_data, offsets[valid], min_length)
+
+    found = np.zeros(count, dtype=bool)
+    found[candidates[valid] - start] = True
+    found = _runs_mask(found, 3, min_entries)
+    positions = np.flatnonzero(found) + start
+    target_of = dict(zip(candidates[valid].tolist(), offsets[valid].tolist()))
+
+    pointers = [(position, target_of[position]) for position in positions.tolist()]
+    logger.info("Найдено %d дальних указателей", len(pointers))
+    return pointers
+
+
+def find_split_far_pointers(rom_data: bytes, start: int = 0, end: int = None,
+                            min_length: int = MIN_POINTER_LENGTH, mbc=None,
+                            min_entries: int = 4, min_valid: float = 0.75) -> List[Tuple[int, int]]:
+    """
+    Поиск раздельных таблиц дальних указателей GB/GBC: таблица банков параллельна таблице адресов
+
+    Кандидаты в таблицу адресов - серии из min_entries и более 16-битных адресов окна
+    0x4000-0x7FFF подряд (при любом выравнивании). Для серии из n записей проверяются
+    n байтов банков непосредственно перед ней и сразу после неё: таблица принимается,
+    если не менее min_valid записей разрешаются в похожий на текст участок.
+    Все кандидаты проверяются одним векторным проходом.
+    Возвращает список кортежей (адрес записи таблицы адресов, смещение текста).
+    """
+    from core.mbc import SWITCHABLE_START, SWITCHABLE_END
+
+    data = np.frombuffer(rom_data, dtype=np.uint8)
+    end_value = min(end if end is not None else len(data), len(data))
+    logger.info("Поиск раздельных таблиц дальних указателей в диапазоне 0x%X-0x%X", start, end_value)
+
+    positions = np.arange(start, end_value - 1, dtype=np.int64)
+    if len(positions) < 2 * min_entries:
+        return []
+    addresses = data[positions].astype(np.int64) | (data[positions + 1].astype(np.int64) << 8)
+    in_window = (addresses >= SWITCHABLE_START) & (addresses < SWITCHABLE_END)
+
+    # Серии адресов окна с шагом 2 (для каждой чётности отдельно)
+    run_starts, run_lengths = [], []
+    for phase in range(2):
+        chain = in_window[phase::2].astype(np.int8)
+        edges = np.diff(np.concatenate(([0], chain, [0])))
+        starts = np.flatnonzero(edges == 1)
+        lengths = np.flatnonzero(edges == -1) - starts
+        long_runs = lengths >= min_entries
+        run_starts.append(positions[phase::2][starts[long_runs]])
+        run_lengths.append(lengths[long_runs])
+    run_starts = np.concatenate(run_starts)
+    run_lengths = np.concatenate(run_lengths)
+    if not len(run_starts):
+        return []
+
+    # Записи всех кандидатов: (серия, сторона таблицы банков) -> группа
+    counts = _text_like_counts(rom_data)
+    pointers = []
+    entry_index = np.arange(run_lengths.sum()) - np.repeat(np.cumsum(run_lengths) - run_lengths, run_lengths)
+    slot_positions = np.repeat(run_starts, run_lengths) + 2 * entry_index
+    slot_addresses = data[slot_positions].astype(np.int64) | (data[slot_positions + 1].astype(np.int64) << 8)
+    group_ids = np.repeat(np.arange(len(run_starts)), run_lengths)
+    claimed = np.zeros(len(run_starts), dtype=bool)
+    for bank_table_starts in (run_starts - run_lengths, run_starts + 2 * run_lengths):
+        bank_positions = np.repeat(bank_table_starts, run_lengths) + entry_index
+        inside = (bank_positions >= 0) & (bank_positions < len(data))
+        banks = np.where(inside, data[np.clip(bank_positions, 0, len(data) - 1)], -1).astype(np.int64)
+        offsets = _resolve_far_pointers(data, banks, slot_addresses, mbc)
+        valid = offsets >= 0
+        valid[valid] = _text_like_windows(counts, offsets[valid], min_length)
+
+        valid_share = np.bincount(group_ids, weights=valid, minlength=len(run_starts)) / run_lengths
+        accepted = (valid_share >= min_valid) & ~claimed
+        claimed |= accepted
+        take = accepted[group_ids] & valid
+        pointers.extend(zip(slot_positions[take].tolist(), offsets[take].tolist()))
+
+    pointers.sort()
+    logger.info("Найдено %d указателей в раздельных таблицах", len(pointers))
+    return pointers
+
+
+def find_gb_far_pointers(rom_data: bytes, start: int = 0, end: int = None,
+                         min_length: int = MIN_POINTER_LENGTH, mbc=None) -> List[Tuple[int, int]]:
+    """
+    Все дальние указатели GB/GBC: 3-байтовые таблицы обеих раскладок и раздельные таблицы
+
+    Возвращает отсортированный список уникальных кортежей (адрес записи, смещение текста).
+    """
+    pointers = set()
+    for layout in FAR_POINTER_LAYOUTS:
+        pointers.update(find_far_pointers(rom_data, start, end, layout=layout, min_length=min_length, mbc=mbc))
+    pointers.update(find_split_far_pointers(rom_data, start, end, min_length=min_length, mbc=mbc))
+    return sorted(pointers)
+
+
+# Максимальная длина сообщения таблицы и допустимый разрыв между соседними сообщениями
+MAX_TABLE_MESSAGE_LENGTH = 0x400
+
+
+@dataclass
+class PointerTable:
+    """
+    Таблица указателей: серия подряд идущих записей с неубывающими смещениями текста
+
+    entries - (адрес записи, смещение текста) в порядке записей, messages - границы
+    (начало, конец) сообщения каждой записи: до следующего по величине смещения
+    таблицы, для последнего сообщения - до терминатора.
+    """
+
+    start: int
+    stride: int
+    entries: List[Tuple[int, int]]
+    messages: List[Tuple[int, int]] = field(default_factory=list)
+    score: float = 0.0
+
+    @property
+    def end(self) -> int:
+        """Адрес за последней записью таблицы"""
+        return self.start + self.stride * len(self.entries)
+
+    @property
+    def text_start(self) -> int:
+        return self.messages[0][0] if self.messages else self.entries[0][1]
+
+    @property
+    def text_end(self) -> int:
+        return max(end for _, end in self.messages) if self.messages else self.entries[-1][1]
+
+
+def _monotone_runs(slots: np.ndarray, targets: np.ndarray, stride: int,
+                   max_gap: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Серии записей с шагом stride и неубывающими смещениями текста
+
+    slots/targets отсортированы по (slot % stride, slot). Возвращает индексы начала
+    серий и их длины.
+    """
+    gaps = np.diff(targets)
+    continues = (np.diff(slots) == stride) & (gaps >= 0) & (gaps <= max_gap)
+    breaks = np.flatnonzero(~continues) + 1
+    starts = np.concatenate(([0], breaks))
+    lengths = np.diff(np.concatenate((starts, [len(slots)])))
+    return starts, lengths
+
+
+def detect_pointer_tables(rom_data: bytes, pointers: Iterable[Tuple[int, int]], strides=(2,),
+                          min_entries: int = 3, max_message_length: int = MAX_TABLE_MESSAGE_LENGTH,
+                          terminators: Iterable[int] = TEXT_TERMINATORS) -> List[PointerTable]:
+    """
+    Определение таблиц указателей среди кандидатов сканеров
+
+    Настоящая таблица - подряд идущие записи (шаг - размер записи) со смещениями
+    текста, возрастающими не более чем на max_message_length. Кандидаты (адрес
+    записи, смещение текста) сортируются один раз, серии для каждого шага из strides
+    выделяются векторно - O(n log n) по числу кандидатов. Оценка таблицы - число
+    различных сообщений с поправкой на повторы; при перекрытии записей таблиц
+    с разным шагом остаётся таблица с большей оценкой.
+    Возвращает таблицы из min_entries и более записей в порядке адресов.
+    """
+    if isinstance(strides, int):
+        strides = (strides,)
+    pairs = np.asarray(list(pointers), dtype=np.int64).reshape(-1, 2)
+    if len(pairs) < min_entries:
+        return []
+    # Один адрес записи - одно смещение (первое из кандидатов)
+    slots, first = np.unique(pairs[:, 0], return_index=True)
+    targets = pairs[first, 1]
+
+    candidates = []
+    for stride in strides:
+        order = np.lexsort((slots, slots % stride))
+        stride_slots, stride_targets = slots[order], targets[order]
+        run_starts, run_lengths = _monotone_runs(stride_slots, stride_targets, stride, max_message_length)
+        for run_start, length in zip(run_starts.tolist(), run_lengths.tolist()):
+            if length < min_entries:
+                continue
+            run_targets = stride_targets[run_start:run_start + length]
+            distinct = len(np.unique(run_targets))
+            candidates.append((distinct * distinct / length, stride, run_start, length,
+                               stride_slots, stride_targets))
+
+    # Перекрывающиеся серии разных шагов: жадно по убыванию оценки
+    candidates.sort(key=lambda c: (-c[0], c[1], int(c[4][c[2]])))
+    taken: List[Tuple[int, int]] = []
+    tables = []
+    for score, stride, run_start, length, stride_slots, stride_targets in candidates:
+        first_slot = int(stride_slots[run_start])
+        last_slot = first_slot + stride * length
+        if any(first_slot < end and start < last_slot for start, end in taken):
+            continue
+        taken.append((first_slot, last_slot))
+        entries = list(zip(stride_slots[run_start:run_start + length].tolist(),
+                           stride_targets[run_start:run_start + length].tolist()))
+        tables.append(PointerTable(first_slot, stride, entries, score=score))
+
+    tables.sort(key=lambda t: t.start)
+    _set_message_bounds(rom_data, tables, max_message_length, terminators)
+    logger.info("Найдено %d таблиц указателей среди %d кандидатов", len(tables), len(slots))
+    return tables
+
+
+def _set_message_bounds(rom_data: bytes, tables: List[PointerTable], max_message_length: int,
+                        terminators: Iterable[int]) -> None:
+    """Границы сообщений таблиц: до следующего смещения таблицы, последнее - до терминатора"""
+    if not tables:
+        return
+    data = np.frombuffer(rom_data, dtype=np.uint8)
+    terminator_positions = np.flatnonzero(np.isin(data, np.fromiter(terminators, dtype=np.uint8)))
+    for table in tables:
+        targets = np.fromiter((target for _, target in table.entries), dtype=np.int64)
+        distinct = np.unique(targets)
+        ends = np.empty_like(distinct)
+        ends[:-1] = distinct[1:]
+        last = int(distinct[-1])
+        index = np.searchsorted(terminator_positions, last)
+        limit = min(last + max_message_length, len(data))
+        if index < len(terminator_positions) and terminator_positions[index] < limit:
+            ends[-1] = terminator_positions[index] + 1
+        else:
+            ends[-1] = limit
+        entry_ends = ends[np.searchsorted(distinct, targets)]
+        table.messages = list(zip(targets.tolist(), entry_ends.tolist()))
+
+
 def detect_multiple_languages(rom_data: bytes, start: int = 0, length: int = 2000) -> List[str]:
     """Определяет все языки, присутствующие в ROM"""
 
@@ -148,8 +529,14 @@ def detect_multiple_languages(rom_data: bytes, start: int = 0, length: int = 200
     return detected_languages if detected_languages else ['english']
 
 
-def auto_detect_charmap(rom_data: bytes, start: int = 0, length: int = 1000) -> Dict[int, str]:
-    """Автоматическое определение таблицы символов с поддержкой нескольких языков"""
+def auto_detect_charmap(rom_data: bytes, start: int = 0, length: int = 1000,
+                        known_words: Optional[Iterable[str]] = None) -> Dict[int, str]:
+    """
+    Автоматическое определение таблицы символов с поддержкой нескольких языков
+
+    known_words - слова, заведомо встречающиеся в игре (имена, названия); если заданы,
+    коды букв уточняются относительным поиском (core.relative_search).
+    """
 
     logger = logging.getLogger('gb2text.scanner')
     logger.info(f"Автоопределение таблицы символов, начиная с 0x{start:X}, длина: {length}")
@@ -195,12 +582,90 @@ def auto_detect_charmap(rom_data: bytes, start: int = 0, length: int = 1000) ->
     # Добавляем пробелы и терминаторы
     _setup_common_symbols(charmap, freq, False, rom_data)
 
+    if known_words:
+        from core.relative_search import apply_known_words
+        charmap = apply_known_words(charmap, rom_data, known_words)
+
     logger.info(f"Создана таблица символов с {len(charmap)} символами для языка: {primary_language}")
     logger.debug(f"Таблица символов: {dict(list(charmap.items())[:10])}...")
 
     return charmap
 
 
+class CharmapDetectionCache:
+    """
+    Кэш автоопределения таблиц символов для одного ROM
+
+    Результат auto_detect_charmap зависит от статистики участка (гистограмма байтов и
+    порядок их первого появления) и от свойств всего ROM (размер, первые байты).
+    Свойства ROM фиксированы для кэша, поэтому ключом служит только сигнатура участка:
+    сегменты с одинаковым статистическим профилем получают одну таблицу и один декодер.
+    """
+
+    def __init__(self, rom_data: bytes, length: int = 1000):
+        self.rom_data = rom_data
+        self.length = length
+        self._charmaps: Dict[Tuple[bytes, bytes], Dict[int, str]] = {}
+        self._decoders: Dict[Tuple[bytes, bytes], object] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def signature(self, start: int) -> Tuple[bytes, bytes]:
+        """Сигнатура участка: гистограмма байтов и порядок первого появления байтов"""
+        region = np.frombuffer(self.rom_data[start:start + self.length], dtype=np.uint8)
+        histogram = np.bincount(region, minlength=256)
+        values, first_seen = np.unique(region, return_index=True)
+        return histogram.tobytes(), values[np.argsort(first_seen)].tobytes()
+
+    def _lookup_charmap(self, key: Tuple[bytes, bytes], start: int) -> Dict[int, str]:
+        charmap = self._charmaps.get(key)
+        if charmap is None:
+            self.misses += 1
+            charmap = auto_detect_charmap(self.rom_data, start, self.length)
+            self._charmaps[key] = charmap
+        else:
+            self.hits += 1
+            logger.debug(f"Таблица символов для 0x{start:X} взята из кэша")
+        return charmap
+
+    def get_charmap(self, start: int) -> Dict[int, str]:
+        """Таблица символов для участка, начинающегося со start"""
+        return self._lookup_charmap(self.signature(start), start)
+
+    def get_decoder(self, start: int):
+        """CharMapDecoder для участка; один декодер на сигнатуру"""
+        from core.decoder import CharMapDecoder
+
+        key = self.signature(start)
+        decoder = self._decoders.get(key)
+        if decoder is None:
+            decoder = CharMapDecoder(self._lookup_charmap(key, start))
+            self._decoders[key] = decoder
+        else:
+            self.hits += 1
+        return decoder
+
+    def clear(self):
+        """Очищает кэш"""
+        self._charmaps.clear()
+        self._decoders.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+# Кэши автоопределения таблиц символов для загруженных ROM
+_charmap_caches: 'weakref.WeakKeyDictionary' = weakref.WeakKeyDictionary()
+
+
+def get_charmap_cache(rom) -> CharmapDetectionCache:
+    """Возвращает кэш автоопределения таблиц символов для объекта ROM (создаётся при первом обращении)"""
+    cache = _charmap_caches.get(rom)
+    if cache is None or cache.rom_data is not rom.data:
+        cache = CharmapDetectionCache(rom.data)
+        _charmap_caches[rom] = cache
+    return cache
+
+
 def _detect_language(rom_data: bytes, start: int, length: int, freq: Counter) -> str:
     """Улучшенное определение языка с приоритетом английского"""
 
@@ -468,7 +933,7 @@ def auto_detect_segments_ml(rom_data: bytes, min_segment_length: int = MIN_SEGME
     
     logger = logging.getLogger('gb2text.scanner')
     
-    if get_ml_classifier is None or not SKLEARN_AVAILABLE:
+    if get_ml_classifier is None or not ML_AVAILABLE:
         logger.warning("ML not available, falling back to heuristic method")
         return auto_detect_segments(rom_data, min_segment_length, MIN_READABILITY, block_size)
     
@@ -481,7 +946,6 @@ def auto_detect_segments_ml(rom_data: bytes, min_segment_length: int = MIN_SEGME
     segments = []
     in_segment = False
     segment_start = 0
-    ml_scores = []
     
     # Пропускаем известные нетекстовые области
     skip_ranges = [
@@ -489,20 +953,22 @@ def auto_detect_segments_ml(rom_data: bytes, min_segment_length: int = MIN_SEGME
         (VRAM_START, VRAM_END)   # Область VRAM
     ]
     
+    # Сначала собираем позиции блоков, затем классифицируем их одним пакетом
+    positions = []
     i = 0
     while i + block_size <= len(rom_data):
         # Пропускаем известные нетекстовые области
         i = _skip_non_text_regions(i, rom_data, skip_ranges)
         if i >= len(rom_data):
             break
-        
-        # Получаем блок данных
-        block = rom_data[i:i + block_size]
-        
-        # ML классификация
-        ml_score = ml_classifier.predict(block)
-        ml_scores.append(ml_score)
-        
+        positions.append(i)
+        i += block_size
+    
+    # ML классификация
+    ml_scores = ml_classifier.predict_batch(
+        [rom_data[pos:pos + block_size] for pos in positions]).tolist()
+    
+    for i, ml_score in zip(positions, ml_scores):
         # Также вычисляем читаемость
         readability = _compute_block_readability(rom_data, i, block_size)
         
@@ -534,8 +1000,6 @@ def auto_detect_segments_ml(rom_data: bytes, min_segment_length: int = MIN_SEGME
                     })
                 
                 in_segment = False
-        
-        i += block_size
     
     # Проверяем последний сегмент
     if in_segment:
@@ -556,8 +1020,7 @@ def auto_detect_segments_ml(rom_data: bytes, min_segment_length: int = MIN_SEGME
     
     logger.info(f"ML автоопределено {len(segments)} текстовых сегментов")
     
-    if SKLEARN_AVAILABLE:
-        logger.info(f"ML классификатор доступен и используется")
+    logger.info(f"ML классификатор доступен и используется (бэкенд: {ml_classifier.backend})")
     
     return segments
 
@@ -610,12 +1073,11 @@ def analyze_text_segment(rom_data: bytes, start: int, end: int) -> Dict:
     logger.info(f"Плотность читаемых символов: {readability:.2%}")
 
     # Анализ повторяющихся паттернов (возможно, сжатие)
-    pattern_counts = Counter()
-    for i in range(len(segment) - 3):
-        pattern = segment[i:i + 4]
-        pattern_counts[tuple(pattern)] += 1
-
-    repeated_patterns = [p for p, c in pattern_counts.items() if c > 3]
+    repeated_patterns = []
+    if len(segment) >= 4:
+        from core.suffix_index import SuffixIndex
+        index = SuffixIndex.build(bytes(segment))
+        repeated_patterns = [tuple(p) for p, _ in index.frequent_ngrams(4, top=len(segment), min_count=4)]
     logger.info(f"Найдено {len(repeated_patterns)} повторяющихся паттернов")
 
     # Анализ возможных терминаторов
@@ -0,0 +1,128 @@
+"""
+Кэш планов текстовых сегментов
+
+get_text_segments у ConfigurablePlugin, GenericGBPlugin и AutoDetectPlugin заново ищет
+указатели/сегменты и создаёт декодеры при каждом вызове, а вызывают его извлечение,
+внедрение (на каждый сегмент), применение рекомендаций руководства и вкладки GUI.
+
+План - неизменяемый кортеж описаний сегментов (с уже созданными декодерами) - строится
+один раз на пару (ключ плагина, содержимое ROM) и разделяется всеми потребителями.
+Ключ плагина возвращает GamePlugin.segment_plan_key(): класс плагина и, для
+конфигурационных плагинов, хэш конфигурации. Плагины без ключа не кэшируются.
+"""
+
+import hashlib
+import logging
+import threading
+import weakref
+from collections import OrderedDict
+from types import MappingProxyType
+from typing import Dict, Hashable, List, Optional, Tuple
+
+logger = logging.getLogger('gb2text.segment_plan')
+
+# Сколько планов хранить (ROM x плагин)
+DEFAULT_PLAN_CACHE_SIZE = 16
+
+# Хэши содержимого загруженных ROM: (объект данных, хэш)
+_content_hashes: 'weakref.WeakKeyDictionary' = weakref.WeakKeyDictionary()
+
+
+def rom_content_hash(rom) -> Optional[str]:
+    """
+    SHA-1 данных ROM (вычисляется один раз на объект ROM)
+
+    Возвращает None, если у объекта нет байтовых данных - такие ROM не кэшируются.
+    """
+    data = getattr(rom, 'data', None)
+    if not isinstance(data, (bytes, bytearray, memoryview)):
+        return None
+    try:
+        cached = _content_hashes.get(rom)
+    except TypeError:
+        cached = None
+    if cached is not None and cached[0] is data:
+        return cached[1]
+    digest = hashlib.sha1(data).hexdigest()
+    try:
+        _content_hashes[rom] = (data, digest)
+    except TypeError:
+        pass
+    return digest
+
+
+class SegmentPlanCache:
+    """LRU-кэш планов сегментов по ключу (ключ плагина, система, хэш содержимого ROM)"""
+
+    def __init__(self, max_size: int = DEFAULT_PLAN_CACHE_SIZE):
+        self.max_size = max_size
+        self._plans: 'OrderedDict[Tuple, Tuple[MappingProxyType, ...]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(plugin, rom) -> Optional[Tuple]:
+        """Ключ плана или None, если план для этой пары не кэшируется"""
+        plan_key = getattr(plugin, 'segment_plan_key', None)
+        plan_key = plan_key() if callable(plan_key) else None
+        if not isinstance(plan_key, (tuple, str)):
+            return None
+        content_hash = rom_content_hash(rom)
+        if content_hash is None:
+            return None
+        return plan_key, getattr(rom, 'system', None), content_hash
+
+    def get_plan(self, plugin, rom) -> Tuple[MappingProxyType, ...]:
+        """Неизменяемый план сегментов плагина для ROM"""
+        key = self.key(plugin, rom)
+        if key is not None:
+            with self._lock:
+                plan = self._plans.get(key)
+                if plan is not None:
+                    self._plans.move_to_end(key)
+                    self.hits += 1
+                    logger.debug(f"План сегментов {type(plugin).__name__} взят из кэша")
+                    return plan
+
+        plan = tuple(MappingProxyType(dict(segment)) for segment in plugin.get_text_segments(rom))
+        if key is not None:
+            with self._lock:
+                self.misses += 1
+                self._plans[key] = plan
+                while len(self._plans) > self.max_size:
+                    self._plans.popitem(last=False)
+        return plan
+
+    def get_segments(self, plugin, rom) -> List[Dict]:
+        """
+        Сегменты плагина для ROM в формате get_text_segments
+
+        Словари - копии описаний плана (их можно менять), декодеры общие.
+        """
+        return [dict(segment) for segment in self.get_plan(plugin, rom)]
+
+    def invalidate(self, plugin_key: Optional[Hashable] = None) -> None:
+        """Удаляет планы плагина с данным ключом (или все планы)"""
+        with self._lock:
+            if plugin_key is None:
+                self._plans.clear()
+            else:
+                for key in [k for k in self._plans if k[0] == plugin_key]:
+                    del self._plans[key]
+
+    def clear(self) -> None:
+        """Очищает кэш"""
+        with self._lock:
+            self._plans.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+# Общий кэш процесса
+segment_plans = SegmentPlanCache()
+
+
+def get_segments(plugin, rom) -> List[Dict]:
+    """Сегменты плагина для ROM через общий кэш планов"""
+    return segment_plans.get_segments(plugin, rom)
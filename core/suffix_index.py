@@ -0,0 +1,302 @@
+"""
+Суффиксный массив и массив LCP по байтам ROM (или одного банка)
+
+Повторяющиеся последовательности байтов - главный признак словарного сжатия
+(DTE/MTE) и общих строк. Суффиксный массив строится удвоением префиксов
+(Manber-Myers) на массивах NumPy: на каждом шаге пересортировываются только
+группы суффиксов, ещё не различимые по первым k байтам, - O(n log n). Массив LCP
+(длина общего префикса соседних суффиксов) вычисляется векторно: шаг удвоения,
+на котором пара разделилась, даёт LCP в [k, 2k), а точное значение находится
+двоичным поиском по сравнению полиномиальных хэшей подстрок.
+
+Поверх индекса: поиск подстроки произвольной длины, самые частые n-граммы
+области и кандидаты таблицы DTE. Индекс строится по запросу, хранится в памяти
+для загруженного ROM и на диске в кэше сканирования (core.scan_cache).
+"""
+
+import logging
+import threading
+import weakref
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from core.mbc import ROM_BANK_SIZE
+from core.scan_cache import scan_cache
+from core.segment_plan import rom_content_hash
+
+logger = logging.getLogger('gb2text.suffix_index')
+
+# Имя результата в кэше сканирования
+CACHE_NAME = 'suffix_index'
+
+# Модули и основания двойного полиномиального хэша для вычисления LCP
+_HASH_PARAMS = ((2147483647, 257), (2147483629, 263))
+
+
+def build_suffix_array(data: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Суффиксный массив удвоением префиксов
+
+    Возвращает (sa, split): sa - начала суффиксов в лексикографическом порядке,
+    split[r] - длина k, при которой суффикс sa[r] отделился от sa[r - 1]
+    (0 - различаются первые байты). LCP этой пары лежит в [k, 2k).
+    """
+    n = len(data)
+    positions = np.arange(n, dtype=np.int32)
+    sa = np.argsort(data, kind='stable').astype(np.int32)
+    first = data[sa]
+    # head[r] - sa[r] начинает новую группу; head[n] - ограничитель
+    head = np.ones(n + 1, dtype=bool)
+    head[1:n] = first[1:] != first[:-1]
+    split = np.zeros(n, dtype=np.int32)
+    # Ранг суффикса - позиция начала его группы в sa
+    group = np.maximum.accumulate(np.where(head[:n], positions, 0))
+    rank = np.empty(n, dtype=np.int32)
+    rank[sa] = group
+
+    k = 1
+    while True:
+        idx = np.flatnonzero(~(head[:n] & head[1:]))
+        if not len(idx):
+            break
+        suffixes = sa[idx]
+        second = np.full(len(idx), -1, dtype=np.int32)
+        inside = suffixes < n - k
+        second[inside] = rank[suffixes[inside] + k]
+        groups = group[idx]
+        # Составной ключ (группа, второй ранг) сортируется быстрее, чем lexsort по двум ключам
+        order = np.argsort((groups.astype(np.int64) << 32) | (second.astype(np.int64) + 1))
+        suffixes, second, groups = suffixes[order], second[order], groups[order]
+        sa[idx] = suffixes
+
+        new_head = np.ones(len(idx), dtype=bool)
+        new_head[1:] = (groups[1:] != groups[:-1]) | (second[1:] != second[:-1])
+        split[idx[new_head & ~head[idx]]] = k
+        head[idx] = new_head
+        group = np.maximum.accumulate(np.where(head[:n], positions, 0))
+        # Ранги обновляются после вычисления всех вторых ключей шага
+        rank[suffixes] = group[idx]
+        k *= 2
+    return sa, split
+
+
+def _prefix_hashes(data: np.ndarray, modulus: int, base: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Префиксные суммы x_j * base^j (mod modulus) и степени base"""
+    n = len(data)
+    powers = np.ones(n + 1, dtype=np.int64)
+    filled, step = 1, base
+    while filled < n + 1:
+        count = min(filled, n + 1 - filled)
+        powers[filled:filled + count] = powers[:count] * step % modulus
+        filled += count
+        step = step * step % modulus
+    # Слагаемые меньше 2^31, так что сумма n слагаемых не переполняет int64
+    prefix = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum((data.astype(np.int64) + 1) * powers[:n] % modulus, out=prefix[1:])
+    prefix %= modulus
+    return prefix.astype(np.uint32), powers.astype(np.uint32)
+
+
+def compute_lcp(data: np.ndarray, sa: np.ndarray, split: np.ndarray) -> np.ndarray:
+    """
+    Массив LCP: lcp[r] - длина общего префикса суффиксов sa[r - 1] и sa[r] (lcp[0] = 0)
+
+    Для пары, разделившейся на шаге k, LCP ищется двоичным поиском в [k, 2k):
+    равенство подстрок проверяется двумя независимыми хэшами.
+    """
+    n = len(data)
+    lcp = np.zeros(n, dtype=np.int32)
+    pending = np.flatnonzero(split)
+    if not len(pending):
+        return lcp
+    left = sa[pending - 1].astype(np.int64)
+    right = sa[pending].astype(np.int64)
+    low = split[pending].astype(np.int64)
+    high = np.minimum(2 * low - 1, n - np.maximum(left, right))
+    first, second = np.minimum(left, right), np.maximum(left, right)
+    tables = [_prefix_hashes(data, modulus, base) for modulus, base in _HASH_PARAMS]
+
+    active = np.flatnonzero(low < high)
+    while len(active):
+        a, b = first[active], second[active]
+        mid = (low[active] + high[active] + 1) // 2
+        equal = np.ones(len(active), dtype=bool)
+        for (prefix, powers), (modulus, _) in zip(tables, _HASH_PARAMS, strict=True):
+            # Хэш подстроки a, приведённый к началу b: (S[a+l] - S[a]) * base^(b-a)
+            head_a = (prefix[a + mid].astype(np.int64) - prefix[a]) % modulus
+            head_b = (prefix[b + mid].astype(np.int64) - prefix[b]) % modulus
+            equal &= head_a * powers[b - a] % modulus == head_b
+        low[active[equal]] = mid[equal]
+        high[active[~equal]] = mid[~equal] - 1
+        active = active[low[active] < high[active]]
+    lcp[pending] = low
+    return lcp
+
+
+class SuffixIndex:
+    """Суффиксный массив и LCP участка ROM; смещения в запросах и ответах - абсолютные"""
+
+    def __init__(self, data: bytes, suffix_array, lcp, base: int = 0):
+        self.data = np.frombuffer(data, dtype=np.uint8) if isinstance(data, (bytes, bytearray)) else data
+        self.suffix_array = np.asarray(suffix_array, dtype=np.int32)
+        self.lcp = np.asarray(lcp, dtype=np.int32)
+        self.base = base
+
+    @classmethod
+    def build(cls, data: bytes, base: int = 0) -> 'SuffixIndex':
+        """Строит индекс по данным; base - смещение данных в ROM"""
+        array = np.frombuffer(data, dtype=np.uint8)
+        sa, split = build_suffix_array(array)
+        index = cls(array, sa, compute_lcp(array, sa, split), base)
+        logger.info(f"Построен суффиксный массив: {len(array)} байт с 0x{base:X}")
+        return index
+
+    def __len__(self) -> int:
+        return len(self.suffix_array)
+
+    def _suffix_range(self, pattern: bytes) -> Tuple[int, int]:
+        """Диапазон [lo, hi) суффиксного массива, суффиксы которого начинаются с pattern"""
+        data, sa, m = self.data, self.suffix_array, len(pattern)
+
+        def prefix(r: int) -> bytes:
+            start = int(sa[r])
+            return data[start:start + m].tobytes()
+
+        lo, hi = 0, len(sa)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if prefix(mid) < pattern:
+                lo = mid + 1
+            else:
+                hi = mid
+        first, hi = lo, len(sa)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if prefix(mid) == pattern:
+                lo = mid + 1
+            else:
+                hi = mid
+        return first, lo
+
+    def find(self, pattern: bytes) -> List[int]:
+        """Все вхождения подстроки (абсолютные смещения по возрастанию)"""
+        if not pattern:
+            return []
+        lo, hi = self._suffix_range(bytes(pattern))
+        return (np.sort(self.suffix_array[lo:hi]).astype(np.int64) + self.base).tolist()
+
+    def count(self, pattern: bytes) -> int:
+        """Число вхождений подстроки"""
+        if not pattern:
+            return 0
+        lo, hi = self._suffix_range(bytes(pattern))
+        return hi - lo
+
+    def frequent_ngrams(self, n: int, start: Optional[int] = None, end: Optional[int] = None,
+                        top: int = 20, min_count: int = 2) -> List[Tuple[bytes, int]]:
+        """
+        Самые частые n-граммы, целиком лежащие в [start, end)
+
+        Суффиксы с общей n-граммой образуют в суффиксном массиве непрерывную группу,
+        границы которой - позиции с LCP < n, так что подсчёт - один векторный проход.
+        """
+        local_start = 0 if start is None else max(start - self.base, 0)
+        local_end = len(self) if end is None else min(end - self.base, len(self))
+        if n <= 0 or local_end - local_start < n:
+            return []
+        groups = np.cumsum(self.lcp < n)
+        sa = self.suffix_array
+        inside = (sa >= local_start) & (sa <= local_end - n)
+        _, first, counts = np.unique(groups[inside], return_index=True, return_counts=True)
+        keep = counts >= min_count
+        counts, first = counts[keep], first[keep]
+        order = np.lexsort((first, -counts))[:top]
+        offsets = sa[np.flatnonzero(inside)[first[order]]]
+        return [(self.data[o:o + n].tobytes(), int(c)) for o, c in zip(offsets.tolist(), counts[order].tolist(), strict=True)]
+
+    def dte_candidates(self, start: Optional[int] = None, end: Optional[int] = None, size: int = 64,
+                       exclude: Iterable[int] = (), min_count: int = 2) -> List[Tuple[bytes, int]]:
+        """
+        Кандидаты таблицы DTE: самые частые пары байтов области
+
+        Пары с байтами из exclude (терминаторы, управляющие коды) и пары из одного
+        повторяющегося байта (заполнители) пропускаются. Возвращает до size пар
+        с числом вхождений.
+        """
+        excluded = set(exclude)
+        candidates = []
+        for pair, count in self.frequent_ngrams(2, start, end, top=len(self), min_count=min_count):
+            if pair[0] in excluded or pair[1] in excluded or pair[0] == pair[1]:
+                continue
+            candidates.append((pair, count))
+            if len(candidates) >= size:
+                break
+        return candidates
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        return {'suffix_array': self.suffix_array, 'lcp': self.lcp}
+
+    @classmethod
+    def from_arrays(cls, data: bytes, arrays: Dict[str, np.ndarray], base: int = 0) -> 'SuffixIndex':
+        return cls(data, arrays['suffix_array'], arrays['lcp'], base)
+
+
+def dte_table(candidates: Iterable[Tuple[bytes, int]], free_codes: Iterable[int],
+              charmap: Optional[Dict[int, str]] = None) -> Dict[int, str]:
+    """Таблица DTE: свободным кодам по порядку назначаются пары-кандидаты (текст по charmap или hex)"""
+    table = {}
+    # Кодов и кандидатов может быть разное число: лишние остаются без назначения
+    for code, (pair, _) in zip(free_codes, candidates, strict=False):
+        if charmap is not None:
+            table[code] = ''.join(charmap.get(byte, f'[{byte:02X}]') for byte in pair)
+        else:
+            table[code] = pair.hex().upper()
+    return table
+
+
+# Индексы загруженных ROM: rom -> {банк: (объект данных, индекс)}
+_indexes: 'weakref.WeakKeyDictionary' = weakref.WeakKeyDictionary()
+_lock = threading.Lock()
+
+
+def get_suffix_index(rom, bank: Optional[int] = None, cache=None) -> SuffixIndex:
+    """
+    Суффиксный индекс всего ROM или одного банка (bank - номер банка 16 КБ)
+
+    Берётся из памяти (для того же объекта данных), затем из кэша сканирования
+    на диске; иначе строится и сохраняется в оба кэша.
+    """
+    cache = cache if cache is not None else scan_cache
+    data = rom.data
+    with _lock:
+        cached = _indexes.get(rom, {}).get(bank)
+    if cached is not None and cached[0] is data:
+        return cached[1]
+
+    if bank is None:
+        base, region = 0, data
+    else:
+        base = bank * ROM_BANK_SIZE
+        if base >= len(data):
+            raise ValueError(f"Банк {bank} вне ROM ({len(data)} байт)")
+        region = data[base:base + ROM_BANK_SIZE]
+
+    content_hash = rom_content_hash(rom)
+    key = CACHE_NAME if bank is None else f'{CACHE_NAME}.bank{bank}'
+    arrays = cache.load(content_hash, key)
+    if arrays is not None:
+        index = SuffixIndex.from_arrays(region, arrays, base)
+    else:
+        index = SuffixIndex.build(region, base)
+        cache.store(content_hash, key, index.to_arrays())
+
+    with _lock:
+        _indexes.setdefault(rom, {})[bank] = (data, index)
+    return index
+
+
+def clear_suffix_indexes() -> None:
+    """Сбрасывает индексы в памяти (дисковый кэш не затрагивается)"""
+    with _lock:
+        _indexes.clear()
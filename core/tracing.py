@@ -0,0 +1,169 @@
+"""
+Трассировка стадий конвейера извлечения/внедрения текста
+
+Стадии (загрузка ROM, разбор заголовка, поиск плагина, поиск сегментов, распаковка,
+определение таблицы символов, разделение на сообщения, декодирование, внедрение,
+сохранение) оборачиваются в span-ы с временем и аргументами (имя сегмента, байты).
+Результат экспортируется в формате Chrome trace events (chrome://tracing, Perfetto).
+
+Текущий трассировщик хранится в contextvars. По умолчанию активен NULL_TRACER:
+span() возвращает общий пустой контекстный менеджер, так что выключенная трассировка
+почти ничего не стоит.
+"""
+
+import contextvars
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+
+class _NullArgs(dict):
+    """Аргументы выключенного span-а: запись игнорируется"""
+
+    def __setitem__(self, key, value):
+        pass
+
+    def update(self, *args, **kwargs):
+        pass
+
+
+class _NullSpan:
+    """Пустой span для выключенной трассировки"""
+
+    __slots__ = ()
+    _args = _NullArgs()
+
+    def __enter__(self) -> Dict:
+        return self._args
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    """Активный span: при выходе записывает complete-событие (ph='X') в трассировщик"""
+
+    __slots__ = ('args', 'category', 'name', 'start_ns', 'tracer')
+
+    def __init__(self, tracer: 'Tracer', name: str, category: str, args: Dict):
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+        self.args = args
+
+    def __enter__(self) -> Dict:
+        self.start_ns = time.perf_counter_ns()
+        return self.args
+
+    def __exit__(self, exc_type, exc, tb):
+        end_ns = time.perf_counter_ns()
+        if exc_type is not None:
+            self.args['error'] = exc_type.__name__
+        self.tracer._record(self.name, self.category, self.start_ns, end_ns, self.args)
+        return False
+
+
+class Tracer:
+    """Собирает span-ы и экспортирует их в формате Chrome trace events"""
+
+    enabled = True
+
+    def __init__(self, origin_ns: Optional[int] = None):
+        self.events: List[Dict] = []
+        # Общее начало отсчёта позволяет объединять события нескольких трассировщиков
+        self.origin_ns = origin_ns if origin_ns is not None else time.perf_counter_ns()
+        self._lock = threading.Lock()
+
+    def span(self, name: str, category: str = 'pipeline', **args):
+        """
+        Контекстный менеджер для стадии; возвращает словарь аргументов,
+        в который можно дописать значения (например, число байт) внутри блока
+        """
+        return _Span(self, name, category, args)
+
+    def _record(self, name: str, category: str, start_ns: int, end_ns: int, args: Dict):
+        event = {
+            'name': name,
+            'cat': category,
+            'ph': 'X',
+            'ts': (start_ns - self.origin_ns) / 1000.0,
+            'dur': (end_ns - start_ns) / 1000.0,
+            'pid': os.getpid(),
+            'tid': threading.get_ident(),
+            'args': args,
+        }
+        with self._lock:
+            self.events.append(event)
+
+    def extend(self, events: List[Dict]):
+        """Добавляет ранее записанные события (например, загрузку ROM до извлечения)"""
+        with self._lock:
+            self.events.extend(events)
+
+    def spans(self, name: Optional[str] = None) -> List[Dict]:
+        """События в порядке начала; при указании name - только с этим именем"""
+        events = sorted(self.events, key=lambda e: e['ts'])
+        return [e for e in events if name is None or e['name'] == name]
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Суммарное время (мс) и число вызовов по каждой стадии"""
+        result: Dict[str, Dict[str, float]] = {}
+        for event in self.events:
+            stage = result.setdefault(event['name'], {'count': 0, 'total_ms': 0.0})
+            stage['count'] += 1
+            stage['total_ms'] += event['dur'] / 1000.0
+        return result
+
+    def to_chrome_trace(self) -> Dict:
+        """Трасса в формате Chrome trace events (JSON object format)"""
+        return {'traceEvents': self.spans(), 'displayTimeUnit': 'ms'}
+
+    def save(self, path: str) -> str:
+        """Записывает трассу в JSON-файл"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_chrome_trace(), f, ensure_ascii=False, default=str)
+        return path
+
+
+class NullTracer:
+    """Выключенный трассировщик"""
+
+    enabled = False
+    events: Tuple[Dict, ...] = ()
+
+    def span(self, name: str, category: str = 'pipeline', **args):
+        return _NULL_SPAN
+
+    def extend(self, events: List[Dict]):
+        pass
+
+
+NULL_TRACER = NullTracer()
+
+_current_tracer: contextvars.ContextVar = contextvars.ContextVar('gb2text_tracer', default=NULL_TRACER)
+
+
+def get_tracer():
+    """Текущий трассировщик (NULL_TRACER, если трассировка не включена)"""
+    return _current_tracer.get()
+
+
+@contextmanager
+def use_tracer(tracer):
+    """Делает tracer текущим внутри блока with"""
+    token = _current_tracer.set(tracer)
+    try:
+        yield tracer
+    finally:
+        _current_tracer.reset(token)
+
+
+def span(name: str, category: str = 'pipeline', **args):
+    """span() текущего трассировщика"""
+    return _current_tracer.get().span(name, category, **args)
@@ -5,6 +5,7 @@
 - Автоматического заполнения пустых переводов
 - Заполнения переводов на основе оригинального текста
 - Пакетного заполнения переводов
+- Заполнения переводами похожих строк из памяти переводов
 """
 
 import logging
@@ -21,6 +22,7 @@ class FillStrategy(Enum):
     PLACEHOLDER = "placeholder"          # Заполнить плейсхолдером
     TEMPORARY_MARK = "temporary_mark"    # Отметить как временный
     SKIP = "skip"                         # Пропустить
+    TRANSLATION_MEMORY = "translation_memory"  # Взять перевод похожей строки
 
 
 @dataclass
@@ -31,6 +33,7 @@ class FillResult:
     filled_translation: str
     strategy_used: FillStrategy
     error_message: Optional[str] = None
+    similarity: Optional[float] = None           # Сходство строки из памяти переводов
 
 
 @dataclass
@@ -41,6 +44,10 @@ class FillOptions:
     mark_temporary: bool = True                  # Добавлять маркер временного
     copy_unchanged: bool = True                  # Копировать текст без изменений
     preserve_formatting: bool = True            # Сохранять форматирование
+    translation_memory: Optional[object] = None  # TranslationDatabase для поиска похожих строк
+    source_lang: str = "en"
+    target_lang: str = "ru"
+    min_similarity: float = 0.8                  # Минимальное сходство строки из памяти
 
 
 class TranslationFiller:
@@ -75,6 +82,17 @@ class TranslationFiller:
                 filled = self._fill_placeholder(original)
             elif self.options.strategy == FillStrategy.TEMPORARY_MARK:
                 filled = self._fill_temporary_mark(original)
+            elif self.options.strategy == FillStrategy.TRANSLATION_MEMORY:
+                result = self._fill_from_memory(segment_id, original)
+                if result is None:
+                    return FillResult(
+                        segment_id=segment_id,
+                        success=False,
+                        filled_translation="",
+                        strategy_used=self.options.strategy,
+                        error_message="В памяти переводов нет похожей строки"
+                    )
+                return result
             else:
                 return FillResult(
                     segment_id=segment_id,
@@ -123,6 +141,32 @@ class TranslationFiller:
             return f"[TEMP] {text}"
         return text
         
+    def _fill_from_memory(self, segment_id: str, original: str) -> Optional[FillResult]:
+        """
+        Перевод самой похожей строки из памяти переводов
+
+        Неточное совпадение помечается как временное (если включено mark_temporary).
+        Возвращает None, если памяти нет или похожая строка не найдена.
+        """
+        memory = self.options.translation_memory
+        if memory is None or not original.strip():
+            return None
+        matches = memory.find_similar(self.options.source_lang, self.options.target_lang, original,
+                                      k=1, min_score=self.options.min_similarity)
+        if not matches:
+            return None
+        match = matches[0]
+        filled = match.target
+        if match.score < 1.0 and self.options.mark_temporary:
+            filled = f"[TEMP] {filled}"
+        return FillResult(
+            segment_id=segment_id,
+            success=True,
+            filled_translation=filled,
+            strategy_used=FillStrategy.TRANSLATION_MEMORY,
+            similarity=match.score
+        )
+
     def fill_batch(self, segments: Dict[str, str]) -> Dict[str, FillResult]:
         """
         Заполняет партию переводов
@@ -236,8 +280,14 @@ class SmartTranslationFiller(TranslationFiller):
         """
         Умное заполнение одного перевода
         
-        Автоматически выбирает стратегию на основе типа сегмента
+        Сначала ищет похожую строку в памяти переводов (если она задана),
+        иначе выбирает стратегию на основе типа сегмента
         """
+        result = self._fill_from_memory(segment_id, original)
+        if result is not None:
+            self.logger.debug(f"Сегмент {segment_id}: из памяти переводов, сходство={result.similarity:.2f}")
+            return result
+
         segment_type = self.determine_segment_type(original)
         self.logger.debug(f"Сегмент {segment_id}: тип={segment_type}")
         
@@ -76,11 +76,12 @@ class TranslationValidator:
     TRAILING_SPACE_RE = re.compile(r' +$', re.MULTILINE)
     LEADING_SPACE_RE = re.compile(r'^ +', re.MULTILINE)
     
-    def __init__(self, max_length: int = 255, check_glyphs: bool = True):
+    def __init__(self, max_length: int = 255, check_glyphs: bool = True, rom=None):
         """
         Args:
             max_length: Максимальная длина перевода (в символах)
             check_glyphs: Проверять ли допустимые глифы
+            rom: ROM, по индексу указателей которого проверяются ссылки на сообщения
         """
         self.max_length = max_length
         self.check_glyphs = check_glyphs
@@ -88,12 +89,27 @@ class TranslationValidator:
         
         # Разрешённые символы (можно расширить)
         self.allowed_glyphs: Optional[set] = None
+
+        # Обратный индекс указателей ROM (core.pointer_index) для проверки ссылок на сообщение
+        self.pointer_index = None
+        if rom is not None:
+            self.set_rom(rom)
         
     def set_allowed_glyphs(self, glyphs: set):
         """Устанавливает набор разрешённых глифов"""
         self.allowed_glyphs = glyphs
+
+    def set_pointer_index(self, pointer_index):
+        """Устанавливает обратный индекс указателей ROM (None - не проверять ссылки)"""
+        self.pointer_index = pointer_index
+
+    def set_rom(self, rom):
+        """Проверять ссылки на сообщения по индексу указателей ROM (None - не проверять)"""
+        from core.pointer_index import get_pointer_index
+        self.set_pointer_index(get_pointer_index(rom) if rom is not None else None)
         
-    def validate(self, original: str, translation: str, segment_id: str = None) -> ValidationResult:
+    def validate(self, original: str, translation: str, segment_id: str = None,
+                 message_offset: Optional[int] = None) -> ValidationResult:
         """
         Проводит полную валидацию перевода
         
@@ -101,6 +117,8 @@ class TranslationValidator:
             original: Оригинальный текст
             translation: Перевод
             segment_id: ID сегмента для отчётности
+            message_offset: Смещение сообщения в ROM; при заданном индексе указателей
+                проверяется, что на сообщение ссылается хотя бы один указатель
             
         Returns:
             ValidationResult с результатами проверки
@@ -143,6 +161,11 @@ class TranslationValidator:
         pointer_result = self._validate_pointers(translation, segment_id)
         warnings.extend(pointer_result.warnings)
         
+        # Проверка ссылок на сообщение
+        if self.pointer_index is not None and message_offset is not None:
+            reference_result = self._validate_references(message_offset, segment_id)
+            warnings.extend(reference_result.warnings)
+
         # Проверка разрешённых глифов
         if self.check_glyphs and self.allowed_glyphs:
             glyph_result = self._validate_glyphs(translation, segment_id)
@@ -264,6 +287,28 @@ class TranslationValidator:
             translated_length=len(text)
         )
     
+    def _validate_references(self, message_offset: int, segment_id: str = None) -> ValidationResult:
+        """Проверка, что на сообщение ссылается хотя бы один указатель"""
+        warnings = []
+
+        if not self.pointer_index.is_referenced(message_offset):
+            warnings.append(ValidationError(
+                ValidationLevel.WARNING,
+                f"На сообщение 0x{message_offset:X} не ссылается ни один указатель: "
+                f"при изменении длины его нельзя перенести",
+                field="pointers",
+                segment_id=segment_id
+            ))
+
+        return ValidationResult(
+            is_valid=True,
+            errors=[],
+            warnings=warnings,
+            max_length=self.max_length,
+            original_length=0,
+            translated_length=0
+        )
+    
     def _validate_glyphs(self, text: str, segment_id: str = None) -> ValidationResult:
         """Проверка допустимых глифов"""
         errors = []
@@ -313,24 +358,27 @@ class TranslationValidator:
 class BatchTranslationValidator:
     """Валидатор для пакетной проверки переводов"""
     
-    def __init__(self, max_length: int = 255, check_glyphs: bool = False):
-        self.validator = TranslationValidator(max_length, check_glyphs)
+    def __init__(self, max_length: int = 255, check_glyphs: bool = False, rom=None):
+        self.validator = TranslationValidator(max_length, check_glyphs, rom=rom)
         self.logger = logging.getLogger('gb2text.batch_validator')
         
-    def validate_batch(self, translations: Dict[str, Tuple[str, str]]) -> Dict[str, ValidationResult]:
+    def validate_batch(self, translations: Dict[str, Tuple]) -> Dict[str, ValidationResult]:
         """
         Проверяет партию переводов
         
         Args:
-            translations: Словарь {segment_id: (original, translation)}
+            translations: Словарь {segment_id: (original, translation)} или
+                {segment_id: (original, translation, message_offset)} - со смещением
+                сообщения в ROM проверяются ссылки на него (см. TranslationValidator)
             
         Returns:
             Словарь {segment_id: ValidationResult}
         """
         results = {}
         
-        for segment_id, (original, translation) in translations.items():
-            result = self.validator.validate(original, translation, segment_id)
+        for segment_id, (original, translation, *offset) in translations.items():
+            message_offset = offset[0] if offset else None
+            result = self.validator.validate(original, translation, segment_id, message_offset=message_offset)
             results[segment_id] = result
             
             if not result.is_valid:
@@ -366,9 +414,11 @@ class BatchTranslationValidator:
 # Глобальный валидатор
 _global_validator: Optional[TranslationValidator] = None
 
-def get_validator(max_length: int = 255, check_glyphs: bool = True) -> TranslationValidator:
-    """Возвращает глобальный экземпляр валидатора"""
+def get_validator(max_length: int = 255, check_glyphs: bool = True, rom=None) -> TranslationValidator:
+    """Возвращает глобальный экземпляр валидатора; rom задаёт индекс указателей для проверки ссылок"""
     global _global_validator
     if _global_validator is None:
         _global_validator = TranslationValidator(max_length, check_glyphs)
+    if rom is not None:
+        _global_validator.set_rom(rom)
     return _global_validator
\ No newline at end of file
@@ -22,6 +22,7 @@ GB Text Extraction Framework
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, scrolledtext
 import json, re, os, logging, threading, time, sys
+import sqlite3
 from datetime import datetime
 from pathlib import Path
 from collections import Counter
@@ -43,11 +44,13 @@ from core.guide import GuideManager
 from core.extractor import TextExtractor
 from core.injector import TextInjector
 from core.plugin_manager import PluginManager, CancellationToken
+from core.segment_plan import get_segments
 from core.encoding import get_generic_english_charmap, get_generic_japanese_charmap, get_generic_russian_charmap, \
     get_generic_chinese_charmap, get_generic_shiftjis_charmap, auto_detect_charmap
 from core.scanner import analyze_text_segment, _detect_language
 from core.constants import DEFAULT_WINDOW_WIDTH, DEFAULT_WINDOW_HEIGHT
 from core.machine_translation import MachineTranslation
+from core.database import TranslationDatabase, default_memory_path
 from core.tmx import TMXHandler
 
 
@@ -61,6 +64,7 @@ class GBTextExtractorGUI:
 
         self.i18n = I18N(default_lang=self.ui_lang.get())
         self.machine_translation = MachineTranslation()
+        self.translation_memory = None  # Открывается при первом обращении
         self.tmx_handler = TMXHandler()
         self._apply_mt_settings()
         self.root = root
@@ -331,6 +335,10 @@ class GBTextExtractorGUI:
                    command=self.inject_translation).pack(side="left", padx=2)
         ttk.Button(button_frame, text=self.i18n.t("machine.translate"),
                    command=self.machine_translate_current).pack(side="left", padx=2)
+        ttk.Button(button_frame, text=self.i18n.t("machine.translate.segment"),
+                   command=self.machine_translate_segment).pack(side="left", padx=2)
+        ttk.Button(button_frame, text=self.i18n.t("memory.suggest"),
+                   command=self.suggest_from_memory).pack(side="left", padx=2)
 
         # Добавляем пагинацию
         pagination_frame = ttk.Frame(entry_frame)
@@ -589,13 +597,19 @@ class GBTextExtractorGUI:
                 return
 
             # Извлекаем тексты
-            segments1 = plugin1.get_text_segments(rom1)
-            segments2 = plugin2.get_text_segments(rom2)
+            segments1 = get_segments(plugin1, rom1)
+            segments2 = get_segments(plugin2, rom2)
 
             # Сравниваем
             texts1 = self._extract_texts_from_segments(rom1, segments1)
             texts2 = self._extract_texts_from_segments(rom2, segments2)
 
+            # Сегмент с тем же текстом, но перенаправленными указателями тоже изменён
+            refs1 = self._segment_references(rom1, segments1)
+            refs2 = self._segment_references(rom2, segments2)
+            texts1 = {name: (text, refs1.get(name)) for name, text in texts1.items()}
+            texts2 = {name: (text, refs2.get(name)) for name, text in texts2.items()}
+
             # Находим различия
             self._find_text_differences(texts1, texts2)
 
@@ -626,6 +640,23 @@ class GBTextExtractorGUI:
                 pass
         return texts
 
+    def _segment_references(self, rom, segments):
+        """Указатели на сообщения каждого сегмента: {имя: ((смещение текста, адрес записи), ...)}"""
+        try:
+            from core.pointer_index import get_pointer_index
+            index = get_pointer_index(rom)
+        except Exception as e:
+            logger.warning(f"Обратный индекс указателей недоступен: {e}")
+            return {}
+        references = {}
+        for seg in segments:
+            start = seg.get('start', 0)
+            end = seg.get('end', len(rom.data))
+            # Смещения относительно начала сегмента: перенос сегмента целиком не считается изменением
+            references[seg.get('name', f'Segment_{start}')] = tuple(
+                (target - start, slot) for target, slot, _ in index.in_range(start, end))
+        return references
+
     def _find_text_differences(self, texts1, texts2):
         """Нахождение различий между текстами"""
         keys1 = set(texts1.keys())
@@ -876,7 +907,7 @@ class GBTextExtractorGUI:
             # Попробуем использовать автоопределение
             from plugins.auto_detect import AutoDetectPlugin
             plugin = AutoDetectPlugin()
-            segments = plugin.get_text_segments(self.current_rom)
+            segments = get_segments(plugin, self.current_rom)
 
             for seg in segments:
                 # Используем extractor для определения таблицы символов
@@ -1545,7 +1576,7 @@ class GBTextExtractorGUI:
                 plugin = self.plugin_manager.get_plugin(game_id, self.current_rom.system)
 
                 if plugin:
-                    segments = plugin.get_text_segments(self.current_rom)
+                    segments = get_segments(plugin, self.current_rom)
                     self.segment_combo['values'] = [seg['name'] for seg in segments]
                     if self.segment_combo['values']:
                         self.segment_combo.current(0)
@@ -2158,6 +2189,11 @@ class GBTextExtractorGUI:
             # Сохраняем перевод в текущую запись (используется при инжекте)
             entry['translation'] = translation
             logger.info(f"Сохранен перевод для записи {self.current_entry_index}: {translation[:50]}...")
+            original_text = entry.get('text', '').strip()
+            memory = self._get_translation_memory()
+            if memory is not None and original_text:
+                memory.store_translation(self._source_lang_for(original_text), self.target_lang.get(),
+                                         original_text, translation)
 
             self.set_status(self.i18n.t("text.saved"))
             messagebox.showinfo(self.i18n.t("success.title"), self.i18n.t("translation.saved"))
@@ -2176,14 +2212,7 @@ class GBTextExtractorGUI:
             return
 
         # Определяем языки
-        source_lang = self.encoding_type.get()
-        if source_lang == 'auto':
-            # Простая логика определения языка
-            if any(ord(c) > 127 for c in original_text):
-                source_lang = 'ja'  # Предполагаем японский для не-ASCII
-            else:
-                source_lang = 'en'
-
+        source_lang = self._source_lang_for(original_text)
         target_lang = self.target_lang.get()
 
         try:
@@ -2196,6 +2225,87 @@ class GBTextExtractorGUI:
             self.set_status("Translation failed")
             messagebox.showerror("Error", f"Machine translation failed: {str(e)}")
 
+    def machine_translate_segment(self):
+        """Машинный перевод всех непереведённых записей сегмента пакетными запросами"""
+        if not self.current_entries:
+            messagebox.showwarning("Warning", "No text loaded")
+            return
+
+        target_lang = self.target_lang.get()
+        # Записи без перевода, сгруппированные по языку оригинала
+        by_lang = {}
+        for entry in self.current_entries:
+            original_text = entry.get('text', '').strip()
+            if original_text and not entry.get('translation'):
+                by_lang.setdefault(self._source_lang_for(original_text), []).append(entry)
+        if not by_lang:
+            self.set_status(self.i18n.t("machine.translate.nothing"))
+            return
+
+        def progress(done, total):
+            self.set_status(self.i18n.t("machine.translate.progress"), int(done * 100 / total))
+
+        count = 0
+        try:
+            for source_lang, entries in by_lang.items():
+                texts = [entry['text'].strip() for entry in entries]
+                translations = self.machine_translation.translate_batch(texts, source_lang, target_lang,
+                                                                        progress_callback=progress)
+                for entry, translation in zip(entries, translations, strict=True):
+                    entry['translation'] = translation
+                count += len(entries)
+        except Exception as e:
+            self.set_status("Translation failed")
+            messagebox.showerror("Error", f"Machine translation failed: {str(e)}")
+            return
+        finally:
+            # Переведённые до ошибки записи тоже отображаются
+            self._display_current_entry()
+        self.set_status(self.i18n.t("machine.translate.done", count=count))
+
+    def _source_lang_for(self, text):
+        """Язык исходного текста: выбранная кодировка или простая догадка при 'auto'"""
+        source_lang = self.encoding_type.get()
+        if source_lang == 'auto':
+            # Простая логика определения языка
+            if any(ord(c) > 127 for c in text):
+                source_lang = 'ja'  # Предполагаем японский для не-ASCII
+            else:
+                source_lang = 'en'
+        return source_lang
+
+    def _get_translation_memory(self):
+        """Память переводов (открывается при первом обращении) или None при ошибке"""
+        if getattr(self, 'translation_memory', None) is None:
+            path = default_memory_path()
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                self.translation_memory = TranslationDatabase(path)
+            except (OSError, sqlite3.Error) as e:
+                logger.error(f"Не удалось открыть память переводов {path}: {e}")
+                return None
+        return self.translation_memory
+
+    def suggest_from_memory(self):
+        """Подставляет перевод самой похожей строки из памяти переводов"""
+        if not self.current_entries:
+            return
+
+        entry = self.current_entries[self.current_entry_index]
+        original_text = entry.get('text', '').strip()
+        memory = self._get_translation_memory()
+        if not original_text or memory is None:
+            return
+
+        matches = memory.find_similar(self._source_lang_for(original_text), self.target_lang.get(),
+                                      original_text, k=1)
+        if not matches:
+            self.set_status(self.i18n.t("memory.not.found"))
+            return
+        self.translated_text.delete(1.0, tk.END)
+        self.translated_text.insert(1.0, matches[0].target)
+        self.set_status(self.i18n.t("memory.found").format(score=round(matches[0].score * 100)))
+
     def _show_preview_dialog(self, translation):
         """Показывает диалог предпросмотра изменений"""
         if not self.current_entries:
@@ -2552,7 +2662,7 @@ class GBTextExtractorGUI:
         plugin = self.plugin_manager.get_plugin(game_id, self.current_rom.system)
 
         if plugin:
-            segments = plugin.get_text_segments(self.current_rom)
+            segments = get_segments(plugin, self.current_rom)
             diagnostics_info["segments"] = []
 
             for segment in segments:
@@ -2716,7 +2826,8 @@ class GBTextExtractorGUI:
 
     def _apply_mt_settings(self):
         """Применяет настройки машинного перевода"""
-        self.machine_translation = MachineTranslation()
+        # Готовые машинные переводы кэшируются в памяти переводов (целевой язык вида 'ru@google')
+        self.machine_translation = MachineTranslation(cache=self._get_translation_memory())
 
         # Добавляем Google (всегда доступен)
         self.machine_translation.add_google_translator()
@@ -2862,6 +2973,8 @@ class GBTextExtractorGUI:
                 self.i18n.t("confirm.title"),
                 self.i18n.t("confirm.exit")
         ):
+            if getattr(self, 'translation_memory', None) is not None:
+                self.translation_memory.close()
             self.root.destroy()
 
     def get_version(self):
@@ -23,31 +23,33 @@ GB Text Extraction Framework
 import argparse, json, logging, sys, os
 from pathlib import Path
 from core.injector import TextInjector
+from core.logging_utils import setup_logging, LOG_LEVELS, DEFAULT_LOG_LEVEL, DEFAULT_SAMPLE_RATES
 
 logger = logging.getLogger('gb2text')
 logger.debug("=== НАЧАЛО ИНИЦИАЛИЗАЦИИ ===")
-logger.debug(f"sys.frozen: {getattr(sys, 'frozen', False)}")
-logger.debug(f"sys._MEIPASS: {getattr(sys, '_MEIPASS', 'N/A')}")
+logger.debug("sys.frozen: %s", getattr(sys, 'frozen', False))
+logger.debug("sys._MEIPASS: %s", getattr(sys, '_MEIPASS', 'N/A'))
 
 # Проверяем пути
 base_path = os.path.dirname(os.path.abspath(__file__))
 if getattr(sys, 'frozen', False):
     base_path = sys._MEIPASS
 
-logger.debug(f"Базовый путь: {base_path}")
-logger.debug(f"Содержимое базового пути: {os.listdir(base_path)}")
+logger.debug("Базовый путь: %s", base_path)
+if logger.isEnabledFor(logging.DEBUG):
+    logger.debug("Содержимое базового пути: %s", os.listdir(base_path))
 
 # Проверяем наличие папки locales
 locales_path = os.path.join(base_path, 'locales')
-logger.debug(f"Путь к locales: {locales_path}")
-logger.debug(f"Папка locales существует: {os.path.exists(locales_path)}")
+logger.debug("Путь к locales: %s", locales_path)
+logger.debug("Папка locales существует: %s", os.path.exists(locales_path))
 
 if not os.path.exists(locales_path):
     # Попробуем найти в родительской директории
     parent_path = os.path.dirname(base_path)
     locales_path = os.path.join(parent_path, 'locales')
-    logger.debug(f"Попробуем путь к locales в родительской директории: {locales_path}")
-    logger.debug(f"Папка locales существует: {os.path.exists(locales_path)}")
+    logger.debug("Попробуем путь к locales в родительской директории: %s", locales_path)
+    logger.debug("Папка locales существует: %s", os.path.exists(locales_path))
 
     if not os.path.exists(locales_path):
         logger.error("Папка locales не найдена! Используем встроенные переводы.")
@@ -84,24 +86,8 @@ def get_version():
         return "1.0.0"
 
 
-def main():
-    logging.basicConfig(
-        level=logging.DEBUG,  # Изменено с INFO на DEBUG для более детального лога
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        filename='gb2text.log',
-        filemode='w'  # 'w' перезаписывает файл при каждом запуске, 'a' дописывает
-    )
-    # Добавим вывод в консоль для отладки
-    console = logging.StreamHandler()
-    console.setLevel(logging.INFO)
-    formatter = logging.Formatter('%(name)s - %(levelname)s - %(message)s')
-    console.setFormatter(formatter)
-    logging.getLogger('').addHandler(console)
-
-    logger = logging.getLogger('gb2text')
-    logger.info("Запуск GB Text Extraction Framework")
-    logger.debug("Запуск в режиме отладки")
-
+def create_parser() -> argparse.ArgumentParser:
+    """Создаёт парсер аргументов командной строки"""
     parser = argparse.ArgumentParser(description='Game Boy Text Extractor')
     parser.add_argument('rom', nargs='?', help='Путь к ROM-файлу')
     parser.add_argument('--output', default='text', choices=['text', 'json', 'csv'],
@@ -116,8 +102,41 @@ def main():
     parser.add_argument('--output-rom', help='Выходной файл ROM')
     parser.add_argument('--lang', default='en', choices=['en', 'ru', 'ja'],
                         help='Язык интерфейса')
-    args = parser.parse_args()
+    parser.add_argument('--log-level', default=DEFAULT_LOG_LEVEL, choices=LOG_LEVELS,
+                        type=str.upper, help='Уровень логирования (по умолчанию INFO; --verbose = DEBUG)')
+    parser.add_argument('--trace', metavar='OUT.json',
+                        help='Записать трассу стадий извлечения/внедрения в JSON (Chrome trace format)')
+    return parser
+
+
+def main():
+    args = create_parser().parse_args()
+
+    # Лог пишется в gb2text.log (перезаписывается при каждом запуске) и в консоль
+    # из фонового потока; повторяющиеся DEBUG-события горячих путей прореживаются
+    setup_logging(
+        level='DEBUG' if args.verbose else args.log_level,
+        sample_rates=DEFAULT_SAMPLE_RATES
+    )
+
+    logger = logging.getLogger('gb2text')
+    logger.info("Запуск GB Text Extraction Framework")
+    logger.debug("Запуск в режиме отладки")
+
+    if args.trace:
+        # Трасса стадий конвейера в формате Chrome trace events (chrome://tracing, Perfetto)
+        from core.tracing import Tracer, use_tracer
+        tracer = Tracer()
+        with use_tracer(tracer):
+            run(args)
+        tracer.save(args.trace)
+        print(f"Трасса сохранена в {args.trace}")
+    else:
+        run(args)
+
 
+def run(args):
+    """Выполняет команду, заданную аргументами командной строки"""
     if args.version:
         print(f"GB Text Extraction Framework v{get_version()}")
         return
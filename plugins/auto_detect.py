@@ -19,16 +19,22 @@ GB Text Extraction Framework
 Плагин для автоматического определения структуры текста в неизвестных играх
 """
 
-from typing import List, Dict, Tuple
+from typing import List, Dict
 from core.plugin import GamePlugin
 from core.rom import GameBoyROM
 from core.database import get_segment_patterns, get_pointer_size
-from core.scanner import auto_detect_segments, find_text_pointers, analyze_text_segment
+from core.mbc import get_rom_mbc
+from core.constants import MIN_SEGMENT_LENGTH
+from core.scanner import (
+    auto_detect_segments, find_text_pointers, find_banked_pointers, find_gb_far_pointers, analyze_text_segment,
+    detect_pointer_tables,
+)
 import logging
 
 # Настройки логирования выполняются в точках входа (main/run_gui)
 logger = logging.getLogger('gb2text.auto_detect')
 
+
 class AutoDetectPlugin(GamePlugin):
     """Плагин для автоматического определения текстовых сегментов"""
 
@@ -72,51 +78,42 @@ class AutoDetectPlugin(GamePlugin):
             pointer_size = get_pointer_size(rom.system)
             logger.info(f"Поиск указателей с размером {pointer_size} байта")
 
-            # Используем кэширование результатов анализа
-            analyzed_ranges = {}
-
-            address_base = 0x08000000 if rom.system == 'gba' else 0
-            pointers = find_text_pointers(
-                rom.data,
-                pointer_size=pointer_size,
-                address_base=address_base
-            )
-
-            # Группируем близко расположенные указатели
-            pointer_groups = self._group_close_pointers(pointers, max_distance=50)
-
-            for i, group in enumerate(pointer_groups):
-                start_addr = min([ptr[1] for ptr in group])
-
-                # Проверяем, не анализировали ли мы уже этот диапазон
-                range_key = (start_addr // 0x1000) * 0x1000  # Группируем по 4K
-                if range_key in analyzed_ranges:
-                    if not analyzed_ranges[range_key]:
-                        continue  # Уже определено, что здесь нет текста
-                else:
-                    # Анализируем только один раз на каждые 4K
-                    analysis = analyze_text_segment(rom.data, start_addr, min(start_addr + 0x1000, len(rom.data)))
-                    analyzed_ranges[range_key] = analysis['readability'] > 0.65
-                    if not analyzed_ranges[range_key]:
-                        continue
-
-                # Более точная оценка длины сегмента
-                segment_length = self._estimate_segment_length(rom.data, start_addr, min_length=200)
-
-                if segment_length > 200:  # Увеличиваем минимальную длину
-                    # Дополнительная проверка плотности текста
-                    analysis = analyze_text_segment(rom.data, start_addr, start_addr + segment_length)
-                    if analysis['readability'] > 0.65:
-                        segments.append({
-                            'name': f'pointer_segment_{i}',
-                            'start': start_addr,
-                            'end': start_addr + segment_length,
-                            'decoder': None,
-                            'compression': self._get_compression_for_system(rom.system)
-                        })
-                        logger.info(
-                            f"Добавлен сегмент из указателей: 0x{start_addr:X} - 0x{start_addr + segment_length:X} "
-                            f"(плотность: {analysis['readability']:.2%})")
+            strides = (pointer_size,)
+            if rom.system in ('gb', 'gbc'):
+                # 16-битный указатель адресует окно банка, в котором он лежит
+                mbc = get_rom_mbc(rom)
+                pointers = find_banked_pointers(rom.data, mbc=mbc)
+                # Таблицы дальних указателей (банк + адрес) MBC1/3/5
+                far_pointers = find_gb_far_pointers(rom.data, mbc=mbc)
+                logger.info(f"Найдено {len(far_pointers)} дальних указателей")
+                pointers = pointers + far_pointers
+                strides = (pointer_size, 3)
+            else:
+                address_base = 0x08000000 if rom.system == 'gba' else 0
+                pointers = find_text_pointers(
+                    rom.data,
+                    pointer_size=pointer_size,
+                    address_base=address_base
+                )
+
+            # Сегмент - область сообщений таблицы указателей (границы сообщений известны из таблицы)
+            tables = detect_pointer_tables(rom.data, pointers, strides=strides)
+            for i, table in enumerate(tables):
+                start_addr, end_addr = table.text_start, table.text_end
+                if end_addr - start_addr < MIN_SEGMENT_LENGTH:
+                    continue
+                analysis = analyze_text_segment(rom.data, start_addr, end_addr)
+                if analysis['readability'] > 0.65:
+                    segments.append({
+                        'name': f'pointer_segment_{i}',
+                        'start': start_addr,
+                        'end': end_addr,
+                        'decoder': None,
+                        'compression': self._get_compression_for_system(rom.system)
+                    })
+                    logger.info(
+                        f"Добавлен сегмент из таблицы указателей 0x{table.start:X} ({len(table.entries)} записей): "
+                        f"0x{start_addr:X} - 0x{end_addr:X} (плотность: {analysis['readability']:.2%})")
 
         # Если все еще нет сегментов, используем автоопределение
         if not segments:
@@ -185,74 +182,9 @@ class AutoDetectPlugin(GamePlugin):
 
         return segments
 
-    def _group_close_pointers(self, pointers: List[Tuple[int, int]], max_distance: int = 50) -> List[
-        List[Tuple[int, int]]]:
-        """Группирует близко расположенные указатели с улучшенной логикой"""
-        if not pointers:
-            return []
-
-        # Сортируем указатели по адресу текста
-        sorted_pointers = sorted(pointers, key=lambda x: x[1])
-
-        groups = []
-        current_group = [sorted_pointers[0]]
-
-        for i in range(1, len(sorted_pointers)):
-            prev_addr = sorted_pointers[i - 1][1]
-            curr_addr = sorted_pointers[i][1]
-
-            # Учитываем не только расстояние, но и логические группы
-            if curr_addr - prev_addr <= max_distance:
-                current_group.append(sorted_pointers[i])
-            else:
-                # Проверяем, не является ли это началом новой логической группы
-                if len(current_group) > 1 or (curr_addr - prev_addr) > 0x100:
-                    groups.append(current_group)
-                    current_group = [sorted_pointers[i]]
-
-        if current_group:
-            groups.append(current_group)
-
-        # Фильтруем группы с малым количеством указателей
-        filtered_groups = [g for g in groups if len(g) > 1 or g[0][1] % 0x100 < 0x80]
-
-        if len(filtered_groups) < len(groups):
-            logger = logging.getLogger('gb2text.auto_detect')
-            logger.info(f"Отфильтровано {len(groups) - len(filtered_groups)} групп указателей с низкой надежностью")
-
-        return filtered_groups
-
-    def _estimate_segment_length(self, data: bytes, start_addr: int, min_length: int = 100) -> int:
-        """Оценивает длину текстового сегмента с улучшенной точностью"""
-        logger = logging.getLogger('gb2text.auto_detect')
-
-        # Проверяем, не выходит ли за пределы ROM
-        if start_addr >= len(data):
-            return 0
-
-        # Ищем терминаторы с учетом возможных паттернов
-        terminators = [0x00, 0xFF, 0xFE, 0x0D, 0x0A]
-        max_length = min(len(data) - start_addr, 0x1000)  # Максимальная длина 4K
-
-        # Анализируем плотность текста для определения оптимальной длины
-        best_length = min_length
-        best_readability = 0
-
-        for length in range(min_length, max_length, 50):
-            analysis = analyze_text_segment(data, start_addr, start_addr + length)
-            if analysis['readability'] > best_readability:
-                best_readability = analysis['readability']
-                best_length = length
-            elif best_readability > 0.6 and analysis['readability'] < best_readability - 0.1:
-                # Если плотность резко упала, вероятно, мы вышли за пределы текста
-                break
-
-        # Проверяем наличие терминаторов в конце сегмента
-        for i in range(best_length - 1, max(0, best_length - 20), -1):
-            if data[start_addr + i] in terminators:
-                return i + 1
-
-        return best_length
+    def segment_plan_key(self):
+        # Сегменты зависят только от содержимого ROM и системы
+        return (type(self).__module__, type(self).__qualname__)
 
     def _get_compression_for_system(self, system: str) -> str:
         """Определяет тип сжатия для системы"""
@@ -21,7 +21,8 @@ GB Text Extraction Framework
 
 from core.plugin import GamePlugin
 from core.database import get_pointer_size
-from core.scanner import find_text_pointers
+from core.mbc import get_rom_mbc
+from core.scanner import find_text_pointers, find_banked_pointers, find_gb_far_pointers, detect_pointer_tables
 from core.constants import GBA_ROM_BASE_ADDRESS
 
 class GenericGBPlugin(GamePlugin):
@@ -53,6 +54,30 @@ class GenericGBPlugin(GamePlugin):
                 'compression': None
             })
 
+        if getattr(rom, 'system', None) in ('gb', 'gbc'):
+            mbc = get_rom_mbc(rom)
+            # Таблицы 16-битных указателей: адрес разрешается в окно банка, где лежит указатель
+            banked_pointers = find_banked_pointers(rom.data, mbc=mbc)
+            for i, table in enumerate(detect_pointer_tables(rom.data, banked_pointers, strides=(2,))):
+                segments.append({
+                    'name': f'banked_segment_{i}',
+                    'start': table.text_start,
+                    'end': table.text_end,
+                    'decoder': None,
+                    'compression': None
+                })
+
+            # Таблицы дальних указателей (банк + адрес) картриджей с MBC
+            far_pointers = find_gb_far_pointers(rom.data, mbc=mbc)
+            for i, table in enumerate(detect_pointer_tables(rom.data, far_pointers, strides=(2, 3))):
+                segments.append({
+                    'name': f'far_segment_{i}',
+                    'start': table.text_start,
+                    'end': table.text_end,
+                    'decoder': None,
+                    'compression': None
+                })
+
         # Если нет указателей, используем стандартные адреса
         if not segments:
             segments.append({
@@ -73,6 +98,10 @@ class GenericGBPlugin(GamePlugin):
                 return i - start_addr + 1
         return 0x100  # Стандартная длина, если терминатор не найден
 
+    def segment_plan_key(self):
+        # Сегменты зависят только от содержимого ROM
+        return (type(self).__module__, type(self).__qualname__)
+
 
 class GenericGBCPlugin(GenericGBPlugin):
     """Базовый плагин для игр Game Boy Color"""
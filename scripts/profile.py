@@ -10,15 +10,26 @@ Modules:
     decoding      - Profile text decoding
     encoding      - Profile text encoding
     full-workflow - Profile full extraction workflow
+    memory        - Per-stage memory profile of extraction and injection
+                    (writes <output>.json and <output>.md)
 """
 
+import sys
+import os
+
+# This file is named like the stdlib 'profile' module that cProfile imports:
+# drop the script directory from the path so the stdlib module is found
+_SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path[:] = [p for p in sys.path if os.path.abspath(p or os.curdir) != _SCRIPT_DIR]
+
 import argparse
+import contextvars
 import cProfile
 import pstats
 import io
-import sys
-import os
+import json
 import time
+import tracemalloc
 from contextlib import contextmanager
 
 # Add parent directory to path
@@ -276,6 +287,237 @@ def generate_benchmark_report(rom_path, output_file=None):
     return results
 
 
+class _MemorySpan:
+    """Pipeline stage measured by MemoryProfiler (see core.tracing spans)."""
+
+    __slots__ = ('profiler', 'name', 'args', 'start_current', 'peak', 'snapshot', 'frame', 'token')
+
+    def __init__(self, profiler, name, args):
+        self.profiler = profiler
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        return self.profiler._enter(self)
+
+    def __exit__(self, exc_type, exc, tb):
+        self.profiler._exit(self)
+        return False
+
+
+class MemoryProfiler:
+    """
+    Tracer that takes tracemalloc snapshots around every pipeline stage.
+
+    Installed with core.tracing.use_tracer, it receives the same spans as the
+    Chrome trace (rom.load, plugin.match, segment.decode, inject.segment, ...).
+    For each stage name it accumulates:
+      - peak: highest traced memory above the level at stage entry
+      - retained: memory still allocated when the stage returns
+      - top allocation sites by retained size (snapshot difference)
+    Peaks of nested stages are folded into their parents, so the peak of
+    'extract' covers everything that happened inside it. The stack of open
+    stages is context-local: spans opened by hook threads nest only within
+    their own thread.
+    """
+
+    enabled = True
+
+    def __init__(self, top: int = 10, frames: int = 1):
+        self.top = top
+        self.frames = frames
+        self.stages = {}
+        self._stack = contextvars.ContextVar(f'memory_profiler_stack_{id(self)}', default=())
+        self._filters = [
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+        ]
+
+    def span(self, name, category='pipeline', **args):
+        return _MemorySpan(self, name, args)
+
+    def extend(self, events):
+        pass
+
+    def _fold_peak(self):
+        """Credits the peak since the last reset to every open stage."""
+        _, peak = tracemalloc.get_traced_memory()
+        for open_span in self._stack.get():
+            open_span.peak = max(open_span.peak, peak)
+        tracemalloc.reset_peak()
+
+    def _snapshot(self):
+        return tracemalloc.take_snapshot().filter_traces(self._filters)
+
+    def _entry(self, name):
+        return self.stages.setdefault(name, {
+            'calls': 0, 'peak_bytes': 0, 'retained_bytes': 0, 'sites': {},
+        })
+
+    @staticmethod
+    def _site(frame):
+        root = os.path.dirname(_SCRIPT_DIR)
+        if os.path.abspath(frame.filename).startswith(root + os.sep):
+            filename = os.path.relpath(frame.filename, root)
+        else:
+            filename = os.path.join(*os.path.normpath(frame.filename).split(os.sep)[-2:])
+        return f"{filename}:{frame.lineno}"
+
+    def _enter(self, stage):
+        # Stages are reported in the order they are first entered
+        self._entry(stage.name)
+        self._fold_peak()
+        stage.snapshot = self._snapshot()
+        stage.token = self._stack.set(self._stack.get() + (stage,))
+        # Under a Python-level tracer (coverage, debuggers) the frames of this call
+        # are heap objects; keep them until the stage exits, or freeing them right
+        # after the baseline would be subtracted from the stage's peak
+        stage.frame = sys._getframe()
+        # Baseline after the snapshot and bookkeeping: memory they free later
+        # must not be subtracted from the stage's own peak either
+        stage.start_current = tracemalloc.get_traced_memory()[0]
+        stage.peak = stage.start_current
+        tracemalloc.reset_peak()
+        return stage.args
+
+    def _exit(self, stage):
+        self._fold_peak()
+        self._stack.reset(stage.token)
+        end_current = tracemalloc.get_traced_memory()[0]
+        stage.frame = None
+        diff = self._snapshot().compare_to(stage.snapshot, 'traceback' if self.frames > 1 else 'lineno')
+
+        entry = self._entry(stage.name)
+        entry['calls'] += 1
+        entry['peak_bytes'] = max(entry['peak_bytes'], stage.peak - stage.start_current)
+        entry['retained_bytes'] += end_current - stage.start_current
+        for stat in diff:
+            if stat.size_diff <= 0:
+                continue
+            site = self._site(stat.traceback[0])
+            size, count = entry['sites'].get(site, (0, 0))
+            entry['sites'][site] = (size + stat.size_diff, count + stat.count_diff)
+
+    def report(self, rom_size: int):
+        """Per-stage summary; sizes in bytes, *_per_rom_mb normalized by ROM size."""
+        rom_mb = rom_size / (1 << 20) or 1.0
+        stages = {}
+        for name, entry in self.stages.items():
+            sites = sorted(entry['sites'].items(), key=lambda item: item[1][0], reverse=True)
+            stages[name] = {
+                'calls': entry['calls'],
+                'peak_bytes': entry['peak_bytes'],
+                'retained_bytes': entry['retained_bytes'],
+                'peak_per_rom_mb': entry['peak_bytes'] / rom_mb,
+                'retained_per_rom_mb': entry['retained_bytes'] / rom_mb,
+                'top_sites': [{'site': site, 'size': size, 'count': count}
+                              for site, (size, count) in sites[:self.top]],
+            }
+        return {'rom_size': rom_size, 'rom_mb': rom_size / (1 << 20), 'stages': stages}
+
+
+def _format_bytes(size):
+    for unit in ('B', 'KB', 'MB'):
+        if abs(size) < 1024 or unit == 'MB':
+            return f"{size:.0f} {unit}" if unit == 'B' else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+def memory_report_markdown(report):
+    """Renders a memory_profile() report as Markdown."""
+    lines = [
+        f"# Memory profile: {os.path.basename(report['rom'])}",
+        "",
+        f"ROM size: {_format_bytes(report['rom_size'])}, "
+        f"overall peak: {_format_bytes(report['peak_bytes'])}",
+        "",
+        "Peak is the highest single call, retained is summed over calls.",
+        "",
+        "| Stage | Calls | Peak | Retained | Peak / ROM MB | Retained / ROM MB |",
+        "|---|---:|---:|---:|---:|---:|",
+    ]
+    for name, stage in report['stages'].items():
+        lines.append(
+            f"| {name} | {stage['calls']} | {_format_bytes(stage['peak_bytes'])} | "
+            f"{_format_bytes(stage['retained_bytes'])} | {_format_bytes(stage['peak_per_rom_mb'])} | "
+            f"{_format_bytes(stage['retained_per_rom_mb'])} |"
+        )
+    for name, stage in report['stages'].items():
+        if not stage['top_sites']:
+            continue
+        lines += ["", f"## {name}", "", "| Site | Retained | Blocks |", "|---|---:|---:|"]
+        for site in stage['top_sites']:
+            lines.append(f"| `{site['site']}` | {_format_bytes(site['size'])} | {site['count']} |")
+    return "\n".join(lines) + "\n"
+
+
+def memory_profile(rom_path, plugin_dir='plugins', output=None, top=10, frames=1, inject=True):
+    """
+    Per-stage memory profile of TextExtractor.extract and TextInjector.
+
+    Runs extraction, then re-injects the extracted messages of every segment
+    and saves the ROM to a temporary file. Writes <output>.json and
+    <output>.md when output is given.
+    """
+    print(f"\n{'='*60}")
+    print("Profiling: Memory per stage")
+    print(f"ROM: {rom_path}")
+    print(f"{'='*60}\n")
+
+    import tempfile
+    from core.tracing import use_tracer
+    from core.plugin_manager import get_safe_plugin_manager
+    from core.extractor import TextExtractor
+    from core.injector import TextInjector
+    from core.segment_plan import get_segments
+
+    plugin_manager = get_safe_plugin_manager(plugin_dir)
+    profiler = MemoryProfiler(top=top, frames=frames)
+
+    was_tracing = tracemalloc.is_tracing()
+    if not was_tracing:
+        tracemalloc.start(frames)
+    tracemalloc.reset_peak()
+    try:
+        with use_tracer(profiler):
+            extractor = TextExtractor(rom_path, plugin_manager)
+            results = extractor.extract()
+
+            if inject and results:
+                injector = TextInjector(rom_path)
+                for segment in get_segments(extractor.plugin, injector.rom):
+                    messages = results.get(segment['name'])
+                    if messages and not segment.get('compression'):
+                        injector.inject_segment(segment['name'], [m['text'] for m in messages],
+                                                extractor.plugin)
+                with tempfile.TemporaryDirectory() as tmp:
+                    injector.save(os.path.join(tmp, 'injected' + os.path.splitext(rom_path)[1]))
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        if not was_tracing:
+            tracemalloc.stop()
+
+    report = profiler.report(len(extractor.rom.data))
+    report['rom'] = rom_path
+    report['peak_bytes'] = max([peak] + [s['peak_bytes'] for s in report['stages'].values()])
+    report['segments'] = len(results)
+
+    markdown = memory_report_markdown(report)
+    print(markdown)
+
+    if output:
+        base = output[:-5] if output.endswith('.json') else output
+        with open(base + '.json', 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        with open(base + '.md', 'w', encoding='utf-8') as f:
+            f.write(markdown)
+        print(f"Report saved to: {base}.json, {base}.md")
+
+    return report
+
+
 def main():
     parser = argparse.ArgumentParser(
         description='GB2Text Profiling Tools',
@@ -284,7 +526,8 @@ def main():
     )
     
     parser.add_argument('--module', '-m',
-                        choices=['rom-loading', 'scanning', 'decoding', 'encoding', 'full-workflow', 'benchmark'],
+                        choices=['rom-loading', 'scanning', 'decoding', 'encoding', 'full-workflow', 'benchmark',
+                                 'memory'],
                         default='rom-loading',
                         help='Module to profile')
     parser.add_argument('--input', '-i', help='Input ROM file path')
@@ -293,10 +536,16 @@ def main():
                         help='Number of iterations for benchmark')
     parser.add_argument('--limit', '-l', type=int, default=100,
                         help='Limit for decoding operations')
+    parser.add_argument('--plugin-dir', default='plugins',
+                        help='Plugin directory for the memory profile')
+    parser.add_argument('--top', type=int, default=10,
+                        help='Allocation sites per stage in the memory profile')
+    parser.add_argument('--frames', type=int, default=1,
+                        help='Traceback depth for allocation sites (memory profile)')
     
     args = parser.parse_args()
     
-    if args.module in ['rom-loading', 'scanning', 'decoding', 'full-workflow', 'benchmark']:
+    if args.module in ['rom-loading', 'scanning', 'decoding', 'full-workflow', 'benchmark', 'memory']:
         if not args.input:
             print("Error: --input required for this module")
             sys.exit(1)
@@ -320,6 +569,8 @@ def main():
             profile_full_workflow(args.input, args.iterations)
         elif args.module == 'benchmark':
             generate_benchmark_report(args.input, args.output)
+        elif args.module == 'memory':
+            memory_profile(args.input, args.plugin_dir, args.output, args.top, args.frames)
             
     except Exception as e:
         print(f"Error: {e}")
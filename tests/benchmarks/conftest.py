@@ -0,0 +1,140 @@
+"""
+Synthetic corpus fixtures and baseline regression checks for benchmarks.
+
+The fastest round of each benchmark (least sensitive to background noise) is
+stored in baseline.json divided by the time of a fixed calibration workload,
+so a baseline recorded on one machine can be checked on another. A benchmark
+regresses when its normalized time exceeds the stored value by more than its
+threshold (default 2x).
+
+    pytest tests/benchmarks --baseline=check
+    pytest tests/benchmarks --baseline=update     # after an intended change
+    GB2TEXT_BENCH_PROFILE=full pytest tests/benchmarks --baseline=check
+"""
+
+import json
+import math
+import platform
+import time
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from tests.benchmarks.synthetic_rom import CORPUS_PROFILES, corpus_profile, generate_rom
+
+BASELINE_PATH = Path(__file__).with_name('baseline.json')
+DEFAULT_THRESHOLD = 2.0
+
+
+def _best_of(workload, rounds: int = 5) -> float:
+    best = float('inf')
+    for _ in range(rounds):
+        start = time.perf_counter()
+        workload()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def calibrate() -> float:
+    """
+    Calibration time (seconds): geometric mean of two fixed workloads.
+
+    Benchmarks mix interpreter-bound code (decoding, parsing) with NumPy scans
+    (pointer search, suffix arrays), and the ratio between the two differs from
+    machine to machine, so both are timed.
+    """
+    data = bytes(range(256)) * 2048
+    table = bytes(reversed(range(256)))
+
+    def interpreter():
+        total = 0
+        for byte in data:
+            total += byte & 0x7F
+        data.translate(table).count(b'\x00')
+
+    array = np.frombuffer(data * 4, dtype=np.uint8)
+
+    def vectorized():
+        words = array[:-1].astype(np.uint16) | (array[1:].astype(np.uint16) << 8)
+        candidates = np.flatnonzero((words >= 0x4000) & (words < 0x8000))
+        np.unique(words[candidates], return_counts=True)
+        np.argsort(words, kind='stable')
+
+    return math.sqrt(_best_of(interpreter) * _best_of(vectorized))
+
+
+def load_baseline(path: Path = BASELINE_PATH) -> dict:
+    if not path.exists():
+        return {'threshold': DEFAULT_THRESHOLD, 'thresholds': {}, 'benchmarks': {}}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+@pytest.fixture(scope='session')
+def baseline_session(request):
+    """Baseline mode, calibration and the results collected in this session."""
+    mode = request.config.getoption('--baseline')
+    state = {
+        'mode': mode,
+        'profile': corpus_profile(),
+        'calibration': calibrate() if mode else None,
+        'baseline': load_baseline(),
+        'results': {},
+    }
+    yield state
+
+    if mode == 'update' and state['results']:
+        baseline = state['baseline']
+        baseline.setdefault('threshold', DEFAULT_THRESHOLD)
+        baseline.setdefault('thresholds', {})
+        baseline['benchmarks'] = {**baseline.get('benchmarks', {}), **state['results']}
+        baseline['machine'] = {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'calibration_s': state['calibration'],
+        }
+        with open(BASELINE_PATH, 'w', encoding='utf-8') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write('\n')
+
+
+@pytest.fixture
+def regression(benchmark, baseline_session, request):
+    """benchmark fixture whose best time is checked against (or recorded into) the baseline."""
+    yield benchmark
+
+    stats = getattr(benchmark, 'stats', None)
+    if not baseline_session['mode'] or stats is None:
+        return
+
+    key = f"{baseline_session['profile']}/{request.node.name}"
+    best, median = stats.stats.min, stats.stats.median
+    normalized = best / baseline_session['calibration']
+
+    if baseline_session['mode'] == 'update':
+        baseline_session['results'][key] = {'min_s': best, 'median_s': median, 'normalized': normalized}
+        return
+
+    baseline = baseline_session['baseline']
+    expected = baseline['benchmarks'].get(key)
+    if expected is None:
+        return
+    threshold = baseline.get('thresholds', {}).get(key, baseline.get('threshold', DEFAULT_THRESHOLD))
+    ratio = normalized / expected['normalized']
+    if ratio > threshold:
+        pytest.fail(f"{key}: {ratio:.2f}x slower than baseline (threshold {threshold}x, "
+                    f"best {best * 1000:.2f} ms, median {median * 1000:.2f} ms)")
+
+
+@pytest.fixture(scope='session')
+def corpus():
+    """Synthetic ROMs of the active profile: {name: SyntheticROM}."""
+    return {name: generate_rom(spec) for name, spec in CORPUS_PROFILES[corpus_profile()].items()}
+
+
+@pytest.fixture(scope='session')
+def corpus_files(corpus, tmp_path_factory):
+    """Synthetic ROMs written to disk: {name: path}."""
+    directory = tmp_path_factory.mktemp('corpus')
+    return {name: rom.write(str(directory / name)) for name, rom in corpus.items()}
@@ -0,0 +1,496 @@
+"""
+Deterministic synthetic ROM corpus for GB2Text benchmarks.
+
+Builds GB/GBC (MBC1/MBC3/MBC5, up to 8 MB) and GBA (up to 32 MB) images that
+look like real games to every stage of the pipeline:
+
+- valid cartridge headers (title, cartridge type, ROM size, checksums)
+- script banks with pointer tables and terminator-separated messages
+- ASCII or custom (Pokemon-style) charmaps
+- LZSS / RLE (GB) and LZ77 type 0x10 (GBA) compressed scripts in the
+  formats understood by core.compression and core.gba_support
+- code (SM83 / Thumb instruction streams) and 2bpp/4bpp tile graphics
+  filler with realistic byte entropy
+
+The same ROMSpec always produces the same bytes.
+
+Usage:
+    from tests.benchmarks.synthetic_rom import ROMSpec, generate_rom
+    rom = generate_rom(ROMSpec(system='gb', size=2 << 20, seed=1))
+    rom.write('synthetic.gb')
+"""
+
+import os
+import random
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+GB_BANK_SIZE = 0x4000
+GBA_BLOCK_SIZE = 0x10000
+GBA_ROM_BASE = 0x08000000
+
+# Cartridge type byte (0x0147) for each MBC; all variants have RAM and a battery
+MBC_CARTRIDGE_TYPES = {
+    'none': 0x00,
+    'mbc1': 0x03,
+    'mbc3': 0x13,
+    'mbc5': 0x1B,
+}
+
+WORDS = (
+    "the a you to of and is it in that we for your this have be on with are not "
+    "what can all go out there here now come back right take look see get will "
+    "one just know time way my me do no so up if at by from or but when where who "
+    "Professor town house route cave forest potion ball badge trainer battle "
+    "power item money friend mother rival journey world city gym leader door key "
+    "map letter ship bridge tower castle king sword shield magic monster dungeon "
+    "hello thanks sorry please welcome great wonderful strange quiet dark bright"
+).split()
+
+PUNCTUATION = ('.', '.', '.', '!', '?', ',')
+
+# SM83 opcodes weighted by typical frequency in GB code: (opcode, operand bytes, weight)
+SM83_OPCODES = (
+    (0x3E, 1, 30), (0xCD, 2, 25), (0xC9, 0, 18), (0x21, 2, 20), (0x11, 2, 10),
+    (0x01, 2, 8), (0x18, 1, 10), (0x20, 1, 14), (0x28, 1, 12), (0xEA, 2, 14),
+    (0xFA, 2, 12), (0xE0, 1, 16), (0xF0, 1, 16), (0x7E, 0, 10), (0x77, 0, 8),
+    (0x2A, 0, 10), (0x22, 0, 8), (0x23, 0, 10), (0x13, 0, 6), (0x0B, 0, 4),
+    (0x78, 0, 6), (0x79, 0, 6), (0x47, 0, 6), (0x4F, 0, 6), (0xAF, 0, 10),
+    (0xA7, 0, 8), (0xFE, 1, 12), (0xE6, 1, 8), (0xC3, 2, 8), (0xC5, 0, 6),
+    (0xC1, 0, 6), (0xD5, 0, 5), (0xD1, 0, 5), (0xE5, 0, 6), (0xE1, 0, 6),
+    (0xF5, 0, 4), (0xF1, 0, 4), (0xCB, 1, 9), (0x06, 1, 6), (0x0E, 1, 6),
+    (0x3C, 0, 5), (0x3D, 0, 5), (0x05, 0, 5), (0x00, 0, 4), (0x19, 0, 4),
+)
+
+# High bytes of common Thumb instructions: (high byte, weight)
+THUMB_HIGH_BYTES = (
+    (0x20, 12), (0x21, 10), (0x28, 10), (0x1C, 8), (0x68, 10), (0x60, 8),
+    (0x88, 5), (0x80, 5), (0x78, 6), (0x70, 5), (0x46, 8), (0x47, 4),
+    (0xB5, 6), (0xBD, 6), (0xF0, 12), (0xF8, 12), (0xD0, 8), (0xD1, 8),
+    (0xDA, 3), (0xE0, 6), (0x49, 8), (0x48, 10), (0x42, 6), (0x40, 4),
+    (0x30, 4), (0x38, 4), (0x00, 4), (0x01, 3), (0x08, 3), (0x04, 3),
+)
+
+# Bytes that dominate tile rows (empty, solid and common outline patterns)
+TILE_ROW_BYTES = (0x00, 0xFF, 0x3C, 0x7E, 0x18, 0x66, 0xC3, 0x81, 0xE7, 0x0F, 0xF0)
+
+
+def ascii_charmap() -> Dict[int, str]:
+    """Printable ASCII; messages end with 0x00, line breaks are 0x0A."""
+    charmap = {i: chr(i) for i in range(0x20, 0x7F)}
+    charmap[0x0A] = '\n'
+    return charmap
+
+
+def custom_charmap() -> Dict[int, str]:
+    """Pokemon-style table: letters from 0x80, [END]=0x50, line break 0x4F."""
+    charmap = {0x50: '[END]', 0x4F: '\n', 0x7F: ' '}
+    for i in range(26):
+        charmap[0x80 + i] = chr(ord('A') + i)
+        charmap[0xA0 + i] = chr(ord('a') + i)
+    for i in range(10):
+        charmap[0xF0 + i] = str(i)
+    charmap.update({0xE0: "'", 0xE3: '-', 0xE6: '?', 0xE7: '!', 0xE8: '.', 0xF4: ','})
+    return charmap
+
+
+CHARMAPS = {
+    'ascii': (ascii_charmap, 0x00),
+    'custom': (custom_charmap, 0x50),
+}
+
+
+# ---------------------------------------------------------------------------
+# Compressors (inverse of the handlers in core.compression / core.gba_support)
+# ---------------------------------------------------------------------------
+
+def _find_match(data: bytes, pos: int, candidates: List[int], max_distance: int,
+                min_length: int, max_length: int) -> Tuple[int, int]:
+    """Longest match for data[pos:] among earlier positions: (length, distance)."""
+    best_length, best_distance = 0, 0
+    limit = min(max_length, len(data) - pos)
+    for candidate in reversed(candidates):
+        distance = pos - candidate
+        if distance > max_distance:
+            break
+        length = 0
+        while length < limit and data[candidate + length] == data[pos + length]:
+            length += 1
+        if length > best_length:
+            best_length, best_distance = length, distance
+            if length == limit:
+                break
+    if best_length < min_length:
+        return 0, 0
+    return best_length, best_distance
+
+
+def _lz_tokens(data: bytes, max_distance: int, min_length: int, max_length: int):
+    """Greedy LZ parse with a 3-byte hash chain: yields ('lit', byte) / ('ref', length, distance)."""
+    chains: Dict[bytes, List[int]] = {}
+    pos = 0
+    while pos < len(data):
+        key = data[pos:pos + 3]
+        candidates = chains.get(key, [])
+        length, distance = _find_match(data, pos, candidates[-32:], max_distance,
+                                       min_length, max_length)
+        step = length if length else 1
+        for p in range(pos, pos + step):
+            chains.setdefault(data[p:p + 3], []).append(p)
+        if length:
+            yield ('ref', length, distance)
+        else:
+            yield ('lit', data[pos])
+        pos += step
+
+
+def _pack_flag_groups(tokens, encode_ref) -> bytearray:
+    """Packs tokens into groups of 8 behind an MSB-first flag byte (1 = reference)."""
+    out = bytearray()
+    group: List[Tuple] = []
+
+    def flush():
+        flags = 0
+        body = bytearray()
+        for bit, token in enumerate(group):
+            if token[0] == 'ref':
+                flags |= 0x80 >> bit
+                body += encode_ref(token[1], token[2])
+            else:
+                body.append(token[1])
+        out.append(flags)
+        out.extend(body)
+        group.clear()
+
+    for token in tokens:
+        group.append(token)
+        if len(group) == 8:
+            flush()
+    if group:
+        flush()
+    return out
+
+
+def lzss_compress(data: bytes) -> bytes:
+    """LZSS as read by LZSSHandler: refs are (distance - 1, length - 2), length 2..17."""
+    tokens = _lz_tokens(data, max_distance=256, min_length=3, max_length=17)
+    return bytes(_pack_flag_groups(tokens, lambda length, distance: bytes((distance - 1, length - 2))))
+
+
+def gba_lz77_compress(data: bytes) -> bytes:
+    """Nintendo LZ77 type 0x10 (BIOS LZ77UnComp format), length 3..18, distance <= 4096."""
+    def encode_ref(length, distance):
+        disp = distance - 1
+        return bytes((((length - 3) << 4) | (disp >> 8), disp & 0xFF))
+
+    tokens = _lz_tokens(data, max_distance=0x1000, min_length=3, max_length=18)
+    header = bytes((0x10, len(data) & 0xFF, (len(data) >> 8) & 0xFF, (len(data) >> 16) & 0xFF))
+    return header + bytes(_pack_flag_groups(tokens, encode_ref))
+
+
+def rle_compress(data: bytes) -> bytes:
+    """RLE as read by RLEHandler: runs and literal zero bytes are 00 <byte> <count>."""
+    out = bytearray()
+    i = 0
+    while i < len(data):
+        byte = data[i]
+        run = 1
+        while i + run < len(data) and data[i + run] == byte and run < 0xFF:
+            run += 1
+        if run >= 4 or byte == 0x00:
+            out += bytes((0x00, byte, run))
+        else:
+            out += data[i:i + run]
+        i += run
+    return bytes(out)
+
+
+COMPRESSORS = {
+    'lzss': lzss_compress,
+    'rle': rle_compress,
+    'gba_lz77': gba_lz77_compress,
+}
+
+
+# ---------------------------------------------------------------------------
+# Corpus description
+# ---------------------------------------------------------------------------
+
+@dataclass(frozen=True)
+class ROMSpec:
+    """Parameters of a synthetic ROM; equal specs produce identical bytes."""
+
+    system: str = 'gb'                      # 'gb', 'gbc' or 'gba'
+    size: int = 1 << 20                     # bytes; power of two, >= 32 KB
+    mbc: str = 'mbc5'                       # GB/GBC only, key of MBC_CARTRIDGE_TYPES
+    seed: int = 0
+    scripts: int = 8                        # number of script blocks
+    messages_per_script: int = 64
+    charmap: str = 'custom'                 # 'custom' or 'ascii'
+    compression: Tuple[str, ...] = ('none', 'lzss', 'rle')  # cycled over scripts
+    code_ratio: float = 0.6                 # share of filler that is code (rest: graphics)
+    title: str = 'SYNTHETIC'
+
+
+@dataclass
+class SyntheticScript:
+    """One script block placed in the ROM."""
+
+    name: str
+    start: int                              # file offset of the stored (maybe compressed) data
+    end: int
+    compression: Optional[str]
+    messages: List[str]
+    raw: bytes                              # uncompressed encoded messages
+    pointer_table: Optional[int] = None     # file offset of the pointer table
+    pointers: List[int] = field(default_factory=list)  # file offsets of messages
+
+
+@dataclass
+class SyntheticROM:
+    """Generated image plus ground truth for the benchmarks."""
+
+    spec: ROMSpec
+    data: bytes
+    charmap: Dict[int, str]
+    terminator: int
+    scripts: List[SyntheticScript]
+
+    @property
+    def extension(self) -> str:
+        return {'gb': '.gb', 'gbc': '.gbc', 'gba': '.gba'}[self.spec.system]
+
+    def write(self, path: str) -> str:
+        """Writes the image; the system extension is appended if missing."""
+        if not path.lower().endswith(self.extension):
+            path += self.extension
+        with open(path, 'wb') as f:
+            f.write(self.data)
+        return path
+
+    def segments(self, decoder=None) -> List[Dict]:
+        """Plugin-style segment dicts (as returned by get_text_segments)."""
+        return [{
+            'name': script.name,
+            'start': script.start,
+            'end': script.end,
+            'decoder': decoder,
+            'compression': script.compression,
+        } for script in self.scripts]
+
+
+# ---------------------------------------------------------------------------
+# Generators
+# ---------------------------------------------------------------------------
+
+def make_messages(rng: random.Random, count: int) -> List[str]:
+    """Dialogue-like sentences of 3..14 words."""
+    messages = []
+    for _ in range(count):
+        words = [rng.choice(WORDS) for _ in range(rng.randint(3, 14))]
+        words[0] = words[0].capitalize()
+        text = ' '.join(words) + rng.choice(PUNCTUATION[:5])
+        if len(text) > 36 and rng.random() < 0.5:
+            cut = text.rfind(' ', 0, 36)
+            text = text[:cut] + '\n' + text[cut + 1:]
+        messages.append(text)
+    return messages
+
+
+def encode_message(text: str, charmap: Dict[int, str]) -> bytes:
+    """Encodes with a reverse charmap; unknown characters become spaces."""
+    reverse = {char: code for code, char in charmap.items() if len(char) == 1}
+    space = reverse[' ']
+    return bytes(reverse.get(char, space) for char in text)
+
+
+def code_bytes(rng: np.random.Generator, size: int, system: str) -> bytes:
+    """Instruction stream: weighted SM83 opcodes with operands, or Thumb halfwords."""
+    if system == 'gba':
+        table = np.array([b for b, _ in THUMB_HIGH_BYTES], dtype=np.uint8)
+        weights = np.array([w for _, w in THUMB_HIGH_BYTES], dtype=np.float64)
+        halfwords = size // 2 + 1
+        out = np.empty((halfwords, 2), dtype=np.uint8)
+        out[:, 0] = rng.integers(0, 256, halfwords, dtype=np.uint8)
+        out[:, 1] = table[rng.choice(len(table), halfwords, p=weights / weights.sum())]
+        return out.tobytes()[:size]
+
+    opcodes = np.array([op for op, _, _ in SM83_OPCODES], dtype=np.uint8)
+    lengths = np.array([n for _, n, _ in SM83_OPCODES], dtype=np.int64)
+    weights = np.array([w for _, _, w in SM83_OPCODES], dtype=np.float64)
+    count = size // 2 + 16
+    chosen = rng.choice(len(opcodes), count, p=weights / weights.sum())
+    matrix = np.empty((count, 3), dtype=np.uint8)
+    matrix[:, 0] = opcodes[chosen]
+    # Operands: small immediates and addresses in the banked area are most common
+    matrix[:, 1] = rng.integers(0, 256, count, dtype=np.uint8)
+    matrix[:, 2] = rng.integers(0x40, 0x80, count, dtype=np.uint8)
+    keep = np.arange(3)[None, :] <= lengths[chosen][:, None]
+    stream = matrix[keep].tobytes()
+    while len(stream) < size:
+        stream += stream
+    return stream[:size]
+
+
+def graphics_bytes(rng: np.random.Generator, size: int, system: str) -> bytes:
+    """Tile data: a small tile set reused with Zipf-like frequency."""
+    tile_size = 32 if system == 'gba' else 16
+    row_table = np.array(TILE_ROW_BYTES, dtype=np.uint8)
+    tileset = row_table[rng.integers(0, len(row_table), (256, tile_size))]
+    # A quarter of the tile rows carry arbitrary pixels
+    noisy = rng.random((256, tile_size)) < 0.25
+    tileset[noisy] = rng.integers(0, 256, int(noisy.sum()), dtype=np.uint8)
+    tileset[0] = 0
+
+    count = size // tile_size + 1
+    ranks = np.minimum(rng.zipf(1.3, count) - 1, 255)
+    return tileset[ranks].tobytes()[:size]
+
+
+def filler_bytes(rng: np.random.Generator, size: int, spec: ROMSpec) -> bytes:
+    """Mix of code and graphics chunks in code_ratio proportion."""
+    out = bytearray()
+    while len(out) < size:
+        chunk = min(size - len(out), int(rng.integers(0x400, 0x2000)))
+        if rng.random() < spec.code_ratio:
+            out += code_bytes(rng, chunk, spec.system)
+        else:
+            out += graphics_bytes(rng, chunk, spec.system)
+    return bytes(out)
+
+
+def _gb_header(data: bytearray, spec: ROMSpec):
+    """Fills the GB/GBC cartridge header and checksums."""
+    data[0x100:0x104] = bytes((0x00, 0xC3, 0x50, 0x01))   # nop; jp $0150
+    title = spec.title.upper().encode('ascii')[:15]
+    data[0x134:0x143] = title.ljust(15, b'\x00')
+    data[0x143] = 0x80 if spec.system == 'gbc' else 0x00
+    data[0x144:0x146] = b'01'
+    data[0x146] = 0x00
+    data[0x147] = MBC_CARTRIDGE_TYPES[spec.mbc]
+    data[0x148] = max(0, (spec.size // 0x8000).bit_length() - 1)
+    data[0x149] = 0x03
+    data[0x14A] = 0x01
+    data[0x14B] = 0x33
+    data[0x14C] = 0x00
+
+    checksum = 0
+    for b in data[0x134:0x14D]:
+        checksum = (checksum - b - 1) & 0xFF
+    data[0x14D] = checksum
+    data[0x14E:0x150] = b'\x00\x00'
+    total = (int(np.frombuffer(bytes(data), dtype=np.uint8).sum(dtype=np.uint64))) & 0xFFFF
+    data[0x14E:0x150] = total.to_bytes(2, 'big')
+
+
+def _gba_header(data: bytearray, spec: ROMSpec):
+    """Fills the GBA cartridge header and complement check."""
+    data[0:4] = (0xEA00002E).to_bytes(4, 'little')      # b 0x080000C0
+    data[0xA0:0xAC] = spec.title.upper().encode('ascii')[:12].ljust(12, b'\x00')
+    data[0xAC:0xB0] = b'ASYE'
+    data[0xB0:0xB2] = b'01'
+    data[0xB2] = 0x96
+    data[0xB3:0xBD] = bytes(10)
+    data[0xBD] = (-(sum(data[0xA0:0xBD]) + 0x19)) & 0xFF
+
+
+def _script_slots(spec: ROMSpec, unit: int) -> List[int]:
+    """Evenly spread bank/block indices for scripts (bank 0 holds the header and code)."""
+    units = spec.size // unit
+    count = min(spec.scripts, units - 1)
+    return [1 + (i * (units - 1)) // count for i in range(count)]
+
+
+def _pointer_bytes(offset: int, spec: ROMSpec) -> bytes:
+    """CPU-visible pointer to a file offset: 2-byte banked ($4000-$7FFF) or 4-byte GBA."""
+    if spec.system == 'gba':
+        return (GBA_ROM_BASE + offset).to_bytes(4, 'little')
+    return (0x4000 + offset % GB_BANK_SIZE).to_bytes(2, 'little')
+
+
+def generate_rom(spec: ROMSpec) -> SyntheticROM:
+    """Builds the image described by spec."""
+    if spec.size < 0x8000 or spec.size & (spec.size - 1):
+        raise ValueError(f"ROM size must be a power of two >= 32 KB, got {spec.size}")
+    if spec.charmap not in CHARMAPS:
+        raise ValueError(f"Unknown charmap: {spec.charmap}")
+
+    text_rng = random.Random(spec.seed)
+    np_rng = np.random.default_rng(spec.seed)
+
+    data = bytearray(filler_bytes(np_rng, spec.size, spec))
+    if spec.system == 'gba':
+        _gba_header(data, spec)
+        unit, pointer_size = GBA_BLOCK_SIZE, 4
+        compression_cycle = tuple('gba_lz77' if c in ('lzss', 'rle') else c for c in spec.compression)
+    else:
+        data[:0x150] = bytes(0x150)
+        unit, pointer_size = GB_BANK_SIZE, 2
+        compression_cycle = spec.compression
+
+    make_charmap, terminator = CHARMAPS[spec.charmap]
+    charmap = make_charmap()
+
+    scripts = []
+    for index, slot in enumerate(_script_slots(spec, unit)):
+        compression = compression_cycle[index % len(compression_cycle)] if compression_cycle else 'none'
+        messages = make_messages(text_rng, spec.messages_per_script)
+        encoded = [encode_message(text, charmap) + bytes((terminator,)) for text in messages]
+        raw = b''.join(encoded)
+        base = slot * unit
+        name = f"script_{index:02d}"
+
+        if compression == 'none':
+            # Pointer table followed by the messages it points to
+            table_size = pointer_size * len(encoded)
+            start = base + table_size
+            pointers, table, offset = [], bytearray(), start
+            for message in encoded:
+                pointers.append(offset)
+                table += _pointer_bytes(offset, spec)
+                offset += len(message)
+            block = bytes(table) + raw
+            if len(block) > unit:
+                raise ValueError(f"{name} does not fit into a {unit:#x}-byte bank")
+            data[base:base + len(block)] = block
+            scripts.append(SyntheticScript(name, start, start + len(raw), None, messages, raw,
+                                           pointer_table=base, pointers=pointers))
+        else:
+            stored = COMPRESSORS[compression](raw)
+            if len(stored) > unit:
+                raise ValueError(f"{name} does not fit into a {unit:#x}-byte bank")
+            data[base:base + len(stored)] = stored
+            scripts.append(SyntheticScript(name, base, base + len(stored), compression, messages, raw))
+
+    if spec.system != 'gba':
+        _gb_header(data, spec)
+
+    return SyntheticROM(spec, bytes(data), charmap, terminator, scripts)
+
+
+# Standard corpus used by the benchmark suite. 'quick' keeps default test runs
+# short; 'full' matches real cartridge sizes (GB2TEXT_BENCH_PROFILE=full).
+CORPUS_PROFILES = {
+    'quick': {
+        'gb_mbc5': ROMSpec(system='gb', size=1 << 20, mbc='mbc5', seed=1),
+        'gbc_ascii': ROMSpec(system='gbc', size=1 << 20, mbc='mbc3', seed=2, charmap='ascii'),
+        'gba': ROMSpec(system='gba', size=4 << 20, seed=3, scripts=16, charmap='ascii',
+                       compression=('none', 'gba_lz77')),
+    },
+    'full': {
+        'gb_mbc5': ROMSpec(system='gb', size=2 << 20, mbc='mbc5', seed=1, scripts=32),
+        'gbc_ascii': ROMSpec(system='gbc', size=2 << 20, mbc='mbc3', seed=2, charmap='ascii', scripts=32),
+        'gba': ROMSpec(system='gba', size=32 << 20, seed=3, scripts=64, charmap='ascii',
+                       compression=('none', 'gba_lz77')),
+    },
+}
+
+
+def corpus_profile() -> str:
+    """Active corpus profile from GB2TEXT_BENCH_PROFILE (default 'quick')."""
+    profile = os.environ.get('GB2TEXT_BENCH_PROFILE', 'quick')
+    if profile not in CORPUS_PROFILES:
+        raise ValueError(f"Unknown benchmark profile: {profile}")
+    return profile
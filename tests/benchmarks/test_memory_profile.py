@@ -0,0 +1,100 @@
+"""
+Tests for the per-stage memory profiler in scripts/profile.py.
+"""
+
+import importlib.util
+import json
+import os
+
+import pytest
+
+from tests.benchmarks.synthetic_rom import ROMSpec, generate_rom
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope='module')
+def profile_script():
+    """scripts/profile.py loaded under a name that does not shadow stdlib 'profile'."""
+    spec = importlib.util.spec_from_file_location('gb2text_profile_script',
+                                                  os.path.join(ROOT, 'scripts', 'profile.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class TestMemoryProfile:
+    """Per-stage memory profile of extraction and injection."""
+
+    def test_report_files(self, profile_script, tmp_path):
+        """JSON and Markdown reports cover extraction and injection stages."""
+        synthetic = generate_rom(ROMSpec(system='gbc', size=0x40000, scripts=4, charmap='ascii'))
+        rom_path = synthetic.write(str(tmp_path / 'rom'))
+        output = str(tmp_path / 'memory')
+
+        report = profile_script.memory_profile(rom_path, os.path.join(ROOT, 'plugins'), output, top=5)
+
+        with open(output + '.json', encoding='utf-8') as f:
+            assert json.load(f)['stages'].keys() == report['stages'].keys()
+        with open(output + '.md', encoding='utf-8') as f:
+            markdown = f.read()
+
+        stages = report['stages']
+        for name in ('rom.load', 'extract', 'segment.decode', 'inject.segment', 'rom.save'):
+            assert name in stages
+            assert f"| {name} |" in markdown
+
+        # Extractor and injector each keep one copy of the ROM
+        load = stages['rom.load']
+        assert load['calls'] == 2
+        assert load['retained_bytes'] >= 2 * len(synthetic.data)
+        assert load['retained_per_rom_mb'] == pytest.approx(load['retained_bytes'] / report['rom_mb'])
+        assert load['top_sites'][0]['site'].startswith(os.path.join('core', 'rom.py'))
+        assert stages['extract']['peak_bytes'] >= stages['segment.decode']['peak_bytes']
+
+    def test_nested_peaks(self, profile_script):
+        """A nested stage's peak is credited to its parent."""
+        import tracemalloc
+        profiler = profile_script.MemoryProfiler()
+        tracemalloc.start()
+        try:
+            with profiler.span('outer'):
+                with profiler.span('inner'):
+                    buffer = bytearray(1 << 20)
+                    del buffer
+        finally:
+            tracemalloc.stop()
+
+        report = profiler.report(1 << 20)['stages']
+        assert report['inner']['peak_bytes'] >= 1 << 20
+        assert report['outer']['peak_bytes'] >= report['inner']['peak_bytes']
+        assert report['outer']['retained_bytes'] < 1 << 20
+
+    def test_threads_have_separate_stacks(self, profile_script):
+        """A stage open in another thread is not credited with this thread's peak."""
+        import threading
+        import tracemalloc
+        profiler = profile_script.MemoryProfiler()
+        opened, release = threading.Event(), threading.Event()
+
+        def worker():
+            with profiler.span('worker'):
+                opened.set()
+                release.wait()
+
+        tracemalloc.start()
+        try:
+            thread = threading.Thread(target=worker)
+            thread.start()
+            opened.wait()
+            with profiler.span('main'):
+                buffer = bytearray(1 << 20)
+                del buffer
+            release.set()
+            thread.join()
+        finally:
+            tracemalloc.stop()
+
+        report = profiler.report(1 << 20)['stages']
+        assert report['main']['peak_bytes'] >= 1 << 20
+        assert report['worker']['peak_bytes'] < 1 << 20
@@ -191,6 +191,47 @@ class TestMemoryBenchmarks:
         assert result > 0
 
 
+class TestStartupBenchmarks:
+    """Process startup benchmarks (fresh interpreter per round)."""
+
+    ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    def _run(self, code):
+        import subprocess
+        import sys
+        return subprocess.run([sys.executable, '-c', code], cwd=self.ROOT,
+                              capture_output=True, text=True, check=True).stdout
+
+    @pytest.mark.benchmark(group="startup")
+    def test_scanner_import_startup(self, benchmark):
+        """Benchmark `import core.scanner`: must not import sklearn or train."""
+        code = "import sys, core.scanner; print('sklearn' in sys.modules)"
+        result = benchmark.pedantic(self._run, args=(code,), rounds=3, iterations=1)
+        assert result.strip() == 'False'
+
+    @pytest.mark.benchmark(group="startup")
+    def test_classifier_first_use_startup(self, benchmark):
+        """Benchmark first classifier use: loads the pre-trained artifact."""
+        code = ("from core.ml_classifier import get_ml_classifier; "
+                "c = get_ml_classifier(); print(c.is_trained or not c.model)")
+        result = benchmark.pedantic(self._run, args=(code,), rounds=3, iterations=1)
+        assert result.strip() == 'True'
+
+
+class TestMLBenchmarks:
+    """ML classifier inference benchmarks."""
+
+    @pytest.mark.benchmark(group="ml")
+    def test_ml_predict_buffer_benchmark(self, benchmark):
+        """Benchmark batched NumPy-backend scoring of 1 MB (65536 blocks)."""
+        from core.ml_classifier import SegmentMLClassifier
+
+        classifier = SegmentMLClassifier()
+        data = os.urandom(0x80000) + b'Hello World! This is text. ' * 0x4D90
+        result = benchmark(classifier.predict_buffer, data, 0, len(data), 16)
+        assert len(result) == len(data) // 16
+
+
 class TestIOBenchmarks:
     """I/O operation benchmarks."""
 
@@ -240,5 +281,75 @@ class TestIOBenchmarks:
         assert os.path.exists(result)
 
 
+    @pytest.mark.benchmark(group="io")
+    def test_translation_memory_benchmark(self, benchmark, tmp_path):
+        """Benchmark batch lookup of 5k segments in a 50k-entry SQLite translation memory."""
+        from core.database import TranslationDatabase
+
+        db = TranslationDatabase(str(tmp_path / "memory.db"))
+        db.store_translations(('en', 'ru', f'Message number {i}', f'Сообщение {i}') for i in range(50000))
+        sources = [f'Message number {i}' for i in range(0, 50000, 10)]
+
+        result = benchmark(db.get_translations, 'en', 'ru', sources)
+        assert len(result) == len(sources)
+        db.close()
+
+    @pytest.mark.benchmark(group="io")
+    def test_fuzzy_memory_benchmark(self, benchmark):
+        """Benchmark a top-5 fuzzy lookup in a 100k-entry translation memory."""
+        import random
+        from core.fuzzy_memory import FuzzyIndex
+
+        rng = random.Random(5)
+        words = [''.join(rng.choice('abcdefghijklmnopqrstuvwxyz') for _ in range(rng.randint(2, 9)))
+                 for _ in range(3000)]
+        sources = [f"{rng.choice(words).title()}: {' '.join(rng.choices(words, k=rng.randint(3, 10)))} {i}!"
+                   for i in range(100000)]
+        index = FuzzyIndex((source, f'T{i}') for i, source in enumerate(sources))
+        query = sources[4242].replace(':', ' says').replace('!', '.')
+
+        result = benchmark(index.search, query, 5)
+        assert result[0].target == 'T4242'
+
+    @pytest.mark.benchmark(group="io")
+    def test_batch_machine_translation_benchmark(self, benchmark):
+        """Benchmark a 20k-line batch translation against a local stub with 20 ms latency."""
+        import json
+        import threading
+        import time
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        from core.machine_translation import BingTranslator, MachineTranslation
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                time.sleep(0.02)
+                payload = json.dumps([{"translations": [{"text": item["text"]}]} for item in body]).encode()
+                self.send_response(200)
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        threading.Thread(target=server.serve_forever, args=(0.01,), daemon=True).start()
+        mt = MachineTranslation(max_workers=8)
+        mt.translators['bing'] = BingTranslator('key', endpoint=f'http://127.0.0.1:{server.server_port}/translate',
+                                                pool_size=8)
+        mt.translators['bing'].max_batch_texts = 100
+        mt.set_service('bing')
+        texts = [f'Line {i % 14000}: the quick brown fox' for i in range(20000)]
+
+        try:
+            result = benchmark.pedantic(mt.translate_batch, args=(texts, 'en', 'ru'), rounds=3)
+        finally:
+            server.shutdown()
+            server.server_close()
+        assert result == texts
+
 if __name__ == '__main__':
     pytest.main([__file__, '--benchmark-only'])
\ No newline at end of file
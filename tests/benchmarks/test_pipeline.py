@@ -0,0 +1,243 @@
+"""
+Full-pipeline benchmarks on the synthetic ROM corpus.
+
+Covers every hot path: load, scan, pointer search (flat, banked and far), pointer tables, ML scan, decompress,
+decode, split, extract, inject and TMX export.
+
+Run with: pytest tests/benchmarks/test_pipeline.py --benchmark-only [--baseline=check]
+"""
+
+import pytest
+
+from core.compression import get_compression_handler
+from core.decoder import CharMapDecoder, message_terminators, split_message_spans
+from core.rom import GameBoyROM
+from core.scanner import auto_detect_segments, auto_detect_segments_ml, find_text_pointers
+from tests.benchmarks.synthetic_rom import GBA_ROM_BASE, corpus_profile
+
+ROM_NAMES = ('gb_mbc5', 'gbc_ascii', 'gba')
+
+# Slow stages run a fixed number of rounds to keep the suite short
+SLOW_ROUNDS = 3
+
+
+class CorpusPlugin:
+    """Plugin returning the ground-truth scripts of a synthetic ROM."""
+
+    def __init__(self, synthetic):
+        self.synthetic = synthetic
+
+    def get_text_segments(self, rom):
+        return self.synthetic.segments(CharMapDecoder(self.synthetic.charmap))
+
+
+class CorpusPluginManager:
+    """Plugin manager that always matches the synthetic ROM."""
+
+    def __init__(self, synthetic):
+        self.plugin = CorpusPlugin(synthetic)
+
+    def get_plugin(self, game_id, system, cancellation_token=None):
+        return self.plugin
+
+
+def scripts_of(synthetic, compression=None):
+    return [s for s in synthetic.scripts if s.compression == compression]
+
+
+class TestLoadScanBenchmarks:
+    """ROM loading and text region discovery."""
+
+    @pytest.mark.benchmark(group="pipeline-load")
+    @pytest.mark.parametrize('name', ROM_NAMES)
+    def test_load(self, regression, corpus_files, name):
+        """Benchmark GameBoyROM load + header parse."""
+        rom = regression(GameBoyROM, corpus_files[name])
+        assert rom.system == name.split('_')[0]
+
+    @pytest.mark.benchmark(group="pipeline-scan")
+    @pytest.mark.parametrize('name', ROM_NAMES)
+    def test_scan(self, regression, corpus, name):
+        """Benchmark heuristic segment scan over the whole ROM."""
+        data = corpus[name].data
+        segments = regression.pedantic(auto_detect_segments, args=(data,), rounds=SLOW_ROUNDS)
+        assert isinstance(segments, list)
+
+    @pytest.mark.benchmark(group="pipeline-pointers")
+    def test_pointer_search_banked(self, regression, corpus):
+        """Benchmark 2-byte pointer search over the switchable bank window."""
+        synthetic = corpus['gbc_ascii']
+        table = scripts_of(synthetic)[0].pointer_table
+        pointers = regression(find_text_pointers, synthetic.data, table, table + 0x4000)
+        assert (table, scripts_of(synthetic)[0].pointers[0]) in pointers
+
+    @pytest.mark.benchmark(group="pipeline-pointers")
+    def test_pointer_search_banked_rom(self, regression, corpus):
+        """Benchmark bank-aware 2-byte pointer search over the whole ROM."""
+        from core.mbc import create_mbc
+        from core.scanner import find_banked_pointers
+
+        synthetic = corpus['gbc_ascii']
+        mbc = create_mbc(synthetic.data, synthetic.data[0x147])
+        pointers = regression.pedantic(find_banked_pointers, args=(synthetic.data,), kwargs={'mbc': mbc},
+                                       rounds=SLOW_ROUNDS)
+        found = set(pointers)
+        for script in scripts_of(synthetic):
+            assert all((script.pointer_table + 2 * i, p) in found for i, p in enumerate(script.pointers))
+
+    @pytest.mark.benchmark(group="pipeline-pointers")
+    def test_far_pointer_search(self, regression, corpus):
+        """Benchmark 3-byte and split far-pointer table search over the whole ROM."""
+        from core.mbc import create_mbc
+        from core.scanner import find_gb_far_pointers
+
+        synthetic = corpus['gbc_ascii']
+        mbc = create_mbc(synthetic.data, synthetic.data[0x147])
+        pointers = regression.pedantic(find_gb_far_pointers, args=(synthetic.data,), kwargs={'mbc': mbc},
+                                       rounds=SLOW_ROUNDS)
+        assert all(0 <= target < len(synthetic.data) for _, target in pointers)
+
+    @pytest.mark.benchmark(group="pipeline-pointers")
+    def test_pointer_tables(self, regression, corpus):
+        """Benchmark pointer-table detection over the banked pointer candidates of a ROM."""
+        from core.mbc import create_mbc
+        from core.scanner import detect_pointer_tables, find_banked_pointers
+
+        synthetic = corpus['gbc_ascii']
+        pointers = find_banked_pointers(synthetic.data, mbc=create_mbc(synthetic.data, synthetic.data[0x147]))
+        tables = {t.start: t for t in regression(detect_pointer_tables, synthetic.data, pointers)}
+        for script in scripts_of(synthetic):
+            table = tables[script.pointer_table]
+            assert [start for start, _ in table.messages] == list(script.pointers)
+            assert (table.text_start, table.text_end) == (script.start, script.end)
+
+    @pytest.mark.benchmark(group="pipeline-charmap")
+    def test_relative_search(self, regression, corpus):
+        """Benchmark relative search of a dozen script words over a custom-charmap ROM."""
+        from core.relative_search import RelativeSearch
+
+        synthetic = corpus['gb_mbc5']
+        words = sorted({w.strip('.,!?\'-') for s in synthetic.scripts for m in s.messages for w in m.split()
+                        if sum(c.isalpha() for c in w) >= 4})[:12]
+        engine = RelativeSearch(synthetic.data)
+        charmap = regression(engine.propose_charmap, words)
+        assert all(charmap[code] == char for code, char in synthetic.charmap.items() if char.isalpha())
+
+    @pytest.mark.benchmark(group="pipeline-dictionary")
+    def test_suffix_index(self, regression, corpus):
+        """Benchmark suffix array + LCP construction over one bank, then DTE pair candidates."""
+        from core.suffix_index import SuffixIndex
+
+        synthetic = corpus['gbc_ascii']
+        script = scripts_of(synthetic)[0]
+        bank = script.start // 0x4000 * 0x4000
+        index = regression(SuffixIndex.build, synthetic.data[bank:bank + 0x4000], bank)
+        assert index.find(synthetic.data[script.start:script.start + 16]) == [script.start]
+        candidates = index.dte_candidates(script.start, script.end, size=16, exclude=(synthetic.terminator,))
+        assert len(candidates) == 16 and all(count >= 2 for _, count in candidates)
+
+    @pytest.mark.benchmark(group="pipeline-pointers")
+    def test_pointer_search_gba(self, regression, corpus):
+        """Benchmark 4-byte GBA pointer search over the first MB."""
+        synthetic = corpus['gba']
+        pointers = regression.pedantic(find_text_pointers, args=(synthetic.data, 0, 0x100000, 4),
+                                       kwargs={'address_base': GBA_ROM_BASE}, rounds=SLOW_ROUNDS)
+        table = scripts_of(synthetic)[0]
+        assert (table.pointer_table, table.pointers[0]) in pointers
+
+    @pytest.mark.benchmark(group="pipeline-ml")
+    def test_ml_scan(self, regression, corpus):
+        """Benchmark ML segment scan (feature extraction + batched inference)."""
+        data = corpus['gbc_ascii'].data
+        segments = regression.pedantic(auto_detect_segments_ml, args=(data,), rounds=SLOW_ROUNDS)
+        assert isinstance(segments, list)
+
+
+class TestDecodeBenchmarks:
+    """Decompression, decoding and message splitting of the scripts."""
+
+    @pytest.mark.benchmark(group="pipeline-decompress")
+    @pytest.mark.parametrize('name,compression', [
+        ('gb_mbc5', 'lzss'), ('gb_mbc5', 'rle'), ('gba', 'gba_lz77'),
+    ])
+    def test_decompress(self, regression, corpus, name, compression):
+        """Benchmark decompression of every compressed script of a ROM."""
+        synthetic = corpus[name]
+        scripts = scripts_of(synthetic, compression)
+        handler = get_compression_handler(compression)
+
+        def decompress_all():
+            return [handler.decompress(synthetic.data[s.start:s.end], 0)[0] for s in scripts]
+
+        assert regression(decompress_all) == [s.raw for s in scripts]
+
+    @pytest.mark.benchmark(group="pipeline-decode")
+    @pytest.mark.parametrize('name', ROM_NAMES)
+    def test_decode(self, regression, corpus, name):
+        """Benchmark CharMapDecoder.decode over all uncompressed script bytes."""
+        synthetic = corpus[name]
+        raw = b''.join(s.raw for s in synthetic.scripts)
+        decoder = CharMapDecoder(synthetic.charmap)
+        text = regression(decoder.decode, raw, 0, len(raw))
+        assert synthetic.scripts[0].messages[0].split()[0] in text
+
+    @pytest.mark.benchmark(group="pipeline-split")
+    @pytest.mark.parametrize('name', ROM_NAMES)
+    def test_split(self, regression, corpus, name):
+        """Benchmark splitting script bytes into messages on terminators."""
+        synthetic = corpus[name]
+        raw = b''.join(s.raw for s in synthetic.scripts)
+        terminators = message_terminators(CharMapDecoder(synthetic.charmap))
+        spans = regression(split_message_spans, raw, terminators)
+        assert len(spans) >= sum(len(s.messages) for s in synthetic.scripts)
+
+
+class TestEndToEndBenchmarks:
+    """Extraction, injection and export of the whole corpus ROM."""
+
+    @pytest.mark.benchmark(group="pipeline-extract")
+    @pytest.mark.parametrize('name', ROM_NAMES)
+    def test_extract(self, regression, corpus, corpus_files, name):
+        """Benchmark TextExtractor.extract with ground-truth segments."""
+        from core.extractor import TextExtractor
+
+        synthetic = corpus[name]
+        rom = GameBoyROM(corpus_files[name])
+
+        def extract():
+            return TextExtractor(corpus_files[name], CorpusPluginManager(synthetic), rom=rom).extract()
+
+        results = regression(extract)
+        assert set(results) == {s.name for s in synthetic.scripts}
+
+    @pytest.mark.benchmark(group="pipeline-inject")
+    @pytest.mark.parametrize('name', ROM_NAMES)
+    def test_inject(self, regression, corpus, corpus_files, name):
+        """Benchmark injecting every uncompressed script back into the ROM."""
+        from core.injector import TextInjector
+
+        synthetic = corpus[name]
+        plugin = CorpusPlugin(synthetic)
+        injector = TextInjector(corpus_files[name])
+        translations = {}
+        for script in scripts_of(synthetic):
+            segment = next(s for s in plugin.get_text_segments(injector.rom) if s['name'] == script.name)
+            translations[script.name] = [m['text'] for m in injector._extract_original_messages(segment)]
+
+        def inject_all():
+            return [injector.inject_segment(seg_name, texts, plugin) for seg_name, texts in translations.items()]
+
+        assert all(regression(inject_all))
+
+    @pytest.mark.benchmark(group="pipeline-tmx")
+    def test_tmx_export(self, regression, corpus, corpus_files):
+        """Benchmark TMX export of a full extraction result."""
+        from core.extractor import TextExtractor
+        from core.tmx import TMXHandler
+
+        synthetic = corpus['gb_mbc5']
+        results = TextExtractor(corpus_files['gb_mbc5'], CorpusPluginManager(synthetic)).extract()
+        handler = TMXHandler()
+        tmx = regression(handler.export_tmx, results, source_lang='en', target_lang='ru',
+                         game_title=f'Synthetic ({corpus_profile()})')
+        assert '<tmx' in tmx
@@ -0,0 +1,109 @@
+"""
+Tests for the synthetic ROM corpus generator used by the benchmarks.
+"""
+
+import math
+from collections import Counter
+
+import numpy as np
+import pytest
+
+from core.compression import get_compression_handler
+from core.decoder import CharMapDecoder
+from core.rom import GameBoyROM
+from tests.benchmarks.synthetic_rom import (
+    GBA_ROM_BASE, ROMSpec, code_bytes, generate_rom, graphics_bytes,
+    gba_lz77_compress, lzss_compress, rle_compress,
+)
+
+
+def entropy(data: bytes) -> float:
+    counts = Counter(data)
+    return -sum(c / len(data) * math.log2(c / len(data)) for c in counts.values())
+
+
+class TestSyntheticROM:
+    """Synthetic ROM generator."""
+
+    def test_deterministic(self):
+        """Same spec gives the same bytes, another seed does not."""
+        spec = ROMSpec(size=0x40000, scripts=4, seed=7)
+        assert generate_rom(spec).data == generate_rom(spec).data
+        assert generate_rom(spec).data != generate_rom(ROMSpec(size=0x40000, scripts=4, seed=8)).data
+
+    @pytest.mark.parametrize('system,mbc,cartridge_type', [
+        ('gb', 'mbc1', 0x03), ('gbc', 'mbc3', 0x13), ('gb', 'mbc5', 0x1B),
+    ])
+    def test_gb_header(self, tmp_path, system, mbc, cartridge_type):
+        """GB/GBC header is parsed by GameBoyROM with a valid checksum."""
+        synthetic = generate_rom(ROMSpec(system=system, size=0x80000, mbc=mbc, scripts=4, title='Bench'))
+        rom = GameBoyROM(synthetic.write(str(tmp_path / 'rom')))
+
+        assert rom.system == system
+        assert rom.header['title'] == 'BENCH'
+        assert rom.header['cartridge_type'] == cartridge_type
+        assert 0x8000 << rom.header['rom_size'] == len(rom.data)
+        checksum = 0
+        for b in rom.data[0x134:0x14D]:
+            checksum = (checksum - b - 1) & 0xFF
+        assert rom.header['header_checksum'] == checksum
+
+    def test_gba_header(self, tmp_path):
+        """GBA image is detected and carries the fixed header byte."""
+        synthetic = generate_rom(ROMSpec(system='gba', size=1 << 20, scripts=4, compression=('none',)))
+        path = synthetic.write(str(tmp_path / 'rom'))
+        assert path.endswith('.gba')
+        assert GameBoyROM(path).system == 'gba'
+        assert synthetic.data[0xB2] == 0x96
+
+    @pytest.mark.parametrize('charmap', ['ascii', 'custom'])
+    def test_pointer_tables(self, charmap):
+        """Pointer tables point at the messages of uncompressed scripts."""
+        synthetic = generate_rom(ROMSpec(size=0x80000, scripts=6, charmap=charmap, compression=('none',)))
+        decoder = CharMapDecoder(synthetic.charmap)
+        for script in synthetic.scripts:
+            for i, pointer in enumerate(script.pointers):
+                raw = synthetic.data[script.pointer_table + 2 * i:script.pointer_table + 2 * i + 2]
+                assert int.from_bytes(raw, 'little') == 0x4000 + pointer % 0x4000
+                end = synthetic.data.index(bytes((synthetic.terminator,)), pointer)
+                assert decoder.decode(synthetic.data, pointer, end - pointer) == script.messages[i]
+
+    def test_gba_pointers(self):
+        """GBA pointers are 4-byte addresses in the 0x08000000 window."""
+        synthetic = generate_rom(ROMSpec(system='gba', size=1 << 20, scripts=2, compression=('none',)))
+        script = synthetic.scripts[0]
+        raw = synthetic.data[script.pointer_table:script.pointer_table + 4]
+        assert int.from_bytes(raw, 'little') == GBA_ROM_BASE + script.pointers[0]
+
+    @pytest.mark.parametrize('system,compression', [
+        ('gb', ('lzss',)), ('gb', ('rle',)), ('gba', ('gba_lz77',)),
+    ])
+    def test_compressed_scripts_roundtrip(self, system, compression):
+        """Compressed scripts decompress with the core handlers."""
+        synthetic = generate_rom(ROMSpec(system=system, size=1 << 20, scripts=3, compression=compression))
+        handler = get_compression_handler(compression[0])
+        for script in synthetic.scripts:
+            assert script.compression == compression[0]
+            assert handler.decompress(synthetic.data[script.start:script.end], 0)[0] == script.raw
+
+    @pytest.mark.parametrize('compress,name', [
+        (lzss_compress, 'lzss'), (rle_compress, 'rle'), (gba_lz77_compress, 'gba_lz77'),
+    ])
+    def test_compressors_edge_cases(self, compress, name):
+        """Compressors handle runs, zero bytes and incompressible data."""
+        handler = get_compression_handler(name)
+        rng = np.random.default_rng(0)
+        for data in (b'\x00' * 600, b'ab' * 300, rng.integers(0, 256, 700, dtype=np.uint8).tobytes()):
+            assert handler.decompress(compress(data), 0)[0] == data
+
+    @pytest.mark.parametrize('system', ['gb', 'gba'])
+    def test_filler_entropy(self, system):
+        """Code is high-entropy but not uniform; graphics are clearly lower."""
+        rng = np.random.default_rng(0)
+        assert 6.0 < entropy(code_bytes(rng, 0x10000, system)) < 7.9
+        assert 3.0 < entropy(graphics_bytes(rng, 0x10000, system)) < 6.0
+
+    def test_invalid_size(self):
+        """Non power-of-two sizes are rejected."""
+        with pytest.raises(ValueError):
+            generate_rom(ROMSpec(size=0x30000))
@@ -63,6 +63,15 @@ def core_modules():
     ]
 
 
+def pytest_addoption(parser):
+    """Benchmark baseline options (see tests/benchmarks/conftest.py)."""
+    parser.addoption(
+        "--baseline", choices=("check", "update"), default=None,
+        help="compare benchmark times with tests/benchmarks/baseline.json "
+             "(check) or rewrite it from this run (update)"
+    )
+
+
 # Skip GUI tests on headless systems
 def pytest_configure(config):
     """Configure pytest markers."""
@@ -91,6 +100,16 @@ def reset_test_env(monkeypatch, tmp_path):
     # Set temp directory for test artifacts
     monkeypatch.setenv('TEMP', str(tmp_path))
     monkeypatch.setenv('TMP', str(tmp_path))
+    # Segment plans are cached per process; start each test with an empty cache
+    from core.segment_plan import segment_plans
+    segment_plans.clear()
+    # Scan results are persisted on disk; keep them out of the user's cache directory
+    monkeypatch.setenv('GB2TEXT_CACHE_DIR', str(tmp_path / 'scan_cache'))
+    monkeypatch.setenv('GB2TEXT_TM_PATH', str(tmp_path / 'translation_memory.db'))
+    from core.pointer_index import clear_pointer_indexes
+    clear_pointer_indexes()
+    from core.suffix_index import clear_suffix_indexes
+    clear_suffix_indexes()
     return tmp_path
 
 
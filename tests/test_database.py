@@ -0,0 +1,159 @@
+"""
+Тесты памяти переводов (core/database.py, TranslationDatabase)
+"""
+
+import gc
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from unittest.mock import patch
+
+import pytest
+
+from core import database
+from core.database import LOOKUP_BATCH_SIZE, TranslationDatabase
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / 'memory.db')
+
+
+class TestTranslationDatabase:
+    """Хранение и поиск переводов"""
+
+    def test_persists_between_sessions(self, db_path):
+        """Тест: переводы сохраняются в файле и видны новому объекту"""
+        db = TranslationDatabase(db_path)
+        db.store_translation('en', 'ru', 'Hello', 'Привет')
+        db.close()
+
+        reopened = TranslationDatabase(db_path)
+        assert reopened.get_translation('en', 'ru', 'Hello') == 'Привет'
+        assert reopened.get_translation('en', 'ja', 'Hello') is None
+        with closing(sqlite3.connect(db_path)) as connection:
+            assert connection.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+
+    def test_latest_translation_first(self):
+        """Тест: последний сохранённый перевод возвращается первым, повтор не дублируется"""
+        db = TranslationDatabase()
+        db.store_translation('en', 'ru', 'Hello', 'Привет')
+        db.store_translation('en', 'ru', 'Hello', 'Здравствуй')
+        assert db.get_translations_for_source('en', 'ru', 'Hello') == ['Здравствуй', 'Привет']
+        db.store_translation('en', 'ru', 'Hello', 'Привет')
+        assert db.get_translation('en', 'ru', 'Hello') == 'Привет'
+        assert db.count() == 2
+
+    def test_bulk_store_and_batch_lookup(self):
+        """Тест: пакетное сохранение и поиск больше одного пакета запроса"""
+        db = TranslationDatabase()
+        count = LOOKUP_BATCH_SIZE * 2 + 10
+        assert db.store_translations(('en', 'ru', f'line {i}', f'строка {i}') for i in range(count)) == count
+        sources = [f'line {i}' for i in range(0, count + 5)]
+        found = db.get_translations('en', 'ru', sources)
+        assert len(found) == count
+        assert found['line 300'] == 'строка 300'
+        assert db.get_translations('en', 'ja', sources) == {}
+
+    def test_hash_collision_keeps_texts_apart(self):
+        """Тест: при совпадении хэшей исходных текстов их переводы не смешиваются"""
+        colliding = ('Apple', 'Avocado')
+        with patch.object(database, 'text_hash', side_effect=lambda text: 1 if text in colliding else len(text)):
+            db = TranslationDatabase()
+            db.store_translations([('en', 'ru', 'Apple', 'Яблоко'), ('en', 'ru', 'Avocado', 'Авокадо')])
+            assert db.get_translation('en', 'ru', 'Apple') == 'Яблоко'
+            assert db.get_translations('en', 'ru', ['Apple', 'Avocado']) == {
+                'Apple': 'Яблоко', 'Avocado': 'Авокадо'}
+
+
+class TestTranslationCache:
+    """LRU-кэш чтения"""
+
+    def test_cache_toggles(self, db_path):
+        """Тест: enable_cache включает кэш, disable_cache выключает и очищает его"""
+        db = TranslationDatabase(db_path, cache_size=2)
+        db.store_translation('en', 'de', 'Test', 'Prüfung')
+        db.get_translation('en', 'de', 'Test')
+        assert db.hits == 0 and db.misses == 0
+
+        db.enable_cache()
+        assert db.get_translation('en', 'de', 'Test') == 'Prüfung'
+        assert db.get_translation('en', 'de', 'Test') == 'Prüfung'
+        assert (db.hits, db.misses) == (1, 1)
+
+        # Запись другого процесса не видна, пока кэш не сброшен
+        TranslationDatabase(db_path).store_translation('en', 'de', 'Test', 'Test')
+        assert db.get_translation('en', 'de', 'Test') == 'Prüfung'
+        db.disable_cache()
+        assert db.get_translation('en', 'de', 'Test') == 'Test'
+
+    def test_own_writes_invalidate(self):
+        """Тест: собственные записи сразу видны при включённом кэше; размер ограничен"""
+        db = TranslationDatabase(cache_size=2)
+        db.enable_cache()
+        db.store_translation('en', 'ru', 'One', 'Один')
+        assert db.get_translations_for_source('en', 'ru', 'One') == ['Один']
+        db.store_translation('en', 'ru', 'One', 'Единица')
+        assert db.get_translations_for_source('en', 'ru', 'One') == ['Единица', 'Один']
+        for word in ('Two', 'Three', 'Four'):
+            db.get_translation('en', 'ru', word)
+        db.store_translations([('en', 'ru', w, w.lower()) for w in ('Two', 'Three', 'Four')])
+        assert db.get_translations('en', 'ru', ['Two', 'Three', 'Four']) == {
+            'Two': 'two', 'Three': 'three', 'Four': 'four'}
+        assert len(db._cache) == 2
+
+
+class TestConcurrency:
+    """Общий файл для нескольких потоков и объектов"""
+
+    def test_threads_share_file(self, db_path):
+        """Тест: потоки пишут и читают через свои соединения"""
+        db = TranslationDatabase(db_path)
+        errors = []
+
+        def worker(n):
+            try:
+                db.store_translations(('en', 'ru', f'{n}-{i}', f'{n}:{i}') for i in range(200))
+                assert db.get_translation('en', 'ru', f'{n}-199') == f'{n}:199'
+            except Exception as e:  # pragma: no cover - сообщение об ошибке потока
+                errors.append(e)
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert not errors
+        assert TranslationDatabase(db_path).count() == 800
+
+    def test_memory_database_shared_between_threads(self):
+        """Тест: база в памяти одна для всех потоков"""
+        db = TranslationDatabase()
+        thread = threading.Thread(target=db.store_translation, args=('en', 'ru', 'Hi', 'Привет'))
+        thread.start()
+        thread.join()
+        assert db.get_translation('en', 'ru', 'Hi') == 'Привет'
+
+    def test_finished_threads_release_connections(self, db_path):
+        """Тест: соединения завершившихся потоков закрываются, а не копятся до close()"""
+        db = TranslationDatabase(db_path)
+        for n in range(20):
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                list(executor.map(lambda i: db.store_translation('en', 'ru', f'{n}-{i}', str(i)), range(4)))
+        gc.collect()
+        assert len(db._connections) <= 2
+        assert db.count() == 80
+
+    def test_reuse_after_close(self, db_path):
+        """Тест: после close() файл открывается заново, база в памяти сообщает о закрытии"""
+        db = TranslationDatabase(db_path)
+        db.store_translation('en', 'ru', 'Hi', 'Привет')
+        db.close()
+        assert db.get_translation('en', 'ru', 'Hi') == 'Привет'
+        db.close()
+
+        memory = TranslationDatabase()
+        memory.close()
+        with pytest.raises(sqlite3.ProgrammingError, match='закрыта'):
+            memory.get_translation('en', 'ru', 'Hi')
@@ -83,3 +83,29 @@ class TestDecoder:
 
 if __name__ == '__main__':
     pytest.main([__file__, '-v'])
+
+
+class TestMessageSplitting:
+    """Тесты разделения сырых байтов на сообщения"""
+
+    def test_split_message_spans(self):
+        """Тест разделения по стандартным терминаторам"""
+        from core.decoder import split_message_spans
+        assert split_message_spans(b"\x00AB\xffCD\x0d\x0aE") == [(1, 3), (4, 6), (8, 9)]
+        assert split_message_spans(b"") == []
+        assert split_message_spans(b"\x00\xff") == []
+
+    def test_charmap_terminators(self):
+        """Тест: байты таблицы с '[END]', переводом строки и [XX] считаются терминаторами"""
+        from core.decoder import message_terminators, split_message_spans
+        decoder = CharMapDecoder({0x50: '[END]', 0x4E: '\n', 0x49: '[49]', 0x41: 'A'})
+        terminators = message_terminators(decoder)
+        assert {0x00, 0xFF, 0x50, 0x4E, 0x49} <= terminators
+        assert 0x41 not in terminators
+        assert split_message_spans(b"A\x50AA\x4EA", terminators) == [(0, 1), (2, 4), (5, 6)]
+
+    def test_regex_special_bytes(self):
+        """Тест: терминаторы, совпадающие со спецсимволами regex, экранируются"""
+        from core.decoder import split_message_spans
+        assert split_message_spans(b"a]b^c-d\\e", {ord(']'), ord('^'), ord('-'), ord('\\')}) == \
+            [(0, 1), (2, 3), (4, 5), (6, 7), (8, 9)]
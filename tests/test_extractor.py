@@ -9,6 +9,7 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from core.extractor import TextExtractor
 from core.plugin_manager import PluginManager, CancellationToken
 from core.guide import GuideManager
+from core.decoder import CharMapDecoder
 
 # Путь к тестовым ROM
 TEST_ROMS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "test_roms")
@@ -23,6 +24,13 @@ def create_temp_rom_file(data: bytes = None, size: int = 0x8000) -> str:
         return f.name
 
 
+def ascii_decoder(extra: dict = None) -> CharMapDecoder:
+    """Декодер с ASCII таблицей символов"""
+    charmap = {i: chr(i) for i in range(0x20, 0x7F)}
+    charmap.update(extra or {})
+    return CharMapDecoder(charmap)
+
+
 def get_gba_roms():
     """Получает список GBA ROM"""
     if not os.path.exists(TEST_ROMS_DIR):
@@ -238,8 +246,9 @@ class TestTextExtractor:
         try:
             extractor = TextExtractor(temp_path, PluginManager(), GuideManager())
             # Test _split_messages method
-            result = extractor._split_messages("Hello[END]World", 0)
+            result = extractor._split_messages(b"Hello\x50World", 0, ascii_decoder({0x50: '[END]'}))
             assert isinstance(result, list)
+            assert [m['text'] for m in result] == ["Hello", "World"]
         finally:
             os.unlink(temp_path)
 
@@ -251,7 +260,7 @@ class TestTextExtractor:
         
         try:
             extractor = TextExtractor(temp_path, PluginManager(), GuideManager())
-            result = extractor._split_messages("", 0)
+            result = extractor._split_messages(b"", 0, ascii_decoder())
             assert isinstance(result, list)
             assert len(result) == 0
         finally:
@@ -308,8 +317,9 @@ class TestTextExtractor:
         try:
             extractor = TextExtractor(temp_path, PluginManager(), GuideManager())
             # Test with multiple terminators
-            result = extractor._split_messages("Test\x00Another\x00End", 0)
+            result = extractor._split_messages(b"Test\x00Another\x00End", 0, ascii_decoder())
             assert isinstance(result, list)
+            assert [m['text'] for m in result] == ["Test", "Another", "End"]
         finally:
             os.unlink(temp_path)
 
@@ -349,8 +359,9 @@ class TestTextExtractor:
         try:
             extractor = TextExtractor(temp_path, PluginManager(), GuideManager())
             # Test with multiple different terminators
-            result = extractor._split_messages("Test\x00Hello\xFFWorld\xFEEnd", 0)
+            result = extractor._split_messages(b"Test\x00Hello\xFFWorld\xFEEnd", 0, ascii_decoder())
             assert isinstance(result, list)
+            assert [(m['offset'], m['length']) for m in result] == [(0, 4), (5, 5), (11, 5), (17, 3)]
         finally:
             os.unlink(temp_path)
 
@@ -362,8 +373,9 @@ class TestTextExtractor:
         
         try:
             extractor = TextExtractor(temp_path, PluginManager(), GuideManager())
-            result = extractor._split_messages("Hello[END]World", 0x1000)
+            result = extractor._split_messages(b"Hello\x50World", 0x1000, ascii_decoder({0x50: '[END]'}))
             assert isinstance(result, list)
+            assert [m['offset'] for m in result] == [0x1000, 0x1006]
         finally:
             os.unlink(temp_path)
 
@@ -439,7 +451,7 @@ class TestTextExtractor:
         try:
             extractor = TextExtractor(temp_path, PluginManager(), GuideManager())
             # Simulate a segment with mostly unknown characters
-            extractor._split_messages("[[[[[[[[[", 0)
+            extractor._split_messages(b"[[[[[[[[[", 0, ascii_decoder())
         finally:
             os.unlink(temp_path)
 
@@ -704,3 +716,27 @@ class TestTextExtractor:
             assert isinstance(result, dict)
         finally:
             os.unlink(temp_path)
+
+    def test_split_messages_matches_injector(self):
+        """Тест: смещения сообщений совпадают с TextInjector._extract_original_messages"""
+        from core.injector import TextInjector
+
+        segment_data = b"\x01Hi\x00\x00Bye\x50Last\x0d\x0a!"
+        rom_data = bytearray(0x8000)
+        rom_data[0x200:0x200 + len(segment_data)] = segment_data
+        temp_path = create_temp_rom_file(bytes(rom_data))
+
+        try:
+            decoder = ascii_decoder({0x01: 'the ', 0x50: '[END]'})
+            segment = {'name': 'seg', 'start': 0x200, 'end': 0x200 + len(segment_data), 'decoder': decoder}
+
+            extractor = TextExtractor(temp_path, PluginManager(), GuideManager())
+            extracted = extractor._split_messages(segment_data, segment['start'], decoder)
+            original = TextInjector(temp_path)._extract_original_messages(segment)
+
+            assert [(m['offset'] - segment['start'], m['length']) for m in extracted] == \
+                [(m['offset'], m['length']) for m in original]
+            assert [m['text'] for m in extracted] == ["the Hi", "Bye", "Last", "!"]
+            assert [m['offset'] for m in extracted] == [0x200, 0x205, 0x209, 0x20F]
+        finally:
+            os.unlink(temp_path)
@@ -0,0 +1,107 @@
+"""
+Тесты нечёткого поиска по памяти переводов (core/fuzzy_memory.py)
+"""
+
+import random
+from unittest.mock import patch
+
+from core import fuzzy_memory
+from core.database import TranslationDatabase
+from core.fuzzy_memory import FuzzyIndex, edit_distance, normalize_text, similarity
+
+
+def naive_edit_distance(a, b):
+    row = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        prev, row[0] = row[0], i
+        for j, cb in enumerate(b, 1):
+            prev, row[j] = row[j], min(row[j] + 1, row[j - 1] + 1, prev + (ca != cb))
+    return row[-1]
+
+
+LINES = [
+    ('Mario: Thank you! But our princess is in another castle!', 'Марио: Спасибо! Но наша принцесса в другом замке!'),
+    ('You got 10 GOLD!', 'Получено 10 золота!'),
+    ('Do you want to save your game?', 'Сохранить игру?'),
+    ('The door is locked.', 'Дверь заперта.'),
+    ('The door is open.', 'Дверь открыта.'),
+]
+
+
+class TestEditDistance:
+    """Расстояние редактирования и сходство"""
+
+    def test_matches_dynamic_programming(self):
+        """Тест: совпадает с классическим алгоритмом, в том числе для длинных строк"""
+        rng = random.Random(3)
+        for _ in range(300):
+            a = ''.join(rng.choice('abc д') for _ in range(rng.randint(0, 90)))
+            b = ''.join(rng.choice('abc д') for _ in range(rng.randint(0, 90)))
+            assert edit_distance(a, b) == naive_edit_distance(a, b)
+
+    def test_similarity_ignores_case_and_spaces(self):
+        """Тест: регистр и повторные пробелы не влияют на сходство"""
+        assert normalize_text('  The   DOOR\x00is ') == 'the door is'
+        assert similarity('The door  is locked.', 'the door is LOCKED.') == 1.0
+        assert similarity('', '') == 1.0
+        assert similarity('abcd', 'abce') == 0.75
+
+
+class TestFuzzyIndex:
+    """Поиск похожих строк"""
+
+    def test_near_duplicates(self):
+        """Тест: другое имя, число или пунктуация находят исходную строку"""
+        index = FuzzyIndex(LINES)
+        assert index.best('Luigi: Thank you! But our princess is in another castle!').target == LINES[0][1]
+        assert index.best('You got 250 GOLD!').target == LINES[1][1]
+        assert index.best('Do you want to save your game').target == LINES[2][1]
+        assert index.best('Completely unrelated text') is None
+
+    def test_top_k_order(self):
+        """Тест: результаты упорядочены по сходству и отсекаются по min_score"""
+        index = FuzzyIndex(LINES)
+        matches = index.search('The door is locked!', k=3)
+        assert [m.target for m in matches] == [LINES[3][1], LINES[4][1]]
+        assert matches[0].score > matches[1].score
+        assert [m.source for m in index.search('The door is locked!', min_score=0.9)] == [LINES[3][0]]
+        assert index.search('the door is locked.')[0].score == 1.0
+
+    def test_exact_entry_among_numeric_variants(self):
+        """Тест: среди строк, различающихся только числом, находится строка с тем же числом"""
+        db = TranslationDatabase()
+        db.store_translations(('en', 'ru', f'You found {n} gold.', f'Найдено {n} золота.') for n in range(10, 100))
+        assert db.find_similar('en', 'ru', 'You found 42 gold.', k=1)[0].target == 'Найдено 42 золота.'
+
+        index = FuzzyIndex((f'Lost {n} coins', f'Потеряно {n} монет') for n in range(2000, 7000))
+        assert not index._delta_sizes
+        best = index.search('Lost 2024 coins', k=3)
+        assert best[0].target == 'Потеряно 2024 монет' and best[0].score == 1.0
+        assert index.best('LOST  6999 coins').target == 'Потеряно 6999 монет'
+        # Числа, которого нет в памяти, ближе всего строки с похожим числом
+        assert index.best('Lost 2025 coins', min_score=0.9).source.startswith('Lost 202')
+
+    def test_incremental_add_and_rebuild(self):
+        """Тест: добавленные строки находятся до и после перестройки индекса"""
+        with patch.object(fuzzy_memory, 'MERGE_THRESHOLD', 3):
+            index = FuzzyIndex(LINES)
+            index.add([('Welcome to the village of Pallet!', 'Добро пожаловать в Паллет!')])
+            assert index._delta_sizes
+            assert index.best('Welcome to the village of Viridian!').source.endswith('Pallet!')
+            index.add([(f'Extra line {n}', f'Строка {n}') for n in range(3)])
+            assert not index._delta_sizes and len(index) == 9
+            assert index.best('Welcome to the village of Viridian!').source.endswith('Pallet!')
+
+        index.add([('You got 10 GOLD!', 'Вы нашли 10 золота!')])
+        assert len(index) == 9
+        assert index.best('You got 10 GOLD!').target == 'Вы нашли 10 золота!'
+
+    def test_translation_database(self):
+        """Тест: память переводов строит индекс один раз и дополняет его новыми записями"""
+        db = TranslationDatabase()
+        db.store_translations(('en', 'ru', source, target) for source, target in LINES)
+        index = db.fuzzy_index('en', 'ru')
+        db.store_translation('en', 'ru', 'The door is locked.', 'Дверь закрыта.')
+        assert db.fuzzy_index('en', 'ru') is index
+        assert db.find_similar('en', 'ru', 'The door is locked!', k=1)[0].target == 'Дверь закрыта.'
+        assert db.find_similar('en', 'ja', 'The door is locked!') == []
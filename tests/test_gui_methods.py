@@ -166,6 +166,21 @@ class TestGUIPublicMethods(unittest.TestCase):
         self.assertEqual(len(gui.search_results), 2)
         self.assertEqual(gui.search_results[0]['offset'], 0x100)
         
+    def test_compare_segment_references(self):
+        """Тест ссылок указателей на сегменты для вкладки сравнения"""
+        from gui.main_window import GBTextExtractorGUI
+        from core.pointer_index import PointerIndex
+
+        gui = object.__new__(GBTextExtractorGUI)
+        rom = Mock()
+        rom.data = b'\x00' * 0x8000
+        index = PointerIndex.from_pointers({'banked16': [(0x4100, 0x5000), (0x4102, 0x5010), (0x4104, 0x6000)]})
+        segments = [{'name': 'a', 'start': 0x5000, 'end': 0x5100}, {'name': 'b', 'start': 0x7000, 'end': 0x7100}]
+        with patch('core.pointer_index.get_pointer_index', return_value=index):
+            references = gui._segment_references(rom, segments)
+
+        self.assertEqual(references, {'a': ((0, 0x4100), (0x10, 0x4102)), 'b': ()})
+
     def test_search_navigation_forward(self):
         """Тест навигации вперед по результатам"""
         from gui.main_window import GBTextExtractorGUI
@@ -246,6 +261,58 @@ class TestGUIPublicMethods(unittest.TestCase):
         gui.search_term = "test_pattern"
         self.assertEqual(gui.search_term, "test_pattern")
 
+    def test_suggest_from_memory(self):
+        """Тест подстановки перевода похожей строки из памяти переводов"""
+        from gui.main_window import GBTextExtractorGUI
+        from core.database import TranslationDatabase
+
+        gui = object.__new__(GBTextExtractorGUI)
+        gui.translation_memory = TranslationDatabase()
+        gui.translation_memory.store_translation('en', 'ru', 'You got 10 GOLD!', 'Получено 10 золота!')
+        gui.current_entries = [{'text': 'You got 25 GOLD!'}]
+        gui.current_entry_index = 0
+        gui.encoding_type = MagicMock(get=MagicMock(return_value='auto'))
+        gui.target_lang = MagicMock(get=MagicMock(return_value='ru'))
+        gui.translated_text = MagicMock()
+        gui.set_status = MagicMock()
+        gui.i18n = MagicMock(t=lambda key: {'memory.found': 'match {score}%'}.get(key, key))
+
+        gui.suggest_from_memory()
+        gui.translated_text.insert.assert_called_once_with(1.0, 'Получено 10 золота!')
+        gui.set_status.assert_called_once_with('match 88%')
+
+        gui.current_entries = [{'text': 'Game over'}]
+        gui.suggest_from_memory()
+        gui.set_status.assert_called_with('memory.not.found')
+
+    def test_machine_translate_segment(self):
+        """Тест: непереведённые записи сегмента переводятся пакетом, по одному вызову на язык"""
+        from gui.main_window import GBTextExtractorGUI
+
+        gui = object.__new__(GBTextExtractorGUI)
+        gui.current_entries = [{'text': 'Hello '}, {'text': 'Done', 'translation': 'Готово'},
+                               {'text': 'こんにちは'}, {'text': 'World'}, {'text': '  '}]
+        gui.encoding_type = MagicMock(get=MagicMock(return_value='auto'))
+        gui.target_lang = MagicMock(get=MagicMock(return_value='ru'))
+        gui.machine_translation = MagicMock()
+        gui.machine_translation.translate_batch.side_effect = \
+            lambda texts, source, target, progress_callback=None: [f'{source}:{t}' for t in texts]
+        gui.machine_translation.translate.side_effect = AssertionError("translate() per entry")
+        gui.set_status = MagicMock()
+        gui._display_current_entry = MagicMock()
+        gui.i18n = MagicMock(t=lambda key, **kwargs: f"{key} {kwargs}" if kwargs else key)
+
+        gui.machine_translate_segment()
+        calls = gui.machine_translation.translate_batch.call_args_list
+        self.assertEqual([c.args for c in calls], [(['Hello', 'World'], 'en', 'ru'), (['こんにちは'], 'ja', 'ru')])
+        self.assertEqual([e.get('translation') for e in gui.current_entries],
+                         ['en:Hello', 'Готово', 'ja:こんにちは', 'en:World', None])
+        gui._display_current_entry.assert_called_once()
+        gui.set_status.assert_called_with("machine.translate.done {'count': 3}")
+
+        gui.machine_translate_segment()
+        gui.set_status.assert_called_with('machine.translate.nothing')
+
 
 class TestGUISearchDialogs(unittest.TestCase):
     """Тесты диалогов поиска и замены"""
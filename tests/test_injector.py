@@ -338,3 +338,63 @@ class TestTextInjector:
             pass
         finally:
             os.unlink(temp_path)
+
+
+class TestRepointing:
+    """Тесты переупаковки сообщений с перенаправлением указателей"""
+
+    MESSAGES = [b'FIRST MESSAGE', b'SECOND ONE', b'THIRD MESSAGE TEXT']
+
+    @classmethod
+    def make_rom(cls, tmp_path, with_pointers=True):
+        """32 КБ ROM: сообщения с 0x5000 и таблица 16-битных указателей на них в 0x4100"""
+        data = bytearray(b'\xC9' * 0x8000)
+        data[0x5000:0x5040] = b'\x00' * 0x40
+        position = 0x5000
+        for i, message in enumerate(cls.MESSAGES):
+            data[position:position + len(message) + 1] = message + b'\x00'
+            if with_pointers:
+                data[0x4100 + 2 * i:0x4102 + 2 * i] = position.to_bytes(2, 'little')
+            position += len(message) + 1
+        path = tmp_path / 'repoint.gb'
+        path.write_bytes(bytes(data))
+        return str(path)
+
+    class Plugin:
+        def get_text_segments(self, rom):
+            from core.decoder import CharMapDecoder
+            charmap = {code: chr(code) for code in range(0x20, 0x7F)}
+            return [{'name': 'main', 'start': 0x5000, 'end': 0x5030, 'decoder': CharMapDecoder(charmap)}]
+
+    def test_longer_translation_is_repointed(self, tmp_path):
+        """Тест: длинный перевод сдвигает следующие сообщения и их указатели"""
+        injector = TextInjector(self.make_rom(tmp_path))
+        translations = ['FIRST', 'A MUCH LONGER SECOND', 'THIRD']
+        assert not injector.inject_segment('main', translations, self.Plugin())
+        assert injector.inject_segment('main', translations, self.Plugin(), repoint=True)
+
+        data = injector.modified_data
+        pointers = [int.from_bytes(data[0x4100 + 2 * i:0x4102 + 2 * i], 'little') for i in range(3)]
+        assert pointers == [0x5000, 0x5006, 0x501B]
+        texts = [bytes(data[p:data.index(0, p)]).decode() for p in pointers]
+        assert texts == translations
+
+    def test_unconfirmed_reference_blocks_repointing(self, tmp_path):
+        """Тест: ссылка вне таблицы (операнд ld hl,nn по нечётному адресу) запрещает перенос"""
+        path = self.make_rom(tmp_path)
+        data = bytearray(open(path, 'rb').read())
+        data[0x4200:0x4203] = b'\x21\x0E\x50'
+        with open(path, 'wb') as f:
+            f.write(data)
+        injector = TextInjector(path)
+        assert not injector.inject_segment('main', ['FIRST', 'A MUCH LONGER SECOND', 'THIRD'],
+                                           self.Plugin(), repoint=True)
+        assert bytes(injector.modified_data) == bytes(data)
+
+    def test_unreferenced_message_is_not_moved(self, tmp_path):
+        """Тест: сообщение без указателей не переносится, ROM не меняется"""
+        injector = TextInjector(self.make_rom(tmp_path, with_pointers=False))
+        original = bytes(injector.modified_data)
+        assert not injector.inject_segment('main', ['FIRST', 'A MUCH LONGER SECOND', 'THIRD'],
+                                           self.Plugin(), repoint=True)
+        assert bytes(injector.modified_data) == original
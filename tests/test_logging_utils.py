@@ -0,0 +1,130 @@
+"""Тесты для модуля logging_utils"""
+
+import logging
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.logging_utils import DEFAULT_LOG_LEVEL, SamplingFilter, resolve_level, setup_logging, shutdown_logging
+
+
+def make_record(name: str, msg: str, level: int = logging.DEBUG, args=()) -> logging.LogRecord:
+    """Создаёт запись лога"""
+    return logging.LogRecord(name, level, __file__, 1, msg, args, None)
+
+
+@pytest.fixture
+def restore_root_logger():
+    """Восстанавливает корневой логгер после теста"""
+    root = logging.getLogger()
+    level, handlers = root.level, list(root.handlers)
+    yield
+    shutdown_logging()
+    root.setLevel(level)
+    for handler in handlers:
+        if handler not in root.handlers:
+            root.addHandler(handler)
+
+
+class TestSamplingFilter:
+    """Тесты прореживания повторяющихся событий"""
+
+    def test_samples_every_nth(self):
+        """Тест: из повторов одного события проходит первое и каждое N-е"""
+        sampling = SamplingFilter({'gb2text.scanner': 10})
+        passed = [sampling.filter(make_record('gb2text.scanner', "Найден указатель: 0x%X", args=(i,)))
+                  for i in range(25)]
+        assert sum(passed) == 3
+        assert passed[0] and passed[10] and passed[20]
+
+    def test_events_counted_separately(self):
+        """Тест: разные шаблоны сообщений прореживаются независимо"""
+        sampling = SamplingFilter({'gb2text.scanner': 10})
+        assert sampling.filter(make_record('gb2text.scanner', "event A"))
+        assert sampling.filter(make_record('gb2text.scanner', "event B"))
+        assert not sampling.filter(make_record('gb2text.scanner', "event A"))
+
+    def test_other_modules_and_levels_pass(self):
+        """Тест: другие модули и записи уровня выше DEBUG не прореживаются"""
+        sampling = SamplingFilter({'gb2text.scanner': 10})
+        for _ in range(5):
+            assert sampling.filter(make_record('gb2text.extractor', "event"))
+            assert sampling.filter(make_record('gb2text.scanner', "warning", level=logging.WARNING))
+
+    def test_child_logger_uses_prefix_rate(self):
+        """Тест: дочерний логгер наследует частоту по префиксу"""
+        sampling = SamplingFilter({'gb2text.decoder': 2, 'gb2text.decoder.multi': 1})
+        assert sampling._rate_for('gb2text.decoder.multi') == 1
+        assert sampling._rate_for('gb2text.decoder.other') == 2
+        assert sampling._rate_for('gb2text.decoderx') == 1
+
+
+class TestSetupLogging:
+    """Тесты настройки логирования"""
+
+    def test_resolve_level(self):
+        """Тест преобразования уровня"""
+        assert resolve_level('info') == logging.INFO
+        assert resolve_level(logging.DEBUG) == logging.DEBUG
+        with pytest.raises(ValueError):
+            resolve_level('LOUD')
+
+    def test_queue_writes_file(self, tmp_path, restore_root_logger):
+        """Тест: записи попадают в файл через фоновый поток"""
+        log_file = tmp_path / 'test.log'
+        listener = setup_logging('INFO', log_file=str(log_file), console=False)
+        assert listener is not None
+
+        logger = logging.getLogger('gb2text.test')
+        logger.info("сообщение %d", 1)
+        logger.debug("скрыто")
+        shutdown_logging()
+
+        content = log_file.read_text(encoding='utf-8')
+        assert "сообщение 1" in content
+        assert "скрыто" not in content
+
+    def test_sampling_applied(self, tmp_path, restore_root_logger):
+        """Тест: прореживание применяется до постановки в очередь"""
+        log_file = tmp_path / 'test.log'
+        setup_logging('DEBUG', log_file=str(log_file), console=False,
+                      sample_rates={'gb2text.scanner': 10})
+
+        logger = logging.getLogger('gb2text.scanner')
+        for i in range(30):
+            logger.debug("Найден указатель: 0x%X", i)
+        shutdown_logging()
+
+        assert log_file.read_text(encoding='utf-8').count("Найден указатель") == 3
+
+    def test_setup_is_idempotent(self, tmp_path, restore_root_logger):
+        """Тест: повторная настройка не дублирует обработчики"""
+        root = logging.getLogger()
+        before = len(root.handlers)
+        setup_logging('INFO', log_file=str(tmp_path / 'a.log'), console=False)
+        setup_logging('INFO', log_file=str(tmp_path / 'b.log'), console=False, use_queue=False)
+        assert len(root.handlers) == before + 1
+
+
+class TestLogLevelFlag:
+    """Тесты флага --log-level"""
+
+    def test_default_is_info(self):
+        """Тест: по умолчанию уровень INFO"""
+        from main import create_parser
+        args = create_parser().parse_args(['game.gb'])
+        assert args.log_level == DEFAULT_LOG_LEVEL == 'INFO'
+
+    def test_case_insensitive(self):
+        """Тест: уровень можно указывать в любом регистре"""
+        from main import create_parser
+        assert create_parser().parse_args(['--log-level', 'debug']).log_level == 'DEBUG'
+
+    def test_invalid_level(self):
+        """Тест: неизвестный уровень отклоняется"""
+        from main import create_parser
+        with pytest.raises(SystemExit):
+            create_parser().parse_args(['--log-level', 'LOUD'])
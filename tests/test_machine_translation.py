@@ -2,9 +2,16 @@
 Tests for machine translation functionality
 """
 
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
 import pytest
 from unittest.mock import Mock, patch
+from core.database import TranslationDatabase
 from core.machine_translation import MachineTranslation, GoogleTranslator, DeepLTranslator, BingTranslator
+from core.machine_translation import RetryableTranslationError, TokenBucket, pack_batches
 
 
 class TestGoogleTranslator:
@@ -73,17 +80,18 @@ class TestDeepLTranslator:
 
 
 class TestBingTranslator:
-    @patch('requests.post')
+    @patch('requests.Session.post')
     def test_translate_success(self, mock_post):
-        mock_response = Mock()
+        mock_response = Mock(status_code=200)
         mock_response.json.return_value = [{"translations": [{"text": "Hello"}]}]
         mock_post.return_value = mock_response
 
-        translator = BingTranslator("fake_key", "global")
+        translator = BingTranslator("fake_key", "global", timeout=5)
         result = translator.translate("Hola", "es", "en")
         assert result == "Hello"
+        assert mock_post.call_args.kwargs['timeout'] == 5
 
-    @patch('requests.post', side_effect=ImportError)
+    @patch('requests.Session.post', side_effect=ImportError)
     def test_translate_requests_not_available(self, mock_post):
         translator = BingTranslator("fake_key", "global")
         with pytest.raises(Exception, match="requests не установлен"):
@@ -222,13 +230,13 @@ class TestDeepLTranslatorEdgeCases:
 
 
 class TestBingTranslatorEdgeCases:
-    @patch('requests.post')
+    @patch('requests.Session.post')
     def test_translate_when_not_available(self, mock_post):
         translator = BingTranslator("", "global")
         with pytest.raises(Exception, match="Bing Translator недоступен"):
             translator.translate("test", "en", "ru")
 
-    @patch('requests.post')
+    @patch('requests.Session.post')
     def test_translate_api_error(self, mock_post):
         mock_post.side_effect = Exception("API Error")
         translator = BingTranslator("fake_key", "global")
@@ -283,4 +291,137 @@ class TestMachineTranslationEdgeCases:
         result = mt.translate("Test text", "en", "ru")
         assert result == "Translated"
         # Verify translate was called on the translator instance
-        mock_instance.translate.assert_called_once()
\ No newline at end of file
+        mock_instance.translate.assert_called_once()
+
+class StubBingHandler(BaseHTTPRequestHandler):
+    """Bing-compatible endpoint: upper-cases texts, can fail the first N requests."""
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        server = self.server
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        with server.lock:
+            server.requests.append(body)
+            server.ports.add(self.client_address[1])
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+            fail = server.failures > 0
+            server.failures -= fail
+        time.sleep(server.delay)
+        with server.lock:
+            server.in_flight -= 1
+        if fail:
+            self.send_response(503)
+            self.send_header('Retry-After', '0')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        payload = json.dumps([{"translations": [{"text": item["text"].upper()}]} for item in body]).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubBingHandler)
+    server.lock = threading.Lock()
+    server.requests, server.in_flight, server.max_in_flight = [], 0, 0
+    server.failures, server.delay, server.ports = 0, 0.0, set()
+    thread = threading.Thread(target=server.serve_forever, args=(0.01,), daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def stub_pipeline(server, **kwargs):
+    mt = MachineTranslation(backoff=0, **kwargs)
+    mt.translators['bing'] = BingTranslator('key', endpoint=f'http://127.0.0.1:{server.server_port}/translate')
+    mt.set_service('bing')
+    return mt
+
+
+class TestBatchHelpers:
+    def test_pack_batches_limits(self):
+        texts = ['aaaa', 'bb', 'cccccc', 'd', 'e' * 20]
+        assert pack_batches(texts, max_texts=2, max_chars=100) == [['aaaa', 'bb'], ['cccccc', 'd'], ['e' * 20]]
+        assert pack_batches(texts, max_texts=10, max_chars=10) == [['aaaa', 'bb'], ['cccccc', 'd'], ['e' * 20]]
+        assert pack_batches([], 10, 10) == []
+
+    def test_token_bucket_limits_rate(self):
+        bucket = TokenBucket(rate=50, capacity=1)
+        start = time.monotonic()
+        for _ in range(6):
+            bucket.acquire()
+        assert time.monotonic() - start >= 0.09
+
+
+class TestBatchTranslation:
+    def test_deduplicates_and_packs(self, stub_server):
+        mt = stub_pipeline(stub_server)
+        texts = [f'line {i % 1500}' for i in range(3000)] + ['', '  ']
+        progress = []
+        result = mt.translate_batch(texts, 'en', 'ru', progress_callback=lambda done, total: progress.append(done))
+        assert result[:2] == ['LINE 0', 'LINE 1'] and result[1500] == 'LINE 0' and result[-2:] == ['', '  ']
+        assert sorted(len(body) for body in stub_server.requests) == [500, 1000]
+        assert progress[-1] == 1500
+
+    def test_concurrent_requests(self, stub_server):
+        stub_server.delay = 0.05
+        mt = stub_pipeline(stub_server, max_workers=4)
+        mt.translators['bing'].max_batch_texts = 10
+        assert mt.translate_batch([f'text {i}' for i in range(80)], 'en', 'ru')[79] == 'TEXT 79'
+        assert len(stub_server.requests) == 8
+        assert stub_server.max_in_flight > 1
+        # Keep-alive connections are reused from the pool
+        assert len(stub_server.ports) <= 4
+
+    def test_persistent_cache(self, stub_server, tmp_path):
+        path = str(tmp_path / 'mt_cache.db')
+        mt = stub_pipeline(stub_server, cache=TranslationDatabase(path))
+        mt.translate_batch(['Hello', 'World'], 'en', 'ru')
+
+        fresh = stub_pipeline(stub_server, cache=TranslationDatabase(path))
+        assert fresh.translate_batch(['World', 'Hello', 'Again'], 'en', 'ru') == ['WORLD', 'HELLO', 'AGAIN']
+        assert fresh.translate('Hello', 'en', 'ru') == 'HELLO'
+        assert stub_server.requests == [[{'text': 'Hello'}, {'text': 'World'}], [{'text': 'Again'}]]
+        # Machine translations are kept apart from the user's own translations
+        assert fresh.cache.get_translation('en', 'ru', 'Hello') is None
+
+    def test_retries_temporary_errors(self, stub_server):
+        stub_server.failures = 2
+        mt = stub_pipeline(stub_server, max_retries=2)
+        assert mt.translate_batch(['retry me'], 'en', 'ru') == ['RETRY ME']
+        assert len(stub_server.requests) == 3
+
+        stub_server.failures = 5
+        with pytest.raises(RetryableTranslationError):
+            mt.translate_batch(['give up'], 'en', 'ru')
+
+    def test_rate_limited_pipeline(self, stub_server):
+        mt = stub_pipeline(stub_server, requests_per_second=40)
+        mt.translators['bing'].max_batch_texts = 1
+        mt.rate_limiter.capacity = mt.rate_limiter._tokens = 1
+        start = time.monotonic()
+        mt.translate_batch(['a', 'b', 'c', 'd', 'e'], 'en', 'ru')
+        assert time.monotonic() - start >= 0.09
+
+    @patch('deepl.Translator')
+    def test_deepl_sends_text_list(self, mock_translator_class):
+        mock_translator = Mock()
+        mock_translator.translate_text.side_effect = lambda texts, **kwargs: [Mock(text=t[::-1]) for t in texts]
+        mock_translator.get_usage.return_value = Mock(any_limit_reached=False)
+        mock_translator_class.return_value = mock_translator
+
+        mt = MachineTranslation()
+        mt.add_deepl_translator('key')
+        mt.set_service('deepl')
+        assert mt.translate_batch(['abc', 'de', 'abc'], 'en', 'ru') == ['cba', 'ed', 'cba']
+        mock_translator.translate_text.assert_called_once_with(['abc', 'de'], source_lang='EN', target_lang='RU')
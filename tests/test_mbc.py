@@ -2,7 +2,11 @@
 Тесты для модуля MBC (Memory Bank Controller)
 """
 import pytest
-from core.mbc import MBC, MBC1, create_mbc
+import numpy as np
+
+from core.mbc import (
+    MBC, MBC1, MBC2, MBC3, MBC5, create_mbc, bank_addresses_to_offsets, offsets_to_bank_addresses,
+)
 
 
 class TestMBC:
@@ -108,3 +112,96 @@ class TestMBC:
         for mbc_type in [0x01, 0x02, 0x03]:  # MBC1
             mbc = create_mbc(rom_data, mbc_type)
             assert isinstance(mbc, MBC1)
+
+    @pytest.mark.parametrize('mbc_type,mbc_class', [
+        (0x05, MBC2), (0x06, MBC2), (0x0F, MBC3), (0x13, MBC3), (0x19, MBC5), (0x1E, MBC5),
+    ])
+    def test_create_mbc_new_types(self, mbc_type, mbc_class):
+        """Тест создания MBC2/MBC3/MBC5"""
+        assert type(create_mbc(b'\x00' * 0x8000, mbc_type)) is mbc_class
+
+
+class TestMBCBankSwitching:
+    """Тесты переключения банков MBC2/MBC3/MBC5"""
+
+    rom_data = bytes(bank for bank in range(64) for _ in range(0x4000))
+
+    def test_mbc2_register_select_by_address_bit8(self):
+        """Тест: MBC2 выбирает регистр по биту 8 адреса"""
+        mbc = MBC2(self.rom_data)
+        mbc.write(0x2100, 0x03)
+        assert mbc.rom_bank == 3
+        assert mbc.read_rom(0x4000) == 3
+        mbc.write(0x0000, 0x0A)
+        assert mbc.ram_enabled and mbc.rom_bank == 3
+        mbc.write(0x2100, 0x00)
+        assert mbc.rom_bank == 1
+
+    def test_mbc3_bank_and_rtc(self):
+        """Тест: MBC3 - 7-битный номер банка и выбор регистра часов"""
+        mbc = MBC3(self.rom_data)
+        mbc.write(0x2000, 0x25)
+        assert mbc.read_rom(0x4000) == 0x25
+        mbc.write(0x2000, 0x00)
+        assert mbc.rom_bank == 1
+        mbc.write(0x4000, 0x08)
+        assert mbc.rtc_register == 0x08
+        mbc.write(0x4000, 0x02)
+        assert (mbc.ram_bank, mbc.rtc_register) == (2, None)
+
+    def test_mbc5_nine_bit_bank(self):
+        """Тест: MBC5 - 9-битный номер банка, банк 0 доступен в окне"""
+        mbc = MBC5(self.rom_data)
+        mbc.write(0x2000, 0x00)
+        assert mbc.rom_bank == 0
+        mbc.write(0x3000, 0x01)
+        assert mbc.rom_bank == 0x100
+        mbc.write(0x2000, 0x12)
+        assert mbc.rom_bank == 0x112
+
+
+class TestBulkAddressTranslation:
+    """Тесты пакетного перевода (банк, адрес CPU) <-> смещение файла"""
+
+    rom_data = bytes(64 * 0x4000)
+
+    def test_generic_roundtrip(self):
+        """Тест: смещения переводятся в (банк, адрес) и обратно"""
+        offsets = np.array([0, 0x3FFF, 0x4000, 0x7FFF, 0x8000, 0x12345, 0xFFFFF])
+        banks, addresses = offsets_to_bank_addresses(offsets)
+        assert list(banks[:4]) == [0, 0, 1, 1]
+        assert list(addresses[:4]) == [0, 0x3FFF, 0x4000, 0x7FFF]
+        assert list(bank_addresses_to_offsets(banks, addresses)) == list(offsets)
+        assert list(bank_addresses_to_offsets([3, 3], [0x8000, -1])) == [-1, -1]
+
+    @pytest.mark.parametrize('mbc_class,bank,reachable', [
+        (MBC, 1, True), (MBC, 2, False),
+        (MBC1, 0x20, False), (MBC1, 0x21, True),
+        (MBC2, 0x0F, True), (MBC2, 0x10, False),
+        (MBC3, 0x3F, True), (MBC3, 0x40, False),
+        (MBC5, 0, True), (MBC5, 0x3F, True),
+    ])
+    def test_reachable_banks(self, mbc_class, bank, reachable):
+        """Тест: недоступные MBC банки и смещения за концом файла дают -1"""
+        mbc = mbc_class(self.rom_data)
+        offset = mbc.to_file_offset(bank, 0x4123)
+        assert offset == (bank * 0x4000 + 0x123 if reachable else -1)
+        assert mbc.to_file_offset(bank, 0x0123) == 0x123
+
+    def test_to_bank_addresses_mbc1(self):
+        """Тест: смещения в банках 0x20/0x40/0x60 недоступны для MBC1"""
+        mbc = MBC1(bytes(128 * 0x4000))
+        banks, addresses = mbc.to_bank_addresses([0x100, 0x20 * 0x4000 + 5, 0x21 * 0x4000 + 5, -1])
+        assert list(banks) == [0, -1, 0x21, -1]
+        assert addresses[2] == 0x4005
+
+    def test_rom_read_banked(self, tmp_path):
+        """Тест: GameBoyROM.read_banked читает байты пакетно"""
+        from core.rom import GameBoyROM
+        data = bytearray(bank for bank in range(8) for _ in range(0x4000))
+        data[0x147] = 0x19
+        path = tmp_path / 'mbc5.gb'
+        path.write_bytes(bytes(data))
+        rom = GameBoyROM(str(path))
+        values = rom.read_banked([3, 7, 9, 0], [0x4000, 0x7FFF, 0x4000, 0x0200])
+        assert list(values) == [3, 7, 0xFF, 0]
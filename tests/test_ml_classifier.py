@@ -6,7 +6,7 @@ import pytest
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from core.ml_classifier import SegmentMLClassifier, SKLEARN_AVAILABLE
+from core.ml_classifier import SegmentMLClassifier, SKLEARN_AVAILABLE, ML_AVAILABLE
 
 
 class TestMLClassifier:
@@ -128,7 +128,161 @@ class TestMLClassifier:
     def test_classifier_trained_status(self):
         """Тест статуса обучения классификатора"""
         classifier = SegmentMLClassifier()
-        if SKLEARN_AVAILABLE:
+        if ML_AVAILABLE:
             assert classifier.is_trained == True
         else:
-            assert classifier.is_trained == False
\ No newline at end of file
+            assert classifier.is_trained == False
+
+class TestMLClassifierArtifact:
+    """Тесты сохранения/загрузки предобученной модели и ленивой инициализации"""
+
+    def test_import_does_not_load_sklearn(self):
+        """Тест: импорт сканера не импортирует sklearn и не обучает модель"""
+        import subprocess
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        code = ("import sys, core.scanner, core.ml_classifier as m; "
+                "print('sklearn' in sys.modules, m._global_classifier is None)")
+        out = subprocess.run([sys.executable, '-c', code], cwd=root,
+                             capture_output=True, text=True, check=True).stdout
+        assert out.split() == ['False', 'True']
+
+    def test_get_ml_classifier_is_lazy_singleton(self):
+        """Тест ленивого создания глобального экземпляра"""
+        import core.ml_classifier as mlc
+        first = mlc.get_ml_classifier()
+        assert mlc.get_ml_classifier() is first
+
+    def test_load_missing_artifact(self, tmp_path):
+        """Тест загрузки несуществующего артефакта"""
+        classifier = SegmentMLClassifier(pretrained=False)
+        assert classifier.load_model(str(tmp_path / 'missing.pkl')) is False
+
+    def test_load_incompatible_artifact(self, tmp_path):
+        """Тест: артефакт другой версии не загружается"""
+        import pickle
+        path = tmp_path / 'old.pkl'
+        with open(path, 'wb') as f:
+            pickle.dump({'format_version': -1}, f)
+        classifier = SegmentMLClassifier(pretrained=False)
+        assert classifier.load_model(str(path)) is False
+
+    @pytest.mark.skipif(not SKLEARN_AVAILABLE, reason="scikit-learn not available")
+    def test_save_and_load_roundtrip(self, tmp_path):
+        """Тест сохранения и загрузки модели"""
+        path = str(tmp_path / 'model.pkl')
+        trained = SegmentMLClassifier(pretrained=False)
+        trained.save_model(path)
+
+        loaded = SegmentMLClassifier(model_path=path, backend='sklearn')
+        assert loaded.is_trained
+        data = b'Hello World! Text'
+        assert loaded.predict(data) == pytest.approx(trained.predict(data))
+
+    @pytest.mark.skipif(not SKLEARN_AVAILABLE, reason="scikit-learn not available")
+    def test_bundled_artifact_is_loadable(self):
+        """Тест: поставляемый артефакт совместим с текущей версией"""
+        from core.ml_classifier import DEFAULT_MODEL_PATH
+        classifier = SegmentMLClassifier(pretrained=False)
+        assert classifier.load_model(DEFAULT_MODEL_PATH)
+
+    def test_save_untrained_raises(self, tmp_path):
+        """Тест: нельзя сохранить необученную модель"""
+        classifier = SegmentMLClassifier(pretrained=False)
+        classifier.is_trained = False
+        with pytest.raises(RuntimeError):
+            classifier.save_model(str(tmp_path / 'model.pkl'))
+
+
+class TestCompactBackend:
+    """Тесты NumPy-бэкенда (CompactForest) и пакетного предсказания"""
+
+    BLOCKS = [b'Hello World! Text', bytes(range(16)), b'\x00' * 16, b'POKEMON RED\x50\x50\x50\x50\x50', b'']
+
+    def test_unknown_backend_raises(self):
+        """Тест: неизвестный бэкенд отклоняется"""
+        with pytest.raises(ValueError):
+            SegmentMLClassifier(backend='torch')
+
+    def test_default_backend_does_not_import_sklearn(self):
+        """Тест: NumPy-бэкенд работает без импорта sklearn"""
+        import subprocess
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        code = ("import sys; from core.ml_classifier import SegmentMLClassifier; "
+                "c = SegmentMLClassifier(); c.predict(b'Hello World!'); "
+                "print(c.backend, c.is_trained, 'sklearn' in sys.modules)")
+        out = subprocess.run([sys.executable, '-c', code], cwd=root,
+                             capture_output=True, text=True, check=True).stdout
+        assert out.split() == ['numpy', 'True', 'False']
+
+    def test_numpy_backend_without_sklearn(self, monkeypatch):
+        """Тест: при отсутствии sklearn используется компактная модель"""
+        import core.ml_classifier as mlc
+        monkeypatch.setattr(mlc, 'SKLEARN_AVAILABLE', False)
+        classifier = SegmentMLClassifier()
+        assert classifier.is_trained
+        assert classifier.model is None
+        assert 0.0 <= classifier.predict(b'Hello World!') <= 1.0
+
+    @pytest.mark.skipif(not SKLEARN_AVAILABLE, reason="scikit-learn not available")
+    def test_compact_matches_sklearn(self):
+        """Тест: вероятности NumPy-бэкенда совпадают с RandomForestClassifier"""
+        import numpy as np
+        rng = np.random.default_rng(0)
+        blocks = rng.integers(0, 256, size=(500, 16), dtype=np.uint8)
+        blocks[::3] = np.frombuffer(b'The quick brown ', dtype=np.uint8)
+
+        reference = SegmentMLClassifier(backend='sklearn')
+        compact = SegmentMLClassifier(backend='numpy')
+        np.testing.assert_allclose(compact.predict_batch(blocks), reference.predict_batch(blocks))
+
+    @pytest.mark.skipif(not SKLEARN_AVAILABLE, reason="scikit-learn not available")
+    def test_compact_roundtrip(self, tmp_path):
+        """Тест сохранения и загрузки компактной модели"""
+        path = str(tmp_path / 'model.npz')
+        trained = SegmentMLClassifier(pretrained=False, backend='sklearn')
+        trained.save_compact_model(path)
+
+        loaded = SegmentMLClassifier(compact_model_path=path)
+        assert loaded.model is None
+        data = b'Hello World! Text'
+        assert loaded.predict(data) == pytest.approx(trained.predict(data))
+
+    def test_incompatible_compact_artifact(self, tmp_path):
+        """Тест: компактный артефакт другой версии не загружается"""
+        import numpy as np
+        from core.ml_classifier import CompactForest
+        path = str(tmp_path / 'old.npz')
+        np.savez(path, format_version=np.array(-1), feature_count=np.array(10))
+        assert CompactForest.load(path) is None
+        assert CompactForest.load(str(tmp_path / 'missing.npz')) is None
+
+    def test_predict_batch_matches_predict(self):
+        """Тест: пакетное предсказание совпадает с поблочным"""
+        classifier = SegmentMLClassifier()
+        scores = classifier.predict_batch(self.BLOCKS)
+        assert len(scores) == len(self.BLOCKS)
+        for block, score in zip(self.BLOCKS[:-1], scores):
+            assert score == pytest.approx(classifier.predict(block))
+        assert scores[-1] == 0.0
+
+    def test_predict_batch_empty(self):
+        """Тест пакетного предсказания для пустого списка"""
+        classifier = SegmentMLClassifier()
+        assert len(classifier.predict_batch([])) == 0
+
+    def test_predict_buffer(self):
+        """Тест оценки последовательных блоков буфера"""
+        classifier = SegmentMLClassifier()
+        data = b'Hello World! This is a test message.' + bytes(range(64))
+        scores = classifier.predict_buffer(data, 4, len(data), block_size=16)
+        assert len(scores) == (len(data) - 4) // 16
+        assert scores[1] == pytest.approx(classifier.predict(data[20:36]))
+        assert len(classifier.predict_buffer(data, 0, 8, block_size=16)) == 0
+
+    def test_untrained_batch_uses_heuristic(self):
+        """Тест: необученный классификатор использует эвристику и в пакетном режиме"""
+        classifier = SegmentMLClassifier()
+        classifier.is_trained = False
+        scores = classifier.predict_batch(self.BLOCKS[:-1])
+        for block, score in zip(self.BLOCKS[:-1], scores):
+            assert score == pytest.approx(classifier._heuristic_score(block))
@@ -7,7 +7,8 @@
 import unittest
 from core.multi_charmap import (
     CharTable, MultiCharmapSegment, EncodingDetector, get_detector,
-    analyze_custom_encoding, _detect_possible_charmaps, _detect_sjis_sequences
+    analyze_custom_encoding, _detect_possible_charmaps, _detect_sjis_sequences,
+    byte_histogram, coverage_mask, coverage_scores, count_sjis_pairs
 )
 
 
@@ -151,6 +152,65 @@ class TestMultiCharmapSegment(unittest.TestCase):
         coverage = segment._calculate_coverage({0x20: ' '})
         self.assertEqual(coverage, 0.0)
 
+        
+    def test_segment_by_table_runs(self):
+        """Тест: границы участков совпадают со сменой таблицы"""
+        data = b"AB" + bytes([0xA1, 0xA2]) + b"\x00" + b"C"
+        segment = MultiCharmapSegment(data, 0)
+        segment.add_table(CharTable("ASCII", {i: chr(i) for i in range(0x41, 0x44)}))
+        segment.add_table(CharTable("Kana", {0xA1: 'ア', 0xA2: 'イ'}))
+        
+        self.assertEqual(segment.segment_by_table(),
+                         [(0, 2, 0), (2, 4, 1), (4, 5, -1), (5, 6, 0)])
+        self.assertEqual(segment.full_decode(),
+                         [("AB", 0), ("アイ", 1), ("[00]", -1), ("C", 0)])
+        
+    def test_first_table_wins(self):
+        """Тест: байт из нескольких таблиц относится к первой из них"""
+        segment = MultiCharmapSegment(b"AA", 0)
+        segment.add_table(CharTable("First", {0x41: 'a'}))
+        segment.add_table(CharTable("Second", {0x41: 'b'}))
+        segment.build_encoding_map()
+        
+        self.assertEqual(segment.encoding_map, {0x41: 0})
+        self.assertEqual(segment.decode_with_fallback(0, 2), "aa")
+        self.assertEqual(segment.decode_segment(0, 2, 1), "bb")
+        
+    def test_lookup_rebuilt_after_add_table(self):
+        """Тест: карта байт -> таблица перестраивается при изменении набора таблиц"""
+        segment = MultiCharmapSegment(b"AZ", 0)
+        segment.add_table(CharTable("A", {0x41: 'A'}))
+        self.assertEqual(segment.decode_with_fallback(0, 2), "A[5A]")
+        
+        segment.add_table(CharTable("Z", {0x5A: 'Z'}))
+        self.assertEqual(segment.decode_with_fallback(0, 2), "AZ")
+        
+    def test_multichar_entries(self):
+        """Тест: многосимвольные значения таблицы не сбивают смещения участков"""
+        data = bytes([0x01, 0x02, 0x41, 0x01])
+        segment = MultiCharmapSegment(data, 0)
+        segment.add_table(CharTable("DTE", {0x01: 'the ', 0x02: ''}))
+        segment.add_table(CharTable("ASCII", {0x41: 'A'}))
+        
+        self.assertEqual(segment.full_decode(), [("the ", 0), ("A", 1), ("the ", 0)])
+        
+    def test_no_tables(self):
+        """Тест декодирования без таблиц"""
+        segment = MultiCharmapSegment(b"\x01\x02", 0)
+        self.assertEqual(segment.full_decode(), [("[01][02]", -1)])
+        
+    def test_large_segment(self):
+        """Тест разбиения большого сегмента (целый банк)"""
+        data = (b"Hello" + bytes([0xA1, 0xA2, 0xA3])) * 0x2000
+        segment = MultiCharmapSegment(data, 0)
+        segment.add_table(CharTable("ASCII", {i: chr(i) for i in range(0x20, 0x7F)}))
+        segment.add_table(CharTable("Kana", {i: chr(0xFF61 + i - 0xA1) for i in range(0xA1, 0xE0)}))
+        
+        parts = segment.full_decode()
+        self.assertEqual(len(parts), 0x4000)
+        self.assertEqual(parts[0], ("Hello", 0))
+        self.assertEqual(parts[1], ("｡｢｣", 1))
+
 
 class TestAnalyzeCustomEncoding(unittest.TestCase):
     """Тесты для функции анализа кодировки"""
@@ -206,6 +266,31 @@ class TestSjisDetection(unittest.TestCase):
         """Тест пустых данных"""
         pairs = _detect_sjis_sequences(b"")
         self.assertEqual(len(pairs), 0)
+        
+    def test_decodes_hiragana(self):
+        """Тест декодирования пар хираганы"""
+        pairs = _detect_sjis_sequences("あいあ".encode('shift-jis'))
+        self.assertEqual(pairs[0x82A0], 'あ')
+        self.assertEqual(pairs[0x82A2], 'い')
+        
+    def test_count_sjis_pairs(self):
+        """Тест подсчёта частот пар Shift-JIS"""
+        data = "あいあ".encode('shift-jis') + b"ABC"
+        counts = count_sjis_pairs(data)
+        self.assertEqual(counts[0x82A0], 2)
+        self.assertEqual(counts[0x82A2], 1)
+        # Пары проверяются на каждой позиции, включая перекрывающиеся
+        self.assertEqual(set(counts), set(_detect_sjis_sequences(data)))
+        
+    def test_count_sjis_pairs_short_data(self):
+        """Тест подсчёта для данных короче пары"""
+        self.assertEqual(count_sjis_pairs(b""), {})
+        self.assertEqual(count_sjis_pairs(b"\x82"), {})
+        
+    def test_analyze_returns_pair_counts(self):
+        """Тест: analyze_custom_encoding возвращает частоты пар"""
+        result = analyze_custom_encoding("ああ".encode('shift-jis'))
+        self.assertEqual(result['sjis_pair_counts'][0x82A0], 2)
 
 
 class TestEncodingDetector(unittest.TestCase):
@@ -299,5 +384,68 @@ class TestDetectPossibleCharmaps(unittest.TestCase):
         self.assertIsInstance(tables, list)
 
 
+
+class TestHistogramCoverage(unittest.TestCase):
+    """Тесты для гистограммы байтов и масок покрытия"""
+    
+    def test_byte_histogram(self):
+        """Тест гистограммы байтов"""
+        histogram = byte_histogram(b"AAB\x00")
+        self.assertEqual(len(histogram), 256)
+        self.assertEqual(histogram[0x41], 2)
+        self.assertEqual(histogram[0x42], 1)
+        self.assertEqual(histogram[0x00], 1)
+        self.assertEqual(histogram.sum(), 4)
+        
+    def test_coverage_mask_ignores_multibyte_codes(self):
+        """Тест: многобайтовые коды не попадают в маску"""
+        mask = coverage_mask({0x41: 'A', 0x8140: ' ', 0xFF: '!'})
+        self.assertEqual(int(mask.sum()), 2)
+        self.assertTrue(mask[0x41])
+        self.assertTrue(mask[0xFF])
+        
+    def test_coverage_scores(self):
+        """Тест: покрытие нескольких таблиц за одно скалярное произведение"""
+        data = b"Hello \xA1\xA2"
+        masks = [coverage_mask({b: chr(b) for b in range(0x20, 0x7F)}),
+                 coverage_mask({0xA1: 'a', 0xA2: 'i'}),
+                 coverage_mask({})]
+        scores = coverage_scores(byte_histogram(data), masks)
+        self.assertAlmostEqual(scores[0], 6 / 8)
+        self.assertAlmostEqual(scores[1], 2 / 8)
+        self.assertEqual(scores[2], 0.0)
+        
+    def test_coverage_scores_empty_data(self):
+        """Тест покрытия для пустых данных"""
+        scores = coverage_scores(byte_histogram(b""), [coverage_mask({0x20: ' '})])
+        self.assertEqual(list(scores), [0.0])
+        
+    def test_segment_coverage_matches_direct_count(self):
+        """Тест: покрытие по гистограмме совпадает с прямым подсчётом"""
+        data = bytes(range(256)) * 3 + b"text"
+        char_map = {b: chr(b) for b in range(0x30, 0x90)}
+        segment = MultiCharmapSegment(data, 0)
+        expected = sum(1 for b in data if b in char_map) / len(data)
+        self.assertAlmostEqual(segment._calculate_coverage(char_map), expected)
+        
+    def test_detect_encoding_picks_best_table(self):
+        """Тест выбора таблицы с наибольшим покрытием"""
+        detector = EncodingDetector()
+        detector.learn_encoding("Katakana", b"\xA1\xA2", {0xA1: 'a', 0xA2: 'i'})
+        detector.learn_encoding("ASCII", b"abc", {b: chr(b) for b in range(0x20, 0x7F)})
+        encoding, confidence = detector.detect_encoding(b"abc \xA1")
+        self.assertEqual(encoding, "ASCII")
+        self.assertAlmostEqual(confidence, 4 / 5)
+        
+    def test_auto_detect_charmap_most_common_order(self):
+        """Тест: из 100 самых частых байтов берутся частые не-ASCII байты"""
+        # 150 различных байтов, из них часто встречаются только 0x80 и 0x81
+        data = bytes(range(0x00, 0x96)) + b"\x80" * 5 + b"\x81" * 3
+        charmap = EncodingDetector()._auto_detect_charmap(data)
+        self.assertIn(0x80, charmap)
+        self.assertIn(0x81, charmap)
+        self.assertNotIn(0x82, charmap)
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -3,12 +3,15 @@
 API для создания плагинов
 """
 
+import threading
+import time
 import unittest
 from core.plugin_api import (
     PluginState, HookType, PluginInfo, HookContext,
     ExtendedGamePlugin, PluginFactory, register_plugin,
     HookManager, get_hook_manager
 )
+from core.tracing import Tracer, get_tracer, use_tracer
 
 
 class TestHookType(unittest.TestCase):
@@ -367,5 +370,137 @@ class TestExtendedGamePlugin(unittest.TestCase):
         self.assertEqual(self.plugin.get_config('missing', 'default'), 'default')
 
 
+class TestHookProfiling(unittest.TestCase):
+    """Тесты статистики, бюджетов и параллельного выполнения хуков"""
+
+    def setUp(self):
+        self.manager = HookManager(max_workers=4)
+        self.context = HookContext(None, HookType.SEGMENT_DECODE, {})
+
+    def tearDown(self):
+        self.manager.shutdown()
+
+    def test_stats_collected(self):
+        """Тест: для каждого callback-а считаются вызовы, ошибки и время"""
+        def ok(ctx):
+            return 'ok'
+
+        def bad(ctx):
+            raise ValueError("boom")
+
+        self.manager.register(HookType.SEGMENT_DECODE, ok)
+        self.manager.register(HookType.SEGMENT_DECODE, bad)
+        for _ in range(3):
+            self.manager.trigger(HookType.SEGMENT_DECODE, self.context)
+
+        stats = {s['name'].rsplit('.', 1)[-1]: s for s in self.manager.get_stats(HookType.SEGMENT_DECODE)}
+        self.assertEqual(stats['ok']['calls'], 3)
+        self.assertEqual(stats['ok']['errors'], 0)
+        self.assertEqual(stats['bad']['errors'], 3)
+        self.assertGreaterEqual(stats['ok']['max_ms'], stats['ok']['avg_ms'])
+        self.assertEqual(self.manager.get_stats(HookType.ROM_LOADED), [])
+
+        self.manager.reset_stats()
+        self.assertEqual(self.manager.get_stats(), [])
+
+    def test_budget_auto_disable(self):
+        """Тест: callback, превышающий бюджет, отключается после max_violations"""
+        calls = []
+
+        def slow(ctx):
+            calls.append(1)
+            time.sleep(0.01)
+
+        self.manager.register(HookType.SEGMENT_DECODE, slow)
+        self.manager.set_budget(HookType.SEGMENT_DECODE, 0.001, auto_disable=True, max_violations=2)
+        with self.assertLogs('gb2text.plugin_api', level='WARNING') as logs:
+            for _ in range(4):
+                self.manager.trigger(HookType.SEGMENT_DECODE, self.context)
+
+        self.assertEqual(len(calls), 2)
+        self.assertTrue(self.manager.is_disabled(HookType.SEGMENT_DECODE, slow))
+        self.assertTrue(any('отключён' in line for line in logs.output))
+        stats = self.manager.get_stats(HookType.SEGMENT_DECODE)[0]
+        self.assertEqual((stats['over_budget'], stats['disabled']), (2, True))
+
+        self.manager.enable(HookType.SEGMENT_DECODE, slow)
+        self.manager.set_budget(HookType.SEGMENT_DECODE, None)
+        self.manager.trigger(HookType.SEGMENT_DECODE, self.context)
+        self.assertEqual(len(calls), 3)
+
+    def test_budget_without_auto_disable(self):
+        """Тест: без auto_disable превышение только логируется"""
+        def slow(ctx):
+            time.sleep(0.005)
+
+        self.manager.register(HookType.SEGMENT_DECODE, slow)
+        self.manager.set_budget(HookType.SEGMENT_DECODE, 0.001)
+        with self.assertLogs('gb2text.plugin_api', level='WARNING'):
+            for _ in range(5):
+                self.manager.trigger(HookType.SEGMENT_DECODE, self.context)
+        self.assertFalse(self.manager.is_disabled(HookType.SEGMENT_DECODE, slow))
+
+    def test_concurrent_hooks_run_in_parallel(self):
+        """Тест: concurrent-хуки выполняются параллельно, результаты - в порядке приоритета"""
+        barrier = threading.Barrier(3, timeout=5)
+
+        def make(value):
+            def callback(ctx):
+                barrier.wait()  # Прошли только если все три выполняются одновременно
+                return value
+            return callback
+
+        for priority in (1, 3, 2):
+            self.manager.register(HookType.SEGMENT_DECODE, make(priority), priority=priority,
+                                  concurrent=True)
+        results = self.manager.trigger(HookType.SEGMENT_DECODE, self.context)
+        self.assertEqual(results, [3, 2, 1])
+
+    def test_sequential_hook_is_barrier(self):
+        """Тест: обычный хук ждёт завершения предыдущих concurrent-хуков"""
+        order = []
+
+        def early(ctx):
+            time.sleep(0.01)
+            order.append('early')
+
+        def barrier(ctx):
+            order.append('barrier')
+            return 'barrier'
+
+        def late(ctx):
+            order.append('late')
+            return 'late'
+
+        self.manager.register(HookType.SEGMENT_DECODE, early, priority=3, concurrent=True)
+        self.manager.register(HookType.SEGMENT_DECODE, barrier, priority=2)
+        self.manager.register(HookType.SEGMENT_DECODE, late, priority=1, concurrent=True)
+        results = self.manager.trigger(HookType.SEGMENT_DECODE, self.context)
+
+        self.assertEqual(order, ['early', 'barrier', 'late'])
+        self.assertEqual(results, ['barrier', 'late'])
+
+    def test_concurrent_hooks_traced(self):
+        """Тест: concurrent-хуки в пуле потоков видят трассировщик вызывающего и пишут span-ы"""
+        tracer = Tracer()
+        seen = []
+
+        def make(value):
+            def callback(ctx):
+                seen.append(get_tracer())
+                return value
+            return callback
+
+        for priority in (2, 1):
+            self.manager.register(HookType.SEGMENT_DECODE, make(priority), priority=priority,
+                                  concurrent=True)
+        with use_tracer(tracer):
+            results = self.manager.trigger(HookType.SEGMENT_DECODE, self.context)
+
+        self.assertEqual(results, [2, 1])
+        self.assertEqual(seen, [tracer, tracer])
+        self.assertEqual(len(tracer.spans('hook.segment_decode')), 2)
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
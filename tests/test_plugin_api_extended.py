@@ -90,6 +90,48 @@ class TestROMContext(unittest.TestCase):
         value = self.context.get_custom_data('missing')
         self.assertIsNone(value)
 
+    def test_get_segment_index_tracks_list(self):
+        """Тест: индекс по имени следует за заменой и расширением списка сегментов"""
+        self.context.segments.append({'name': 'dialogue', 'start': 0, 'end': 1})
+        self.assertEqual(self.context.get_segment('dialogue')['start'], 0x4000)
+
+        self.context.segments.append({'name': 'items', 'start': 0, 'end': 5})
+        self.assertEqual(self.context.get_segment('items')['end'], 5)
+
+        self.context.segments = [{'name': 'names', 'start': 6, 'end': 11}]
+        self.assertIsNone(self.context.get_segment('menu'))
+        self.assertEqual(self.context.get_segment('names')['start'], 6)
+
+    def test_get_segment_view_zero_copy(self):
+        """Тест: get_segment_view возвращает memoryview над rom_data"""
+        rom_data = bytearray(b"Hello World! This is test data.")
+        context = ROMContext(rom_data, {}, [{'name': 'world', 'start': 6, 'end': 11}])
+        view = context.get_segment_view('world')
+        self.assertIsInstance(view, memoryview)
+        self.assertEqual(view, b"World")
+        rom_data[6] = ord('w')
+        self.assertEqual(bytes(view), b"world")
+        self.assertIsNone(context.get_segment_view('missing'))
+
+    def test_get_unpacked_data_cached(self):
+        """Тест: сжатый сегмент распаковывается один раз"""
+        calls = []
+
+        class Handler:
+            def decompress(self, data, start):
+                calls.append(bytes(data))
+                return bytes(data[start:]) * 2, len(data)
+
+        context = ROMContext(b"..abc..", {}, [
+            {'name': 'packed', 'start': 2, 'end': 5, 'compression': Handler()},
+            {'name': 'plain', 'start': 0, 'end': 2},
+        ])
+        self.assertEqual(context.get_unpacked_data('packed'), b"abcabc")
+        self.assertIs(context.get_unpacked_data('packed'), context.get_unpacked_data('packed'))
+        self.assertEqual(calls, [b"abc"])
+        self.assertEqual(context.get_unpacked_data('plain'), b"..")
+        self.assertIsNone(context.get_unpacked_data('missing'))
+
 
 class TestHookManagerPriority(unittest.TestCase):
     """Дополнительные тесты HookManager"""
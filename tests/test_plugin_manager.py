@@ -735,12 +735,12 @@ class TestPluginManager:
             assert len(pm.plugins) >= 1
 
     def test_load_config_plugins_max_limit(self):
-        """Тест лимита конфигов"""
+        """Тест: число конфигов не ограничено"""
         import tempfile
         with tempfile.TemporaryDirectory() as tmpdir:
             config_dir = os.path.join(tmpdir, "plugins", "config")
             os.makedirs(config_dir)
-            # Создаём 25 конфигов (больше лимита 20)
+            # Создаём 25 конфигов (больше прежнего лимита 20)
             for i in range(25):
                 config = {
                     "game_id_pattern": f"TEST{i}",
@@ -749,7 +749,8 @@ class TestPluginManager:
                 with open(os.path.join(config_dir, f"test{i}.json"), 'w') as f:
                     json.dump(config, f)
             pm = PluginManager(os.path.join(tmpdir, "plugins"))
-            pm._load_config_plugins()
+            patterns = {getattr(p, 'game_id_pattern', None) for p in pm.plugins}
+            assert {f"TEST{i}" for i in range(25)} <= patterns
 
     def test_load_config_plugins_invalid_json(self):
         """Тест с невалидным JSON"""
@@ -869,3 +870,197 @@ class TestPluginManager:
         except (TypeError, AttributeError):
             result = True  # Ожидаемое поведение при None
         assert isinstance(result, bool)
+
+
+class PatternPlugin:
+    """Плагин только с шаблоном game_id"""
+
+    def __init__(self, pattern):
+        self.game_id_pattern = pattern
+
+    def get_text_segments(self, rom):
+        return []
+
+
+class TestPluginMatcher:
+    """Тесты индекса шаблонов плагинов"""
+
+    def naive_match(self, patterns, game_id):
+        """Последовательный перебор, как до индекса"""
+        import re
+        for i, pattern in enumerate(patterns):
+            try:
+                if re.match(pattern, game_id):
+                    return i
+            except re.error:
+                pass
+        return None
+
+    def test_matches_sequential_order(self):
+        """Тест: индекс находит тот же плагин, что и последовательный перебор"""
+        from core.plugin_manager import PluginMatcher
+        patterns = [
+            '^TITLE_A$', 'TITLE', '^GAME_[0-9A-F]{2}$', r'^(a)\1$', '(?P<x>Q)', '(?i)home',
+            '[', r'^DOT\.$', '^TITLE_A$', 'TITLE_B$', '^.*$',
+        ]
+        matcher = PluginMatcher([PatternPlugin(p) for p in patterns])
+        assert matcher.exact == {'TITLE_A': 0, 'DOT.': 7, 'TITLE_B': 9}
+
+        for game_id in ['TITLE_A', 'TITLE_B', 'TITLE', 'GAME_1B', 'aa', 'Q', 'HOMEBREW',
+                        'DOT.', 'DOTX', 'TITLE_A\n', 'other', '']:
+            assert matcher.match(game_id) == self.naive_match(patterns, game_id), game_id
+
+    def test_literal_index_priority(self):
+        """Тест: точный литерал позже в списке не обгоняет более ранний общий шаблон"""
+        from core.plugin_manager import PluginMatcher
+        matcher = PluginMatcher([PatternPlugin('^GAME_.*$'), PatternPlugin('^GAME_01$')])
+        assert matcher.match('GAME_01') == 0
+
+    def test_get_plugin_memoized(self):
+        """Тест: результат запоминается и сбрасывается при изменении списка плагинов"""
+        pm = PluginManager("plugins")
+        pm.plugins = [PatternPlugin('^TITLE_A$')]
+        first = pm.plugins[0]
+        assert pm.get_plugin('TITLE_A', 'gb') is first
+        assert pm.get_plugin('TITLE_A', 'gb') is first
+        assert pm.get_plugin('OTHER', 'gbc') is pm.get_plugin('OTHER', 'gbc')
+
+        pm.plugins.insert(0, PatternPlugin('^TITLE_.*$'))
+        assert pm.get_plugin('TITLE_A', 'gb') is pm.plugins[0]
+
+    def test_no_progress_for_fast_lookup(self):
+        """Тест: быстрый поиск не дёргает цикл событий GUI"""
+        pm = PluginManager("plugins")
+        statuses = []
+        pm.update_status = lambda msg, progress: statuses.append(progress)
+
+        class MockI18n:
+            def t(self, key):
+                return key
+
+        class MockRoot:
+            calls = 0
+
+            def update_idletasks(self):
+                MockRoot.calls += 1
+
+        pm.i18n = MockI18n()
+        pm.root = MockRoot()
+        pm.plugins.extend(PatternPlugin(f'^TITLE_{i}$') for i in range(200))
+        pm.get_plugin('TITLE_150', 'gb')
+        assert MockRoot.calls == 0
+        assert statuses == [95]
+
+
+class TestPluginManifest:
+    """Тесты кэша обнаружения плагинов"""
+
+    def write_config(self, config_dir, name, pattern):
+        path = os.path.join(config_dir, name)
+        with open(path, 'w') as f:
+            json.dump({"game_id_pattern": pattern,
+                       "segments": [{"name": "main", "start": 0, "end": 100}]}, f)
+        return path
+
+    def test_configs_lazy_from_manifest(self, tmp_path, monkeypatch):
+        """Тест: при неизменных конфигах они не читаются, плагин создаётся при совпадении"""
+        from core.plugin_manager import LazyPlugin
+        config_dir = tmp_path / "plugins" / "config"
+        config_dir.mkdir(parents=True)
+        for i in range(3):
+            self.write_config(config_dir, f"game{i}.json", f"^GAME{i}$")
+        with open(config_dir / "broken.json", 'w') as f:
+            f.write("not valid json")
+
+        PluginManager(str(tmp_path / "plugins"))
+        assert (tmp_path / "plugins" / ".manifest.json").exists()
+
+        import core.plugin_manager as plugin_manager
+        loads = []
+        real_load = plugin_manager.json.load
+        monkeypatch.setattr(plugin_manager.json, 'load', lambda f: loads.append(f.name) or real_load(f))
+
+        pm = PluginManager(str(tmp_path / "plugins"))
+        lazy = [p for p in pm.plugins if isinstance(p, LazyPlugin)]
+        assert [p.game_id_pattern for p in lazy] == ["^GAME0$", "^GAME1$", "^GAME2$"]
+        assert not any(name.endswith(('game0.json', 'broken.json')) for name in loads)
+
+        pm.plugins = lazy
+        plugin = pm.get_plugin("GAME1", "gb")
+        assert isinstance(plugin, ConfigurablePlugin)
+        assert plugin.config["segments"][0]["name"] == "main"
+        assert [name for name in loads if os.path.dirname(name) == str(config_dir)] == [str(config_dir / "game1.json")]
+
+    def test_changed_config_invalidates_entry(self, tmp_path):
+        """Тест: изменённый конфиг перечитывается, touch без изменений - нет"""
+        from core.plugin_manager import LazyPlugin
+        config_dir = tmp_path / "plugins" / "config"
+        config_dir.mkdir(parents=True)
+        path = self.write_config(config_dir, "game.json", "^OLD$")
+        PluginManager(str(tmp_path / "plugins"))
+
+        os.utime(path, (1, 1))
+        pm = PluginManager(str(tmp_path / "plugins"))
+        pm.plugins = [p for p in pm.plugins if isinstance(p, LazyPlugin)]
+        assert pm.get_plugin("OLD", "gb").game_id_pattern == "^OLD$"
+
+        self.write_config(config_dir, "game.json", "^NEW_ID$")
+        pm = PluginManager(str(tmp_path / "plugins"))
+        pm.plugins = [p for p in pm.plugins if isinstance(p, ConfigurablePlugin)]
+        assert pm.get_plugin("NEW_ID", "gb").game_id_pattern == "^NEW_ID$"
+        assert pm.get_plugin("OLD", "gb").__class__.__name__ == "GenericGBPlugin"
+
+    def test_frozen_build_manifest_in_user_cache(self, tmp_path, monkeypatch):
+        """Тест: в сборке PyInstaller манифест пишется не во временный каталог _MEIPASS"""
+        from core.plugin_manager import LazyPlugin
+        config_dir = tmp_path / "meipass" / "plugins" / "config"
+        config_dir.mkdir(parents=True)
+        self.write_config(config_dir, "game.json", "^FROZEN$")
+        monkeypatch.setattr(sys, 'frozen', True, raising=False)
+        monkeypatch.setattr(sys, '_MEIPASS', str(tmp_path / "meipass"), raising=False)
+        monkeypatch.setenv('GB2TEXT_CACHE_DIR', str(tmp_path / "cache"))
+
+        PluginManager("plugins")
+        assert not (tmp_path / "meipass" / "plugins" / ".manifest.json").exists()
+        assert len(list((tmp_path / "cache").glob("plugins.*.manifest.json"))) == 1
+
+        pm = PluginManager("plugins")
+        assert [p.game_id_pattern for p in pm.plugins if isinstance(p, LazyPlugin)] == ["^FROZEN$"]
+
+        # Другой каталог плагинов получает собственный манифест
+        other_dir = tmp_path / "other" / "plugins" / "config"
+        other_dir.mkdir(parents=True)
+        self.write_config(other_dir, "game.json", "^OTHER$")
+        monkeypatch.setattr(sys, '_MEIPASS', str(tmp_path / "other"), raising=False)
+        pm = PluginManager("plugins")
+        assert [p.game_id_pattern for p in pm.plugins if isinstance(p, LazyPlugin)] == []
+        assert len(list((tmp_path / "cache").glob("plugins.*.manifest.json"))) == 2
+        pm = PluginManager("plugins")
+        assert [p.game_id_pattern for p in pm.plugins if isinstance(p, LazyPlugin)] == ["^OTHER$"]
+
+    def test_python_plugins_lazy_from_manifest(self):
+        """Тест: Python-плагины из манифеста импортируются при совпадении шаблона"""
+        from core.plugin_manager import LazyPlugin
+        PluginManager("plugins")
+        pm = PluginManager("plugins")
+        lazy = [p for p in pm.plugins if isinstance(p, LazyPlugin)]
+        assert {p.plugin_name for p in lazy} >= {"GenericGBPlugin", "AutoDetectPlugin"}
+
+        pm.plugins = [p for p in lazy if p.plugin_name != "AutoDetectPlugin"]
+        plugin = pm.get_plugin("GAME_1B", "gb")
+        assert not isinstance(plugin, LazyPlugin)
+        assert plugin.__class__.__name__ in {"GenericGBAPlugin", "GenericGBCPlugin", "GenericGBPlugin"}
+
+    def test_broken_lazy_plugin_skipped(self, tmp_path):
+        """Тест: если плагин из манифеста не загрузился, поиск продолжается"""
+        from core.plugin_manager import LazyPlugin
+
+        def fail():
+            raise ImportError("gone")
+
+        pm = PluginManager(str(tmp_path / "plugins"), use_manifest=False)
+        fallback = PatternPlugin('^TITLE.*$')
+        pm.plugins = [LazyPlugin('^TITLE_A$', 'Broken', fail), fallback]
+        assert pm.get_plugin('TITLE_A', 'gb') is fallback
+        assert pm.plugins == [fallback]
+        assert not (tmp_path / "plugins" / ".manifest.json").exists()
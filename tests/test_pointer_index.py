@@ -0,0 +1,149 @@
+"""
+Тесты обратного индекса указателей (core/pointer_index.py)
+"""
+
+from unittest.mock import patch
+
+import pytest
+
+from core.pointer_index import (
+    PointerIndex, clear_pointer_indexes, encode_pointer, get_pointer_index,
+)
+from core.rom import GameBoyROM
+from core.scan_cache import ScanCache
+
+# Сообщения банка 1 (16-битная таблица) и банка 2 (таблица дальних указателей)
+BANK1_MESSAGES = [b'HELLO THERE FRIEND', b'SECOND MESSAGE HERE', b'THIRD ONE IS LAST']
+BANK2_MESSAGES = [b'FAR AWAY MESSAGE ONE', b'FAR AWAY MESSAGE TWO', b'FAR AWAY MESSAGE END']
+
+
+def write_messages(data, start, messages):
+    offsets = []
+    for message in messages:
+        offsets.append(start)
+        data[start:start + len(message) + 1] = message + b'\x00'
+        start += len(message) + 1
+    return offsets
+
+
+def build_gb_rom():
+    """ROM MBC5 на 4 банка: 16-битная таблица в банке 1 и дальние указатели в банке 0"""
+    data = bytearray(b'\xC9' * 0x10000)
+    data[0x134:0x144] = b'POINTERS'.ljust(16, b'\x00')
+    data[0x147] = 0x19
+    data[0x148] = 0x01
+    bank1 = write_messages(data, 0x5000, BANK1_MESSAGES)
+    bank2 = write_messages(data, 0x9000, BANK2_MESSAGES)
+    for i, offset in enumerate(bank1):
+        data[0x4100 + 2 * i:0x4102 + 2 * i] = offset.to_bytes(2, 'little')
+    for i, offset in enumerate(bank2):
+        address = 0x4000 + offset % 0x4000
+        data[0x0200 + 3 * i:0x0203 + 3 * i] = bytes([2, address & 0xFF, address >> 8])
+    return bytes(data), bank1, bank2
+
+
+@pytest.fixture
+def gb_rom(tmp_path):
+    data, bank1, bank2 = build_gb_rom()
+    path = tmp_path / 'pointers.gb'
+    path.write_bytes(data)
+    return GameBoyROM(str(path)), bank1, bank2
+
+
+class TestPointerIndex:
+    """Запросы к обратному индексу"""
+
+    def test_references_across_formats(self, gb_rom):
+        """Тест: 16-битные и дальние указатели находятся по смещению текста"""
+        rom, bank1, bank2 = gb_rom
+        index = get_pointer_index(rom)
+        assert index.references(bank1[1]) == [(0x4102, 'banked16')]
+        assert index.references(bank2[2]) == [(0x0206, 'far_bank_lo_hi')]
+        assert index.is_referenced(bank1[0])
+        assert not index.is_referenced(bank1[0] + 1)
+
+    def test_range_queries(self, gb_rom):
+        """Тест: ссылки на диапазон упорядочены по смещению текста"""
+        rom, bank1, bank2 = gb_rom
+        index = get_pointer_index(rom)
+        # Байты таблицы дальних указателей в банке 0 тоже читаются как 16-битный адрес - отбрасываем
+        assert [(t, s) for t, s, _ in index.in_range(0x5000, 0x5100) if s >= 0x4000] == [
+            (offset, 0x4100 + 2 * i) for i, offset in enumerate(bank1)]
+        assert index.count_in_range(bank2[0], bank2[-1] + 1) == 3
+        assert index.count_in_range(0x6000, 0x7000) == 0
+
+    def test_stray_words_are_not_confirmed(self, tmp_path):
+        """Тест: одиночные совпадения (в том числе по нечётному адресу) не считаются записями таблиц"""
+        data, bank1, _ = build_gb_rom()
+        data = bytearray(data)
+        data[0x4301:0x4303] = bank1[1].to_bytes(2, 'little')
+        data[0x4400:0x4402] = bank1[1].to_bytes(2, 'little')
+        path = tmp_path / 'stray.gb'
+        path.write_bytes(bytes(data))
+        index = get_pointer_index(GameBoyROM(str(path)))
+        assert [slot for slot, _ in index.references(bank1[1])] == [0x4102, 0x4301, 0x4400]
+        assert index.unvalidated_references(bank1[1]) == [(0x4301, 'banked16'), (0x4400, 'banked16')]
+        assert index.unvalidated_references(bank1[2]) == []
+        with pytest.raises(ValueError):
+            index.pointer_writes(bank1[1], bank1[1] + 4)
+
+    def test_duplicate_slot_keeps_first_format(self):
+        """Тест: запись, найденная несколькими сканерами, учитывается один раз"""
+        index = PointerIndex.from_pointers({
+            'banked16': [(0x10, 0x5000)],
+            'split16': [(0x10, 0x5000), (0x20, 0x5000)],
+        })
+        assert index.references(0x5000) == [(0x10, 'banked16'), (0x20, 'split16')]
+
+    def test_memory_and_disk_cache(self, gb_rom, tmp_path):
+        """Тест: индекс строится один раз и загружается из кэша сканирования"""
+        rom, bank1, _ = gb_rom
+        cache = ScanCache(str(tmp_path / 'cache'))
+        index = get_pointer_index(rom, cache)
+        assert get_pointer_index(rom, cache) is index
+
+        clear_pointer_indexes()
+        with patch.object(PointerIndex, 'build', side_effect=AssertionError('rebuilt')):
+            loaded = get_pointer_index(rom, cache)
+        assert loaded is not index
+        assert loaded.references(bank1[2]) == index.references(bank1[2])
+
+    def test_gba_pointers(self, tmp_path):
+        """Тест: 32-битные указатели GBA"""
+        data = bytearray(0x20000)
+        data[0xAC:0xB0] = b'TEST'
+        data[0xB2] = 0x96
+        data[0x10000:0x10020] = b'GBA MESSAGE TEXT FOR THE INDEX\x00\x00'
+        data[0x100:0x104] = (0x08010000).to_bytes(4, 'little')
+        path = tmp_path / 'pointers.gba'
+        path.write_bytes(bytes(data))
+        rom = GameBoyROM(str(path))
+        assert get_pointer_index(rom).references(0x10000) == [(0x100, 'gba32')]
+
+
+class TestEncodePointer:
+    """Кодирование перенаправленных указателей"""
+
+    @pytest.mark.parametrize('kind,expected', [
+        ('banked16', b'\x10\x50'),
+        ('split16', b'\x10\x50'),
+        ('far_bank_lo_hi', b'\x03\x10\x50'),
+        ('far_lo_hi_bank', b'\x10\x50\x03'),
+        ('gba32', (0x08000000 + 0xD010).to_bytes(4, 'little')),
+    ])
+    def test_formats(self, kind, expected):
+        assert encode_pointer(kind, 0xD000, 0xD010) == expected
+
+    def test_16bit_pointer_cannot_leave_bank(self):
+        """Тест: 16-битный указатель нельзя перенаправить в другой банк"""
+        assert encode_pointer('far_bank_lo_hi', 0xD000, 0x10010) == b'\x04\x10\x40'
+        with pytest.raises(ValueError):
+            encode_pointer('banked16', 0xD000, 0x10010)
+        with pytest.raises(ValueError):
+            encode_pointer('far_bank_lo_hi', 0xD000, 0x100)
+
+    def test_pointer_writes(self, gb_rom):
+        """Тест: байты для всех записей, ссылающихся на сообщение"""
+        rom, bank1, _ = gb_rom
+        writes = get_pointer_index(rom).pointer_writes(bank1[1], bank1[1] + 4)
+        assert writes == [(0x4102, (0x4000 + (bank1[1] + 4) % 0x4000).to_bytes(2, 'little'))]
@@ -0,0 +1,137 @@
+"""
+Тесты относительного поиска (core/relative_search.py)
+"""
+
+import pytest
+
+from core import encoding, scanner
+from core.relative_search import (
+    RelativeQuery,
+    RelativeSearch,
+    apply_known_words,
+    get_relative_search,
+    shifts_to_charmap,
+)
+
+# Собственная кодировка: A=0x80, a=0xA0, 0=0x10, пробел=0x7F
+UPPER, LOWER, DIGIT, SPACE = 0x80, 0xA0, 0x10, 0x7F
+
+
+def encode(text):
+    result = bytearray()
+    for char in text:
+        if char.isupper():
+            result.append(UPPER + ord(char) - ord('A'))
+        elif char.islower():
+            result.append(LOWER + ord(char) - ord('a'))
+        elif char.isdigit():
+            result.append(DIGIT + ord(char) - ord('0'))
+        else:
+            result.append(SPACE)
+    return bytes(result)
+
+
+def build_rom():
+    data = bytearray(0x8000)
+    data[0x1000:0x1100] = encode('The Hero entered Castle Town with 20 Gold ').ljust(0x100, b'\x00')
+    data[0x5000:0x5100] = encode('The King gave the Hero a Sword ').ljust(0x100, b'\x00')
+    return bytes(data)
+
+
+class TestRelativeQuery:
+    """Разбор слов запроса"""
+
+    def test_anchor_is_longest_run(self):
+        """Тест: ключ берётся из самой длинной серии символов одного класса"""
+        query = RelativeQuery.parse('Castle')
+        assert query.anchor == 1
+        assert query.anchor_diffs == (18, 1, 0xF8)
+        assert query.classes == ['upper'] + ['lower'] * 5
+
+    def test_short_word_rejected(self):
+        """Тест: слово без трёх символов одного класса подряд не ищется"""
+        with pytest.raises(ValueError):
+            RelativeQuery.parse('Hi')
+        with pytest.raises(ValueError):
+            RelativeQuery.parse('a-b-c')
+
+
+class TestRelativeSearch:
+    """Поиск слов по разностям кодов"""
+
+    def test_finds_words_with_shifts(self):
+        """Тест: все вхождения слов и сдвиги кодов по классам"""
+        engine = RelativeSearch(build_rom())
+        matches = engine.search(['Hero', 'Castle', '20 Gold'])
+        assert [(m.word, m.offset) for m in matches] == [
+            ('Hero', 0x1004), ('Castle', 0x1011), ('20 Gold', 0x1022), ('Hero', 0x5012)]
+        assert matches[0].shifts == {'upper': UPPER - ord('A'), 'lower': (LOWER - ord('a')) & 0xFF}
+        assert matches[2].shifts['digit'] == (DIGIT - ord('0')) & 0xFF
+
+    def test_inconsistent_shift_rejected(self):
+        """Тест: совпадение разностей при разных сдвигах заглавных букв отбрасывается"""
+        data = bytearray(0x100)
+        # Строчные части совпадают, но у N во втором вхождении другой сдвиг, чем у H
+        data[0x10:0x18] = encode('Hero Ned')
+        data[0x20:0x28] = encode('Hero Ned')
+        data[0x25] = 0x10
+        matches = RelativeSearch(bytes(data)).search(['Hero Ned'])
+        assert [m.offset for m in matches] == [0x10]
+
+    def test_single_capital_not_matched_by_lowercase(self):
+        """Тест: 'Hero' не находится в 'hero', хотя заглавная буква в слове одна"""
+        data = bytearray(0x100)
+        data[0x10:0x14] = encode('hero')
+        data[0x20:0x24] = encode('Hero')
+        assert [m.offset for m in RelativeSearch(bytes(data)).search(['Hero'])] == [0x20]
+
+    def test_range_and_limit(self):
+        """Тест: поиск в диапазоне и ограничение числа вхождений на слово"""
+        engine = RelativeSearch(build_rom())
+        assert [m.offset for m in engine.search(['Hero'], start=0x4000)] == [0x5012]
+        assert len(engine.search(['Hero'], max_matches=1)) == 1
+
+    def test_propose_charmap(self):
+        """Тест: таблица символов из найденных слов"""
+        charmap = RelativeSearch(build_rom()).propose_charmap(['King', 'Sword', 'Town', '20 Gold'])
+        assert charmap[UPPER] == 'A' and charmap[LOWER + 25] == 'z' and charmap[DIGIT + 9] == '9'
+        assert ''.join(charmap[b] for b in encode('Hero')) == 'Hero'
+
+    def test_shifts_to_charmap_wraps(self):
+        """Тест: коды берутся по модулю 256"""
+        assert shifts_to_charmap({'lower': 0xFF})[ord('a') - 1] == 'a'
+
+
+class TestKnownWords:
+    """Уточнение автоопределённой таблицы"""
+
+    def test_apply_known_words(self):
+        """Тест: предположения для определённых классов заменяются, остальные сохраняются"""
+        rom = build_rom()
+        charmap = apply_known_words({0x41: 'A', 0x00: '[END]'}, rom, ['Hero', 'Castle'])
+        assert 0x41 not in charmap and charmap[0x00] == '[END]'
+        assert charmap[UPPER + 7] == 'H'
+        assert apply_known_words({0x41: 'A'}, rom, ['Zyxxy']) == {0x41: 'A'}
+
+    def test_unusable_words_skipped(self):
+        """Тест: короткие и нелатинские слова пропускаются, остальные используются"""
+        rom = build_rom()
+        charmap = apply_known_words({0x41: 'A'}, rom, ['Hero', 'Ax', 'Герой', 'ゆうしゃ'])
+        assert charmap[UPPER + 7] == 'H'
+        assert apply_known_words({0x41: 'A'}, rom, ['Ax', 'Герой']) == {0x41: 'A'}
+        assert encoding.auto_detect_charmap(rom, 0x1000, 0x100, known_words=['Ax'])
+        with pytest.raises(ValueError):
+            RelativeSearch(rom).search(['Ax'])
+
+    @pytest.mark.parametrize('detect', [scanner.auto_detect_charmap, encoding.auto_detect_charmap])
+    def test_auto_detect_with_known_words(self, detect):
+        """Тест: auto_detect_charmap из core.scanner и core.encoding принимает известные слова"""
+        rom = build_rom()
+        charmap = detect(rom, 0x1000, 0x100, known_words=['Hero', 'Castle'])
+        assert ''.join(charmap[b] for b in encode('Town')) == 'Town'
+
+    def test_engine_reused_for_same_data(self):
+        """Тест: разности ROM вычисляются один раз для одного объекта данных"""
+        rom = build_rom()
+        assert get_relative_search(rom) is get_relative_search(rom)
+        assert get_relative_search(bytes(bytearray(rom))) is not get_relative_search(rom)
@@ -0,0 +1,81 @@
+"""
+Тесты дискового кэша сканирования (core/scan_cache.py)
+"""
+
+import os
+
+import numpy as np
+
+from core import scan_cache as scan_cache_module
+from core.scan_cache import DEFAULT_CACHE_MAX_MB, ScanCache, default_cache_dir, default_max_size
+
+
+class TestScanCache:
+    """Сохранение и загрузка результатов сканирования"""
+
+    def test_store_and_load(self, tmp_path):
+        """Тест: массивы возвращаются без изменений"""
+        cache = ScanCache(str(tmp_path))
+        arrays = {'targets': np.arange(5, dtype=np.int64), 'kinds': np.zeros(5, dtype=np.uint8)}
+        assert cache.store('abc', 'index', arrays)
+        loaded = cache.load('abc', 'index')
+        assert set(loaded) == {'targets', 'kinds'}
+        assert loaded['targets'].tolist() == [0, 1, 2, 3, 4]
+        assert loaded['kinds'].dtype == np.uint8
+        assert cache.load('abc', 'other') is None
+        assert cache.load(None, 'index') is None
+
+    def test_version_mismatch_and_corruption(self, tmp_path, monkeypatch):
+        """Тест: файлы другой версии и повреждённые файлы игнорируются"""
+        cache = ScanCache(str(tmp_path))
+        cache.store('abc', 'index', {'a': np.zeros(1)})
+        monkeypatch.setattr(scan_cache_module, 'SCAN_CACHE_VERSION', 2)
+        assert cache.load('abc', 'index') is None
+
+        (tmp_path / 'bad.index.npz').write_bytes(b'not a zip')
+        assert cache.load('bad', 'index') is None
+
+    def test_disabled_and_remove(self, tmp_path):
+        """Тест: выключенный кэш ничего не пишет; remove удаляет результаты ROM"""
+        assert not ScanCache(str(tmp_path / 'off'), enabled=False).store('abc', 'index', {'a': np.zeros(1)})
+        assert not (tmp_path / 'off').exists()
+
+        cache = ScanCache(str(tmp_path))
+        cache.store('abc', 'one', {'a': np.zeros(1)})
+        cache.store('abc', 'two', {'a': np.zeros(1)})
+        cache.remove('abc', 'one')
+        assert cache.load('abc', 'one') is None and cache.load('abc', 'two') is not None
+        cache.remove('abc')
+        assert cache.load('abc', 'two') is None
+
+    def test_directory_from_environment(self, tmp_path, monkeypatch):
+        """Тест: каталог по умолчанию задаётся GB2TEXT_CACHE_DIR"""
+        monkeypatch.setenv('GB2TEXT_CACHE_DIR', str(tmp_path / 'env'))
+        assert default_cache_dir() == str(tmp_path / 'env')
+        assert ScanCache().directory == str(tmp_path / 'env')
+
+    def test_size_limit_evicts_least_recently_used(self, tmp_path, monkeypatch):
+        """Тест: при превышении предела удаляются давно не использованные файлы"""
+        cache = ScanCache(str(tmp_path), max_size=0)
+        data = {'a': np.zeros(1000, dtype=np.uint8)}
+        for stamp, name in enumerate(('old', 'used', 'new')):
+            cache.store('abc', name, data)
+            os.utime(cache.path('abc', name), (stamp * 10, stamp * 10))
+        file_size = os.path.getsize(cache.path('abc', 'old'))
+        assert cache.size() == 3 * file_size
+
+        # Чтение обновляет время использования
+        assert cache.load('abc', 'used') is not None
+        assert cache.prune(max_size=2 * file_size) == file_size
+        assert cache.load('abc', 'old') is None and cache.load('abc', 'used') is not None
+
+        # Запись в кэш с пределом вытесняет старые файлы, но не только что записанный
+        limited = ScanCache(str(tmp_path), max_size=file_size)
+        limited.store('abc', 'latest', data)
+        assert os.listdir(tmp_path) == [os.path.basename(limited.path('abc', 'latest'))]
+        assert limited.clear() == file_size and limited.size() == 0
+
+        monkeypatch.setenv('GB2TEXT_CACHE_MAX_MB', '1')
+        assert default_max_size() == ScanCache().max_size == 1024 * 1024
+        monkeypatch.setenv('GB2TEXT_CACHE_MAX_MB', 'many')
+        assert default_max_size() == DEFAULT_CACHE_MAX_MB * 1024 * 1024
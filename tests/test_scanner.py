@@ -2,6 +2,8 @@
 import os
 import sys
 
+import pytest
+
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from core.scanner import (
@@ -10,7 +12,9 @@ from core.scanner import (
     detect_multiple_languages,
     auto_detect_charmap,
     analyze_text_segment,
-    auto_detect_segments
+    auto_detect_segments,
+    CharmapDetectionCache,
+    get_charmap_cache
 )
 
 
@@ -734,3 +738,299 @@ class TestScanner:
         text_data = b'Some text here\x00\x00\x00'
         result = analyze_text_segment(text_data, 0, len(text_data))
         assert isinstance(result, dict)
+
+
+
+class TestCharmapDetectionCache:
+    """Тесты кэша автоопределения таблиц символов"""
+
+    def test_matches_auto_detect_charmap(self):
+        """Тест: кэш возвращает ту же таблицу, что и auto_detect_charmap"""
+        import random
+        rng = random.Random(0)
+        alphabet = b'Hello World \x00\xff' + bytes(range(0xA1, 0xB0))
+        rom_data = bytes(rng.choice(alphabet) for _ in range(20000))
+        cache = CharmapDetectionCache(rom_data)
+        for start in range(0, len(rom_data), 1999):
+            assert cache.get_charmap(start) == auto_detect_charmap(rom_data, start)
+
+    def test_same_profile_shares_decoder(self):
+        """Тест: участки с одинаковой статистикой используют один декодер"""
+        rom_data = b'TEXT\x00' * 2000
+        cache = CharmapDetectionCache(rom_data)
+        first = cache.get_decoder(0)
+        assert cache.get_decoder(500) is first
+        assert cache.misses == 1
+        assert cache.hits == 1
+
+    def test_different_profile_detected_separately(self):
+        """Тест: участки с разной статистикой определяются отдельно"""
+        rom_data = b'TEXT\x00' * 400 + bytes(range(0xA0, 0xE0)) * 40
+        cache = CharmapDetectionCache(rom_data)
+        assert cache.get_decoder(0) is not cache.get_decoder(2000)
+        assert cache.misses == 2
+
+    def test_get_charmap_cache_per_rom(self):
+        """Тест: у каждого объекта ROM свой кэш"""
+        class FakeROM:
+            def __init__(self, data):
+                self.data = data
+
+        rom_a, rom_b = FakeROM(b'A' * 100), FakeROM(b'B' * 100)
+        assert get_charmap_cache(rom_a) is get_charmap_cache(rom_a)
+        assert get_charmap_cache(rom_a) is not get_charmap_cache(rom_b)
+
+        rom_a.data = b'C' * 100
+        assert get_charmap_cache(rom_a).rom_data is rom_a.data
+
+
+class TestBankedPointers:
+    """Тесты поиска указателей с учётом банков"""
+
+    @staticmethod
+    def banked_rom(banks=8):
+        """ROM, где в банках 2 и 5 лежат указатели на текст своего банка"""
+        data = bytearray(b'\xC9' * (banks * 0x4000))
+        for bank in (2, 5):
+            base = bank * 0x4000
+            data[base + 0x1000:base + 0x1040] = b'HELLO TEXT IN BANK ' + bytes([0x30 + bank]) + b' ' * 44
+            data[base:base + 2] = (0x5000).to_bytes(2, 'little')
+        return bytes(data)
+
+    def test_pointers_resolved_in_containing_bank(self):
+        """Тест: указатель 0x5000 разрешается в окно своего банка"""
+        from core.scanner import find_banked_pointers
+        pointers = find_banked_pointers(self.banked_rom(), min_length=20)
+        assert (2 * 0x4000, 2 * 0x4000 + 0x1000) in pointers
+        assert (5 * 0x4000, 5 * 0x4000 + 0x1000) in pointers
+
+    def test_mbc_limits_reachable_banks(self):
+        """Тест: банки, недоступные MBC, отбрасываются"""
+        from core.mbc import MBC2
+        from core.scanner import find_banked_pointers
+        data = self.banked_rom(banks=32)
+        base = 0x10 * 0x4000
+        data = bytearray(data)
+        data[base + 0x1000:base + 0x1040] = b'TEXT BEYOND MBC2 BANK LIMIT' + b' ' * 37
+        data[base:base + 2] = (0x5000).to_bytes(2, 'little')
+        data = bytes(data)
+
+        targets = {t for _, t in find_banked_pointers(data, min_length=20)}
+        assert base + 0x1000 in targets
+        targets = {t for _, t in find_banked_pointers(data, min_length=20, mbc=MBC2(data))}
+        assert base + 0x1000 not in targets
+        assert 5 * 0x4000 + 0x1000 in targets
+
+    def test_text_like_mask_matches_is_text_like(self):
+        """Тест: векторная проверка совпадает с is_text_like"""
+        import numpy as np
+        from core.scanner import text_like_mask
+        rng = np.random.default_rng(0)
+        rom_data = bytes(rng.choice([0x41, 0x20, 0x00, 0xC3, 0x8F], size=5000))
+        starts = list(range(0, 5000, 37)) + [4990, -1]
+        mask = text_like_mask(rom_data, starts, 20)
+        assert list(mask) == [s >= 0 and is_text_like(rom_data, s, 20) for s in starts]
+
+
+class TestFarPointers:
+    """Тесты поиска таблиц дальних указателей (банк + адрес)"""
+
+    # (банк, адрес CPU) трёх сообщений
+    TARGETS = [(3, 0x4100), (3, 0x4200), (6, 0x5800)]
+
+    @classmethod
+    def far_rom(cls, tables, banks=8):
+        """ROM с сообщениями TARGETS и таблицами, записанными функциями tables(data)"""
+        data = bytearray(b'\xC9' * (banks * 0x4000))
+        for i, (bank, address) in enumerate(cls.TARGETS):
+            offset = bank * 0x4000 + address - 0x4000
+            data[offset:offset + 32] = b'FAR MESSAGE NUMBER ' + bytes([0x30 + i]) + b' ' * 11 + b'\x00'
+        tables(data)
+        return bytes(data)
+
+    @classmethod
+    def offsets(cls):
+        return [bank * 0x4000 + address - 0x4000 for bank, address in cls.TARGETS]
+
+    def test_bank_lo_hi_table(self):
+        """Тест: записи банк, младший, старший разрешаются в банк записи"""
+        from core.scanner import find_far_pointers
+
+        def tables(data):
+            for i, (bank, address) in enumerate(self.TARGETS):
+                data[0x1000 + 3 * i:0x1003 + 3 * i] = bytes([bank, address & 0xFF, address >> 8])
+
+        pointers = find_far_pointers(self.far_rom(tables), min_length=20)
+        assert pointers == [(0x1000 + 3 * i, offset) for i, offset in enumerate(self.offsets())]
+
+    def test_lo_hi_bank_table(self):
+        """Тест: раскладка младший, старший, банк"""
+        from core.scanner import find_far_pointers
+
+        def tables(data):
+            for i, (bank, address) in enumerate(self.TARGETS):
+                data[0x2001 + 3 * i:0x2004 + 3 * i] = bytes([address & 0xFF, address >> 8, bank])
+
+        data = self.far_rom(tables)
+        pointers = find_far_pointers(data, layout='lo_hi_bank', min_length=20)
+        assert pointers == [(0x2001 + 3 * i, offset) for i, offset in enumerate(self.offsets())]
+        assert find_far_pointers(data, layout='bank_lo_hi', min_length=20) == []
+        with pytest.raises(ValueError):
+            find_far_pointers(data, layout='hi_lo_bank')
+
+    def test_single_entry_is_not_a_table(self):
+        """Тест: одиночная запись без соседей отбрасывается"""
+        from core.scanner import find_far_pointers
+
+        def tables(data):
+            bank, address = self.TARGETS[0]
+            data[0x1000:0x1003] = bytes([bank, address & 0xFF, address >> 8])
+
+        data = self.far_rom(tables)
+        assert find_far_pointers(data, min_length=20) == []
+        assert find_far_pointers(data, min_length=20, min_entries=1) == [(0x1000, self.offsets()[0])]
+
+    def test_split_tables(self):
+        """Тест: таблица банков перед и после параллельной таблицы адресов"""
+        from core.scanner import find_split_far_pointers
+
+        targets = self.TARGETS + [(6, 0x5800)]
+
+        def tables(data):
+            for i, (bank, address) in enumerate(targets):
+                data[0x3000 + i] = bank
+                data[0x3004 + 2 * i:0x3006 + 2 * i] = address.to_bytes(2, 'little')
+                data[0x3101 + 2 * i:0x3103 + 2 * i] = address.to_bytes(2, 'little')
+                data[0x3109 + i] = bank
+
+        pointers = find_split_far_pointers(self.far_rom(tables), min_length=20)
+        offsets = self.offsets() + [self.offsets()[-1]]
+        expected = [(0x3004 + 2 * i, o) for i, o in enumerate(offsets)]
+        expected += [(0x3101 + 2 * i, o) for i, o in enumerate(offsets)]
+        assert pointers == expected
+
+    def test_mbc_rejects_unreachable_banks(self):
+        """Тест: банк, который MBC не подключает в окно, не даёт указателей"""
+        from core.mbc import MBC1, MBC5
+        from core.scanner import find_gb_far_pointers
+
+        def tables(data):
+            for i in range(3):
+                data[0x1000 + 3 * i:0x1003 + 3 * i] = bytes([0x20, 0x00, 0x40 + i])
+            for i in range(3):
+                offset = 0x20 * 0x4000 + i * 0x100
+                data[offset:offset + 20] = b'TEXT IN BANK 0x20...'
+
+        data = self.far_rom(tables, banks=64)
+        assert [p for p, _ in find_gb_far_pointers(data, min_length=20, mbc=MBC5(data))] == [0x1000, 0x1003, 0x1006]
+        assert find_gb_far_pointers(data, min_length=20, mbc=MBC1(data)) == []
+
+    def test_auto_detect_uses_far_pointers(self):
+        """Тест: AutoDetectPlugin ищет таблицы и среди дальних указателей"""
+        from unittest.mock import patch
+        from plugins.auto_detect import AutoDetectPlugin
+
+        rom = type('ROM', (), {})()
+        rom.system = 'gb'
+        rom.data = self.far_rom(lambda data: None)
+        far = [(0x1000, self.offsets()[2])]
+        with patch('plugins.auto_detect.get_segment_patterns', return_value=[]), \
+                patch('plugins.auto_detect.find_banked_pointers', return_value=[]), \
+                patch('plugins.auto_detect.find_gb_far_pointers', return_value=far) as far_search, \
+                patch('plugins.auto_detect.detect_pointer_tables', return_value=[]) as detect:
+            AutoDetectPlugin().get_text_segments(rom)
+        far_search.assert_called_once()
+        assert detect.call_args[0][1] == far
+        assert detect.call_args[1]['strides'] == (2, 3)
+
+    def test_plugins_resolve_pointers_in_their_bank(self):
+        """Тест: сегменты GB ищутся по 16-битным указателям в окне банка, где лежит таблица"""
+        from unittest.mock import patch
+        from plugins.auto_detect import AutoDetectPlugin
+        from plugins.generic import GenericGBPlugin
+
+        data = bytearray(b'\xC9' * 0x10000)
+        bank = 2
+        window = []
+        position = 0x4200
+        for i in range(12):
+            message = f'MESSAGE NUMBER {i:02d} IN BANK TWO'.encode('ascii')
+            offset = bank * 0x4000 + position - 0x4000
+            data[offset:offset + len(message) + 1] = message + b'\x00'
+            window.append(position)
+            position += len(message) + 1
+        for i, address in enumerate(window):
+            data[bank * 0x4000 + 0x40 + 2 * i:bank * 0x4000 + 0x42 + 2 * i] = address.to_bytes(2, 'little')
+
+        rom = type('ROM', (), {})()
+        rom.system = 'gb'
+        rom.data = bytes(data)
+        text_start = bank * 0x4000 + 0x200
+        with patch('plugins.auto_detect.get_segment_patterns', return_value=[]):
+            segments = AutoDetectPlugin().get_text_segments(rom)
+        assert [s['start'] for s in segments if s['name'].startswith('pointer_segment')] == [text_start]
+        assert [s['start'] for s in GenericGBPlugin().get_text_segments(rom)
+                if s['name'].startswith('banked_segment')] == [text_start]
+
+
+class TestPointerTables:
+    """Тесты определения таблиц указателей"""
+
+    @staticmethod
+    def table_rom(messages, table_at=0x100, text_at=0x4000, stride=2):
+        """ROM с сообщениями подряд и таблицей 2-байтовых указателей на них"""
+        data = bytearray(b'\xC9' * 0x8000)
+        offsets = []
+        position = text_at
+        for message in messages:
+            offsets.append(position)
+            data[position:position + len(message) + 1] = message + b'\x00'
+            position += len(message) + 1
+        for i, offset in enumerate(offsets):
+            data[table_at + stride * i:table_at + stride * i + 2] = offset.to_bytes(2, 'little')
+        return bytes(data), offsets
+
+    def test_table_with_message_bounds(self):
+        """Тест: таблица и границы сообщений до следующего смещения и терминатора"""
+        from core.scanner import detect_pointer_tables
+        data, offsets = self.table_rom([b'FIRST', b'SECOND ONE', b'THIRD'])
+        pointers = [(0x100 + 2 * i, o) for i, o in enumerate(offsets)]
+        tables = detect_pointer_tables(data, pointers)
+        assert len(tables) == 1
+        table = tables[0]
+        assert (table.start, table.end, table.stride) == (0x100, 0x106, 2)
+        assert table.messages == [(0x4000, 0x4006), (0x4006, 0x4011), (0x4011, 0x4017)]
+        assert (table.text_start, table.text_end) == (0x4000, 0x4017)
+
+    def test_breaks_on_gaps_and_decreasing_targets(self):
+        """Тест: пропуск записи или убывание смещения разрывают таблицу"""
+        from core.scanner import detect_pointer_tables
+        data, offsets = self.table_rom([b'MSG %d' % i for i in range(8)])
+        pointers = [(0x100 + 2 * i, o) for i, o in enumerate(offsets)]
+        # Записи 0-2 - таблица, запись 3 отсутствует, 4-7 - вторая таблица
+        del pointers[3]
+        pointers[5] = (pointers[5][0], offsets[0])
+        tables = detect_pointer_tables(data, pointers, min_entries=2)
+        assert [(t.start, len(t.entries)) for t in tables] == [(0x100, 3), (0x108, 2), (0x10C, 2)]
+        # Одиночные кандидаты таблицей не считаются
+        assert detect_pointer_tables(data, pointers[:1] + pointers[3:4]) == []
+
+    def test_repeated_targets_lower_score(self):
+        """Тест: повторяющиеся смещения допустимы, но снижают оценку"""
+        from core.scanner import detect_pointer_tables
+        data, offsets = self.table_rom([b'A MESSAGE', b'B MESSAGE', b'C MESSAGE'])
+        distinct = detect_pointer_tables(data, [(0x100 + 2 * i, o) for i, o in enumerate(offsets)])[0]
+        repeated_targets = [offsets[0], offsets[0], offsets[1]]
+        repeated = detect_pointer_tables(data, [(0x200 + 2 * i, o) for i, o in enumerate(repeated_targets)])[0]
+        assert repeated.score < distinct.score
+        assert repeated.messages[0] == repeated.messages[1] == (offsets[0], offsets[1])
+
+    def test_overlapping_strides_keep_best(self):
+        """Тест: из перекрывающихся таблиц с разным шагом остаётся лучшая"""
+        from core.scanner import detect_pointer_tables
+        data, offsets = self.table_rom([b'MSG %d' % i for i in range(6)], stride=3)
+        pointers = [(0x100 + 3 * i, o) for i, o in enumerate(offsets)]
+        # Ложная серия с шагом 2 из трёх записей поверх таблицы
+        pointers += [(0x101, 0x4000), (0x103, 0x4001), (0x105, 0x4002)]
+        tables = detect_pointer_tables(data, pointers, strides=(2, 3))
+        assert [(t.start, t.stride, len(t.entries)) for t in tables] == [(0x100, 3, 6)]
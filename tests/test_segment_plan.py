@@ -0,0 +1,133 @@
+"""
+Тесты кэша планов сегментов (core/segment_plan.py)
+"""
+
+from types import MappingProxyType
+from unittest.mock import Mock
+
+import pytest
+
+from core.decoder import CharMapDecoder
+from core.plugin_manager import ConfigurablePlugin
+from core.rom import GameBoyROM
+from core.segment_plan import SegmentPlanCache, get_segments, rom_content_hash, segment_plans
+from plugins.auto_detect import AutoDetectPlugin
+from plugins.generic import GenericGBPlugin
+
+
+class CountingPlugin(GenericGBPlugin):
+    """GenericGBPlugin, считающий вызовы get_text_segments"""
+
+    calls = 0
+
+    def get_text_segments(self, rom):
+        CountingPlugin.calls += 1
+        return super().get_text_segments(rom)
+
+
+@pytest.fixture
+def rom_path(tmp_path):
+    data = bytearray(0x8000)
+    data[0x4000:0x4010] = b'HELLO WORLD TEXT'
+    path = tmp_path / 'test.gb'
+    path.write_bytes(bytes(data))
+    return str(path)
+
+
+def make_config():
+    return {
+        "game_id_pattern": "^TEST$",
+        "segments": [{"name": "main", "start": "0x4000", "end": "0x4100",
+                      "charmap": {"0x41": "A", "0x42": "B", "0x00": "[END]"}}],
+    }
+
+
+class TestSegmentPlanCache:
+    """Тесты SegmentPlanCache"""
+
+    def test_plan_shared_between_rom_objects(self, rom_path):
+        """Тест: два объекта ROM с одним содержимым используют один план"""
+        CountingPlugin.calls = 0
+        cache = SegmentPlanCache()
+        first = cache.get_plan(CountingPlugin(), GameBoyROM(rom_path))
+        second = cache.get_plan(CountingPlugin(), GameBoyROM(rom_path))
+
+        assert first is second
+        assert CountingPlugin.calls == 1
+        assert (cache.hits, cache.misses) == (1, 1)
+        assert all(isinstance(segment, MappingProxyType) for segment in first)
+
+    def test_segments_are_copies_with_shared_decoders(self, rom_path):
+        """Тест: сегменты можно менять, декодеры общие"""
+        rom = GameBoyROM(rom_path)
+        plugin = ConfigurablePlugin(make_config())
+        segments = get_segments(plugin, rom)
+        assert isinstance(segments[0]['decoder'], CharMapDecoder)
+
+        segments[0]['decoder'] = None
+        again = get_segments(plugin, rom)
+        assert isinstance(again[0]['decoder'], CharMapDecoder)
+        assert again[0]['decoder'] is get_segments(ConfigurablePlugin(make_config()), rom)[0]['decoder']
+
+    def test_config_change_invalidates(self, rom_path):
+        """Тест: изменение конфигурации даёт новый план"""
+        rom = GameBoyROM(rom_path)
+        plugin = ConfigurablePlugin(make_config())
+        assert get_segments(plugin, rom)[0]['end'] == 0x4100
+
+        plugin.config['segments'][0]['end'] = '0x4200'
+        assert get_segments(plugin, rom)[0]['end'] == 0x4200
+
+    def test_rom_content_change_invalidates(self, rom_path, tmp_path):
+        """Тест: ROM с другим содержимым получает свой план"""
+        rom = GameBoyROM(rom_path)
+        other_data = bytearray(rom.data)
+        other_data[0x5000] = 0x41
+        other_path = tmp_path / 'other.gb'
+        other_path.write_bytes(bytes(other_data))
+        other = GameBoyROM(str(other_path))
+
+        assert rom_content_hash(rom) != rom_content_hash(other)
+        get_segments(AutoDetectPlugin(), rom)
+        get_segments(AutoDetectPlugin(), other)
+        assert segment_plans.misses == 2
+
+    def test_uncacheable_plugins_and_roms(self, rom_path):
+        """Тест: плагины без ключа и ROM без байтовых данных не кэшируются"""
+        plugin = Mock()
+        plugin.segment_plan_key.return_value = None
+        plugin.get_text_segments.return_value = [{'name': 'a', 'start': 0, 'end': 1}]
+        rom = GameBoyROM(rom_path)
+        get_segments(plugin, rom)
+        get_segments(plugin, rom)
+        assert plugin.get_text_segments.call_count == 2
+
+        mock_rom = Mock()
+        mock_rom.data = Mock()
+        assert rom_content_hash(mock_rom) is None
+        assert SegmentPlanCache.key(GenericGBPlugin(), mock_rom) is None
+
+    def test_lru_eviction(self, rom_path):
+        """Тест: при переполнении вытесняется самый старый план"""
+        cache = SegmentPlanCache(max_size=1)
+        rom = GameBoyROM(rom_path)
+        cache.get_plan(GenericGBPlugin(), rom)
+        cache.get_plan(AutoDetectPlugin(), rom)
+        cache.get_plan(GenericGBPlugin(), rom)
+        assert (cache.hits, cache.misses) == (0, 3)
+
+    def test_injector_reuses_extractor_plan(self, rom_path):
+        """Тест: внедрение использует план, построенный при извлечении"""
+        from core.extractor import TextExtractor
+        from core.injector import TextInjector
+
+        CountingPlugin.calls = 0
+        manager = Mock()
+        manager.get_plugin.return_value = CountingPlugin()
+        del manager.update_status
+        results = TextExtractor(rom_path, manager).extract()
+
+        injector = TextInjector(rom_path)
+        for name in results:
+            injector.inject_segment(name, [], manager.get_plugin.return_value)
+        assert CountingPlugin.calls == 1
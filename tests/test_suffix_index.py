@@ -0,0 +1,112 @@
+"""
+Тесты суффиксного индекса (core/suffix_index.py)
+"""
+
+from itertools import pairwise
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from core.rom import GameBoyROM
+from core.scan_cache import ScanCache
+from core.suffix_index import SuffixIndex, clear_suffix_indexes, dte_table, get_suffix_index
+
+
+def naive_suffix_array(data):
+    order = sorted(range(len(data)), key=lambda i: data[i:])
+    lcp = [0]
+    for prev, cur in pairwise(order):
+        length = 0
+        while max(prev, cur) + length < len(data) and data[prev + length] == data[cur + length]:
+            length += 1
+        lcp.append(length)
+    return order, lcp
+
+
+class TestSuffixArray:
+    """Построение суффиксного массива и LCP"""
+
+    @pytest.mark.parametrize('data', [
+        b'banana', b'a', b'aaaaaaaaaaaaaaaaaaaa', b'abababababab\xff\xff\xff', b'mississippi' * 5,
+    ])
+    def test_matches_naive(self, data):
+        """Тест: результат совпадает с наивной сортировкой суффиксов"""
+        index = SuffixIndex.build(data)
+        order, lcp = naive_suffix_array(data)
+        assert index.suffix_array.tolist() == order
+        assert index.lcp.tolist() == lcp
+
+    def test_random_data(self):
+        """Тест: случайные данные с малым алфавитом и повторами"""
+        rng = np.random.default_rng(7)
+        for _ in range(50):
+            data = bytes(rng.integers(0, 3, int(rng.integers(2, 200)), dtype=np.uint8)) * 2
+            order, lcp = naive_suffix_array(data)
+            index = SuffixIndex.build(data)
+            assert index.suffix_array.tolist() == order
+            assert index.lcp.tolist() == lcp
+
+
+class TestQueries:
+    """Поиск подстрок, n-граммы и кандидаты DTE"""
+
+    def test_find_and_count(self):
+        """Тест: все вхождения подстроки с учётом смещения участка"""
+        index = SuffixIndex.build(b'the cat and the hat', base=0x4000)
+        assert index.find(b'the') == [0x4000, 0x400C]
+        assert index.find(b'at') == [0x4005, 0x4011]
+        assert index.count(b'he cat and the hat') == 1
+        assert index.find(b'dog') == [] and index.count(b'') == 0
+
+    def test_frequent_ngrams_in_region(self):
+        """Тест: частые n-граммы только внутри области"""
+        data = b'xyzxyzxyz' + b'----' + b'abab'
+        index = SuffixIndex.build(data)
+        assert index.frequent_ngrams(3, top=2) == [(b'xyz', 3), (b'---', 2)]
+        assert index.frequent_ngrams(2, start=13) == [(b'ab', 2)]
+        assert index.frequent_ngrams(3, start=13, end=17) == []
+
+    def test_dte_candidates(self):
+        """Тест: пары с исключёнными байтами и заполнители пропускаются"""
+        data = b'the then there\x00\x00\x00\x00 these'
+        index = SuffixIndex.build(data)
+        candidates = index.dte_candidates(size=3, exclude=(0x20,))
+        assert candidates[:2] == [(b'he', 4), (b'th', 4)]
+        assert all(b'\x00\x00' != pair and 0x20 not in pair for pair, _ in candidates)
+        assert dte_table(candidates[:2], [0xD0, 0xD1], {ord(c): c for c in 'the'}) == {0xD0: 'he', 0xD1: 'th'}
+        assert dte_table(candidates[:1], [0xD0]) == {0xD0: '6865'}
+
+
+class TestSuffixIndexCache:
+    """Индекс ROM и банков в памяти и на диске"""
+
+    @pytest.fixture
+    def rom(self, tmp_path):
+        data = bytearray(0x8000)
+        data[0x134:0x144] = b'SUFFIX'.ljust(16, b'\x00')
+        data[0x4100:0x4110] = b'REPEATED STRING!'
+        data[0x1100:0x1110] = b'REPEATED STRING!'
+        path = tmp_path / 'suffix.gb'
+        path.write_bytes(bytes(data))
+        return GameBoyROM(str(path))
+
+    def test_whole_rom_and_bank(self, rom):
+        """Тест: индекс банка возвращает абсолютные смещения внутри банка"""
+        assert get_suffix_index(rom).find(b'REPEATED STRING!') == [0x1100, 0x4100]
+        assert get_suffix_index(rom, bank=1).find(b'REPEATED STRING!') == [0x4100]
+        with pytest.raises(ValueError):
+            get_suffix_index(rom, bank=5)
+
+    def test_memory_and_disk_cache(self, rom, tmp_path):
+        """Тест: индекс строится один раз и загружается из кэша сканирования"""
+        cache = ScanCache(str(tmp_path / 'cache'))
+        index = get_suffix_index(rom, bank=1, cache=cache)
+        assert get_suffix_index(rom, bank=1, cache=cache) is index
+
+        clear_suffix_indexes()
+        with patch.object(SuffixIndex, 'build', side_effect=AssertionError('rebuilt')):
+            loaded = get_suffix_index(rom, bank=1, cache=cache)
+        assert loaded is not index
+        assert loaded.suffix_array.tolist() == index.suffix_array.tolist()
+        assert loaded.find(b'STRING') == [0x4109]
@@ -0,0 +1,161 @@
+"""Тесты для модуля tracing"""
+
+import json
+import os
+import sys
+import tempfile
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.decoder import CharMapDecoder
+from core.tracing import NULL_TRACER, Tracer, get_tracer, span, use_tracer
+
+
+class StubPlugin:
+    """Плагин с одним фиксированным сегментом"""
+
+    def get_text_segments(self, rom):
+        charmap = {i: chr(i) for i in range(0x20, 0x7F)}
+        return [{'name': 'dialog', 'start': 0x200, 'end': 0x220, 'decoder': CharMapDecoder(charmap)}]
+
+
+class StubPluginManager:
+    """Менеджер плагинов, всегда возвращающий StubPlugin"""
+
+    def get_plugin(self, game_id, system, cancellation_token=None):
+        return StubPlugin()
+
+
+@pytest.fixture
+def rom_path():
+    """Временный ROM с двумя сообщениями по адресу 0x200"""
+    data = bytearray(0x8000)
+    data[0x200:0x20C] = b'HELLO\x00WORLD\x00'
+    with tempfile.NamedTemporaryFile(delete=False, suffix='.gb') as f:
+        f.write(bytes(data))
+    yield f.name
+    os.unlink(f.name)
+
+
+class TestTracer:
+    """Тесты трассировщика"""
+
+    def test_disabled_by_default(self):
+        """Тест: по умолчанию активен пустой трассировщик"""
+        assert get_tracer() is NULL_TRACER
+        with span('stage', bytes=10) as args:
+            args['chars'] = 5
+        assert NULL_TRACER.events == ()
+
+    def test_records_nested_spans(self):
+        """Тест: вложенные span-ы записываются с аргументами"""
+        tracer = Tracer()
+        with use_tracer(tracer):
+            with span('outer', segment='a') as args:
+                with span('inner'):
+                    pass
+                args['bytes'] = 42
+        assert get_tracer() is NULL_TRACER
+
+        outer, inner = tracer.spans()
+        assert outer['name'] == 'outer' and outer['args'] == {'segment': 'a', 'bytes': 42}
+        assert inner['ts'] >= outer['ts']
+        assert inner['ts'] + inner['dur'] <= outer['ts'] + outer['dur'] + 1e-3
+        assert tracer.summary()['inner']['count'] == 1
+
+    def test_error_recorded(self):
+        """Тест: исключение помечается в аргументах span-а"""
+        tracer = Tracer()
+        with pytest.raises(KeyError):
+            with tracer.span('failing'):
+                raise KeyError('x')
+        assert tracer.events[0]['args']['error'] == 'KeyError'
+
+    def test_chrome_trace_export(self, tmp_path):
+        """Тест: экспорт в формат Chrome trace events"""
+        tracer = Tracer()
+        with tracer.span('stage', category='io', path='a.gb'):
+            pass
+        path = tracer.save(str(tmp_path / 'trace.json'))
+
+        with open(path, encoding='utf-8') as f:
+            trace = json.load(f)
+        event = trace['traceEvents'][0]
+        assert event['ph'] == 'X' and event['cat'] == 'io'
+        assert {'name', 'ts', 'dur', 'pid', 'tid', 'args'} <= set(event)
+
+
+class TestExtractorTrace:
+    """Тесты трассировки извлечения"""
+
+    def test_last_trace_disabled(self, rom_path):
+        """Тест: без trace=True трасса не собирается"""
+        from core.extractor import TextExtractor
+        extractor = TextExtractor(rom_path, StubPluginManager())
+        extractor.extract()
+        assert extractor.last_trace is None
+
+    def test_last_trace_stages(self, rom_path):
+        """Тест: трасса содержит все стадии с размерами"""
+        from core.extractor import TextExtractor
+        extractor = TextExtractor(rom_path, StubPluginManager(), trace=True)
+        results = extractor.extract()
+
+        trace = extractor.last_trace
+        names = [event['name'] for event in trace.spans()]
+        for stage in ('rom.load', 'rom.parse_header', 'extract', 'plugin.match',
+                      'plugin.segments', 'segment.split', 'segment.decode'):
+            assert stage in names
+
+        assert trace.spans('rom.load')[0]['args']['bytes'] == 0x8000
+        decode = trace.spans('segment.decode')[0]['args']
+        assert decode['segment'] == 'dialog'
+        assert decode['chars'] == sum(len(msg['text']) for msg in results['dialog'])
+
+        # Повторное извлечение даёт новую трассу с той же загрузкой ROM
+        extractor.extract()
+        assert extractor.last_trace is not trace
+        assert len(extractor.last_trace.spans('rom.load')) == 1
+
+    def test_ambient_tracer(self, rom_path):
+        """Тест: внешний трассировщик получает стадии загрузки и извлечения"""
+        from core.extractor import TextExtractor
+        tracer = Tracer()
+        with use_tracer(tracer):
+            extractor = TextExtractor(rom_path, StubPluginManager())
+            extractor.extract()
+        assert extractor.last_trace is tracer
+        assert tracer.spans('rom.load') and tracer.spans('extract')
+
+    def test_ambient_non_tracer(self, rom_path):
+        """Тест: трассировщик другого типа не публикуется в last_trace"""
+        from core.extractor import TextExtractor
+
+        class RecordingTracer:
+            enabled = True
+
+            def __init__(self):
+                self.names = []
+
+            def span(self, name, category='pipeline', **args):
+                self.names.append(name)
+                return NULL_TRACER.span(name, category, **args)
+
+        tracer = RecordingTracer()
+        with use_tracer(tracer):
+            extractor = TextExtractor(rom_path, StubPluginManager())
+            extractor.extract()
+        assert extractor.last_trace is None
+        assert 'extract' in tracer.names
+
+
+class TestTraceFlag:
+    """Тесты флага --trace"""
+
+    def test_parser_accepts_trace(self):
+        """Тест: флаг --trace принимает путь к файлу"""
+        from main import create_parser
+        assert create_parser().parse_args(['game.gb', '--trace', 'out.json']).trace == 'out.json'
+        assert create_parser().parse_args(['game.gb']).trace is None
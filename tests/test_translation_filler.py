@@ -9,6 +9,7 @@ from core.translation_filler import (
     FillStrategy, FillResult, FillOptions,
     get_filler, quick_fill, auto_fill_empty
 )
+from core.database import TranslationDatabase
 
 
 class TestFillStrategy(unittest.TestCase):
@@ -237,6 +238,44 @@ class TestSmartTranslationFiller(unittest.TestCase):
         self.assertEqual(results["seg_2"].filled_translation, "[START]")
 
 
+class TestTranslationMemoryFill(unittest.TestCase):
+    """Тесты заполнения из памяти переводов"""
+
+    def setUp(self):
+        self.memory = TranslationDatabase()
+        self.memory.store_translations([
+            ('en', 'ru', 'Mario: You found 3 coins!', 'Марио: Ты нашёл 3 монеты!'),
+            ('en', 'ru', 'START', 'СТАРТ'),
+        ])
+
+    def test_fill_exact_and_similar(self):
+        """Тест: точное совпадение без маркера, похожая строка с маркером и сходством"""
+        filler = TranslationFiller(FillOptions(strategy=FillStrategy.TRANSLATION_MEMORY,
+                                               translation_memory=self.memory))
+        exact = filler.fill_translation("seg_1", "START")
+        self.assertEqual(exact.filled_translation, "СТАРТ")
+        self.assertEqual(exact.similarity, 1.0)
+
+        similar = filler.fill_translation("seg_2", "Mario: You found 5 coins.")
+        self.assertTrue(similar.success)
+        self.assertEqual(similar.filled_translation, "[TEMP] Марио: Ты нашёл 3 монеты!")
+        self.assertGreaterEqual(similar.similarity, 0.8)
+        self.assertLess(similar.similarity, 1.0)
+
+        missing = filler.fill_translation("seg_3", "Game over")
+        self.assertFalse(missing.success)
+        self.assertEqual(missing.strategy_used, FillStrategy.TRANSLATION_MEMORY)
+
+    def test_smart_fill_prefers_memory(self):
+        """Тест: умный заполнитель сначала ищет в памяти, затем выбирает стратегию по типу"""
+        filler = SmartTranslationFiller(FillOptions(translation_memory=self.memory, mark_temporary=False))
+        results = filler.smart_fill_batch({"seg_1": "Mario: You found 4 coins!", "seg_2": "CONTINUE"})
+        self.assertEqual(results["seg_1"].filled_translation, "Марио: Ты нашёл 3 монеты!")
+        self.assertEqual(results["seg_1"].strategy_used, FillStrategy.TRANSLATION_MEMORY)
+        self.assertEqual(results["seg_2"].filled_translation, "[CONTINUE]")
+        self.assertIsNone(results["seg_2"].similarity)
+
+
 class TestGetFiller(unittest.TestCase):
     """Тесты для глобальной функции get_filler"""
     
@@ -150,6 +150,23 @@ class TestTranslationValidator(unittest.TestCase):
         result = validator.validate("Hello", "ABC АБВ田中")
         self.assertFalse(result.is_valid)
 
+    def test_message_references(self):
+        """Тест предупреждения о сообщении, на которое не ссылается ни один указатель"""
+        from core.pointer_index import PointerIndex
+        validator = TranslationValidator(max_length=100, check_glyphs=False)
+        validator.set_pointer_index(PointerIndex.from_pointers({'banked16': [(0x4100, 0x5000)]}))
+
+        result = validator.validate("Hello", "Привет", message_offset=0x5000)
+        self.assertEqual([w for w in result.warnings if w.field == "pointers"], [])
+
+        result = validator.validate("Hello", "Привет", message_offset=0x5010)
+        self.assertTrue(result.is_valid)
+        self.assertEqual(len([w for w in result.warnings if w.field == "pointers"]), 1)
+
+        # Без смещения ссылки не проверяются
+        result = validator.validate("Hello", "Привет")
+        self.assertEqual([w for w in result.warnings if w.field == "pointers"], [])
+
 
 class TestBatchTranslationValidator(unittest.TestCase):
     """Тесты для класса BatchTranslationValidator"""
@@ -184,6 +201,24 @@ class TestBatchTranslationValidator(unittest.TestCase):
         self.assertTrue(results["seg_1"].is_valid)
         self.assertFalse(results["seg_2"].is_valid)
         
+    def test_batch_checks_references_in_rom(self):
+        """Тест: с ROM ссылки на сообщения проверяются по его индексу указателей"""
+        from unittest.mock import patch
+        from core.pointer_index import PointerIndex
+        rom = object()
+        index = PointerIndex.from_pointers({'banked16': [(0x4100, 0x5000)]})
+        with patch('core.pointer_index.get_pointer_index', return_value=index) as get_index:
+            batch = BatchTranslationValidator(max_length=50, rom=rom)
+        get_index.assert_called_once_with(rom)
+
+        results = batch.validate_batch({
+            "seg_1": ("Hello", "Привет", 0x5000),
+            "seg_2": ("World", "Мир", 0x5010),
+            "seg_3": ("Test", "Тест"),
+        })
+        self.assertEqual([len([w for w in results[k].warnings if w.field == "pointers"])
+                          for k in ("seg_1", "seg_2", "seg_3")], [0, 1, 0])
+
     def test_get_summary(self):
         """Тест получения сводки"""
         translations = {